@@ -349,7 +349,7 @@ export const schedulingApi = {
   operatives: (filters?: Record<string, string | undefined>) =>
     request<{ items: any[]; total: number }>(`/scheduling/operatives${buildQueryString(filters || {})}`),
   operative: (id: string) => request<any>(`/scheduling/operatives/${id}`),
-  slots: (params: { date: string; trade?: string; operativeId?: string }) =>
+  slots: (params: { date?: string; from?: string; to?: string; trade?: string; operativeId?: string }) =>
     request<any[]>(`/scheduling/slots${buildQueryString(params)}`),
   appointments: (filters?: Record<string, string | undefined>) =>
     request<{ items: any[]; total: number }>(`/scheduling/appointments${buildQueryString(filters || {})}`),
@@ -32,19 +32,42 @@ import { filesRouter } from './routes/files.js';
 import { schedulingRouter } from './routes/scheduling.js';
 import { importRouter } from './routes/import.js';
 import { errorHandler } from './middleware/error-handler.js';
-import { metricsMiddleware } from './middleware/metrics.js';
+import { metricsMiddleware, firestoreTraceContext } from './middleware/metrics.js';
 import { getHealthStatus } from './services/monitoring.js';
-import { apiLimiter, authLimiter, aiLimiter, adminLimiter } from './middleware/rate-limiter.js';
+import { db } from './services/firestore.js';
+import { installFirestoreTracing } from './services/firestore-tracing.js';
+import { startCacheListeners } from './services/firestore-listeners.js';
+import { startDeadlineScheduler } from './services/awaabs-law.js';
+import {
+  apiLimiter,
+  authLimiter,
+  aiLimiter,
+  adminLimiter,
+  setRateLimitStore,
+  RedisRateLimitStore,
+  LocalRedisClient,
+} from './middleware/rate-limiter.js';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
+// Attribute Firestore reads and writes to the request that made them
+installFirestoreTracing(db);
+
 const app = express();
 const PORT = parseInt(process.env.PORT || '8080', 10);
 
 // ---- Middleware ----
 app.use(compression());
 
+// Rate-limit counters are per instance unless a shared store is set.
+// RATE_LIMIT_STORE=local-redis runs the Redis-backed store against an
+// in-process stand-in; pass a real Redis client to share limits across
+// Cloud Run instances.
+if (process.env.RATE_LIMIT_STORE === 'local-redis') {
+  setRateLimitStore(new RedisRateLimitStore(new LocalRedisClient()));
+}
+
 // Security headers via Helmet with a proper Content Security Policy
 app.use(helmet({
   contentSecurityPolicy: {
@@ -111,6 +134,8 @@ app.use(morgan('combined'));
 app.use(metricsMiddleware);
 app.use(express.json({ limit: '1mb' }));
 app.use(express.urlencoded({ extended: true }));
+// The body parsers drop the async context metricsMiddleware opened
+app.use(firestoreTraceContext);
 
 // ---- Health Check (Cloud Run) ----
 app.get('/health', async (_req, res) => {
@@ -212,6 +237,10 @@ app.listen(PORT, '0.0.0.0', () => {
   console.log(`  Health: http://localhost:${PORT}/health`);
   console.log(`  API:    http://localhost:${PORT}/api/v1/`);
   console.log(`  SPA:    http://localhost:${PORT}/`);
+  startCacheListeners();
+  startDeadlineScheduler().catch((err) => {
+    console.error('[awaabs-law] Failed to start deadline scheduler:', err.message);
+  });
 });
 
 export default app;
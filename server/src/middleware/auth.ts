@@ -1,6 +1,5 @@
 import type { Request, Response, NextFunction } from 'express';
-import { verifyIdToken } from '../services/firebase-admin.js';
-import { collections, getDoc } from '../services/firestore.js';
+import { verifyIdTokenCached, getUserProfile } from '../services/auth-cache.js';
 
 export interface AuthUser {
   uid: string;
@@ -71,6 +70,8 @@ const DEMO_PERSONAS: Record<string, AuthUser> = {
  * 1. Firebase JWT: Authorization: Bearer <idToken>
  *    - Verifies the token, loads user profile from Firestore users collection
  *    - Falls back to custom claims for persona if no Firestore profile
+ *    - Both are cached (services/auth-cache.ts): the token until it expires,
+ *      the profile briefly and until a profile write invalidates it
  *
  * 2. Legacy X-Persona header (backward compatible for development/testing)
  *    - No token required, attaches a demo user with the specified persona
@@ -82,10 +83,10 @@ export function authMiddleware(req: Request, res: Response, next: NextFunction)
   if (authHeader && authHeader.startsWith('Bearer ')) {
     // Firebase JWT mode
     const idToken = authHeader.slice(7);
-    verifyIdToken(idToken)
+    verifyIdTokenCached(idToken)
       .then(async (decoded) => {
         // Try to load full user profile from Firestore
-        const userProfile = await getDoc<any>(collections.users, decoded.uid);
+        const userProfile = await getUserProfile(decoded.uid);
 
         req.user = {
           uid: decoded.uid,
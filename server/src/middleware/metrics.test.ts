@@ -0,0 +1,93 @@
+// ============================================================
+// SocialHomes.Ai — Request Metrics Tests
+// Route template labels for successes, errors passed to next()
+// and unmatched paths, body parser rejections, the Firestore
+// trace across the parsers and the Server-Timing header.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import express, { Router } from 'express';
+import type { AddressInfo } from 'net';
+
+const { recordRequest } = vi.hoisted(() => ({ recordRequest: vi.fn() }));
+vi.mock('../services/monitoring.js', () => ({ recordRequest, recordFirestoreUsage: vi.fn() }));
+
+import { metricsMiddleware, firestoreTraceContext } from './metrics.js';
+import { currentFirestoreTrace } from '../services/firestore-tracing.js';
+
+function makeApp() {
+  const tenants = Router();
+  tenants.get('/:id', (req, res, next) => {
+    if (req.params.id === 'broken') return next(new Error('Firestore unavailable'));
+    res.json({ id: req.params.id });
+  });
+  tenants.post('/', (req, res) => {
+    res.json({ traced: currentFirestoreTrace()?.name ?? null, body: req.body });
+  });
+
+  // The same order as index.ts
+  const app = express();
+  app.use(metricsMiddleware);
+  app.use(express.json({ limit: '1kb' }));
+  app.use(firestoreTraceContext);
+  app.use('/api/v1/tenants', tenants);
+  app.use((err: Error, _req: express.Request, res: express.Response, _next: express.NextFunction) => {
+    res.status((err as { status?: number }).status ?? 500).json({ error: err.message });
+  });
+  return app;
+}
+
+async function send(path: string, init?: RequestInit): Promise<{ res: Response; body: string }> {
+  const server = makeApp().listen(0, '127.0.0.1');
+  await new Promise(resolve => server.once('listening', resolve));
+  try {
+    const { port } = server.address() as AddressInfo;
+    const res = await fetch(`http://127.0.0.1:${port}${path}`, init);
+    return { res, body: await res.text() };
+  } finally {
+    server.close();
+  }
+}
+
+const get = async (path: string) => (await send(path)).res;
+const post = (path: string, body: string) =>
+  send(path, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body });
+
+describe('metricsMiddleware', () => {
+  beforeEach(() => {
+    recordRequest.mockReset();
+  });
+
+  it('labels errors passed to next() with the route that raised them', async () => {
+    await get('/api/v1/tenants/ten-001');
+    await get('/api/v1/tenants/broken');
+    await vi.waitFor(() => expect(recordRequest).toHaveBeenCalledTimes(2));
+
+    expect(recordRequest.mock.calls.map(([route, status]) => [route, status])).toEqual([
+      ['GET /api/v1/tenants/:id', 200],
+      ['GET /api/v1/tenants/:id', 500],
+    ]);
+  });
+
+  it('shares one label for unmatched paths and sets Server-Timing', async () => {
+    const res = await get('/no/such/path');
+    await vi.waitFor(() => expect(recordRequest).toHaveBeenCalledOnce());
+
+    expect(recordRequest.mock.calls[0][0]).toBe('GET (unmatched)');
+    expect(res.headers.get('server-timing')).toMatch(/^total;dur=[\d.]+$/);
+  });
+
+  it('records requests the body parser rejects', async () => {
+    const malformed = await post('/api/v1/tenants', '{"name":');
+    const oversized = await post('/api/v1/tenants', JSON.stringify({ notes: 'x'.repeat(2048) }));
+    await vi.waitFor(() => expect(recordRequest).toHaveBeenCalledTimes(2));
+
+    expect([malformed.res.status, oversized.res.status]).toEqual([400, 413]);
+    expect(recordRequest.mock.calls.map(([, status]) => status)).toEqual([400, 413]);
+  });
+
+  it('keeps the Firestore trace across the body parser', async () => {
+    const { body } = await post('/api/v1/tenants', JSON.stringify({ name: 'Ada' }));
+    expect(JSON.parse(body)).toEqual({ traced: 'POST /api/v1/tenants', body: { name: 'Ada' } });
+  });
+});
@@ -1,17 +1,80 @@
 // ============================================================
 // SocialHomes.Ai — Request Metrics Middleware
-// Records request count, response time, and status codes
+// Records request count, response time, and status codes, and
+// traces the Firestore operations each request makes
 // ============================================================
 
+import { performance } from 'perf_hooks';
 import type { Request, Response, NextFunction } from 'express';
-import { recordRequest } from '../services/monitoring.js';
+import { recordRequest, recordFirestoreUsage } from '../services/monitoring.js';
+import {
+  newFirestoreTrace,
+  runInFirestoreTrace,
+  serverTimingEntry,
+  type FirestoreTrace,
+} from '../services/firestore-tracing.js';
 
+/**
+ * Note "GET /api/v1/tenants/:id" in res.locals as a route matches. Express
+ * sets req.route while req.baseUrl still holds the router's mount path; by
+ * 'finish', a request that ended through next(err) has had baseUrl
+ * restored, so the label is taken here rather than there.
+ */
+function captureRouteTemplate(req: Request, res: Response): void {
+  let route: { path: unknown } | undefined;
+  Object.defineProperty(req, 'route', {
+    configurable: true,
+    enumerable: true,
+    get: () => route,
+    set(value: { path: unknown }) {
+      route = value;
+      res.locals.routeTemplate = `${req.method} ${req.baseUrl}${String(value.path)}`;
+    },
+  });
+}
+
+/**
+ * The matched route's template. Requests no route matched (static files,
+ * 404s) share one label so raw paths cannot grow the metrics without bound.
+ */
+function routeTemplate(req: Request, res: Response): string {
+  return res.locals.routeTemplate ?? `${req.method} (unmatched)`;
+}
+
+/**
+ * Runs first, so body parser rejections and parsing time are measured.
+ * The parsers call next() from request stream events, which drops the
+ * trace's async context; firestoreTraceContext re-enters it after them.
+ */
 export function metricsMiddleware(req: Request, res: Response, next: NextFunction): void {
-  const start = Date.now();
+  const start = performance.now();
+  captureRouteTemplate(req, res);
+  const trace = newFirestoreTrace(`${req.method} ${req.path}`);
+  res.locals.firestoreTrace = trace;
+
+  // Server-Timing has to be set as the headers go out, after the handler ran
+  const writeHead = res.writeHead;
+  res.writeHead = function (this: Response, ...args: unknown[]) {
+    if (!this.headersSent) {
+      const timings = [`total;dur=${(performance.now() - start).toFixed(1)}`];
+      if (trace.ops > 0) timings.push(serverTimingEntry(trace));
+      this.setHeader('Server-Timing', timings.join(', '));
+    }
+    return (writeHead as (...a: unknown[]) => Response).apply(this, args);
+  } as typeof res.writeHead;
+
   res.on('finish', () => {
-    const duration = Date.now() - start;
-    const path = req.route?.path || req.path;
-    recordRequest(path, res.statusCode, duration);
+    const duration = performance.now() - start;
+    const route = routeTemplate(req, res);
+    recordRequest(route, res.statusCode, duration);
+    recordFirestoreUsage(route, trace);
   });
-  next();
+  runInFirestoreTrace(trace, next);
+}
+
+/** Re-enter the request's Firestore trace; mounted after the body parsers. */
+export function firestoreTraceContext(_req: Request, res: Response, next: NextFunction): void {
+  const trace = res.locals.firestoreTrace as FirestoreTrace | undefined;
+  if (trace) runInFirestoreTrace(trace, next);
+  else next();
 }
@@ -0,0 +1,122 @@
+// ============================================================
+// SocialHomes.Ai — Rate Limiter Tests
+// Admission up to the limit, the sliding estimate across window
+// boundaries, per-user keys, shared stores and failing open.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
+import type { Request, Response } from 'express';
+
+const { peekVerifiedUid } = vi.hoisted(() => ({ peekVerifiedUid: vi.fn() }));
+vi.mock('../services/auth-cache.js', () => ({ peekVerifiedUid }));
+
+import {
+  rateLimiter,
+  MemoryRateLimitStore,
+  RedisRateLimitStore,
+  LocalRedisClient,
+  type RateLimitStore,
+} from './rate-limiter.js';
+
+// Start of a fixed window, so offsets below are fractions of it
+const WINDOW_START = 1_000 * 60_000;
+
+function request(ip = '10.0.0.1', headers: Record<string, string> = {}): Request {
+  return { headers: { 'x-forwarded-for': ip, ...headers }, socket: {} } as unknown as Request;
+}
+
+function response() {
+  const headers: Record<string, string> = {};
+  const res = {
+    statusCode: 200,
+    body: undefined as any,
+    headers,
+    setHeader(name: string, value: string) { headers[name] = value; },
+    status(code: number) { res.statusCode = code; return res; },
+    json(body: unknown) { res.body = body; },
+  };
+  return res;
+}
+
+async function send(limiter: ReturnType<typeof rateLimiter>, req = request()) {
+  const res = response();
+  let passed = false;
+  limiter(req, res as unknown as Response, () => { passed = true; });
+  await vi.waitFor(() => expect(passed || res.statusCode === 429).toBe(true));
+  return { passed, res };
+}
+
+describe('rateLimiter', () => {
+  beforeEach(() => {
+    vi.useFakeTimers();
+    vi.setSystemTime(WINDOW_START);
+    peekVerifiedUid.mockReset();
+  });
+
+  afterEach(() => {
+    vi.useRealTimers();
+  });
+
+  it('admits up to the limit, then rejects without using up quota', async () => {
+    const limiter = rateLimiter({ windowMs: 60_000, maxRequests: 3 });
+    for (let i = 0; i < 3; i++) expect((await send(limiter)).passed).toBe(true);
+
+    const rejected = await send(limiter);
+    expect(rejected.res.statusCode).toBe(429);
+    expect(rejected.res.headers['X-RateLimit-Remaining']).toBe('0');
+    expect(Number(rejected.res.headers['Retry-After'])).toBeGreaterThan(0);
+
+    // Halfway through the next window half of the previous three still count
+    vi.setSystemTime(WINDOW_START + 90_000);
+    expect((await send(limiter)).passed).toBe(true);
+    expect((await send(limiter)).res.statusCode).toBe(429);
+  });
+
+  it('forgets a window once it no longer overlaps', async () => {
+    const limiter = rateLimiter({ windowMs: 60_000, maxRequests: 2 });
+    await send(limiter);
+    await send(limiter);
+    vi.setSystemTime(WINDOW_START + 120_000);
+    expect((await send(limiter)).res.headers['X-RateLimit-Remaining']).toBe('1');
+  });
+
+  it('keys a verified user separately from others on the same address', async () => {
+    const limiter = rateLimiter({ windowMs: 60_000, maxRequests: 1 });
+    peekVerifiedUid.mockImplementation((token: string) => (token === 'token-a' ? 'user-a' : undefined));
+
+    expect((await send(limiter, request('10.0.0.1', { authorization: 'Bearer token-a' }))).passed).toBe(true);
+    expect((await send(limiter, request('10.0.0.1'))).passed).toBe(true);
+    expect((await send(limiter, request('10.0.0.1', { authorization: 'Bearer token-a' }))).res.statusCode).toBe(429);
+  });
+
+  it('shares limits between instances through a Redis store', async () => {
+    const store = new RedisRateLimitStore(new LocalRedisClient());
+    const instanceA = rateLimiter({ windowMs: 60_000, maxRequests: 2, name: 'api', store });
+    const instanceB = rateLimiter({ windowMs: 60_000, maxRequests: 2, name: 'api', store });
+
+    expect((await send(instanceA)).passed).toBe(true);
+    expect((await send(instanceB)).passed).toBe(true);
+    expect((await send(instanceA)).res.statusCode).toBe(429);
+  });
+
+  it('allows requests when the store fails', async () => {
+    vi.spyOn(console, 'error').mockImplementation(() => {});
+    const store: RateLimitStore = {
+      hit: async () => { throw new Error('connection refused'); },
+      undo: () => {},
+    };
+    const limiter = rateLimiter({ windowMs: 60_000, maxRequests: 1, store });
+    expect((await send(limiter)).passed).toBe(true);
+    expect((await send(limiter)).passed).toBe(true);
+  });
+});
+
+describe('MemoryRateLimitStore', () => {
+  it('holds one entry per client however many requests it sends', () => {
+    const store = new MemoryRateLimitStore(60_000);
+    for (let i = 0; i < 10_000; i++) store.hit('ip:10.0.0.1', 1000);
+    store.hit('ip:10.0.0.2', 1000);
+    expect(store.size).toBe(2);
+    expect(store.hit('ip:10.0.0.1', 1001)).toEqual({ current: 1, previous: 10_000 });
+  });
+});
@@ -1,11 +1,20 @@
 import type { Request, Response, NextFunction } from 'express';
+import { peekVerifiedUid } from '../services/auth-cache.js';
 
 /**
- * Simple in-memory sliding window rate limiter.
+ * Sliding window rate limiter with constant memory per client.
  *
- * Uses a per-IP counter with automatic cleanup of expired entries.
- * Suitable for Cloud Run where each container instance maintains its own
- * in-memory state. For a distributed rate limiter, use Redis or similar.
+ * Each client has a counter for the current fixed window and the one
+ * before it; the sliding count is the previous window's count weighted
+ * by how much of it still overlaps the sliding window, plus the current
+ * count. A whole office behind one NAT address costs two numbers, not a
+ * timestamp per request.
+ *
+ * Clients are keyed by user when the bearer token is one this instance
+ * has already verified, otherwise by IP. Counters live in memory per
+ * instance by default; setRateLimitStore() moves every limiter onto a
+ * shared store (e.g. RedisRateLimitStore) so limits hold across Cloud
+ * Run instances.
  */
 
 interface RateLimitConfig {
@@ -13,84 +22,248 @@ interface RateLimitConfig {
   windowMs: number;
   /** Maximum number of requests allowed within the window */
   maxRequests: number;
+  /** Separates this limiter's counters from others in a shared store */
+  name?: string;
+  /** Overrides the shared store for this limiter */
+  store?: RateLimitStore;
 }
 
-interface WindowEntry {
-  timestamps: number[];
+// ---- Stores ----
+
+export interface WindowCounts {
+  /** Requests counted in the current fixed window, including this one */
+  current: number;
+  /** Requests counted in the window before it */
+  previous: number;
 }
 
-export function rateLimiter(config: RateLimitConfig) {
-  const { windowMs, maxRequests } = config;
-  const store = new Map<string, WindowEntry>();
+export interface RateLimitStore {
+  /** Count a request against `key` in fixed window number `window` */
+  hit(key: string, window: number, windowMs: number): WindowCounts | Promise<WindowCounts>;
+  /** Take back a counted request that was then rejected */
+  undo(key: string, window: number): void | Promise<void>;
+}
 
-  // Periodically clean up expired entries to prevent memory leaks
-  const cleanupInterval = setInterval(() => {
-    const now = Date.now();
-    for (const [key, entry] of store) {
-      entry.timestamps = entry.timestamps.filter((ts) => now - ts < windowMs);
-      if (entry.timestamps.length === 0) {
-        store.delete(key);
+interface CounterEntry {
+  window: number;
+  current: number;
+  previous: number;
+}
+
+/** Per-instance counters; the default store. */
+export class MemoryRateLimitStore implements RateLimitStore {
+  private entries = new Map<string, CounterEntry>();
+
+  constructor(windowMs: number) {
+    // Drop clients idle for two windows; the sweep is per client, not per request
+    const cleanupInterval = setInterval(() => {
+      const expired = Math.floor(Date.now() / windowMs) - 1;
+      for (const [key, entry] of this.entries) {
+        if (entry.window < expired) this.entries.delete(key);
       }
+    }, windowMs * 2);
+
+    // Allow the Node.js process to exit even if the interval is still active
+    if (cleanupInterval.unref) {
+      cleanupInterval.unref();
     }
-  }, windowMs * 2);
+  }
 
-  // Allow the Node.js process to exit even if the interval is still active
-  if (cleanupInterval.unref) {
-    cleanupInterval.unref();
+  hit(key: string, window: number): WindowCounts {
+    let entry = this.entries.get(key);
+    if (!entry) {
+      entry = { window, current: 0, previous: 0 };
+      this.entries.set(key, entry);
+    } else if (entry.window !== window) {
+      entry.previous = entry.window === window - 1 ? entry.current : 0;
+      entry.current = 0;
+      entry.window = window;
+    }
+    entry.current++;
+    return { current: entry.current, previous: entry.previous };
   }
 
-  return (req: Request, res: Response, next: NextFunction): void => {
-    // Use X-Forwarded-For (Cloud Run sets this) or fall back to socket address
-    const ip = (req.headers['x-forwarded-for'] as string)?.split(',')[0]?.trim()
-      || req.socket.remoteAddress
-      || 'unknown';
+  undo(key: string, window: number): void {
+    const entry = this.entries.get(key);
+    if (entry && entry.window === window && entry.current > 0) entry.current--;
+  }
 
-    const now = Date.now();
-    let entry = store.get(ip);
+  get size(): number {
+    return this.entries.size;
+  }
+}
 
-    if (!entry) {
-      entry = { timestamps: [] };
-      store.set(ip, entry);
+/** The Redis commands RedisRateLimitStore uses (ioredis method names). */
+export interface RedisCommands {
+  incr(key: string): Promise<number>;
+  decr(key: string): Promise<number>;
+  get(key: string): Promise<string | null>;
+  pexpire(key: string, milliseconds: number): Promise<number>;
+}
+
+/**
+ * Counters shared between instances through Redis: one key per client
+ * per window, expiring once it can no longer be the previous window.
+ */
+export class RedisRateLimitStore implements RateLimitStore {
+  constructor(private client: RedisCommands, private prefix = 'ratelimit:') {}
+
+  async hit(key: string, window: number, windowMs: number): Promise<WindowCounts> {
+    const currentKey = `${this.prefix}${key}:${window}`;
+    const [current, previous] = await Promise.all([
+      this.client.incr(currentKey),
+      this.client.get(`${this.prefix}${key}:${window - 1}`),
+    ]);
+    if (current === 1) await this.client.pexpire(currentKey, windowMs * 2);
+    return { current, previous: Number(previous) || 0 };
+  }
+
+  async undo(key: string, window: number): Promise<void> {
+    await this.client.decr(`${this.prefix}${key}:${window}`);
+  }
+}
+
+/**
+ * In-process stand-in for a Redis server implementing the commands
+ * RedisRateLimitStore sends, for local development and tests.
+ */
+export class LocalRedisClient implements RedisCommands {
+  private values = new Map<string, { value: string; expiresAt?: number }>();
+
+  private live(key: string) {
+    const entry = this.values.get(key);
+    if (entry?.expiresAt !== undefined && entry.expiresAt <= Date.now()) {
+      this.values.delete(key);
+      return undefined;
     }
+    return entry;
+  }
 
-    // Remove timestamps outside the current window
-    entry.timestamps = entry.timestamps.filter((ts) => now - ts < windowMs);
+  private add(key: string, delta: number): number {
+    const entry = this.live(key);
+    const value = (entry ? Number(entry.value) : 0) + delta;
+    this.values.set(key, { value: String(value), expiresAt: entry?.expiresAt });
+    return value;
+  }
+
+  async incr(key: string): Promise<number> {
+    return this.add(key, 1);
+  }
+
+  async decr(key: string): Promise<number> {
+    return this.add(key, -1);
+  }
+
+  async get(key: string): Promise<string | null> {
+    return this.live(key)?.value ?? null;
+  }
+
+  async pexpire(key: string, milliseconds: number): Promise<number> {
+    const entry = this.live(key);
+    if (!entry) return 0;
+    entry.expiresAt = Date.now() + milliseconds;
+    return 1;
+  }
+}
+
+let sharedStore: RateLimitStore | null = null;
+
+/** Move every limiter without its own store onto `store` (null restores per-instance memory). */
+export function setRateLimitStore(store: RateLimitStore | null): void {
+  sharedStore = store;
+}
+
+// ---- Middleware ----
+
+function clientKey(req: Request): string {
+  if (req.user) return `user:${req.user.uid}`;
+
+  const authHeader = req.headers.authorization;
+  const uid = authHeader?.startsWith('Bearer ') ? peekVerifiedUid(authHeader.slice(7)) : undefined;
+  if (uid) return `user:${uid}`;
 
-    if (entry.timestamps.length >= maxRequests) {
-      const oldestInWindow = entry.timestamps[0];
-      const retryAfterMs = windowMs - (now - oldestInWindow);
-      const retryAfterSec = Math.ceil(retryAfterMs / 1000);
+  // Use X-Forwarded-For (Cloud Run sets this) or fall back to socket address
+  const ip = (req.headers['x-forwarded-for'] as string)?.split(',')[0]?.trim()
+    || req.socket.remoteAddress
+    || 'unknown';
+  return `ip:${ip}`;
+}
+
+/**
+ * Milliseconds until one more request would be admitted, given the
+ * counts with the rejected request removed and how far (0..1) the
+ * current window has run.
+ */
+function retryAfterMs(current: number, previous: number, elapsed: number, windowMs: number, maxRequests: number): number {
+  if (current < maxRequests) {
+    // Wait for the previous window's share to decay enough
+    return (1 - (maxRequests - current - 1) / previous - elapsed) * windowMs;
+  }
+  // The current window alone is full: wait into the next one
+  return (1 - elapsed + 1 - (maxRequests - 1) / current) * windowMs;
+}
+
+export function rateLimiter(config: RateLimitConfig) {
+  const { windowMs, maxRequests, name = 'default' } = config;
+  const memory = new MemoryRateLimitStore(windowMs);
 
-      res.setHeader('Retry-After', String(retryAfterSec));
+  return (req: Request, res: Response, next: NextFunction): void => {
+    const now = Date.now();
+    const window = Math.floor(now / windowMs);
+    const elapsed = (now % windowMs) / windowMs;
+    const key = `${name}:${clientKey(req)}`;
+    const store = config.store ?? sharedStore ?? memory;
+
+    const decide = ({ current, previous }: WindowCounts): void => {
+      const count = previous * (1 - elapsed) + current;
       res.setHeader('X-RateLimit-Limit', String(maxRequests));
-      res.setHeader('X-RateLimit-Remaining', '0');
-      res.status(429).json({
-        error: 'Too many requests. Please try again later.',
-        retryAfterSeconds: retryAfterSec,
-      });
-      return;
-    }
 
-    entry.timestamps.push(now);
+      if (count > maxRequests) {
+        // Rejected requests do not use up quota
+        Promise.resolve(store.undo(key, window)).catch(() => {});
+        const retryAfterSec = Math.max(1, Math.ceil(retryAfterMs(current - 1, previous, elapsed, windowMs, maxRequests) / 1000));
 
-    // Set informational rate-limit headers
-    res.setHeader('X-RateLimit-Limit', String(maxRequests));
-    res.setHeader('X-RateLimit-Remaining', String(maxRequests - entry.timestamps.length));
+        res.setHeader('Retry-After', String(retryAfterSec));
+        res.setHeader('X-RateLimit-Remaining', '0');
+        res.status(429).json({
+          error: 'Too many requests. Please try again later.',
+          retryAfterSeconds: retryAfterSec,
+        });
+        return;
+      }
+
+      // Set informational rate-limit headers
+      res.setHeader('X-RateLimit-Remaining', String(Math.floor(maxRequests - count)));
+      next();
+    };
 
-    next();
+    // A failing shared store must not take the API down with it
+    const failOpen = (err: Error): void => {
+      console.error('[rate-limiter] Store error, allowing request:', err.message);
+      next();
+    };
+
+    let counts: WindowCounts | Promise<WindowCounts>;
+    try {
+      counts = store.hit(key, window, windowMs);
+    } catch (err: any) {
+      return failOpen(err);
+    }
+    if (counts instanceof Promise) counts.then(decide, failOpen);
+    else decide(counts);
   };
 }
 
 // ---- Pre-configured limiters ----
 
 /** General API routes: 100 requests per minute */
-export const apiLimiter = rateLimiter({ windowMs: 60_000, maxRequests: 100 });
+export const apiLimiter = rateLimiter({ windowMs: 60_000, maxRequests: 100, name: 'api' });
 
 /** Authentication endpoints: 10 requests per minute */
-export const authLimiter = rateLimiter({ windowMs: 60_000, maxRequests: 10 });
+export const authLimiter = rateLimiter({ windowMs: 60_000, maxRequests: 10, name: 'auth' });
 
 /** AI / LLM endpoints: 30 requests per minute */
-export const aiLimiter = rateLimiter({ windowMs: 60_000, maxRequests: 30 });
+export const aiLimiter = rateLimiter({ windowMs: 60_000, maxRequests: 30, name: 'ai' });
 
 /** Admin endpoints: 20 requests per minute */
-export const adminLimiter = rateLimiter({ windowMs: 60_000, maxRequests: 20 });
+export const adminLimiter = rateLimiter({ windowMs: 60_000, maxRequests: 20, name: 'admin' });
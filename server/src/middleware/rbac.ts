@@ -1,7 +1,7 @@
 import type { Request, Response, NextFunction } from 'express';
 import { ApiError } from './error-handler.js';
 
-type PersonaLevel = 'coo' | 'head-of-service' | 'manager' | 'housing-officer' | 'operative' | 'pending-approval';
+export type PersonaLevel = 'coo' | 'head-of-service' | 'manager' | 'housing-officer' | 'operative' | 'pending-approval';
 
 const personaHierarchy: Record<PersonaLevel, number> = {
   'coo': 5,
@@ -12,6 +12,16 @@ const personaHierarchy: Record<PersonaLevel, number> = {
   'pending-approval': 0,
 };
 
+/** Whether a value names a persona in the hierarchy. */
+export function isPersonaLevel(value: unknown): value is PersonaLevel {
+  return typeof value === 'string' && Object.prototype.hasOwnProperty.call(personaHierarchy, value);
+}
+
+/** Rank of a persona in the hierarchy; unknown personas rank lowest. */
+export function personaRank(persona: string | undefined): number {
+  return isPersonaLevel(persona) ? personaHierarchy[persona] : 0;
+}
+
 /**
  * Require minimum persona level for access.
  * e.g. requirePersona('manager') allows manager, head-of-service, and coo.
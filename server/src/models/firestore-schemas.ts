@@ -130,6 +130,23 @@ export interface PropertyDoc {
     propertyAdjacencyCode?: string;
     heatingTypeCode?: string;
   };
+  riskScores?: {
+    dampRisk?: StoredRiskScore;
+  };
+}
+
+// ---- Stored Risk Score ----
+// Written by the nightly risk scoring pipeline (services/risk-scoring.ts)
+export interface StoredRiskScore<T = unknown> {
+  score: number;
+  level: string;
+  /** Full result, including the factor breakdown */
+  result: T;
+  /** Fingerprint of the inputs the score was computed from */
+  inputHash: string;
+  scoredAt: string;
+  /** Last pipeline run that found the inputs unchanged (or scored it) */
+  checkedAt?: string;
 }
 
 // ---- Tenant ----
@@ -165,6 +182,10 @@ export interface TenantDoc {
     paymentMethodCode?: string;
     tenureTypeCode?: string;
   };
+  riskScores?: {
+    vulnerabilityScore?: StoredRiskScore;
+    activityScore?: StoredRiskScore;
+  };
 }
 
 // ---- Case (unified) ----
@@ -180,6 +201,7 @@ export interface CaseDoc {
   priority: string;
   handler: string;
   createdDate: string;
+  createdDateIso?: string; // YYYY-MM-DD, normalised from createdDate at write time (sort/cursor key)
   targetDate?: string;
   closedDate?: string;
   daysOpen: number;
@@ -243,10 +265,28 @@ export interface ActivityDoc {
   subject: string;
   description: string;
   date: string;
+  dateIso?: string; // YYYY-MM-DD, normalised from date at write time (sort key)
   officer: string;
   linkedCaseRef?: string;
 }
 
+export interface RentTransactionDoc {
+  id: string;
+  tenantId: string;
+  propertyId?: string;
+  date: string;
+  dateIso?: string; // YYYY-MM-DD, normalised from date at write time (sort key)
+  week?: number;
+  type: string;
+  description?: string;
+  debit?: number;
+  credit?: number;
+  amount?: number;
+  balance?: number;
+  reference?: string;
+  paymentMethod?: string;
+}
+
 // ---- Audit ----
 export interface AuditDoc {
   id: string;
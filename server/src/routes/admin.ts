@@ -1,9 +1,11 @@
 import { Router } from 'express';
-import { collections, getDocs, setDoc } from '../services/firestore.js';
+import { collections, getDoc, getDocs, setDoc, updateDoc } from '../services/firestore.js';
 import { authMiddleware } from '../middleware/auth.js';
-import { requirePersona } from '../middleware/rbac.js';
+import { requirePersona, isPersonaLevel, personaRank } from '../middleware/rbac.js';
 import { seedFirestore } from '../services/seed.js';
-import { getMetrics } from '../services/monitoring.js';
+import { getMetrics, getPrometheusMetrics } from '../services/monitoring.js';
+import { invalidateUserProfile } from '../services/auth-cache.js';
+import { writeAuditEntry } from '../services/audit-log.js';
 import type { AuditDoc } from '../models/firestore-schemas.js';
 
 export const adminRouter = Router();
@@ -39,12 +41,58 @@ adminRouter.post('/users', requirePersona('head-of-service'), async (req, res, n
       createdAt: new Date().toISOString(),
     };
     await setDoc(collections.users, id, user);
+    invalidateUserProfile(id);
     res.status(201).json(user);
   } catch (err) {
     next(err);
   }
 });
 
+// PATCH /api/v1/admin/users/:id — approve a user or change their persona/team
+adminRouter.patch('/users/:id', requirePersona('head-of-service'), async (req, res, next) => {
+  try {
+    const { persona, teamId, patchIds } = req.body;
+    if (persona !== undefined && !isPersonaLevel(persona)) {
+      return res.status(400).json({ error: 'persona is not a recognised persona' });
+    }
+    if (req.params.id === req.user?.uid) {
+      return res.status(403).json({ error: 'You cannot change your own profile' });
+    }
+    const existing = await getDoc<{ persona?: string }>(collections.users, req.params.id);
+    if (!existing) return res.status(404).json({ error: 'User not found' });
+
+    // Nobody can grant, or take away, a level above their own
+    const callerRank = personaRank(req.user?.persona);
+    if (persona !== undefined && (personaRank(persona) > callerRank || personaRank(existing.persona) > callerRank)) {
+      return res.status(403).json({ error: 'Cannot assign or change a persona above your own' });
+    }
+
+    await updateDoc(collections.users, req.params.id, {
+      ...(persona !== undefined && { persona }),
+      ...(teamId !== undefined && { teamId }),
+      ...(patchIds !== undefined && { patchIds }),
+      updatedAt: new Date().toISOString(),
+    });
+    // The user's next request must see the new persona, not the cached one
+    invalidateUserProfile(req.params.id);
+    if (persona !== undefined && persona !== existing.persona) {
+      await writeAuditEntry(
+        req.user?.email || req.user?.uid || 'unknown',
+        'update',
+        'user',
+        req.params.id,
+        'persona',
+        existing.persona ?? '',
+        persona,
+        req.ip,
+      );
+    }
+    res.json(await getDoc(collections.users, req.params.id));
+  } catch (err) {
+    next(err);
+  }
+});
+
 // GET /api/v1/admin/users
 adminRouter.get('/users', requirePersona('manager'), async (_req, res, next) => {
   try {
@@ -105,6 +153,15 @@ adminRouter.get('/monitoring', requirePersona('manager'), async (_req, res, next
   }
 });
 
+// GET /api/v1/admin/monitoring/prometheus — the same metrics for a Prometheus scraper
+adminRouter.get('/monitoring/prometheus', requirePersona('manager'), (_req, res, next) => {
+  try {
+    res.type('text/plain; version=0.0.4').send(getPrometheusMetrics());
+  } catch (err) {
+    next(err);
+  }
+});
+
 // ---- Integration Management ----
 
 interface IntegrationDef {
@@ -1,10 +1,11 @@
-import { Router } from 'express';
+import { Router, type Response } from 'express';
 import { collections, serializeFirestoreData } from '../services/firestore.js';
 import { authMiddleware } from '../middleware/auth.js';
 import type { CaseDoc, TenantDoc, PropertyDoc } from '../models/firestore-schemas.js';
 
 // Phase 5 services
-import { generateAiResponse, streamAiResponse, analyseRepairPhotoVertex } from '../services/vertex-ai.js';
+import { generateAiResponse, streamAiResponse, analyseRepairPhotoVertex, presetIdentity } from '../services/vertex-ai.js';
+import { cachedAiResponse } from '../services/ai-response-cache.js';
 import { buildDraftingPrompt, checkLegalCompliance } from '../services/ai-prompts.js';
 import type { CommunicationTone } from '../services/ai-prompts.js';
 
@@ -16,13 +17,14 @@ import {
 } from '../services/claude-ai.js';
 import { calculateTenantActivityScore, scanAllTenantActivity } from '../services/tenant-activity-scoring.js';
 import { assessAwaabsLawCase, scanAwaabsLawCases } from '../services/awaabs-law.js';
-import { analyseRepairDescription, checkRecurringPatterns } from '../services/repair-intake.js';
+import { analyseRepairDescription, analyseRepairDescriptions, checkRecurringPatterns } from '../services/repair-intake.js';
 
 // Differentiator services
-import { predictDampRisk, predictEstateDampRisk } from '../services/damp-prediction.js';
+import { predictDampRisk, predictEstateDampRisk, predictPortfolioDampRisk } from '../services/damp-prediction.js';
 import { getEstateCrimeContext, getAsbCaseContext } from '../services/crime-context.js';
 import { assessVulnerability, scanAllTenants } from '../services/vulnerability-detection.js';
 import { checkBenefitsEntitlement } from '../services/benefits-engine.js';
+import { getStoredScore } from '../services/risk-scoring.js';
 import { generateNeighbourhoodBriefing } from '../services/neighbourhood-briefing.js';
 import { generatePropertyPassport } from '../services/property-passport.js';
 import {
@@ -52,6 +54,15 @@ aiRouter.use(authMiddleware);
 // Note: Old hardcoded generateDraft() and generateChatResponse() functions removed.
 // Chat and drafting now powered by Claude AI service (claude-ai.ts).
 
+// Entities a draft is built from, so edits to any of them drop its cached response
+function draftEntities(tenantId: string, propertyId?: string, caseId?: string): string[] {
+  return [
+    `tenants/${tenantId}`,
+    ...(propertyId ? [`properties/${propertyId}`] : []),
+    ...(caseId ? [`cases/${caseId}`] : []),
+  ];
+}
+
 // POST /api/v1/ai/draft-communication
 aiRouter.post('/draft-communication', async (req, res, next) => {
   try {
@@ -97,6 +108,7 @@ aiRouter.post('/draft-communication', async (req, res, next) => {
       tone: tone || 'empathetic',
       context: contextParts.join('\n'),
       caseRef,
+      entities: draftEntities(tenantId, tenant.propertyId, caseData?.id),
     });
 
     res.json({
@@ -173,10 +185,24 @@ aiRouter.post('/chat', async (req, res, next) => {
 // DIFFERENTIATOR 1: Predictive Damp Intelligence
 // ================================================================
 
-// GET /api/v1/ai/damp-risk/:propertyId
+// GET /api/v1/ai/damp-risk/portfolio
+// Registered before /:propertyId so 'portfolio' is not read as an ID
+aiRouter.get('/damp-risk/portfolio', async (_req, res, next) => {
+  try {
+    const result = await predictPortfolioDampRisk();
+    res.json(result);
+  } catch (err) {
+    next(err);
+  }
+});
+
+// GET /api/v1/ai/damp-risk/:propertyId?refresh=true
+// Serves the nightly stored score; refresh=true recomputes it
 aiRouter.get('/damp-risk/:propertyId', async (req, res, next) => {
   try {
-    const prediction = await predictDampRisk(req.params.propertyId);
+    const stored = req.query.refresh === 'true' ? null
+      : await getStoredScore(collections.properties, req.params.propertyId, 'dampRisk');
+    const prediction = stored ?? await predictDampRisk(req.params.propertyId);
     res.json(prediction);
   } catch (err: any) {
     if (err.message?.includes('not found')) return res.status(404).json({ error: err.message });
@@ -227,10 +253,12 @@ aiRouter.get('/crime-context/case/:caseId', async (req, res, next) => {
 // DIFFERENTIATOR 3: Automatic Vulnerability Detection
 // ================================================================
 
-// GET /api/v1/ai/vulnerability/:tenantId
+// GET /api/v1/ai/vulnerability/:tenantId?refresh=true
 aiRouter.get('/vulnerability/:tenantId', async (req, res, next) => {
   try {
-    const assessment = await assessVulnerability(req.params.tenantId);
+    const stored = req.query.refresh === 'true' ? null
+      : await getStoredScore(collections.tenants, req.params.tenantId, 'vulnerabilityScore');
+    const assessment = stored ?? await assessVulnerability(req.params.tenantId);
     res.json(assessment);
   } catch (err: any) {
     if (err.message?.includes('not found')) return res.status(404).json({ error: err.message });
@@ -238,10 +266,15 @@ aiRouter.get('/vulnerability/:tenantId', async (req, res, next) => {
   }
 });
 
-// POST /api/v1/ai/vulnerability/scan
-aiRouter.post('/vulnerability/scan', async (_req, res, next) => {
+// POST /api/v1/ai/vulnerability/scan?restart=true&concurrency=8
+// Resumes an interrupted scan unless restart=true
+aiRouter.post('/vulnerability/scan', async (req, res, next) => {
   try {
-    const scan = await scanAllTenants();
+    const concurrency = req.query.concurrency ? parseInt(String(req.query.concurrency), 10) : undefined;
+    if (concurrency !== undefined && (isNaN(concurrency) || concurrency < 1 || concurrency > 32)) {
+      return res.status(400).json({ error: 'concurrency must be between 1 and 32' });
+    }
+    const scan = await scanAllTenants({ concurrency, restart: req.query.restart === 'true' });
     res.json(scan);
   } catch (err) {
     next(err);
@@ -449,8 +482,32 @@ aiRouter.post('/chat/v2', async (req, res, next) => {
   }
 });
 
+// Write one SSE frame, waiting for the socket to drain when its buffer is
+// full so a slow client throttles the model stream rather than buffering it
+async function writeSse(res: Response, frame: string, signal: AbortSignal): Promise<void> {
+  const flushed = res.write(frame);
+  // compression() buffers output until flushed
+  (res as Response & { flush?: () => void }).flush?.();
+  if (flushed || signal.aborted) return;
+  await new Promise<void>(resolve => {
+    const resume = () => {
+      res.off('drain', resume);
+      signal.removeEventListener('abort', resume);
+      resolve();
+    };
+    res.on('drain', resume);
+    signal.addEventListener('abort', resume);
+  });
+}
+
 // GET /api/v1/ai/chat/stream — SSE streaming endpoint
 aiRouter.get('/chat/stream', async (req, res, next) => {
+  // Aborted when the client disconnects, cancelling the model request
+  const disconnected = new AbortController();
+  res.on('close', () => {
+    if (!res.writableEnded) disconnected.abort();
+  });
+
   try {
     const query = req.query.query as string;
     const conversationId = req.query.conversationId as string;
@@ -463,20 +520,24 @@ aiRouter.get('/chat/stream', async (req, res, next) => {
     res.setHeader('Content-Type', 'text/event-stream');
     res.setHeader('Cache-Control', 'no-cache');
     res.setHeader('Connection', 'keep-alive');
+    res.setHeader('X-Accel-Buffering', 'no');
     res.flushHeaders();
 
     const stream = streamAiResponse(query, {
       entityType: entityType as any,
       persona,
-    }, conversationId);
+    }, conversationId, { signal: disconnected.signal });
 
     for await (const event of stream) {
-      res.write(`data: ${JSON.stringify(event)}\n\n`);
+      if (disconnected.signal.aborted) break;
+      await writeSse(res, `data: ${JSON.stringify(event)}\n\n`, disconnected.signal);
     }
+    if (disconnected.signal.aborted) return;
 
-    res.write('data: [DONE]\n\n');
+    await writeSse(res, 'data: [DONE]\n\n', disconnected.signal);
     res.end();
   } catch (err) {
+    if (disconnected.signal.aborted) return;
     next(err);
   }
 });
@@ -517,25 +578,40 @@ aiRouter.post('/draft-communication/v2', async (req, res, next) => {
       persona,
     });
 
-    const aiResponse = await generateAiResponse(prompt, {
-      entityType: 'tenant',
-      entityId: tenantId,
-      persona,
-    }, undefined, 'drafting');
+    const { model, systemPrompt } = presetIdentity('drafting');
+    const { value: draft, cached } = await cachedAiResponse({
+      namespace: 'draft-communication/v2',
+      model,
+      systemPrompt,
+      prompt,
+      params: { persona, date: new Date().toISOString().slice(0, 10) },
+      entities: draftEntities(tenantId, tenant.propertyId, caseData?.id),
+    }, async () => {
+      const aiResponse = await generateAiResponse(prompt, {
+        entityType: 'tenant',
+        entityId: tenantId,
+        persona,
+      }, undefined, 'drafting');
+      return {
+        value: { response: aiResponse.response, model: aiResponse.metadata.model },
+        cacheable: !aiResponse.metadata.fallback,
+      };
+    });
 
     // Legal compliance check
-    const complianceCheck = checkLegalCompliance(aiResponse.response, communicationType);
+    const complianceCheck = checkLegalCompliance(draft.response, communicationType);
 
     res.json({
-      draft: aiResponse.response,
+      draft: draft.response,
       metadata: {
         tenantId,
         tenantName: `${tenant.title} ${tenant.firstName} ${tenant.lastName}`,
         communicationType,
         tone: draftTone,
-        model: aiResponse.metadata.model,
+        model: draft.model,
         confidence: 0.88,
         generatedAt: new Date().toISOString(),
+        cached: cached !== null,
         legalComplianceCheck: complianceCheck,
       },
     });
@@ -548,10 +624,12 @@ aiRouter.post('/draft-communication/v2', async (req, res, next) => {
 // PHASE 5: Tenant Activity Scoring (Task 5.2.12)
 // ================================================================
 
-// GET /api/v1/ai/activity-score/:tenantId
+// GET /api/v1/ai/activity-score/:tenantId?refresh=true
 aiRouter.get('/activity-score/:tenantId', async (req, res, next) => {
   try {
-    const score = await calculateTenantActivityScore(req.params.tenantId);
+    const stored = req.query.refresh === 'true' ? null
+      : await getStoredScore(collections.tenants, req.params.tenantId, 'activityScore');
+    const score = stored ?? await calculateTenantActivityScore(req.params.tenantId);
     res.json(score);
   } catch (err: any) {
     if (err.message?.includes('not found')) return res.status(404).json({ error: err.message });
@@ -586,10 +664,11 @@ aiRouter.get('/awaabs-law/:caseId', async (req, res, next) => {
   }
 });
 
-// GET /api/v1/ai/awaabs-law — scan all Awaab's Law cases
-aiRouter.get('/awaabs-law', async (_req, res, next) => {
+// GET /api/v1/ai/awaabs-law?limit=500 — Awaab's Law overview from the deadline index
+aiRouter.get('/awaabs-law', async (req, res, next) => {
   try {
-    const scan = await scanAwaabsLawCases();
+    const limit = Math.min(parseInt(req.query.limit as string, 10) || 500, 2000);
+    const scan = await scanAwaabsLawCases(limit);
     res.json(scan);
   } catch (err) {
     next(err);
@@ -621,6 +700,24 @@ aiRouter.post('/repair-intake', async (req, res, next) => {
   }
 });
 
+// POST /api/v1/ai/repair-intake/batch — classify many descriptions (bulk re-classification)
+aiRouter.post('/repair-intake/batch', async (req, res, next) => {
+  try {
+    const { descriptions } = req.body;
+    if (!Array.isArray(descriptions) || descriptions.some(d => typeof d !== 'string')) {
+      return res.status(400).json({ error: 'descriptions must be an array of strings' });
+    }
+    if (descriptions.length > 10000) {
+      return res.status(400).json({ error: 'At most 10000 descriptions per request' });
+    }
+
+    const results = analyseRepairDescriptions(descriptions);
+    res.json({ results, total: results.length });
+  } catch (err) {
+    next(err);
+  }
+});
+
 // POST /api/v1/ai/analyse-repair-photo — analyse repair photo using Vertex AI (Gemini Vision)
 // Falls back to Claude Vision if Vertex AI is unavailable
 aiRouter.post('/analyse-repair-photo', async (req, res, next) => {
@@ -1,7 +1,7 @@
 // ============================================================
 // SocialHomes.Ai — API Integration Route Tests
 // Tests route handlers for properties, tenants, cases,
-// compliance, briefing, reports, and auth.
+// compliance, briefing, reports, scheduling and auth.
 // Mocks Firestore, Firebase Admin, auth middleware, and global fetch.
 // Uses raw HTTP requests against ephemeral Express test servers.
 // ============================================================
@@ -17,6 +17,7 @@ const _docStore = new Map<string, any>();
 const _collectionDocs = new Map<string, any[]>();
 
 const _mockFetch = vi.fn();
+const _mockDispatch = vi.fn(async (_payload: any) => {});
 
 // ── Helper: populate a collection in the mock store ──
 // Deep-clones each doc to prevent cross-test mutation via shared references.
@@ -45,33 +46,107 @@ vi.mock('@google-cloud/firestore', () => {
     }
   }
 
-  function makeQuery(collectionName: string, filters: any[] = []) {
+  function readField(d: any, field: string) {
+    if (field === '__name__') return d.id;
+    return field.split('.').reduce((o: any, k: string) => o?.[k], d);
+  }
+
+  // Compare two key tuples under the query's orderBy directions
+  function compareKeys(a: any[], b: any[], orders: { field: string; dir: string }[]) {
+    for (let i = 0; i < orders.length && i < b.length; i++) {
+      if (a[i] === b[i]) continue;
+      const lt = a[i] < b[i];
+      return (orders[i].dir === 'desc' ? !lt : lt) ? -1 : 1;
+    }
+    return 0;
+  }
+
+  function runQuery(collectionName: string, filters: any[], spec: any) {
+    let docs = _collectionDocs.get(collectionName) || [];
+    for (const f of filters) {
+      docs = docs.filter((d: any) => {
+        const val = readField(d, f.field);
+        switch (f.op) {
+          case '==': return val === f.value;
+          case '>=': return val >= f.value;
+          case '<=': return val <= f.value;
+          case '>': return val > f.value;
+          case '<': return val < f.value;
+          case '!=': return val !== f.value;
+          case 'in': return f.value.includes(val);
+          case 'array-contains': return Array.isArray(val) && val.includes(f.value);
+          default: return true;
+        }
+      });
+    }
+    const orders: { field: string; dir: string }[] = spec.orders || [];
+    if (orders.length > 0) {
+      // Like Firestore, documents missing an ordered field are excluded
+      docs = docs.filter((d: any) => orders.every(o => readField(d, o.field) !== undefined));
+      const keyOf = (d: any) => orders.map(o => readField(d, o.field));
+      docs = [...docs].sort((a: any, b: any) => compareKeys(keyOf(a), keyOf(b), orders));
+      if (spec.after) {
+        const after = spec.after.length === 1 && typeof spec.after[0]?.data === 'function'
+          ? keyOf({ ...spec.after[0].data(), id: spec.after[0].id })
+          : spec.after;
+        docs = docs.filter((d: any) => compareKeys(keyOf(d), after, orders) > 0);
+      }
+    }
+    if (spec.offset) docs = docs.slice(spec.offset);
+    if (spec.limit !== undefined) docs = docs.slice(0, spec.limit);
+    return docs;
+  }
+
+  // Apply a set(..., { merge: true }) payload, honouring increment/delete sentinels
+  function mergeInto(target: any, data: any): any {
+    const out = { ...target };
+    for (const [key, value] of Object.entries<any>(data)) {
+      if (value?.__op === 'increment') out[key] = (out[key] || 0) + value.n;
+      else if (value?.__op === 'delete') delete out[key];
+      else if (value && typeof value === 'object' && !Array.isArray(value)) out[key] = mergeInto(out[key] || {}, value);
+      else out[key] = value;
+    }
+    return out;
+  }
+
+  // Apply an update() payload; dotted keys write nested fields
+  function updateInto(target: any, data: any): any {
+    const out = structuredClone(target);
+    for (const [path, value] of Object.entries<any>(data)) {
+      const keys = path.split('.');
+      const parent = keys.slice(0, -1).reduce((o: any, k: string) => (o[k] ??= {}), out);
+      parent[keys[keys.length - 1]] = value;
+    }
+    return out;
+  }
+
+  function makeQuery(collectionName: string, filters: any[] = [], spec: any = {}): any {
     return {
       where(field: string, op: string, value: any) {
-        return makeQuery(collectionName, [...filters, { field, op, value }]);
+        return makeQuery(collectionName, [...filters, { field, op, value }], spec);
+      },
+      orderBy(field: string, dir = 'asc') {
+        return makeQuery(collectionName, filters, { ...spec, orders: [...(spec.orders || []), { field, dir }] });
+      },
+      select() { return makeQuery(collectionName, filters, spec); },
+      limit(n: number) { return makeQuery(collectionName, filters, { ...spec, limit: n }); },
+      offset(n: number) { return makeQuery(collectionName, filters, { ...spec, offset: n }); },
+      startAfter(...values: any[]) { return makeQuery(collectionName, filters, { ...spec, after: values }); },
+      count() {
+        return {
+          get: async () => {
+            const total = runQuery(collectionName, filters, {}).length;
+            return { data: () => ({ count: total }) };
+          },
+        };
       },
-      orderBy() { return makeQuery(collectionName, filters); },
-      limit() { return makeQuery(collectionName, filters); },
       get: async () => {
-        let docs = _collectionDocs.get(collectionName) || [];
-        for (const f of filters) {
-          docs = docs.filter((d: any) => {
-            const val = f.field.split('.').reduce((o: any, k: string) => o?.[k], d);
-            switch (f.op) {
-              case '==': return val === f.value;
-              case '>=': return val >= f.value;
-              case '<=': return val <= f.value;
-              case '>': return val > f.value;
-              case '<': return val < f.value;
-              case '!=': return val !== f.value;
-              default: return true;
-            }
-          });
-        }
+        const docs = runQuery(collectionName, filters, spec);
         return {
           docs: docs.map((d: any) => ({
             id: d.id,
             exists: true,
+            ref: new MockFirestore().collection(collectionName).doc(d.id),
             data: () => ({ ...d }),
           })),
           empty: docs.length === 0,
@@ -81,81 +156,88 @@ vi.mock('@google-cloud/firestore', () => {
     };
   }
 
-  return {
-    Firestore: class {
-      collection(name: string) {
-        return {
-          doc: (id: string) => ({
-            get: async () => {
-              const entry = _docStore.get(`${name}/${id}`);
-              return {
-                exists: !!entry,
-                id,
-                data: () => entry ? { ...entry } : null,
-              };
-            },
-            set: async (data: any) => {
-              _docStore.set(`${name}/${id}`, { ...data, id });
-              const existing = _collectionDocs.get(name) || [];
-              const idx = existing.findIndex((d: any) => d.id === id);
-              if (idx >= 0) existing[idx] = { ...data, id };
-              else existing.push({ ...data, id });
-              _collectionDocs.set(name, existing);
-            },
-            update: async (data: any) => {
-              const existing = _docStore.get(`${name}/${id}`);
-              if (existing) {
-                const updated = { ...existing, ...data };
-                _docStore.set(`${name}/${id}`, updated);
-                const col = _collectionDocs.get(name) || [];
-                const idx = col.findIndex((d: any) => d.id === id);
-                if (idx >= 0) col[idx] = updated;
-                _collectionDocs.set(name, col);
-              }
-            },
-            delete: async () => {
-              _docStore.delete(`${name}/${id}`);
-              const col = _collectionDocs.get(name) || [];
-              _collectionDocs.set(name, col.filter((d: any) => d.id !== id));
-            },
-          }),
-          add: async (data: any) => {
-            const newId = `auto-${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
-            _docStore.set(`${name}/${newId}`, { ...data, id: newId });
+  class MockFirestore {
+    collection(name: string) {
+      return {
+        doc: (id: string) => ({
+          get: async () => {
+            const entry = _docStore.get(`${name}/${id}`);
+            return {
+              exists: !!entry,
+              id,
+              data: () => entry ? { ...entry } : null,
+            };
+          },
+          set: async (data: any, options?: { merge?: boolean }) => {
+            const stored = options?.merge
+              ? mergeInto(_docStore.get(`${name}/${id}`) || {}, { ...data, id })
+              : { ...data, id };
+            _docStore.set(`${name}/${id}`, stored);
             const existing = _collectionDocs.get(name) || [];
-            existing.push({ ...data, id: newId });
+            const idx = existing.findIndex((d: any) => d.id === id);
+            if (idx >= 0) existing[idx] = stored;
+            else existing.push(stored);
             _collectionDocs.set(name, existing);
-            return { id: newId };
           },
-          // Support query chaining directly on the collection reference
-          where(field: string, op: string, value: any) {
-            return makeQuery(name, [{ field, op, value }]);
+          update: async (data: any) => {
+            const existing = _docStore.get(`${name}/${id}`);
+            if (existing) {
+              const updated = updateInto(existing, data);
+              _docStore.set(`${name}/${id}`, updated);
+              const col = _collectionDocs.get(name) || [];
+              const idx = col.findIndex((d: any) => d.id === id);
+              if (idx >= 0) col[idx] = updated;
+              _collectionDocs.set(name, col);
+            }
           },
-          orderBy() { return makeQuery(name); },
-          limit() { return makeQuery(name); },
-          get: async () => {
-            const docs = _collectionDocs.get(name) || [];
-            return {
-              docs: docs.map((d: any) => ({
-                id: d.id,
-                exists: true,
-                data: () => ({ ...d }),
-              })),
-              empty: docs.length === 0,
-              size: docs.length,
-            };
+          delete: async () => {
+            _docStore.delete(`${name}/${id}`);
+            const col = _collectionDocs.get(name) || [];
+            _collectionDocs.set(name, col.filter((d: any) => d.id !== id));
           },
-        };
-      }
-      batch() {
-        const ops: (() => Promise<void>)[] = [];
-        return {
-          set: (ref: any, data: any) => { ops.push(() => ref.set(data)); },
-          commit: async () => { for (const op of ops) await op(); },
-        };
-      }
+        }),
+        add: async (data: any) => {
+          const newId = `auto-${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
+          _docStore.set(`${name}/${newId}`, { ...data, id: newId });
+          const existing = _collectionDocs.get(name) || [];
+          existing.push({ ...data, id: newId });
+          _collectionDocs.set(name, existing);
+          return { id: newId };
+        },
+        // Support query chaining directly on the collection reference
+        ...makeQuery(name),
+      };
+    }
+    batch() {
+      const ops: (() => Promise<void>)[] = [];
+      return {
+        set: (ref: any, data: any, options?: any) => { ops.push(() => ref.set(data, options)); },
+        update: (ref: any, data: any) => { ops.push(() => ref.update(data)); },
+        delete: (ref: any) => { ops.push(() => ref.delete()); },
+        commit: async () => { for (const op of ops) await op(); },
+      };
+    }
+    // Reads go straight to the store; writes apply once the callback resolves
+    async runTransaction(fn: (tx: any) => Promise<any>) {
+      const ops: (() => Promise<void>)[] = [];
+      const result = await fn({
+        get: (ref: any) => ref.get(),
+        set: (ref: any, data: any, options?: any) => { ops.push(() => ref.set(data, options)); },
+        update: (ref: any, data: any) => { ops.push(() => ref.update(data)); },
+        delete: (ref: any) => { ops.push(() => ref.delete()); },
+      });
+      for (const op of ops) await op();
+      return result;
+    }
+  }
+
+  return {
+    Firestore: MockFirestore,
+    FieldValue: {
+      serverTimestamp: () => 'SERVER_TIMESTAMP',
+      increment: (n: number) => ({ __op: 'increment', n }),
+      delete: () => ({ __op: 'delete' }),
     },
-    FieldValue: { serverTimestamp: () => 'SERVER_TIMESTAMP' },
     Timestamp,
   };
 });
@@ -213,6 +295,12 @@ vi.mock('../services/firebase-admin.js', () => ({
   },
 }));
 
+// ── Mock notification dispatch — records payloads instead of sending ──
+vi.mock('../services/notification-dispatch.js', () => ({
+  dispatchNotification: (payload: any) => _mockDispatch(payload),
+  dispatchBulkNotification: async () => ({ sent: 0, failed: 0 }),
+}));
+
 // ── Stub global fetch ──
 vi.stubGlobal('fetch', _mockFetch);
 
@@ -225,6 +313,12 @@ import { complianceRouter } from './compliance.js';
 import { briefingRouter } from './briefing.js';
 import { reportsRouter } from './reports.js';
 import { authRouter } from './auth.js';
+import { schedulingRouter } from './scheduling.js';
+import { adminRouter } from './admin.js';
+import { runRiskScoring } from '../services/risk-scoring.js';
+import { processDueDeadlines, rebuildDeadlineIndex, scanAwaabsLawCases } from '../services/awaabs-law.js';
+import { rebuildOccupancy } from '../services/scheduling-availability.js';
+import { currentPeriod, previousPeriod, refreshReportCubes } from '../services/report-cubes.js';
 
 // ── Test helpers ──
 
@@ -444,6 +538,7 @@ const MOCK_CASES = [
     priority: 'emergency',
     handler: 'Sarah Mitchell',
     createdDate: '2026-02-20',
+    createdDateIso: '2026-02-20',
     targetDate: '2026-02-21',
     daysOpen: 7,
     slaStatus: 'breached',
@@ -466,6 +561,7 @@ const MOCK_CASES = [
     priority: 'medium',
     handler: 'James Okoye',
     createdDate: '2026-02-18',
+    createdDateIso: '2026-02-18',
     targetDate: '2026-03-04',
     daysOpen: 9,
     slaStatus: 'approaching',
@@ -485,6 +581,7 @@ const MOCK_CASES = [
     priority: 'high',
     handler: 'Sarah Mitchell',
     createdDate: '2026-02-10',
+    createdDateIso: '2026-02-10',
     targetDate: '2026-02-28',
     daysOpen: 17,
     slaStatus: 'within',
@@ -504,6 +601,7 @@ const MOCK_CASES = [
     priority: 'routine',
     handler: 'Lisa Wong',
     createdDate: '2026-01-15',
+    createdDateIso: '2026-01-15',
     targetDate: '2026-02-10',
     closedDate: '2026-02-08',
     daysOpen: 24,
@@ -525,6 +623,7 @@ const MOCK_ACTIVITIES = [
     subject: 'Update on boiler repair',
     description: 'Called tenant to confirm appointment',
     date: '2026-02-21',
+    dateIso: '2026-02-21',
     officer: 'Sarah Mitchell',
   },
   {
@@ -535,6 +634,7 @@ const MOCK_ACTIVITIES = [
     subject: 'Parts ordered',
     description: 'Boiler control board ordered from supplier',
     date: '2026-02-22',
+    dateIso: '2026-02-22',
     officer: 'Mark Stevens',
   },
   {
@@ -546,6 +646,7 @@ const MOCK_ACTIVITIES = [
     subject: 'Complaint acknowledgement',
     description: 'Stage 1 acknowledgement letter sent',
     date: '2026-02-19',
+    dateIso: '2026-02-19',
     officer: 'James Okoye',
   },
 ];
@@ -731,6 +832,12 @@ describe('API Integration Routes', () => {
       }
     });
 
+    it('orders tenant activities newest first', async () => {
+      const res = await request(app(), 'GET', '/api/v1/tenants/ten-001/activities');
+      const dates = res.body.map((a: any) => a.dateIso);
+      expect(dates).toEqual([...dates].sort().reverse());
+    });
+
     it('returns empty array for tenant with no activities', async () => {
       const res = await request(app(), 'GET', '/api/v1/tenants/ten-003/activities');
       expect(res.status).toBe(200);
@@ -764,6 +871,51 @@ describe('API Integration Routes', () => {
     });
   });
 
+  describe('Risk scoring — stored scores and worklist ordering', () => {
+    const app = () => makeApp(tenantsRouter, '/api/v1/tenants');
+
+    it('scores every entity once and skips unchanged inputs on the next run', async () => {
+      const first = await runRiskScoring();
+      expect(first.processed).toBe(6);
+      expect(first.rescored).toBe(6);
+      expect(_docStore.get('properties/prop-001').riskScores.dampRisk.result.factors.length).toBeGreaterThan(0);
+      expect(_docStore.get('tenants/ten-001').riskScores.vulnerabilityScore.scoredAt).toBeDefined();
+
+      // An unchanged score keeps its scoredAt but is marked as checked again
+      const scored = _docStore.get('tenants/ten-001').riskScores.vulnerabilityScore;
+      scored.scoredAt = scored.checkedAt = new Date(Date.now() - 3 * 86_400_000).toISOString();
+      const second = await runRiskScoring();
+      expect(second.rescored).toBe(0);
+      expect(second.skipped).toBe(6);
+      const checked = _docStore.get('tenants/ten-001').riskScores.vulnerabilityScore;
+      expect(checked.scoredAt).toBe(scored.scoredAt);
+      expect(Date.now() - Date.parse(checked.checkedAt)).toBeLessThan(60_000);
+    });
+
+    it('re-scores a changed tenant and the property whose damp score reads it', async () => {
+      await runRiskScoring();
+      await request(app(), 'PATCH', '/api/v1/tenants/ten-001', { rentBalance: -900 });
+      const run = await runRiskScoring();
+      expect(run.metrics.tenantsRescored).toBe(1);
+      expect(run.metrics.propertiesRescored).toBe(1);
+      expect(_docStore.get('tenants/ten-001').riskScores.activityScore.result.tenantId).toBe('ten-001');
+    });
+
+    it('orders the tenant worklist by stored score', async () => {
+      await runRiskScoring();
+      const res = await request(app(), 'GET', '/api/v1/tenants?sortBy=vulnerabilityScore&order=desc');
+      expect(res.status).toBe(200);
+      const scores = res.body.items.map((t: any) => t.riskScores.vulnerabilityScore.score);
+      expect(scores).toHaveLength(3);
+      expect(scores).toEqual([...scores].sort((a: number, b: number) => b - a));
+    });
+
+    it('rejects an unknown sort key', async () => {
+      const res = await request(app(), 'GET', '/api/v1/tenants?sortBy=arrears');
+      expect(res.status).toBe(400);
+    });
+  });
+
   // ══════════════════════════════════════════════════════════════
   // 3. Cases Routes
   // ══════════════════════════════════════════════════════════════
@@ -829,6 +981,38 @@ describe('API Integration Routes', () => {
         expect(dates[i - 1] >= dates[i]).toBe(true);
       }
     });
+
+    it('combines filters and counts the total in Firestore', async () => {
+      const res = await request(app(), 'GET', '/api/v1/cases?type=repair&handler=Sarah+Mitchell');
+      expect(res.status).toBe(200);
+      expect(res.body.items.map((c: any) => c.id)).toEqual(['case-001']);
+      expect(res.body.total).toBe(1);
+    });
+
+    it('pages through every case with nextCursor', async () => {
+      const seen: string[] = [];
+      let path = '/api/v1/cases?limit=3';
+      for (;;) {
+        const res = await request(app(), 'GET', path);
+        expect(res.status).toBe(200);
+        seen.push(...res.body.items.map((c: any) => c.id));
+        if (!res.body.nextCursor) break;
+        path = `/api/v1/cases?limit=3&cursor=${encodeURIComponent(res.body.nextCursor)}`;
+      }
+      expect(seen).toEqual(['case-001', 'case-002', 'case-003', 'case-004']);
+    });
+
+    it('returns null nextCursor on the last page', async () => {
+      const res = await request(app(), 'GET', '/api/v1/cases?limit=10');
+      expect(res.status).toBe(200);
+      expect(res.body.nextCursor).toBeNull();
+    });
+
+    it('rejects a malformed cursor with 400', async () => {
+      const res = await request(app(), 'GET', '/api/v1/cases?cursor=not-a-cursor');
+      expect(res.status).toBe(400);
+      expect(res.body.error).toBe('Invalid cursor');
+    });
   });
 
   describe('Cases — GET /api/v1/cases/:id', () => {
@@ -872,6 +1056,7 @@ describe('API Integration Routes', () => {
       expect(res.body.daysOpen).toBe(0);
       expect(res.body.slaStatus).toBe('within');
       expect(res.body.createdDate).toBeDefined();
+      expect(res.body.createdDateIso).toBe(res.body.createdDate);
     });
   });
 
@@ -889,6 +1074,80 @@ describe('API Integration Routes', () => {
     });
   });
 
+  describe('Cases — deadline index', () => {
+    const app = () => makeApp(casesRouter, '/api/v1/cases');
+
+    it('indexes a new damp case and notifies each stage once', async () => {
+      const created = await request(app(), 'POST', '/api/v1/cases', {
+        reference: 'DMP-2026-900', type: 'damp-mould', status: 'open', priority: 'emergency', handler: 'Sarah Mitchell',
+      });
+      const entryKey = `caseDeadlines/${created.body.id}__awaabs-law`;
+      expect(_docStore.get(entryKey)).toMatchObject({ kind: 'awaabs-law', hazardCategory: 'emergency', stage: 'pending' });
+
+      // Emergency investigation is due within a day, so the warning is already due
+      const first = await processDueDeadlines();
+      expect(first.notifications).toBe(1);
+      expect(_mockDispatch.mock.calls[0][0]).toMatchObject({ category: 'damp-alert', priority: 'high' });
+      expect(_docStore.get(entryKey).stage).toBe('approaching');
+
+      const second = await processDueDeadlines();
+      expect(second.notifications).toBe(0);
+
+      await request(app(), 'PATCH', `/api/v1/cases/${created.body.id}`, { status: 'completed' });
+      expect(_docStore.has(entryKey)).toBe(false);
+    });
+
+    it('retries a failed notification after a backed-off delay', async () => {
+      const created = await request(app(), 'POST', '/api/v1/cases', {
+        reference: 'DMP-2026-901', type: 'damp-mould', status: 'open', priority: 'emergency', handler: 'Sarah Mitchell',
+      });
+      const entryKey = `caseDeadlines/${created.body.id}__awaabs-law`;
+
+      _mockDispatch.mockRejectedValue(new Error('Notify unavailable'));
+      const failed = await processDueDeadlines();
+      expect(failed.notifications).toBe(0);
+      expect(failed.errors).toEqual(['DMP-2026-901: Notify unavailable']);
+      const entry = _docStore.get(entryKey);
+      expect(entry).toMatchObject({ stage: 'pending', failedAttempts: 1 });
+      expect(Date.parse(entry.checkAt) - Date.now()).toBeGreaterThan(4 * 60_000);
+      // Not due again until the delay has passed
+      expect((await processDueDeadlines()).processed).toBe(0);
+
+      // Each further failure doubles the delay
+      entry.checkAt = new Date(0).toISOString();
+      await processDueDeadlines();
+      expect(Date.parse(_docStore.get(entryKey).checkAt) - Date.now()).toBeGreaterThan(9 * 60_000);
+
+      _mockDispatch.mockImplementation(async () => {});
+      _docStore.get(entryKey).checkAt = new Date(0).toISOString();
+      const retried = await processDueDeadlines();
+      expect(retried.notifications).toBe(1);
+      expect(_docStore.get(entryKey)).toMatchObject({ stage: 'approaching', failedAttempts: 0 });
+    });
+
+    it('rebuilds from every case, drops orphans and serves the overview', async () => {
+      seedCollection('caseDeadlines', [{ id: 'case-999__sla', caseId: 'case-999', kind: 'sla', dueAt: '2026-01-01T00:00:00.000Z', checkAt: null }]);
+      const rebuilt = await rebuildDeadlineIndex();
+      expect(rebuilt.processed).toBe(4);
+      // case-001/002 SLA, case-003 SLA + Awaab's Law; case-004 is completed
+      expect(rebuilt.indexed).toBe(4);
+      expect(_docStore.has('caseDeadlines/case-999__sla')).toBe(false);
+
+      const overview = await scanAwaabsLawCases();
+      expect(overview.totalCases).toBe(1);
+      expect(overview.breached).toBe(1);
+      expect(overview.cases[0]).toMatchObject({ caseId: 'case-003', phase: 'breached' });
+
+      const result = await processDueDeadlines();
+      expect(result.notifications).toBe(4);
+      expect(_mockDispatch.mock.calls.every(([p]) => p.recipientRole === 'manager')).toBe(true);
+
+      // Re-indexing unchanged cases keeps their stage, so nothing is re-sent
+      await rebuildDeadlineIndex();
+      expect((await processDueDeadlines()).notifications).toBe(0);
+    });
+  });
+
   describe('Cases — GET /api/v1/cases/:id/activities', () => {
     const app = () => makeApp(casesRouter, '/api/v1/cases');
 
@@ -1018,6 +1277,29 @@ describe('API Integration Routes', () => {
       expect(res.body.kpis.totalArrears).toBe(250);
       expect(res.body.kpis.tenantsInArrears).toBe(1);
     });
+
+    it('serves later requests from the materialised snapshot', async () => {
+      await request(app(), 'GET', '/api/v1/briefing');
+      // Remove the source data — a second briefing must not re-read it
+      seedCollection('tenants', []);
+      const res = await request(app(), 'GET', '/api/v1/briefing');
+      expect(res.body.kpis.totalTenants).toBe(2);
+    });
+
+    it('applies tenant and case writes to the snapshot incrementally', async () => {
+      await request(app(), 'GET', '/api/v1/briefing');
+
+      const tenantsApp = makeApp(tenantsRouter, '/api/v1/tenants');
+      await request(tenantsApp, 'PATCH', '/api/v1/tenants/ten-003', { rentBalance: -100 });
+      const casesApp = makeApp(casesRouter, '/api/v1/cases');
+      await request(casesApp, 'PATCH', '/api/v1/cases/case-001', { status: 'completed' });
+
+      const res = await request(app(), 'GET', '/api/v1/briefing');
+      expect(res.body.kpis.totalArrears).toBe(350);
+      expect(res.body.kpis.tenantsInArrears).toBe(2);
+      expect(res.body.kpis.emergencyRepairs).toBe(0);
+      expect(res.body.tasks.find((t: any) => t.id === 'case-001')).toBeUndefined();
+    });
   });
 
   // ══════════════════════════════════════════════════════════════
@@ -1026,6 +1308,10 @@ describe('API Integration Routes', () => {
   describe('Reports — GET /api/v1/reports/tsm', () => {
     const app = () => makeApp(reportsRouter, '/api/v1/reports');
 
+    beforeEach(async () => {
+      await refreshReportCubes();
+    });
+
     it('returns computed TSM measures when tsmMeasures collection is empty', async () => {
       const res = await request(app(), 'GET', '/api/v1/reports/tsm');
       expect(res.status).toBe(200);
@@ -1074,6 +1360,10 @@ describe('API Integration Routes', () => {
   describe('Reports — GET /api/v1/reports/regulatory', () => {
     const app = () => makeApp(reportsRouter, '/api/v1/reports');
 
+    beforeEach(async () => {
+      await refreshReportCubes();
+    });
+
     it('returns regulatory report with expected fields', async () => {
       const res = await request(app(), 'GET', '/api/v1/reports/regulatory');
       expect(res.status).toBe(200);
@@ -1104,6 +1394,79 @@ describe('API Integration Routes', () => {
       // case-002: complaint, open
       expect(res.body.openComplaints).toBe(1);
     });
+
+    it('serves later requests from the report cube', async () => {
+      await request(app(), 'GET', '/api/v1/reports/regulatory');
+      seedCollection('properties', []);
+      const res = await request(app(), 'GET', '/api/v1/reports/regulatory');
+      expect(res.body.totalUnits).toBe(3);
+      expect(res.body.cubePeriod).toMatch(/^\d{4}-\d{2}$/);
+    });
+
+    it('reports a single estate from its cube cell', async () => {
+      const res = await request(app(), 'GET', '/api/v1/reports/regulatory?estateId=estate-001');
+      expect(res.status).toBe(200);
+      expect(res.body.estateId).toBe('estate-001');
+      expect(res.body.totalUnits).toBe(2);
+    });
+
+    it('returns 404 for an estate with no cube cell', async () => {
+      const res = await request(app(), 'GET', '/api/v1/reports/regulatory?estateId=est-999');
+      expect(res.status).toBe(404);
+    });
+
+    it('rejects a malformed period with 400', async () => {
+      const res = await request(app(), 'GET', '/api/v1/reports/regulatory?period=2026');
+      expect(res.status).toBe(400);
+    });
+
+    it('keeps the current period in step with entity writes', async () => {
+      await request(makeApp(tenantsRouter, '/api/v1/tenants'), 'PATCH', '/api/v1/tenants/ten-003', { rentBalance: -100 });
+      await request(makeApp(propertiesRouter, '/api/v1/properties'), 'PATCH', '/api/v1/properties/prop-002', { isVoid: false });
+      await request(makeApp(casesRouter, '/api/v1/cases'), 'PATCH', '/api/v1/cases/case-001', { status: 'completed' });
+
+      const res = await request(app(), 'GET', '/api/v1/reports/regulatory');
+      expect(res.body.currentArrears).toBe(1550);
+      expect(res.body.voids).toBe(0);
+      expect(res.body.occupancyRate).toBe(100);
+      expect(res.body.openRepairs).toBe(0);
+      const estate = await request(app(), 'GET', '/api/v1/reports/regulatory?estateId=estate-001');
+      expect(estate.body.voids).toBe(0);
+    });
+
+    it('builds a missing current period in the background', async () => {
+      seedCollection('reportCubes', []);
+      for (const key of [..._docStore.keys()]) if (key.startsWith('reportCubes/')) _docStore.delete(key);
+
+      const first = await request(app(), 'GET', '/api/v1/reports/regulatory');
+      expect(first.status).toBe(503);
+      await vi.waitFor(async () => {
+        const res = await request(app(), 'GET', '/api/v1/reports/regulatory');
+        expect(res.status).toBe(200);
+        expect(res.body.totalUnits).toBe(3);
+      });
+    });
+
+    it('serves and finalises the previous period at rollover', async () => {
+      const previous = previousPeriod(currentPeriod());
+      seedCollection('reportCubes', [{
+        id: `${previous}__all`, period: previous, estateId: 'all', facts: { units: 5, voids: 1 }, measures: {}, refreshedAt: '2026-01-31T23:00:00.000Z',
+      }]);
+      _docStore.delete(`reportCubes/${currentPeriod()}__all`);
+
+      const res = await request(app(), 'GET', '/api/v1/reports/regulatory');
+      expect(res.body.cubePeriod).toBe(previous);
+      expect(res.body.totalUnits).toBe(5);
+      expect(res.body.occupancyRate).toBe(80);
+
+      await vi.waitFor(async () => {
+        const built = await request(app(), 'GET', '/api/v1/reports/regulatory');
+        expect(built.body.cubePeriod).toBe(currentPeriod());
+      });
+      expect(_docStore.get(`reportCubes/${previous}__all`).finalisedAt).toBeDefined();
+      const { finalised } = await refreshReportCubes();
+      expect(finalised).toBe(0);
+    });
   });
 
   // ══════════════════════════════════════════════════════════════
@@ -1213,6 +1576,33 @@ describe('API Integration Routes', () => {
     });
   });
 
+  describe('Admin — PATCH /api/v1/admin/users/:id', () => {
+    const app = () => makeApp(adminRouter, '/api/v1/admin');
+
+    beforeEach(() => {
+      seedCollection('users', [{ id: 'user-101', email: 'officer@rcha.org.uk', persona: 'housing-officer' }]);
+    });
+
+    it('changes a persona and records the old and new value', async () => {
+      const res = await request(app(), 'PATCH', '/api/v1/admin/users/user-101', { persona: 'manager' }, { 'X-Persona': 'coo' });
+      expect(res.status).toBe(200);
+      expect(res.body.persona).toBe('manager');
+
+      const audit = [..._docStore.entries()].find(([key]) => key.startsWith('auditLog/'))?.[1];
+      expect(audit).toMatchObject({ entity: 'user', entityId: 'user-101', field: 'persona', oldValue: 'housing-officer', newValue: 'manager' });
+    });
+
+    it('rejects unknown personas and changes to the caller\'s own profile', async () => {
+      const unknown = await request(app(), 'PATCH', '/api/v1/admin/users/user-101', { persona: 'superuser' }, { 'X-Persona': 'coo' });
+      expect(unknown.status).toBe(400);
+
+      seedCollection('users', [{ id: 'demo-coo', persona: 'coo' }]);
+      const self = await request(app(), 'PATCH', '/api/v1/admin/users/demo-coo', { persona: 'coo' }, { 'X-Persona': 'coo' });
+      expect(self.status).toBe(403);
+      expect(_docStore.get('users/user-101').persona).toBe('housing-officer');
+    });
+  });
+
   describe('Auth — POST /api/v1/auth/seed-users', () => {
     const app = () => makeApp(authRouter, '/api/v1/auth');
 
@@ -1233,4 +1623,114 @@ describe('API Integration Routes', () => {
       expect(res.body.error).toContain('Insufficient permissions');
     });
   });
+
+  describe('Scheduling — slot availability', () => {
+    const app = () => makeApp(schedulingRouter, '/api/v1/scheduling');
+    const slotFor = (slots: any[], operativeId: string, date: string, timeSlot: string) =>
+      slots.find(s => s.operativeId === operativeId && s.date === date && s.timeSlot === timeSlot);
+
+    beforeEach(() => {
+      seedCollection('operatives', [
+        { id: 'op-001', name: 'James Hargreaves', trade: 'plumbing', maxJobsPerDay: 2, available: true },
+        { id: 'op-002', name: 'Aisha Patel', trade: 'electrical', maxJobsPerDay: 5, available: true },
+        { id: 'op-003', name: 'David Williams', trade: 'general', maxJobsPerDay: 6, available: true },
+      ]);
+    });
+
+    // Runs first: the backfill is checked once per process
+    it('counts appointments booked before the counters existed', async () => {
+      seedCollection('appointments', [
+        { id: 'appt-0', operativeId: 'op-001', date: '2026-03-25', timeSlot: 'afternoon', status: 'booked' },
+      ]);
+      // A booking before the first search creates a counter for the day
+      await request(app(), 'POST', '/api/v1/scheduling/appointments', {
+        caseId: 'case-001', operativeId: 'op-001', date: '2026-03-25', timeSlot: 'morning', propertyId: 'prop-001', tenantId: 'ten-001',
+      });
+
+      const res = await request(app(), 'GET', '/api/v1/scheduling/slots?date=2026-03-25&operativeId=op-001');
+      expect(res.body.every((s: any) => !s.available)).toBe(true);
+      expect(_docStore.get('operativeOccupancy/op-001__2026-03-25')).toMatchObject({ morning: 1, afternoon: 1, total: 2 });
+      expect(_docStore.has('operativeOccupancy/_backfill')).toBe(true);
+    });
+
+    it('keeps day counters in step with bookings and searches a fortnight across trades', async () => {
+      const booked = await request(app(), 'POST', '/api/v1/scheduling/appointments', {
+        caseId: 'case-001', operativeId: 'op-001', date: '2026-03-25', timeSlot: 'morning', propertyId: 'prop-001', tenantId: 'ten-001',
+      });
+      expect(booked.status).toBe(201);
+      expect(_docStore.get('operativeOccupancy/op-001__2026-03-25')).toMatchObject({ morning: 1, afternoon: 0, total: 1 });
+
+      const res = await request(app(), 'GET', '/api/v1/scheduling/slots?from=2026-03-23&to=2026-04-05&trade=plumbing,electrical');
+      expect(res.status).toBe(200);
+      // 14 days x 2 operatives x 2 half-days
+      expect(res.body).toHaveLength(56);
+      expect(slotFor(res.body, 'op-001', '2026-03-25', 'morning').available).toBe(false);
+      expect(slotFor(res.body, 'op-001', '2026-03-25', 'afternoon').available).toBe(true);
+      expect(res.body.some((s: any) => s.operativeId === 'op-003')).toBe(false);
+
+      await request(app(), 'PATCH', `/api/v1/scheduling/appointments/${booked.body.id}`, { status: 'cancelled' });
+      expect(_docStore.get('operativeOccupancy/op-001__2026-03-25')).toMatchObject({ morning: 0, total: 0 });
+      const after = await request(app(), 'GET', '/api/v1/scheduling/slots?date=2026-03-25&operativeId=op-001');
+      expect(after.body.every((s: any) => s.available)).toBe(true);
+    });
+
+    it('moves the day counter when an appointment is rescheduled', async () => {
+      const booked = await request(app(), 'POST', '/api/v1/scheduling/appointments', {
+        caseId: 'case-001', operativeId: 'op-002', date: '2026-03-25', timeSlot: 'morning', propertyId: 'prop-001', tenantId: 'ten-001',
+      });
+      const moved = await request(app(), 'PATCH', `/api/v1/scheduling/appointments/${booked.body.id}`, {
+        date: '2026-03-26', timeSlot: 'afternoon',
+      });
+      expect(moved.body).toMatchObject({ id: booked.body.id, date: '2026-03-26', timeSlot: 'afternoon', status: 'booked' });
+      expect(_docStore.get('operativeOccupancy/op-002__2026-03-25')).toMatchObject({ morning: 0, total: 0 });
+      expect(_docStore.get('operativeOccupancy/op-002__2026-03-26')).toMatchObject({ afternoon: 1, total: 1 });
+
+      const missing = await request(app(), 'PATCH', '/api/v1/scheduling/appointments/appt-missing', { status: 'cancelled' });
+      expect(missing.status).toBe(404);
+    });
+
+    it('closes every day covered by overlapping diary blocks', async () => {
+      seedCollection('diaryBlocks', [
+        { id: 'block-1', operativeId: 'op-002', startDate: '2026-03-24', endDate: '2026-03-26', reason: 'training' },
+        { id: 'block-2', operativeId: 'op-002', startDate: '2026-03-26', endDate: '2026-03-28', reason: 'holiday' },
+        { id: 'block-3', operativeId: 'op-002', startDate: '2026-02-01', endDate: '2026-02-07', reason: 'sick' },
+        { id: 'block-4', operativeId: 'op-002', startDate: '2026-04-06', endDate: '2026-04-10', reason: 'holiday' },
+      ]);
+      seedCollection('appointments', [
+        { id: 'appt-1', operativeId: 'op-002', date: '2026-03-23', timeSlot: 'morning', status: 'booked' },
+        { id: 'appt-2', operativeId: 'op-001', date: '2026-03-23', timeSlot: 'morning', status: 'booked' },
+      ]);
+
+      const res = await request(app(), 'GET', '/api/v1/scheduling/slots?from=2026-03-23&to=2026-03-29&operativeId=op-002');
+      const closed = [...new Set(res.body.filter((s: any) => !s.available).map((s: any) => s.date))];
+      expect(closed).toEqual(['2026-03-24', '2026-03-25', '2026-03-26', '2026-03-27', '2026-03-28']);
+
+      const diary = await request(app(), 'GET', '/api/v1/scheduling/diary?operativeId=op-002&weekStart=2026-03-23');
+      expect(diary.body.appointments.map((a: any) => a.id)).toEqual(['appt-1']);
+      expect(diary.body.diaryBlocks.map((b: any) => b.id)).toEqual(['block-1', 'block-2']);
+    });
+
+    it('rejects invalid and over-long ranges', async () => {
+      expect((await request(app(), 'GET', '/api/v1/scheduling/slots')).status).toBe(400);
+      expect((await request(app(), 'GET', '/api/v1/scheduling/slots?date=25/03/2026')).status).toBe(400);
+      expect((await request(app(), 'GET', '/api/v1/scheduling/slots?from=2026-03-10&to=2026-03-01')).status).toBe(400);
+      expect((await request(app(), 'GET', '/api/v1/scheduling/slots?from=2026-03-01&to=2026-04-15')).status).toBe(400);
+    });
+
+    it('rebuilds counters from appointments and drops stale days', async () => {
+      seedCollection('appointments', [
+        { id: 'appt-1', operativeId: 'op-001', date: '2026-03-25', timeSlot: 'morning', status: 'booked' },
+        { id: 'appt-2', operativeId: 'op-001', date: '2026-03-25', timeSlot: 'afternoon', status: 'completed' },
+        { id: 'appt-3', operativeId: 'op-001', date: '2026-03-26', timeSlot: 'morning', status: 'cancelled' },
+      ]);
+      seedCollection('operativeOccupancy', [
+        { id: 'op-009__2026-01-01', operativeId: 'op-009', date: '2026-01-01', morning: 1, afternoon: 0, total: 1 },
+      ]);
+
+      const rebuilt = await rebuildOccupancy();
+      expect(rebuilt).toEqual({ processed: 3, indexed: 1 });
+      expect(_docStore.get('operativeOccupancy/op-001__2026-03-25')).toMatchObject({ morning: 1, afternoon: 1, total: 2 });
+      expect(_docStore.has('operativeOccupancy/op-009__2026-01-01')).toBe(false);
+    });
+  });
 });
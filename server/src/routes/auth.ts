@@ -6,6 +6,7 @@ import {
 } from '../services/firebase-admin.js';
 import { collections, setDoc, getDoc } from '../services/firestore.js';
 import { authMiddleware } from '../middleware/auth.js';
+import { invalidateUserProfile } from '../services/auth-cache.js';
 import { requirePersona } from '../middleware/rbac.js';
 
 export const authRouter = Router();
@@ -96,6 +97,7 @@ authRouter.post('/seed-users', authMiddleware, requirePersona('coo'), async (_re
         createdAt: new Date().toISOString(),
         updatedAt: new Date().toISOString(),
       });
+      invalidateUserProfile(uid);
 
       results.push({
         email: user.email,
@@ -146,6 +148,7 @@ authRouter.post('/profile', async (req, res, next) => {
     };
 
     await setDoc(collections.users, decoded.uid, profile);
+    invalidateUserProfile(decoded.uid);
     res.status(201).json({ status: 'created', profile });
   } catch (err: any) {
     if (err.code === 'auth/id-token-expired' || err.code === 'auth/argument-error') {
@@ -1,5 +1,6 @@
 import { Router } from 'express';
-import { collections, getDocs, getDoc } from '../services/firestore.js';
+import { collections, getDocs } from '../services/firestore.js';
+import { cachedGetDoc, cachedGetDocs } from '../services/entity-cache.js';
 import { authMiddleware } from '../middleware/auth.js';
 import type { RegionDoc, LocalAuthorityDoc, EstateDoc, BlockDoc, PropertyDoc } from '../models/firestore-schemas.js';
 
@@ -13,26 +14,26 @@ exploreRouter.get('/hierarchy', async (req, res, next) => {
 
     if (!level) {
       // Top level: return all regions
-      const regions = await getDocs<RegionDoc>(collections.regions);
+      const regions = await cachedGetDocs<RegionDoc>(collections.regions);
       return res.json({ level: 'country', children: regions });
     }
 
     switch (level) {
       case 'region': {
         // Return local authorities for a region
-        const las = await getDocs<LocalAuthorityDoc>(collections.localAuthorities, [
+        const las = await cachedGetDocs<LocalAuthorityDoc>(collections.localAuthorities, [
           { field: 'regionId', op: '==', value: parentId },
         ]);
         return res.json({ level: 'region', parentId, children: las });
       }
       case 'local-authority': {
-        const estates = await getDocs<EstateDoc>(collections.estates, [
+        const estates = await cachedGetDocs<EstateDoc>(collections.estates, [
           { field: 'localAuthorityId', op: '==', value: parentId },
         ]);
         return res.json({ level: 'local-authority', parentId, children: estates });
       }
       case 'estate': {
-        const blocks = await getDocs<BlockDoc>(collections.blocks, [
+        const blocks = await cachedGetDocs<BlockDoc>(collections.blocks, [
           { field: 'estateId', op: '==', value: parentId },
         ]);
         return res.json({ level: 'estate', parentId, children: blocks });
@@ -54,7 +55,7 @@ exploreRouter.get('/hierarchy', async (req, res, next) => {
 // GET /api/v1/explore/regions
 exploreRouter.get('/regions', async (_req, res, next) => {
   try {
-    const regions = await getDocs<RegionDoc>(collections.regions);
+    const regions = await cachedGetDocs<RegionDoc>(collections.regions);
     res.json(regions);
   } catch (err) {
     next(err);
@@ -64,7 +65,7 @@ exploreRouter.get('/regions', async (_req, res, next) => {
 // GET /api/v1/explore/local-authorities/:id
 exploreRouter.get('/local-authorities/:id', async (req, res, next) => {
   try {
-    const la = await getDoc<LocalAuthorityDoc>(collections.localAuthorities, req.params.id);
+    const la = await cachedGetDoc<LocalAuthorityDoc>(collections.localAuthorities, req.params.id);
     if (!la) return res.status(404).json({ error: 'Local authority not found' });
     res.json(la);
   } catch (err) {
@@ -75,7 +76,7 @@ exploreRouter.get('/local-authorities/:id', async (req, res, next) => {
 // GET /api/v1/explore/estates/:id
 exploreRouter.get('/estates/:id', async (req, res, next) => {
   try {
-    const estate = await getDoc<EstateDoc>(collections.estates, req.params.id);
+    const estate = await cachedGetDoc<EstateDoc>(collections.estates, req.params.id);
     if (!estate) return res.status(404).json({ error: 'Estate not found' });
     res.json(estate);
   } catch (err) {
@@ -86,7 +87,7 @@ exploreRouter.get('/estates/:id', async (req, res, next) => {
 // GET /api/v1/explore/blocks/:id
 exploreRouter.get('/blocks/:id', async (req, res, next) => {
   try {
-    const block = await getDoc<BlockDoc>(collections.blocks, req.params.id);
+    const block = await cachedGetDoc<BlockDoc>(collections.blocks, req.params.id);
     if (!block) return res.status(404).json({ error: 'Block not found' });
     res.json(block);
   } catch (err) {
@@ -1,184 +1,23 @@
 import { Router } from 'express';
-import { collections, batchWrite, setDoc } from '../services/firestore.js';
 import { authMiddleware } from '../middleware/auth.js';
 import { requirePersona } from '../middleware/rbac.js';
+import {
+  ENTITY_TEMPLATES,
+  validateField,
+  coerceValue,
+  isImportEntityType,
+  parseCsvRows,
+  parseJsonRows,
+  createImportJob,
+  getImportJob,
+  runImportJob,
+} from '../services/import-pipeline.js';
+import type { FieldDef, ImportJob } from '../services/import-pipeline.js';
 
 export const importRouter = Router();
 importRouter.use(authMiddleware);
 importRouter.use(requirePersona('manager'));
 
-// ============================================================
-// HACT v3.5 Entity Templates — required & optional fields
-// ============================================================
-
-interface FieldDef {
-  field: string;
-  label: string;
-  required: boolean;
-  type: 'string' | 'number' | 'date' | 'boolean' | 'email' | 'postcode';
-}
-
-const ENTITY_TEMPLATES: Record<string, FieldDef[]> = {
-  properties: [
-    { field: 'id', label: 'Property ID', required: true, type: 'string' },
-    { field: 'address', label: 'Address', required: true, type: 'string' },
-    { field: 'postcode', label: 'Postcode', required: true, type: 'postcode' },
-    { field: 'uprn', label: 'UPRN', required: false, type: 'string' },
-    { field: 'type', label: 'Property Type', required: true, type: 'string' },
-    { field: 'bedrooms', label: 'Bedrooms', required: true, type: 'number' },
-    { field: 'floorArea', label: 'Floor Area (sqm)', required: false, type: 'number' },
-    { field: 'heatingType', label: 'Heating Type', required: false, type: 'string' },
-    { field: 'tenureType', label: 'Tenure Type', required: false, type: 'string' },
-    { field: 'isVoid', label: 'Is Void', required: false, type: 'boolean' },
-    { field: 'voidSince', label: 'Void Since', required: false, type: 'date' },
-    { field: 'constructionYear', label: 'Construction Year', required: false, type: 'number' },
-    { field: 'epcRating', label: 'EPC Rating', required: false, type: 'string' },
-    { field: 'weeklyRent', label: 'Weekly Rent', required: false, type: 'number' },
-    { field: 'serviceCharge', label: 'Service Charge', required: false, type: 'number' },
-    { field: 'dampRisk', label: 'Damp Risk Score', required: false, type: 'number' },
-    { field: 'blockId', label: 'Block ID', required: false, type: 'string' },
-    { field: 'estateId', label: 'Estate ID', required: false, type: 'string' },
-    { field: 'localAuthorityId', label: 'Local Authority ID', required: false, type: 'string' },
-    { field: 'regionId', label: 'Region ID', required: false, type: 'string' },
-    { field: 'lat', label: 'Latitude', required: false, type: 'number' },
-    { field: 'lng', label: 'Longitude', required: false, type: 'number' },
-  ],
-  tenants: [
-    { field: 'id', label: 'Tenant ID', required: true, type: 'string' },
-    { field: 'firstName', label: 'First Name', required: true, type: 'string' },
-    { field: 'lastName', label: 'Last Name', required: true, type: 'string' },
-    { field: 'title', label: 'Title', required: false, type: 'string' },
-    { field: 'email', label: 'Email', required: true, type: 'email' },
-    { field: 'phone', label: 'Phone', required: true, type: 'string' },
-    { field: 'mobile', label: 'Mobile', required: false, type: 'string' },
-    { field: 'dob', label: 'Date of Birth', required: false, type: 'date' },
-    { field: 'propertyId', label: 'Property ID', required: true, type: 'string' },
-    { field: 'tenancyId', label: 'Tenancy ID', required: false, type: 'string' },
-    { field: 'tenancyStartDate', label: 'Tenancy Start Date', required: true, type: 'date' },
-    { field: 'tenancyType', label: 'Tenancy Type', required: false, type: 'string' },
-    { field: 'tenancyStatus', label: 'Tenancy Status', required: false, type: 'string' },
-    { field: 'weeklyCharge', label: 'Weekly Charge', required: false, type: 'number' },
-    { field: 'rentBalance', label: 'Rent Balance', required: false, type: 'number' },
-    { field: 'ucStatus', label: 'UC Status', required: false, type: 'string' },
-    { field: 'paymentMethod', label: 'Payment Method', required: false, type: 'string' },
-    { field: 'communicationPreference', label: 'Communication Preference', required: false, type: 'string' },
-    { field: 'assignedOfficer', label: 'Assigned Officer', required: false, type: 'string' },
-  ],
-  cases: [
-    { field: 'id', label: 'Case ID', required: true, type: 'string' },
-    { field: 'reference', label: 'Reference', required: true, type: 'string' },
-    { field: 'type', label: 'Type (repair/complaint/asb)', required: true, type: 'string' },
-    { field: 'tenantId', label: 'Tenant ID', required: true, type: 'string' },
-    { field: 'propertyId', label: 'Property ID', required: true, type: 'string' },
-    { field: 'subject', label: 'Subject', required: true, type: 'string' },
-    { field: 'description', label: 'Description', required: true, type: 'string' },
-    { field: 'status', label: 'Status', required: true, type: 'string' },
-    { field: 'priority', label: 'Priority', required: true, type: 'string' },
-    { field: 'handler', label: 'Handler', required: false, type: 'string' },
-    { field: 'createdDate', label: 'Created Date', required: true, type: 'date' },
-    { field: 'targetDate', label: 'Target Date', required: false, type: 'date' },
-    { field: 'closedDate', label: 'Closed Date', required: false, type: 'date' },
-    { field: 'sorCode', label: 'SOR Code', required: false, type: 'string' },
-    { field: 'trade', label: 'Trade', required: false, type: 'string' },
-    { field: 'cost', label: 'Cost', required: false, type: 'number' },
-    { field: 'category', label: 'Category', required: false, type: 'string' },
-  ],
-  rentTransactions: [
-    { field: 'id', label: 'Transaction ID', required: true, type: 'string' },
-    { field: 'tenantId', label: 'Tenant ID', required: true, type: 'string' },
-    { field: 'propertyId', label: 'Property ID', required: true, type: 'string' },
-    { field: 'date', label: 'Date', required: true, type: 'date' },
-    { field: 'amount', label: 'Amount', required: true, type: 'number' },
-    { field: 'type', label: 'Type (debit/credit)', required: true, type: 'string' },
-    { field: 'description', label: 'Description', required: false, type: 'string' },
-    { field: 'reference', label: 'Reference', required: false, type: 'string' },
-    { field: 'paymentMethod', label: 'Payment Method', required: false, type: 'string' },
-    { field: 'balance', label: 'Running Balance', required: false, type: 'number' },
-  ],
-};
-
-// ============================================================
-// Validation helpers
-// ============================================================
-
-const UK_POSTCODE_REGEX = /^[A-Z]{1,2}\d[A-Z\d]?\s*\d[A-Z]{2}$/i;
-const EMAIL_REGEX = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
-const DATE_REGEX = /^\d{4}-\d{2}-\d{2}$/;
-// Also accept DD/MM/YYYY and DD-MM-YYYY
-const DATE_UK_REGEX = /^\d{2}[\/\-]\d{2}[\/\-]\d{4}$/;
-
-function normaliseDate(value: string): string | null {
-  if (DATE_REGEX.test(value)) return value;
-  if (DATE_UK_REGEX.test(value)) {
-    const parts = value.split(/[\/\-]/);
-    return `${parts[2]}-${parts[1]}-${parts[0]}`;
-  }
-  // Try parsing as a date
-  const d = new Date(value);
-  if (!isNaN(d.getTime())) return d.toISOString().split('T')[0];
-  return null;
-}
-
-function validateField(
-  value: any,
-  fieldDef: FieldDef,
-): string | null {
-  const strVal = String(value ?? '').trim();
-
-  if (fieldDef.required && (!strVal || strVal === 'undefined' || strVal === 'null')) {
-    return `${fieldDef.label} is required`;
-  }
-
-  if (!strVal || strVal === 'undefined' || strVal === 'null') return null;
-
-  switch (fieldDef.type) {
-    case 'number': {
-      const num = Number(strVal);
-      if (isNaN(num)) return `${fieldDef.label} must be a number`;
-      break;
-    }
-    case 'date': {
-      const normalised = normaliseDate(strVal);
-      if (!normalised) return `${fieldDef.label} must be a valid date (YYYY-MM-DD or DD/MM/YYYY)`;
-      break;
-    }
-    case 'boolean': {
-      const lower = strVal.toLowerCase();
-      if (!['true', 'false', 'yes', 'no', '1', '0', 'y', 'n'].includes(lower)) {
-        return `${fieldDef.label} must be true/false, yes/no, or 1/0`;
-      }
-      break;
-    }
-    case 'email': {
-      if (!EMAIL_REGEX.test(strVal)) return `${fieldDef.label} must be a valid email address`;
-      break;
-    }
-    case 'postcode': {
-      if (!UK_POSTCODE_REGEX.test(strVal)) return `${fieldDef.label} must be a valid UK postcode`;
-      break;
-    }
-  }
-
-  return null;
-}
-
-function normaliseBool(value: string): boolean {
-  const lower = String(value).toLowerCase().trim();
-  return ['true', 'yes', '1', 'y'].includes(lower);
-}
-
-function coerceValue(value: any, type: FieldDef['type']): any {
-  const strVal = String(value ?? '').trim();
-  if (!strVal || strVal === 'undefined' || strVal === 'null') return undefined;
-
-  switch (type) {
-    case 'number': return Number(strVal);
-    case 'boolean': return normaliseBool(strVal);
-    case 'date': return normaliseDate(strVal) || strVal;
-    default: return strVal;
-  }
-}
-
 // ============================================================
 // Field mapping suggestion (header name similarity)
 // ============================================================
@@ -434,20 +273,53 @@ importRouter.post('/preview', async (req, res, next) => {
   }
 });
 
+// ============================================================
+// Import jobs — shared by /execute and the streaming /jobs route
+// ============================================================
+
+/** Load a job to resume, or start a new one. Returns an error message on conflict. */
+async function openJob(
+  entityType: ImportJob['entityType'],
+  createdBy: string,
+  resumeJobId?: string,
+): Promise<{ job: ImportJob } | { status: number; error: string }> {
+  if (!resumeJobId) return { job: createImportJob(entityType, createdBy) };
+  const job = await getImportJob(resumeJobId);
+  if (!job) return { status: 404, error: 'Import job not found' };
+  if (job.entityType !== entityType) return { status: 400, error: `Import job ${job.id} is for ${job.entityType}` };
+  if (job.status === 'completed') return { status: 409, error: `Import job ${job.id} has already completed` };
+  return { job };
+}
+
+function jobSummary(job: ImportJob) {
+  return {
+    jobId: job.id,
+    status: job.status,
+    imported: job.imported,
+    skipped: job.skipped,
+    total: job.rowsRead,
+    committedRows: job.committedRows,
+    errors: job.errors,
+    ...(job.message ? { message: job.message } : {}),
+  };
+}
+
 // ============================================================
 // POST /api/v1/import/execute
-// Execute the import, writing records to Firestore in batches
+// Execute the import from a JSON body of records. Runs as an import
+// job; pass jobId to resume one that failed part-way.
 // ============================================================
 
 importRouter.post('/execute', async (req, res, next) => {
   try {
-    const { entityType, records, mapping } = req.body as {
+    const { entityType, records, mapping, jobId } = req.body as {
       entityType: 'properties' | 'tenants' | 'cases' | 'rentTransactions';
       records: Record<string, any>[];
       mapping: Record<string, string>;
+      jobId?: string;
     };
 
-    if (!entityType || !ENTITY_TEMPLATES[entityType]) {
+    if (!isImportEntityType(entityType)) {
       return res.status(400).json({ error: `Invalid entity type. Must be one of: ${Object.keys(ENTITY_TEMPLATES).join(', ')}` });
     }
 
@@ -455,105 +327,75 @@ importRouter.post('/execute', async (req, res, next) => {
       return res.status(400).json({ error: 'No records provided' });
     }
 
-    const fields = ENTITY_TEMPLATES[entityType];
-    const fieldMap = new Map(fields.map(f => [f.field, f]));
-
-    // Resolve the correct Firestore collection
-    const collectionMap: Record<string, FirebaseFirestore.CollectionReference> = {
-      properties: collections.properties,
-      tenants: collections.tenants,
-      cases: collections.cases,
-      rentTransactions: collections.rentTransactions,
-    };
+    const opened = await openJob(entityType, req.user?.email || 'system', jobId);
+    if ('error' in opened) return res.status(opened.status).json({ error: opened.error });
 
-    const collection = collectionMap[entityType];
-    if (!collection) {
-      return res.status(400).json({ error: `No collection found for entity type: ${entityType}` });
+    const job = await runImportJob(opened.job, records, mapping);
+    if (job.status === 'failed') {
+      return res.status(500).json({ error: 'Import failed', ...jobSummary(job), total: records.length });
     }
 
-    let imported = 0;
-    let skipped = 0;
-    const errors: { row: number; message: string }[] = [];
-    const batchOps: { collection: FirebaseFirestore.CollectionReference; id: string; data: Record<string, any> }[] = [];
-
-    for (let i = 0; i < records.length; i++) {
-      const record = records[i];
-
-      try {
-        const transformed: Record<string, any> = {};
-
-        if (mapping && Object.keys(mapping).length > 0) {
-          for (const [sourceField, targetField] of Object.entries(mapping)) {
-            const fieldDef = fieldMap.get(targetField);
-            if (fieldDef && record[sourceField] !== undefined) {
-              transformed[targetField] = coerceValue(record[sourceField], fieldDef.type);
-            }
-          }
-        } else {
-          for (const fieldDef of fields) {
-            if (record[fieldDef.field] !== undefined) {
-              transformed[fieldDef.field] = coerceValue(record[fieldDef.field], fieldDef.type);
-            }
-          }
-        }
+    res.json({ ...jobSummary(job), total: records.length });
+  } catch (err) {
+    next(err);
+  }
+});
 
-        // Require an ID for each record
-        const id = transformed.id || record.id;
-        if (!id) {
-          errors.push({ row: i + 1, message: 'Missing ID field' });
-          skipped++;
-          continue;
-        }
+// ============================================================
+// POST /api/v1/import/jobs?entityType=&format=csv|json&mapping=&jobId=
+// Stream a CSV or JSON (array or newline-delimited) request body
+// straight into Firestore. Rows are validated and written as they
+// are read, so the upload size is not bounded by the JSON body limit.
+// ============================================================
 
-        // Validate required fields
-        const requiredFields = fields.filter(f => f.required);
-        let hasErrors = false;
-        for (const reqField of requiredFields) {
-          const val = transformed[reqField.field];
-          if (val === undefined || val === null || val === '') {
-            errors.push({ row: i + 1, message: `Missing required field: ${reqField.label}` });
-            hasErrors = true;
-          }
-        }
+importRouter.post('/jobs', async (req, res, next) => {
+  try {
+    const { entityType, format, mapping: mappingParam, jobId } = req.query as Record<string, string | undefined>;
 
-        if (hasErrors) {
-          skipped++;
-          continue;
-        }
+    if (!isImportEntityType(entityType)) {
+      return res.status(400).json({ error: `Invalid entity type. Must be one of: ${Object.keys(ENTITY_TEMPLATES).join(', ')}` });
+    }
 
-        // Add import metadata
-        transformed.importedAt = new Date().toISOString();
-        transformed.importedBy = req.user?.email || 'system';
+    // application/json bodies are already consumed by the JSON body parser
+    if (req.is('application/json')) {
+      return res.status(415).json({ error: 'Stream records as text/csv or application/x-ndjson, or POST a JSON body to /import/execute' });
+    }
 
-        batchOps.push({ collection, id: String(id), data: transformed });
-      } catch (err: any) {
-        errors.push({ row: i + 1, message: err.message || 'Unknown error processing record' });
-        skipped++;
-      }
+    const sourceFormat = format || (req.is('text/csv') ? 'csv' : req.is('application/x-ndjson') ? 'json' : undefined);
+    if (sourceFormat !== 'csv' && sourceFormat !== 'json') {
+      return res.status(400).json({ error: 'format must be csv or json' });
     }
 
-    // Write in batches of 500 (Firestore limit)
-    try {
-      if (batchOps.length > 0) {
-        await batchWrite(batchOps);
-        imported = batchOps.length;
+    let mapping: Record<string, string> | undefined;
+    if (mappingParam) {
+      try {
+        mapping = JSON.parse(mappingParam);
+      } catch {
+        return res.status(400).json({ error: 'mapping must be a JSON object of sourceField -> targetField' });
       }
-    } catch (err: any) {
-      return res.status(500).json({
-        error: 'Firestore batch write failed',
-        message: err.message,
-        imported: 0,
-        skipped: records.length,
-        errors,
-      });
     }
 
-    res.json({
-      imported,
-      skipped,
-      total: records.length,
-      errors: errors.slice(0, 100),
-    });
+    const opened = await openJob(entityType, req.user?.email || 'system', jobId);
+    if ('error' in opened) return res.status(opened.status).json({ error: opened.error });
+
+    const rows = sourceFormat === 'csv' ? parseCsvRows(req) : parseJsonRows(req);
+    const job = await runImportJob(opened.job, rows, mapping);
+    res.status(job.status === 'failed' ? 422 : 200).json(jobSummary(job));
+  } catch (err) {
+    next(err);
+  }
+});
+
+// ============================================================
+// GET /api/v1/import/jobs/:id
+// Progress of a running or finished import job
+// ============================================================
+
+importRouter.get('/jobs/:id', async (req, res, next) => {
+  try {
+    const job = await getImportJob(req.params.id);
+    if (!job) return res.status(404).json({ error: 'Import job not found' });
+    res.json(job);
   } catch (err) {
     next(err);
   }
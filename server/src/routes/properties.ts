@@ -1,18 +1,24 @@
 import { Router } from 'express';
-import { collections, getDocs, getDoc, updateDoc } from '../services/firestore.js';
+import { collections, getDocs, getDoc } from '../services/firestore.js';
 import { authMiddleware } from '../middleware/auth.js';
+import { updateProperty } from '../services/entity-writes.js';
+import { invalidateAiResponses } from '../services/ai-response-cache.js';
+import { scoreOrderField } from '../services/risk-scoring.js';
 import type { PropertyDoc } from '../models/firestore-schemas.js';
 
 export const propertiesRouter = Router();
 propertiesRouter.use(authMiddleware);
 
 // GET /api/v1/properties?regionId=london&estateId=oak-park&type=flat&isVoid=true&limit=50
+// sortBy=dampRisk&order=asc|desc orders by the stored nightly damp score;
+// properties not yet scored are left out of a sorted list
 propertiesRouter.get('/', async (req, res, next) => {
   try {
     // Multi-tenancy: will use getCollections(orgId) once data is migrated
     // For now, use flat collections for backward compatibility
 
-    const { regionId, estateId, blockId, localAuthorityId, type, isVoid, limit: limitStr } = req.query;
+    const { regionId, estateId, blockId, localAuthorityId, type, isVoid, sortBy, order, limit: limitStr } = req.query;
+    if (sortBy && sortBy !== 'dampRisk') return res.status(400).json({ error: 'sortBy must be dampRisk' });
     const filters: { field: string; op: FirebaseFirestore.WhereFilterOp; value: any }[] = [];
 
     if (regionId) filters.push({ field: 'regionId', op: '==', value: regionId });
@@ -23,7 +29,10 @@ propertiesRouter.get('/', async (req, res, next) => {
     if (isVoid !== undefined) filters.push({ field: 'isVoid', op: '==', value: isVoid === 'true' });
 
     const limit = limitStr ? parseInt(limitStr as string, 10) : 200;
-    const properties = await getDocs<PropertyDoc>(collections.properties, filters, undefined, limit);
+    const orderBy = sortBy
+      ? { field: scoreOrderField('dampRisk'), direction: order === 'asc' ? 'asc' as const : 'desc' as const }
+      : undefined;
+    const properties = await getDocs<PropertyDoc>(collections.properties, filters, orderBy, limit);
 
     res.json({
       items: properties,
@@ -72,8 +81,9 @@ propertiesRouter.patch('/:id', async (req, res, next) => {
     // Multi-tenancy: will use getCollections(orgId) once data is migrated
     // For now, use flat collections for backward compatibility
 
-    await updateDoc(collections.properties, req.params.id, req.body);
+    await updateProperty(req.params.id, req.body);
     const updated = await getDoc<PropertyDoc>(collections.properties, req.params.id);
+    await invalidateAiResponses('properties', req.params.id);
     res.json(updated);
   } catch (err) {
     next(err);
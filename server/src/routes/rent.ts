@@ -1,6 +1,7 @@
 import { Router } from 'express';
 import { collections, getDocs } from '../services/firestore.js';
 import { authMiddleware } from '../middleware/auth.js';
+import { listTenantTransactions } from '../services/entity-index.js';
 import type { TenantDoc } from '../models/firestore-schemas.js';
 
 export const rentRouter = Router();
@@ -72,12 +73,7 @@ rentRouter.get('/dashboard', async (_req, res, next) => {
 // GET /api/v1/rent/transactions/:tenantId
 rentRouter.get('/transactions/:tenantId', async (req, res, next) => {
   try {
-    const tenantId = req.params.tenantId;
-    // Filter in memory to avoid composite index requirement
-    const allTx = await getDocs(collections.rentTransactions);
-    const transactions = allTx
-      .filter((t: any) => t.tenantId === tenantId)
-      .sort((a: any, b: any) => (b.date || '').localeCompare(a.date || ''));
+    const transactions = await listTenantTransactions(req.params.tenantId);
     res.json(transactions);
   } catch (err) {
     next(err);
@@ -1,14 +1,25 @@
 import { Router } from 'express';
-import { collections, db, getDocs, getDoc, setDoc, addDoc, updateDoc, deleteDoc } from '../services/firestore.js';
+import { collections, db, getDocs, getDoc, setDoc, deleteDoc, serializeFirestoreData } from '../services/firestore.js';
 import { authMiddleware } from '../middleware/auth.js';
+import {
+  searchSlots,
+  applyOccupancyChange,
+  loadDiaryBlockIndex,
+  daysBetween,
+  isDateKey,
+  MAX_SEARCH_DAYS,
+  type Operative,
+  type Appointment,
+  type DiaryBlock,
+} from '../services/scheduling-availability.js';
 
 export const schedulingRouter = Router();
 schedulingRouter.use(authMiddleware);
 
 // ---- Firestore Collections ----
-const operativesCol = db.collection('operatives');
-const appointmentsCol = db.collection('appointments');
-const diaryBlocksCol = db.collection('diaryBlocks');
+const operativesCol = collections.operatives;
+const appointmentsCol = collections.appointments;
+const diaryBlocksCol = collections.diaryBlocks;
 
 // ---- Seed Data ----
 const SEED_OPERATIVES = [
@@ -87,52 +98,6 @@ async function ensureOperativesSeeded(): Promise<void> {
   seeded = true;
 }
 
-// ---- Operative Interfaces ----
-interface Operative {
-  id: string;
-  name: string;
-  trade: string;
-  email: string;
-  phone: string;
-  maxJobsPerDay: number;
-  available: boolean;
-  region: string;
-  qualifications: string[];
-}
-
-interface Appointment {
-  id: string;
-  caseId: string;
-  operativeId: string;
-  operativeName: string;
-  date: string;        // YYYY-MM-DD
-  timeSlot: 'morning' | 'afternoon';
-  propertyId: string;
-  tenantId: string;
-  status: 'booked' | 'completed' | 'cancelled' | 'no-access';
-  notes?: string;
-  createdAt: string;
-  updatedAt: string;
-}
-
-interface DiaryBlock {
-  id: string;
-  operativeId: string;
-  startDate: string;   // YYYY-MM-DD
-  endDate: string;     // YYYY-MM-DD
-  reason: 'holiday' | 'training' | 'sick' | 'other';
-  notes?: string;
-  createdAt: string;
-}
-
-interface Slot {
-  date: string;
-  timeSlot: 'morning' | 'afternoon';
-  operativeId: string;
-  operativeName: string;
-  available: boolean;
-}
-
 // =========================================================
 // GET /scheduling/operatives — List all operatives
 // Query: ?trade=plumbing&available=true
@@ -175,77 +140,36 @@ schedulingRouter.get('/operatives/:id', async (req, res, next) => {
 // =========================================================
 // GET /scheduling/slots — Available appointment slots
 // Query: ?date=2026-03-25&trade=plumbing&operativeId=op-001
+//    or: ?from=2026-03-23&to=2026-04-05&trade=plumbing,electrical
 // =========================================================
 schedulingRouter.get('/slots', async (req, res, next) => {
   try {
     await ensureOperativesSeeded();
-    const { date, trade, operativeId } = req.query;
+    const { date, from, to, trade, operativeId } = req.query;
 
-    if (!date) {
-      return res.status(400).json({ error: 'date query parameter is required (YYYY-MM-DD)' });
+    const startDate = (date || from) as string | undefined;
+    const endDate = (date || to || from) as string | undefined;
+    if (!startDate) {
+      return res.status(400).json({ error: 'date (or from/to) query parameter is required (YYYY-MM-DD)' });
+    }
+    if (!isDateKey(startDate) || !isDateKey(endDate)) {
+      return res.status(400).json({ error: 'Dates must be in YYYY-MM-DD format' });
+    }
+    if (startDate > endDate) {
+      return res.status(400).json({ error: 'from must be on or before to' });
+    }
+    if (daysBetween(startDate, endDate).length > MAX_SEARCH_DAYS) {
+      return res.status(400).json({ error: `Slot searches cover at most ${MAX_SEARCH_DAYS} days` });
     }
 
-    const dateStr = date as string;
-
-    // Get operatives matching filters
-    let operatives = await getDocs<Operative>(operativesCol as any, undefined, undefined, 100);
+    // Get operatives matching filters; trade accepts a comma-separated list
+    const trades = trade ? String(trade).split(',').map(t => t.trim()).filter(Boolean) : [];
+    let operatives = await getDocs<Operative>(operativesCol, undefined, undefined, 100);
     operatives = operatives.filter(o => o.available);
-    if (trade) operatives = operatives.filter(o => o.trade === trade);
+    if (trades.length > 0) operatives = operatives.filter(o => trades.includes(o.trade));
     if (operativeId) operatives = operatives.filter(o => o.id === operativeId);
 
-    // Get existing appointments for the date
-    const allAppointments = await getDocs<Appointment>(appointmentsCol as any, undefined, undefined, 1000);
-    const dateAppointments = allAppointments.filter(
-      a => a.date === dateStr && a.status !== 'cancelled'
-    );
-
-    // Get diary blocks that overlap with the date
-    const allBlocks = await getDocs<DiaryBlock>(diaryBlocksCol as any, undefined, undefined, 500);
-    const activeBlocks = allBlocks.filter(
-      b => dateStr >= b.startDate && dateStr <= b.endDate
-    );
-
-    const timeSlots: Array<'morning' | 'afternoon'> = ['morning', 'afternoon'];
-    const slots: Slot[] = [];
-
-    for (const op of operatives) {
-      // Check if operative is blocked on this date
-      const isBlocked = activeBlocks.some(b => b.operativeId === op.id);
-      if (isBlocked) {
-        for (const ts of timeSlots) {
-          slots.push({
-            date: dateStr,
-            timeSlot: ts,
-            operativeId: op.id,
-            operativeName: op.name,
-            available: false,
-          });
-        }
-        continue;
-      }
-
-      // Count appointments for this operative on this date
-      const opAppointments = dateAppointments.filter(a => a.operativeId === op.id);
-      const morningCount = opAppointments.filter(a => a.timeSlot === 'morning').length;
-      const afternoonCount = opAppointments.filter(a => a.timeSlot === 'afternoon').length;
-      const totalCount = opAppointments.length;
-
-      // Each slot can hold max half of maxJobsPerDay (split between morning/afternoon)
-      const maxPerSlot = Math.ceil(op.maxJobsPerDay / 2);
-
-      for (const ts of timeSlots) {
-        const slotCount = ts === 'morning' ? morningCount : afternoonCount;
-        slots.push({
-          date: dateStr,
-          timeSlot: ts,
-          operativeId: op.id,
-          operativeName: op.name,
-          available: slotCount < maxPerSlot && totalCount < op.maxJobsPerDay,
-        });
-      }
-    }
-
-    res.json(slots);
+    res.json(await searchSlots(operatives, startDate, endDate));
   } catch (err) {
     next(err);
   }
@@ -276,7 +200,8 @@ schedulingRouter.post('/appointments', async (req, res, next) => {
     }
 
     const now = new Date().toISOString();
-    const id = `appt-${Date.now()}`;
+    // Random suffix so two bookings in the same millisecond don't share an ID
+    const id = `appt-${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
     const appointment: Appointment = {
       id,
       caseId,
@@ -292,7 +217,10 @@ schedulingRouter.post('/appointments', async (req, res, next) => {
       updatedAt: now,
     };
 
-    await setDoc(appointmentsCol as any, id, appointment);
+    const batch = db.batch();
+    batch.set(appointmentsCol.doc(id), appointment);
+    applyOccupancyChange(batch, null, appointment);
+    await batch.commit();
     res.status(201).json(appointment);
   } catch (err) {
     next(err);
@@ -332,9 +260,6 @@ schedulingRouter.get('/appointments', async (req, res, next) => {
 // =========================================================
 schedulingRouter.patch('/appointments/:id', async (req, res, next) => {
   try {
-    const existing = await getDoc<Appointment>(appointmentsCol as any, req.params.id);
-    if (!existing) return res.status(404).json({ error: 'Appointment not found' });
-
     const updates: Record<string, any> = {};
     const { date, timeSlot, status, notes } = req.body;
 
@@ -354,8 +279,19 @@ schedulingRouter.patch('/appointments/:id', async (req, res, next) => {
     if (notes !== undefined) updates.notes = notes;
     updates.updatedAt = new Date().toISOString();
 
-    await updateDoc(appointmentsCol as any, req.params.id, updates);
-    const updated = await getDoc<Appointment>(appointmentsCol as any, req.params.id);
+    // Read and counter changes in one transaction, so concurrent
+    // reschedules or cancellations each move the slot they saw
+    const ref = appointmentsCol.doc(req.params.id);
+    const updated = await db.runTransaction(async tx => {
+      const snapshot = await tx.get(ref);
+      if (!snapshot.exists) return null;
+      const existing = serializeFirestoreData({ id: snapshot.id, ...snapshot.data() }) as Appointment;
+      const after: Appointment = { ...existing, ...updates };
+      tx.update(ref, updates);
+      applyOccupancyChange(tx, existing, after);
+      return after;
+    });
+    if (!updated) return res.status(404).json({ error: 'Appointment not found' });
     res.json(updated);
   } catch (err) {
     next(err);
@@ -383,13 +319,14 @@ schedulingRouter.get('/diary', async (req, res, next) => {
     const endDate = end.toISOString().split('T')[0];
 
     // Get appointments for the operative in this week
-    const allAppointments = await getDocs<Appointment>(appointmentsCol as any, undefined, undefined, 1000);
-    const weekAppointments = allAppointments.filter(
-      a =>
-        a.operativeId === operativeId &&
-        a.date >= startDate &&
-        a.date <= endDate
-    );
+    const [weekAppointments, blocks] = await Promise.all([
+      getDocs<Appointment>(appointmentsCol, [
+        { field: 'operativeId', op: '==', value: operativeId },
+        { field: 'date', op: '>=', value: startDate },
+        { field: 'date', op: '<=', value: endDate },
+      ]),
+      loadDiaryBlockIndex(startDate, endDate),
+    ]);
 
     // Sort by date ascending, morning first
     weekAppointments.sort((a, b) => {
@@ -398,14 +335,8 @@ schedulingRouter.get('/diary', async (req, res, next) => {
       return a.timeSlot === 'morning' ? -1 : 1;
     });
 
-    // Get diary blocks that overlap this week
-    const allBlocks = await getDocs<DiaryBlock>(diaryBlocksCol as any, undefined, undefined, 500);
-    const weekBlocks = allBlocks.filter(
-      b =>
-        b.operativeId === operativeId &&
-        b.startDate <= endDate &&
-        b.endDate >= startDate
-    );
+    // Diary blocks that overlap this week
+    const weekBlocks = blocks.overlapping(operativeId as string, startDate, endDate);
 
     res.json({
       operativeId,
@@ -1,15 +1,31 @@
 import { Router } from 'express';
-import { collections, getDocs, getDoc, updateDoc } from '../services/firestore.js';
+import { collections, getDocs, getDoc } from '../services/firestore.js';
 import { authMiddleware } from '../middleware/auth.js';
-import type { TenantDoc, ActivityDoc, CaseDoc } from '../models/firestore-schemas.js';
+import { listTenantActivities } from '../services/entity-index.js';
+import { updateTenant } from '../services/entity-writes.js';
+import { invalidateAiResponses } from '../services/ai-response-cache.js';
+import { scoreOrderField } from '../services/risk-scoring.js';
+import type { TenantDoc, CaseDoc } from '../models/firestore-schemas.js';
 
 export const tenantsRouter = Router();
 tenantsRouter.use(authMiddleware);
 
+const TENANT_SORT_KEYS = ['vulnerabilityScore', 'activityScore'] as const;
+
 // GET /api/v1/tenants?assignedOfficer=Sarah+Mitchell&tenancyStatus=active&limit=100
+// sortBy=vulnerabilityScore|activityScore&order=asc|desc orders by the stored
+// nightly score; tenants not yet scored are left out of a sorted list
 tenantsRouter.get('/', async (req, res, next) => {
   try {
-    const { assignedOfficer, tenancyStatus, propertyId, arrearsRiskMin, limit: limitStr } = req.query;
+    const { assignedOfficer, tenancyStatus, propertyId, arrearsRiskMin, sortBy, order, limit: limitStr } = req.query;
+    const sortKey = TENANT_SORT_KEYS.find(k => k === sortBy);
+    if (sortBy && !sortKey) {
+      return res.status(400).json({ error: `sortBy must be one of: ${TENANT_SORT_KEYS.join(', ')}` });
+    }
+    // Firestore requires the first orderBy to match a range filter's field
+    if (sortKey && arrearsRiskMin) {
+      return res.status(400).json({ error: 'sortBy cannot be combined with arrearsRiskMin' });
+    }
     const filters: { field: string; op: FirebaseFirestore.WhereFilterOp; value: any }[] = [];
 
     if (assignedOfficer) filters.push({ field: 'assignedOfficer', op: '==', value: assignedOfficer });
@@ -18,7 +34,10 @@ tenantsRouter.get('/', async (req, res, next) => {
     if (arrearsRiskMin) filters.push({ field: 'arrearsRisk', op: '>=', value: parseInt(arrearsRiskMin as string, 10) });
 
     const limit = limitStr ? parseInt(limitStr as string, 10) : 200;
-    const tenants = await getDocs<TenantDoc>(collections.tenants, filters, undefined, limit);
+    const orderBy = sortKey
+      ? { field: scoreOrderField(sortKey), direction: order === 'asc' ? 'asc' as const : 'desc' as const }
+      : undefined;
+    const tenants = await getDocs<TenantDoc>(collections.tenants, filters, orderBy, limit);
 
     res.json({
       items: tenants,
@@ -43,12 +62,7 @@ tenantsRouter.get('/:id', async (req, res, next) => {
 // GET /api/v1/tenants/:id/activities
 tenantsRouter.get('/:id/activities', async (req, res, next) => {
   try {
-    const tenantId = req.params.id;
-    // Filter in memory to avoid composite index requirement
-    const allActivities = await getDocs<ActivityDoc>(collections.activities);
-    const activities = allActivities
-      .filter(a => a.tenantId === tenantId)
-      .sort((a, b) => (b.date || '').localeCompare(a.date || ''));
+    const activities = await listTenantActivities(req.params.id);
     res.json(activities);
   } catch (err) {
     next(err);
@@ -73,8 +87,9 @@ tenantsRouter.get('/:id/cases', async (req, res, next) => {
 // PATCH /api/v1/tenants/:id
 tenantsRouter.patch('/:id', async (req, res, next) => {
   try {
-    await updateDoc(collections.tenants, req.params.id, req.body);
+    await updateTenant(req.params.id, req.body);
     const updated = await getDoc<TenantDoc>(collections.tenants, req.params.id);
+    await invalidateAiResponses('tenants', req.params.id);
     res.json(updated);
   } catch (err) {
     next(err);
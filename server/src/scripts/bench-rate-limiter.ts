@@ -0,0 +1,104 @@
+// ============================================================
+// SocialHomes.Ai — Rate Limiter Micro-Benchmark
+// Compares the counter-based limiter with the timestamp-array
+// limiter it replaced: time per request and retained heap, for
+// an office sharing one NAT address and for many separate clients.
+//
+// Usage:  npm run bench:rate-limit
+// ============================================================
+
+import type { Request, Response, NextFunction } from 'express';
+import { rateLimiter } from '../middleware/rate-limiter.js';
+
+type Middleware = (req: Request, res: Response, next: NextFunction) => void;
+
+// ── The previous implementation, kept here as the baseline ──
+function timestampRateLimiter(config: { windowMs: number; maxRequests: number }): Middleware {
+  const { windowMs, maxRequests } = config;
+  const store = new Map<string, { timestamps: number[] }>();
+
+  return (req, res, next) => {
+    const ip = (req.headers['x-forwarded-for'] as string)?.split(',')[0]?.trim() || 'unknown';
+    const now = Date.now();
+    let entry = store.get(ip);
+    if (!entry) {
+      entry = { timestamps: [] };
+      store.set(ip, entry);
+    }
+    entry.timestamps = entry.timestamps.filter((ts) => now - ts < windowMs);
+    if (entry.timestamps.length >= maxRequests) {
+      res.setHeader('X-RateLimit-Remaining', '0');
+      res.status(429).json({ error: 'Too many requests. Please try again later.' });
+      return;
+    }
+    entry.timestamps.push(now);
+    res.setHeader('X-RateLimit-Limit', String(maxRequests));
+    res.setHeader('X-RateLimit-Remaining', String(maxRequests - entry.timestamps.length));
+    next();
+  };
+}
+
+// ── Harness ──
+
+const res = {
+  setHeader() {},
+  status() { return this; },
+  json() {},
+} as unknown as Response;
+const next = () => {};
+
+function requestFrom(ip: string): Request {
+  return { headers: { 'x-forwarded-for': ip }, socket: {} } as unknown as Request;
+}
+
+interface Scenario {
+  name: string;
+  maxRequests: number;
+  clients: number;
+  requestsPerClient: number;
+}
+
+const scenarios: Scenario[] = [
+  // A housing office of ~200 staff behind one address, each loading a few pages
+  { name: 'shared office NAT (1 address)', maxRequests: 5_000, clients: 1, requestsPerClient: 20_000 },
+  { name: 'many clients (10k addresses)', maxRequests: 100, clients: 10_000, requestsPerClient: 20 },
+];
+
+function heapUsed(): number {
+  (globalThis as { gc?: () => void }).gc?.();
+  return process.memoryUsage().heapUsed;
+}
+
+function run(scenario: Scenario, limiter: Middleware): { nsPerRequest: number; retainedKb: number } {
+  const requests = Array.from({ length: scenario.clients }, (_, i) => requestFrom(`10.${(i >> 16) & 255}.${(i >> 8) & 255}.${i & 255}`));
+  const before = heapUsed();
+  const start = process.hrtime.bigint();
+  for (let round = 0; round < scenario.requestsPerClient; round++) {
+    for (const req of requests) limiter(req, res, next);
+  }
+  const elapsed = Number(process.hrtime.bigint() - start);
+  const retained = heapUsed() - before;
+  return {
+    nsPerRequest: elapsed / (scenario.clients * scenario.requestsPerClient),
+    retainedKb: Math.max(0, retained) / 1024,
+  };
+}
+
+if (!(globalThis as { gc?: () => void }).gc) {
+  console.warn('Run with --expose-gc for retained heap figures.\n');
+}
+
+for (const scenario of scenarios) {
+  const config = { windowMs: 60_000, maxRequests: scenario.maxRequests };
+  // Warm both paths before timing
+  run({ ...scenario, requestsPerClient: 1 }, timestampRateLimiter(config));
+  run({ ...scenario, requestsPerClient: 1 }, rateLimiter({ ...config, name: 'warmup' }));
+
+  const baseline = run(scenario, timestampRateLimiter(config));
+  const counters = run(scenario, rateLimiter({ ...config, name: 'bench' }));
+
+  console.log(scenario.name);
+  console.log(`  timestamps: ${baseline.nsPerRequest.toFixed(0).padStart(8)} ns/request  ${baseline.retainedKb.toFixed(0).padStart(7)} KB retained`);
+  console.log(`  counters:   ${counters.nsPerRequest.toFixed(0).padStart(8)} ns/request  ${counters.retainedKb.toFixed(0).padStart(7)} KB retained`);
+  console.log(`  speed-up:   ${(baseline.nsPerRequest / counters.nsPerRequest).toFixed(1)}x\n`);
+}
@@ -0,0 +1,154 @@
+// ============================================================
+// SocialHomes.Ai — AI Response Cache Tests
+// Memory and Firestore tier hits, prompt normalisation, TTL
+// expiry, uncacheable results, single-flight, entity
+// invalidation and metrics reporting.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+
+// ── In-memory stand-in for the aiResponseCache collection ──
+const { stored } = vi.hoisted(() => ({ stored: new Map<string, any>() }));
+
+vi.mock('./firestore.js', () => {
+  const ref = (id: string) => ({
+    id,
+    get: async () => ({ exists: stored.has(id), id, data: () => stored.get(id) }),
+    set: async (data: any) => { stored.set(id, data); },
+  });
+  return {
+    collections: {
+      aiResponseCache: {
+        doc: ref,
+        where: (field: string, _op: 'array-contains', value: string) => ({
+          select: () => ({
+            get: async () => ({
+              docs: [...stored].filter(([, d]) => d[field].includes(value)).map(([id]) => ({ id, ref: ref(id) })),
+            }),
+          }),
+        }),
+      },
+    },
+    db: {
+      batch: () => {
+        const deletes: string[] = [];
+        return {
+          delete: (r: { id: string }) => { deletes.push(r.id); },
+          commit: async () => { for (const id of deletes) stored.delete(id); },
+        };
+      },
+    },
+  };
+});
+
+import { cachedAiResponse, invalidateAiResponses, clearAiResponseMemory, responseCacheKey } from './ai-response-cache.js';
+import type { AiCacheRequest } from './ai-response-cache.js';
+import { getMetrics } from './monitoring.js';
+
+const request: AiCacheRequest = {
+  namespace: 'draft-communication',
+  model: 'claude-sonnet',
+  systemPrompt: 'You are Yantra Assist.',
+  prompt: 'Draft an arrears letter.\n\nTenant: Mrs Patel',
+  params: { maxTokens: 2048, date: '2026-03-01' },
+  entities: ['tenants/ten-001', 'properties/prop-001'],
+};
+
+function generator(value = 'Dear Mrs Patel', cacheable = true) {
+  return vi.fn(async () => ({ value, cacheable }));
+}
+
+describe('AI response cache', () => {
+  beforeEach(() => {
+    clearAiResponseMemory();
+    stored.clear();
+    vi.spyOn(console, 'error').mockImplementation(() => {});
+  });
+
+  it('serves a repeat request from memory without calling the model', async () => {
+    const generate = generator();
+    expect(await cachedAiResponse(request, generate)).toEqual({ value: 'Dear Mrs Patel', cached: null });
+    expect(await cachedAiResponse(request, generate)).toEqual({ value: 'Dear Mrs Patel', cached: 'memory' });
+    expect(generate).toHaveBeenCalledTimes(1);
+  });
+
+  it('falls back to the Firestore tier when memory is empty', async () => {
+    await cachedAiResponse(request, generator());
+    clearAiResponseMemory();
+
+    const generate = generator();
+    expect((await cachedAiResponse(request, generate)).cached).toBe('firestore');
+    expect(generate).not.toHaveBeenCalled();
+  });
+
+  it('regenerates once the entry has expired', async () => {
+    await cachedAiResponse({ ...request, ttlMs: -1 }, generator());
+    clearAiResponseMemory();
+
+    const generate = generator();
+    expect((await cachedAiResponse(request, generate)).cached).toBeNull();
+    expect(generate).toHaveBeenCalledTimes(1);
+  });
+
+  it('ignores whitespace differences but not model or parameter changes', () => {
+    const key = responseCacheKey(request);
+    expect(responseCacheKey({ ...request, prompt: '  Draft an arrears letter.\r\n\r\n\r\nTenant:   Mrs Patel ' })).toBe(key);
+    expect(responseCacheKey({ ...request, params: { date: '2026-03-01', maxTokens: 2048 } })).toBe(key);
+    expect(responseCacheKey({ ...request, model: 'claude-haiku' })).not.toBe(key);
+    expect(responseCacheKey({ ...request, params: { maxTokens: 2048, date: '2026-03-02' } })).not.toBe(key);
+  });
+
+  it('does not store fallback output', async () => {
+    await cachedAiResponse(request, generator('Thank you for contacting us', false));
+    const generate = generator();
+    expect((await cachedAiResponse(request, generate)).cached).toBeNull();
+    expect(generate).toHaveBeenCalledTimes(1);
+    expect(stored.size).toBe(1);
+  });
+
+  it('shares one model call between concurrent identical requests', async () => {
+    const generate = generator();
+    const results = await Promise.all([cachedAiResponse(request, generate), cachedAiResponse(request, generate)]);
+    expect(generate).toHaveBeenCalledTimes(1);
+    expect(results.map(r => r.value)).toEqual(['Dear Mrs Patel', 'Dear Mrs Patel']);
+  });
+
+  it('purges both tiers when an entity the prompt used changes', async () => {
+    await cachedAiResponse(request, generator());
+    await cachedAiResponse({ ...request, prompt: 'Draft a repairs letter.', entities: ['tenants/ten-002'] }, generator());
+
+    await invalidateAiResponses('properties', 'prop-001');
+    expect(stored.size).toBe(1);
+
+    const generate = generator();
+    expect((await cachedAiResponse(request, generate)).cached).toBeNull();
+    expect(generate).toHaveBeenCalledTimes(1);
+  });
+
+  it('does not cache a result generated across an invalidation', async () => {
+    let release!: () => void;
+    const pending = cachedAiResponse(request, () => new Promise(resolve => {
+      release = () => resolve({ value: 'Dear Mrs Patel', cacheable: true });
+    }));
+    await vi.waitFor(() => expect(release).toBeDefined());
+    await invalidateAiResponses('tenants', 'ten-001');
+    release();
+    await pending;
+
+    expect(stored.size).toBe(0);
+  });
+
+  it('reports hits by tier and the hit rate', async () => {
+    const before = getMetrics().aiResponseCache;
+    await cachedAiResponse(request, generator());
+    await cachedAiResponse(request, generator());
+    clearAiResponseMemory();
+    await cachedAiResponse(request, generator());
+
+    const after = getMetrics().aiResponseCache;
+    expect(after.misses - before.misses).toBe(1);
+    expect(after.memoryHits - before.memoryHits).toBe(1);
+    expect(after.firestoreHits - before.firestoreHits).toBe(1);
+    expect(after.hitRate).toBeGreaterThan(0);
+  });
+});
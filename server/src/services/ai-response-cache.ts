@@ -0,0 +1,210 @@
+// ============================================================
+// SocialHomes.Ai — AI Response Cache
+// Reuses model output for repeat requests. Entries are keyed by a
+// hash of the model, system prompt, normalised prompt and generation
+// parameters, so only an identical request can hit. An LRU memory
+// tier sits in front of a Firestore tier shared across instances;
+// entries expire by TTL and are purged when an entity the prompt was
+// built from changes.
+// ============================================================
+
+import crypto from 'crypto';
+import { db, collections } from './firestore.js';
+import { recordAiCacheHit, recordAiCacheMiss } from './monitoring.js';
+
+// ---- Configuration ----
+
+const DEFAULT_TTL_MS = 24 * 3600 * 1000;
+const MAX_MEMORY_ENTRIES = 500;
+
+export interface AiCacheRequest {
+  /** Separates callers whose cached values have different shapes */
+  namespace: string;
+  model: string;
+  systemPrompt: string;
+  prompt: string;
+  /** Anything else that shapes the output: token limits, today's date for letters */
+  params?: Record<string, string | number | boolean | undefined>;
+  /** Entities the prompt was built from, as `${collectionId}/${id}` */
+  entities?: string[];
+  ttlMs?: number;
+}
+
+export type AiCacheTier = 'memory' | 'firestore';
+
+interface MemoryEntry {
+  value: unknown;
+  entities: string[];
+  expiresAt: number;
+}
+
+interface StoredEntry {
+  namespace: string;
+  model: string;
+  value: unknown;
+  entities: string[];
+  createdAt: string;
+  // Stored as a timestamp so a Firestore TTL policy can delete expired entries
+  expiresAt: Date | FirebaseFirestore.Timestamp;
+}
+
+// ---- Key ----
+
+/**
+ * Whitespace-only differences (line endings, indentation, blank-line
+ * runs) do not change what a model is asked, so they share a key.
+ */
+export function normalisePrompt(text: string): string {
+  return text
+    .replace(/\r\n?/g, '\n')
+    .replace(/[ \t]+/g, ' ')
+    .replace(/ ?\n ?/g, '\n')
+    .replace(/\n{3,}/g, '\n\n')
+    .trim();
+}
+
+export function responseCacheKey(request: AiCacheRequest): string {
+  const params = Object.entries(request.params ?? {})
+    .filter(([, v]) => v !== undefined)
+    .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+  return crypto
+    .createHash('sha256')
+    .update(JSON.stringify([
+      request.namespace,
+      request.model,
+      normalisePrompt(request.systemPrompt),
+      normalisePrompt(request.prompt),
+      params,
+    ]))
+    .digest('hex');
+}
+
+// ---- Memory Tier ----
+// Map iteration order is insertion order, so re-inserting on every hit
+// keeps the least recently used entry first.
+
+const memory = new Map<string, MemoryEntry>();
+const inFlight = new Map<string, Promise<unknown>>();
+// Bumped on invalidation so a generation that started before an entity
+// changed is not cached after it
+const generations = new Map<string, number>();
+
+function remember(key: string, entry: MemoryEntry): void {
+  memory.delete(key);
+  memory.set(key, entry);
+  while (memory.size > MAX_MEMORY_ENTRIES) {
+    memory.delete(memory.keys().next().value as string);
+  }
+}
+
+function generationOf(entities: string[]): number {
+  return entities.reduce((sum, entity) => sum + (generations.get(entity) ?? 0), 0);
+}
+
+function expiryMs(expiresAt: StoredEntry['expiresAt']): number {
+  return expiresAt instanceof Date ? expiresAt.getTime() : expiresAt.toMillis();
+}
+
+// ---- Read-Through ----
+
+/**
+ * Return the cached value for an identical request, or run `generate`
+ * and cache its value when it reports it as cacheable (fallback text and
+ * failed parses are not). Concurrent identical misses share one model
+ * call. Cache storage failures never fail the request.
+ */
+export async function cachedAiResponse<T>(
+  request: AiCacheRequest,
+  generate: () => Promise<{ value: T; cacheable: boolean }>,
+): Promise<{ value: T; cached: AiCacheTier | null }> {
+  const key = responseCacheKey(request);
+  const entities = request.entities ?? [];
+
+  const hit = memory.get(key);
+  if (hit && hit.expiresAt > Date.now()) {
+    remember(key, hit);
+    recordAiCacheHit('memory');
+    return { value: structuredClone(hit.value) as T, cached: 'memory' };
+  }
+  if (hit) memory.delete(key);
+
+  try {
+    const doc = await collections.aiResponseCache.doc(key).get();
+    const stored = doc.exists ? doc.data() as StoredEntry : null;
+    if (stored && expiryMs(stored.expiresAt) > Date.now()) {
+      remember(key, { value: stored.value, entities: stored.entities, expiresAt: expiryMs(stored.expiresAt) });
+      recordAiCacheHit('firestore');
+      return { value: structuredClone(stored.value) as T, cached: 'firestore' };
+    }
+  } catch (err: any) {
+    console.error('[ai-response-cache] Read failed:', err.message);
+  }
+  recordAiCacheMiss();
+
+  let pending = inFlight.get(key) as Promise<{ value: T; cacheable: boolean }> | undefined;
+  if (!pending) {
+    const generation = generationOf(entities);
+    pending = generate()
+      .then(async result => {
+        if (result.cacheable && generationOf(entities) === generation) {
+          await store(key, request, result.value);
+        }
+        return result;
+      })
+      .finally(() => inFlight.delete(key));
+    inFlight.set(key, pending);
+  }
+  const { value } = await pending;
+  return { value: structuredClone(value), cached: null };
+}
+
+async function store(key: string, request: AiCacheRequest, value: unknown): Promise<void> {
+  const expiresAt = Date.now() + (request.ttlMs ?? DEFAULT_TTL_MS);
+  const entities = request.entities ?? [];
+  remember(key, { value, entities, expiresAt });
+  try {
+    const entry: StoredEntry = {
+      namespace: request.namespace,
+      model: request.model,
+      value,
+      entities,
+      createdAt: new Date().toISOString(),
+      expiresAt: new Date(expiresAt),
+    };
+    await collections.aiResponseCache.doc(key).set(entry);
+  } catch (err: any) {
+    console.error('[ai-response-cache] Write failed:', err.message);
+  }
+}
+
+// ---- Invalidation ----
+
+/**
+ * Purge every cached response built from an entity, from both tiers.
+ * Keys already change when the prompt text does; this stops superseded
+ * entries being served or lingering until their TTL.
+ */
+export async function invalidateAiResponses(collectionId: string, id: string): Promise<void> {
+  const entity = `${collectionId}/${id}`;
+  generations.set(entity, (generations.get(entity) ?? 0) + 1);
+  for (const [key, entry] of memory) {
+    if (entry.entities.includes(entity)) memory.delete(key);
+  }
+
+  try {
+    const snapshot = await collections.aiResponseCache.where('entities', 'array-contains', entity).select().get();
+    for (let i = 0; i < snapshot.docs.length; i += 500) {
+      const batch = db.batch();
+      for (const doc of snapshot.docs.slice(i, i + 500)) batch.delete(doc.ref);
+      await batch.commit();
+    }
+  } catch (err: any) {
+    console.error(`[ai-response-cache] Failed to invalidate ${entity}:`, err.message);
+  }
+}
+
+/** Empty the memory tier (the Firestore tier is left to its TTL). */
+export function clearAiResponseMemory(): void {
+  memory.clear();
+  inFlight.clear();
+}
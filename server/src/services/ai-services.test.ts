@@ -158,7 +158,7 @@ vi.stubGlobal('fetch', mockFetch);
 // Service Imports (AFTER mocks are registered)
 // ============================================================
 
-import { classifyRisk, predictDampRisk } from './damp-prediction.js';
+import { classifyRisk, predictDampRisk, predictEstateDampRisk } from './damp-prediction.js';
 import { getEstateCrimeContext, getAsbCaseContext } from './crime-context.js';
 import { assessVulnerability, scanAllTenants } from './vulnerability-detection.js';
 import { checkBenefitsEntitlement } from './benefits-engine.js';
@@ -538,6 +538,32 @@ describe('Damp Prediction Service', () => {
       expect(result.recommendations.length).toBeGreaterThan(0);
     });
   });
+
+  describe('predictEstateDampRisk', () => {
+    it('scores every property in bulk, matching the single-property prediction', async () => {
+      const cases = [makeCase({ type: 'damp-mould', status: 'open', propertyId: 'prop-002', isAwaabsLaw: true })];
+      const tenants = [makeTenant(), makeTenant({ id: 'tenant-002', propertyId: 'prop-002', rentBalance: -900 })];
+      seedMockData({
+        estates: [makeEstate()],
+        properties: [makeProperty(), makeProperty({ id: 'prop-002', currentTenancyId: 'tenant-002', dampRisk: 80 })],
+        blocks: [makeBlock()],
+        tenants,
+        cases,
+      });
+      // Bulk 'in' lookups across the estate's properties
+      _mockQueryResults.set('cases:propertyId=prop-001,prop-002', cases);
+      _mockQueryResults.set('tenants:propertyId=prop-001,prop-002', tenants);
+
+      const estate = await predictEstateDampRisk('estate-001');
+      expect(estate.properties).toHaveLength(2);
+      for (const scored of estate.properties) {
+        const single = await predictDampRisk(scored.propertyId);
+        expect(scored.score).toBe(single.overallScore);
+        expect(scored.riskLevel).toBe(single.riskLevel);
+      }
+      expect(estate.properties[0].propertyId).toBe('prop-002');
+    });
+  });
 });
 
 // ============================================================
@@ -941,6 +967,54 @@ describe('Vulnerability Detection Service', () => {
       expect(result.totalTenants).toBe(0);
       expect(result.results).toHaveLength(0);
     });
+
+    it('looks up IMD once per distinct postcode', async () => {
+      seedMockData({
+        tenants: [
+          makeTenant({ id: 'tenant-001' }),
+          makeTenant({ id: 'tenant-002', propertyId: 'prop-002' }),
+          makeTenant({ id: 'tenant-003', propertyId: 'prop-003' }),
+        ],
+        properties: [
+          makeProperty({ id: 'prop-001' }),
+          makeProperty({ id: 'prop-002' }),
+          makeProperty({ id: 'prop-003', postcode: 'SE1 7PB' }),
+        ],
+        cases: [],
+      });
+
+      await scanAllTenants({ concurrency: 2 });
+      const postcodeCalls = mockFetch.mock.calls.filter((c: any[]) => String(c[0]).includes('postcodes.io'));
+      expect(postcodeCalls).toHaveLength(2);
+    });
+
+    it('resumes an interrupted scan from its last checkpoint', async () => {
+      seedMockData({
+        tenants: [
+          makeTenant({ id: 'tenant-001' }),
+          makeTenant({ id: 'tenant-002', propertyId: 'prop-002' }),
+        ],
+        properties: [makeProperty({ id: 'prop-001' }), makeProperty({ id: 'prop-002' })],
+        cases: [],
+      });
+      const startedAt = new Date().toISOString();
+      _mockData.set('vulnerabilityScans/latest', {
+        scanId: 'scan-1', status: 'running', startedAt, updatedAt: startedAt,
+        totalTenants: 2, processedTenants: 1, lastTenantId: 'tenant-001', chunks: 1,
+      });
+      _mockData.set('vulnerabilityScans/scan-1__00000', {
+        scanId: 'scan-1',
+        results: [{ tenantId: 'tenant-001', tenantName: 'Mrs Jane Doe', score: 99, level: 'critical', newFlags: [] }],
+      });
+
+      const result = await scanAllTenants();
+      expect(result.resumed).toBe(true);
+      expect(result.scanId).toBe('scan-1');
+      expect(result.totalTenants).toBe(2);
+      // tenant-001 is carried over from the checkpoint rather than rescored
+      expect(result.results[0]).toMatchObject({ tenantId: 'tenant-001', score: 99 });
+      expect(_mockData.get('vulnerabilityScans/latest').status).toBe('completed');
+    });
   });
 });
 
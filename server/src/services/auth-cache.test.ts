@@ -0,0 +1,84 @@
+// ============================================================
+// SocialHomes.Ai — Auth Cache Tests
+// Token reuse until expiry, shared verification, uncached
+// failures, profile TTL and invalidation.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
+
+const { verifyIdTokenMock, getDocMock } = vi.hoisted(() => ({
+  verifyIdTokenMock: vi.fn(),
+  getDocMock: vi.fn(),
+}));
+
+vi.mock('./firebase-admin.js', () => ({ verifyIdToken: verifyIdTokenMock }));
+vi.mock('./firestore.js', () => ({ collections: { users: {} }, getDoc: getDocMock }));
+
+import { verifyIdTokenCached, getUserProfile, invalidateUserProfile, clearAuthCache } from './auth-cache.js';
+
+const NOW = Date.parse('2026-03-01T10:00:00Z');
+
+describe('auth cache', () => {
+  beforeEach(() => {
+    vi.useFakeTimers();
+    vi.setSystemTime(NOW);
+    clearAuthCache();
+    verifyIdTokenMock.mockReset();
+    getDocMock.mockReset();
+    verifyIdTokenMock.mockImplementation(async () => ({ uid: 'user-1', exp: NOW / 1000 + 3600 }));
+    getDocMock.mockImplementation(async () => ({ persona: 'manager' }));
+  });
+
+  afterEach(() => {
+    vi.useRealTimers();
+  });
+
+  it('verifies a token once and reuses it until it expires', async () => {
+    await verifyIdTokenCached('token-a');
+    await verifyIdTokenCached('token-a');
+    expect(verifyIdTokenMock).toHaveBeenCalledTimes(1);
+
+    vi.setSystemTime(NOW + 3600 * 1000);
+    await verifyIdTokenCached('token-a');
+    expect(verifyIdTokenMock).toHaveBeenCalledTimes(2);
+  });
+
+  it('shares one verification between concurrent requests', async () => {
+    await Promise.all([verifyIdTokenCached('token-a'), verifyIdTokenCached('token-a'), verifyIdTokenCached('token-a')]);
+    expect(verifyIdTokenMock).toHaveBeenCalledTimes(1);
+  });
+
+  it('does not cache a failed verification', async () => {
+    verifyIdTokenMock.mockRejectedValueOnce(Object.assign(new Error('Token expired'), { code: 'auth/id-token-expired' }));
+    await expect(verifyIdTokenCached('token-a')).rejects.toThrow('Token expired');
+    await expect(verifyIdTokenCached('token-a')).resolves.toMatchObject({ uid: 'user-1' });
+  });
+
+  it('caches profiles, including missing ones, for a short TTL', async () => {
+    getDocMock.mockResolvedValueOnce(null);
+    expect(await getUserProfile('user-1')).toBeNull();
+    expect(await getUserProfile('user-1')).toBeNull();
+    expect(getDocMock).toHaveBeenCalledTimes(1);
+
+    vi.setSystemTime(NOW + 61 * 1000);
+    expect(await getUserProfile('user-1')).toEqual({ persona: 'manager' });
+  });
+
+  it('reloads a profile as soon as it is invalidated', async () => {
+    await getUserProfile('user-1');
+    getDocMock.mockResolvedValueOnce({ persona: 'coo' });
+    invalidateUserProfile('user-1');
+    expect(await getUserProfile('user-1')).toEqual({ persona: 'coo' });
+  });
+
+  it('does not cache a profile read that overlapped an invalidation', async () => {
+    let release!: (profile: object) => void;
+    getDocMock.mockImplementationOnce(() => new Promise(resolve => { release = resolve; }));
+    const stale = getUserProfile('user-1');
+    invalidateUserProfile('user-1');
+    release({ persona: 'pending-approval' });
+    await stale;
+
+    expect(await getUserProfile('user-1')).toEqual({ persona: 'manager' });
+  });
+});
@@ -0,0 +1,138 @@
+// ============================================================
+// SocialHomes.Ai — Auth Cache
+// Verified ID tokens and user profiles for authMiddleware. The
+// SPA sends the same token on every call a page makes, so a
+// verified token is kept until its own expiry and the profile
+// behind it for a short TTL; profile writes invalidate it.
+// ============================================================
+
+import crypto from 'crypto';
+import type { DecodedIdToken } from 'firebase-admin/auth';
+import { verifyIdToken } from './firebase-admin.js';
+import { collections, getDoc } from './firestore.js';
+
+// ---- Configuration ----
+
+const MAX_TOKENS = 5000;
+const MAX_PROFILES = 5000;
+// Persona changes made outside the API take at most this long to apply
+const PROFILE_TTL_MS = 60 * 1000;
+
+export interface UserProfile {
+  persona?: string;
+  displayName?: string;
+  teamId?: string;
+  patchIds?: string[];
+  organisationId?: string;
+}
+
+interface Entry<T> {
+  value: T;
+  expiresAt: number;
+}
+
+// Map iteration order is insertion order, so re-inserting on every hit
+// keeps the least recently used entry first
+function remember<T>(cache: Map<string, Entry<T>>, key: string, entry: Entry<T>, max: number): void {
+  cache.delete(key);
+  cache.set(key, entry);
+  while (cache.size > max) {
+    cache.delete(cache.keys().next().value as string);
+  }
+}
+
+function fresh<T>(cache: Map<string, Entry<T>>, key: string): Entry<T> | undefined {
+  const entry = cache.get(key);
+  if (!entry) return undefined;
+  if (entry.expiresAt <= Date.now()) {
+    cache.delete(key);
+    return undefined;
+  }
+  remember(cache, key, entry, Infinity);
+  return entry;
+}
+
+// ---- Verified Tokens ----
+
+// Keyed by a hash so raw bearer tokens are never held as map keys
+const tokens = new Map<string, Entry<DecodedIdToken>>();
+const verifying = new Map<string, Promise<DecodedIdToken>>();
+
+function tokenKey(idToken: string): string {
+  return crypto.createHash('sha256').update(idToken).digest('base64url');
+}
+
+/**
+ * Verify an ID token, reusing an earlier verification until the token
+ * expires. Concurrent requests carrying the same new token share one
+ * verification; failures are not cached.
+ */
+export async function verifyIdTokenCached(idToken: string): Promise<DecodedIdToken> {
+  const key = tokenKey(idToken);
+  const hit = fresh(tokens, key);
+  if (hit) return hit.value;
+
+  let pending = verifying.get(key);
+  if (!pending) {
+    pending = verifyIdToken(idToken)
+      .then(decoded => {
+        remember(tokens, key, { value: decoded, expiresAt: decoded.exp * 1000 }, MAX_TOKENS);
+        return decoded;
+      })
+      .finally(() => verifying.delete(key));
+    verifying.set(key, pending);
+  }
+  return pending;
+}
+
+/**
+ * The uid of a token this instance has already verified, without
+ * verifying it. Lets the rate limiter, which runs before authMiddleware,
+ * key a known user by account rather than by IP.
+ */
+export function peekVerifiedUid(idToken: string): string | undefined {
+  const entry = tokens.get(tokenKey(idToken));
+  return entry && entry.expiresAt > Date.now() ? entry.value.uid : undefined;
+}
+
+// ---- User Profiles ----
+
+const profiles = new Map<string, Entry<UserProfile | null>>();
+const loading = new Map<string, Promise<UserProfile | null>>();
+// Bumped on invalidation so a read that started before a write is not cached
+const generations = new Map<string, number>();
+
+/** The user's Firestore profile (null when none exists), cached briefly. */
+export async function getUserProfile(uid: string): Promise<UserProfile | null> {
+  const hit = fresh(profiles, uid);
+  if (hit) return hit.value;
+
+  let pending = loading.get(uid);
+  if (!pending) {
+    const generation = generations.get(uid) ?? 0;
+    pending = getDoc<UserProfile>(collections.users, uid)
+      .then(profile => {
+        if ((generations.get(uid) ?? 0) === generation) {
+          remember(profiles, uid, { value: profile, expiresAt: Date.now() + PROFILE_TTL_MS }, MAX_PROFILES);
+        }
+        return profile;
+      })
+      .finally(() => loading.delete(uid));
+    loading.set(uid, pending);
+  }
+  return pending;
+}
+
+/** Drop a user's cached profile after it is created or its persona changes. */
+export function invalidateUserProfile(uid: string): void {
+  generations.set(uid, (generations.get(uid) ?? 0) + 1);
+  profiles.delete(uid);
+  loading.delete(uid);
+}
+
+export function clearAuthCache(): void {
+  tokens.clear();
+  verifying.clear();
+  profiles.clear();
+  loading.clear();
+}
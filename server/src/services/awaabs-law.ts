@@ -1,11 +1,14 @@
 // ============================================================
 // SocialHomes.Ai — Awaab's Law Compliance Engine
 // Task 5.2.13: Automatic deadline calculation, SLA breach
-// detection, escalation, notification chain, audit trail
+// detection, escalation, notification chain, audit trail.
+// Open deadlines are kept in a time-ordered index so breach
+// detection reads only what is due.
 // ============================================================
 
-import { db, collections, getDocs, FieldValue } from './firestore.js';
+import { db, collections, getDocs, getDocsIn, serializeFirestoreData, DOCUMENT_ID } from './firestore.js';
 import { dispatchNotification } from './notification-dispatch.js';
+import type { NotificationPayload } from './notification-dispatch.js';
 import type { CaseDoc, PropertyDoc, TenantDoc } from '../models/firestore-schemas.js';
 
 // ---- Awaab's Law Timeline Requirements ----
@@ -321,59 +324,420 @@ function getRequiredActions(timeline: AwaabsLawTimeline, category: HazardCategor
   return actions;
 }
 
+// ---- Deadline Index ----
+// One caseDeadlines entry per open case deadline — the next Awaab's Law
+// milestone for damp/mould cases and the SLA target for any case with a
+// targetDate — keyed `${caseId}__${kind}` and rewritten on every case
+// write. checkAt is the next moment the entry needs attention (warning,
+// then breach), so breach detection reads only entries that are due and
+// the scheduler sleeps until the earliest one.
+
+export type DeadlineKind = 'awaabs-law' | 'sla';
+export type DeadlineStage = 'pending' | 'approaching' | 'breached';
+
+export interface CaseDeadline {
+  id: string;
+  caseId: string;
+  reference: string;
+  caseType: string;
+  kind: DeadlineKind;
+  isAwaabsLaw: boolean;
+  handler: string;
+  deadlineType: string;
+  hazardCategory?: HazardCategory;
+  phase?: AwaabsLawTimeline['currentPhase'];
+  dueAt: string;
+  /** Notifications already sent for this deadline */
+  stage: DeadlineStage;
+  /** When the entry is next due for processing; null once breached */
+  checkAt: string | null;
+  /** Notification attempts that have failed in a row for the current stage */
+  failedAttempts?: number;
+  updatedAt: string;
+}
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+const WARNING_MS = 2 * DAY_MS;
+const AT_RISK_DAYS = 5;
+const CLOSED_STATUSES = ['completed', 'closed', 'cancelled'];
+const INDEX_CHUNK_SIZE = 300;
+// A failed notification is retried after 5 minutes, doubling up to an hour
+const RETRY_BASE_MS = 5 * 60 * 1000;
+const RETRY_MAX_MS = 60 * 60 * 1000;
+
+function deadlineId(caseId: string, kind: DeadlineKind): string {
+  return `${caseId}__${kind}`;
+}
+
+function isValidDate(value: string | undefined): value is string {
+  return !!value && !isNaN(Date.parse(value));
+}
+
+type DeadlineFields = Omit<CaseDeadline, 'stage' | 'checkAt' | 'updatedAt'>;
+
+function deadlinesFor(caseData: CaseDoc): DeadlineFields[] {
+  if (CLOSED_STATUSES.includes(caseData.status)) return [];
+  const base = {
+    caseId: caseData.id,
+    reference: caseData.reference,
+    caseType: caseData.type,
+    isAwaabsLaw: !!caseData.isAwaabsLaw,
+    handler: caseData.handler ?? '',
+  };
+  const deadlines: DeadlineFields[] = [];
+
+  if ((caseData.type === 'damp-mould' || caseData.isAwaabsLaw) && isValidDate(caseData.createdDate)) {
+    const hazardCategory = determineHazardCategory(caseData, null);
+    const timeline = calculateTimeline(caseData.createdDate, hazardCategory, caseData.status);
+    deadlines.push({
+      ...base,
+      id: deadlineId(caseData.id, 'awaabs-law'),
+      kind: 'awaabs-law',
+      deadlineType: timeline.nextDeadlineType,
+      hazardCategory,
+      phase: timeline.currentPhase,
+      dueAt: timeline.nextDeadline,
+    });
+  }
+  if (isValidDate(caseData.targetDate)) {
+    deadlines.push({
+      ...base,
+      id: deadlineId(caseData.id, 'sla'),
+      kind: 'sla',
+      deadlineType: 'SLA target',
+      dueAt: new Date(caseData.targetDate).toISOString(),
+    });
+  }
+  return deadlines;
+}
+
+function nextCheckAt(dueAt: string, stage: DeadlineStage): string | null {
+  if (stage === 'pending') return new Date(Date.parse(dueAt) - WARNING_MS).toISOString();
+  if (stage === 'approaching') return dueAt;
+  return null;
+}
+
+// A deadline that has not moved keeps its stage, so re-indexing an
+// unchanged case never repeats a notification
+function withStage(fields: DeadlineFields, existing: CaseDeadline | undefined, updatedAt: string): CaseDeadline {
+  const stage = existing && existing.dueAt === fields.dueAt ? existing.stage : 'pending';
+  return { ...fields, stage, checkAt: nextCheckAt(fields.dueAt, stage), updatedAt };
+}
+
+/**
+ * Rewrite the deadline entries for a batch of cases. Missing cases and
+ * closed cases lose their entries.
+ */
+async function indexCases(caseIds: string[], cases: CaseDoc[]): Promise<CaseDeadline[]> {
+  const existing = await getDocsIn<CaseDeadline>(collections.caseDeadlines, 'caseId', caseIds);
+  const existingById = new Map(existing.map(d => [d.id, d]));
+  const now = new Date().toISOString();
+  const batch = db.batch();
+  const written: CaseDeadline[] = [];
+
+  for (const caseData of cases) {
+    for (const fields of deadlinesFor(caseData)) {
+      const entry = withStage(fields, existingById.get(fields.id), now);
+      batch.set(collections.caseDeadlines.doc(entry.id), entry);
+      existingById.delete(entry.id);
+      written.push(entry);
+    }
+  }
+  for (const stale of existingById.keys()) {
+    batch.delete(collections.caseDeadlines.doc(stale));
+  }
+
+  if (written.length > 0 || existingById.size > 0) await batch.commit();
+  wakeSchedulerFor(written);
+  return written;
+}
+
+/** Re-index specific cases after a write that bypassed the per-case hook. */
+export async function reindexCaseDeadlines(caseIds: string[]): Promise<void> {
+  for (let i = 0; i < caseIds.length; i += INDEX_CHUNK_SIZE) {
+    const chunk = caseIds.slice(i, i + INDEX_CHUNK_SIZE);
+    const cases = await getDocsIn<CaseDoc>(collections.cases, DOCUMENT_ID, chunk);
+    await indexCases(chunk, cases);
+  }
+}
+
+/**
+ * Apply a case write to the deadline index. A failure must not fail the
+ * write that triggered it; the nightly rebuild corrects any drift.
+ */
+export async function recordCaseDeadlines(id: string, after: CaseDoc | null): Promise<void> {
+  try {
+    await indexCases([id], after ? [{ ...after, id }] : []);
+  } catch (err: any) {
+    console.error(`[awaabs-law] Failed to index deadlines for case ${id}:`, err.message);
+  }
+}
+
+/**
+ * Rebuild the whole deadline index, paging through every case. Entries
+ * whose case no longer exists are removed at the end.
+ */
+export async function rebuildDeadlineIndex(): Promise<{ processed: number; indexed: number }> {
+  const live = new Set<string>();
+  let processed = 0;
+  let last: FirebaseFirestore.QueryDocumentSnapshot | undefined;
+
+  for (;;) {
+    let page = collections.cases.orderBy(DOCUMENT_ID).limit(INDEX_CHUNK_SIZE);
+    if (last) page = page.startAfter(last);
+    const snapshot = await page.get();
+    if (snapshot.empty) break;
+
+    const cases = snapshot.docs.map(doc => serializeFirestoreData({ id: doc.id, ...doc.data() }) as CaseDoc);
+    const written = await indexCases(cases.map(c => c.id), cases);
+    for (const entry of written) live.add(entry.id);
+    processed += cases.length;
+
+    last = snapshot.docs[snapshot.docs.length - 1];
+    if (snapshot.size < INDEX_CHUNK_SIZE) break;
+  }
+
+  const orphans = (await collections.caseDeadlines.select().get()).docs.filter(doc => !live.has(doc.id));
+  for (let i = 0; i < orphans.length; i += 500) {
+    const batch = db.batch();
+    for (const doc of orphans.slice(i, i + 500)) batch.delete(doc.ref);
+    await batch.commit();
+  }
+
+  return { processed, indexed: live.size };
+}
+
+// ---- Breach Detection ----
+
+function daysUntil(dueAt: string, now: number): number {
+  return Math.ceil((Date.parse(dueAt) - now) / DAY_MS);
+}
+
+function deadlineNotification(entry: CaseDeadline, stage: DeadlineStage, now: number): NotificationPayload {
+  const target = { entityType: 'case', entityId: entry.caseId, actionUrl: `/cases/${entry.caseId}` };
+  const days = daysUntil(entry.dueAt, now);
+
+  if (entry.kind === 'awaabs-law') {
+    return stage === 'breached'
+      ? {
+        ...target,
+        category: 'damp-alert',
+        priority: 'critical',
+        title: `AWAAB'S LAW DEADLINE BREACHED — ${entry.reference}`,
+        body: `${entry.deadlineType} deadline (${entry.hazardCategory}) passed on ${entry.dueAt.slice(0, 10)}. Escalate to Director of Housing and record the reasons for breach.`,
+        recipientRole: 'manager',
+      }
+      : {
+        ...target,
+        category: 'damp-alert',
+        priority: 'high',
+        title: `Awaab's Law deadline approaching — ${entry.reference}`,
+        body: `${entry.deadlineType} deadline (${entry.hazardCategory}) due in ${days} day(s). Handler: ${entry.handler}.`,
+        recipientRole: 'housing-officer',
+      };
+  }
+
+  return stage === 'breached'
+    ? {
+      ...target,
+      category: 'sla-breach',
+      priority: entry.isAwaabsLaw ? 'critical' : 'high',
+      title: `SLA BREACHED — ${entry.reference}`,
+      body: `${entry.caseType} case ${entry.reference} has breached SLA by ${Math.abs(days)} day(s). ${entry.isAwaabsLaw ? 'AWAAB\'S LAW CASE — immediate escalation required.' : 'Escalation review needed.'}`,
+      recipientRole: 'manager',
+    }
+    : {
+      ...target,
+      category: 'sla-breach',
+      priority: 'high',
+      title: `SLA approaching — ${entry.reference}`,
+      body: `${entry.caseType} case ${entry.reference} will breach SLA in ${days} day(s). Handler: ${entry.handler}.`,
+      recipientRole: 'housing-officer',
+    };
+}
+
+/**
+ * Notify every deadline entry whose checkAt has passed and advance it to
+ * its next stage. Reads only the due entries. Each entry is claimed with
+ * an update-time precondition before notifying, so two instances waking
+ * together do not both send. A failed notification puts the entry back
+ * with a backed-off checkAt, so a later run retries it without the
+ * scheduler waking straight away while dispatch keeps failing.
+ */
+export async function processDueDeadlines(): Promise<{ processed: number; notifications: number; errors: string[] }> {
+  const now = Date.now();
+  const nowIso = new Date(now).toISOString();
+  const errors: string[] = [];
+  let processed = 0;
+  let notifications = 0;
+  let last: FirebaseFirestore.QueryDocumentSnapshot | undefined;
+
+  for (;;) {
+    let page = collections.caseDeadlines.where('checkAt', '<=', nowIso).orderBy('checkAt').limit(INDEX_CHUNK_SIZE);
+    if (last) page = page.startAfter(last);
+    const snapshot = await page.get();
+    if (snapshot.empty) break;
+
+    for (const doc of snapshot.docs) {
+      const entry = { id: doc.id, ...doc.data() } as CaseDeadline;
+      const stage: DeadlineStage = Date.parse(entry.dueAt) <= now ? 'breached' : 'approaching';
+      processed++;
+
+      let claimed: FirebaseFirestore.WriteResult;
+      try {
+        claimed = await doc.ref.update(
+          { stage, checkAt: nextCheckAt(entry.dueAt, stage), failedAttempts: 0, updatedAt: nowIso },
+          { lastUpdateTime: doc.updateTime },
+        );
+      } catch {
+        continue; // Claimed by another instance, or re-indexed since the read
+      }
+
+      try {
+        await dispatchNotification(deadlineNotification(entry, stage, now));
+        notifications++;
+      } catch (err: any) {
+        errors.push(`${entry.reference}: ${err.message}`);
+        const attempts = entry.failedAttempts ?? 0;
+        const retryAt = new Date(now + Math.min(RETRY_BASE_MS * 2 ** attempts, RETRY_MAX_MS)).toISOString();
+        try {
+          await doc.ref.update(
+            { stage: entry.stage, checkAt: retryAt, failedAttempts: attempts + 1, updatedAt: nowIso },
+            { lastUpdateTime: claimed?.writeTime },
+          );
+        } catch {
+          // Re-indexed since the claim — the new entry carries its own checkAt
+        }
+      }
+    }
+
+    last = snapshot.docs[snapshot.docs.length - 1];
+    if (snapshot.size < INDEX_CHUNK_SIZE) break;
+  }
+
+  return { processed, notifications, errors };
+}
+
+// ---- Deadline Scheduler ----
+// Sleeps until the earliest checkAt in the index. Case writes pull the
+// wake-up forward; the sleep is capped so writes made by other server
+// instances are still picked up.
+
+const MAX_SCHEDULER_SLEEP_MS = 6 * 60 * 60 * 1000;
+
+let schedulerStarted = false;
+let wakeTimer: ReturnType<typeof setTimeout> | null = null;
+let wakeAt = Infinity;
+
+function scheduleWake(at: number): void {
+  const when = Math.min(at, Date.now() + MAX_SCHEDULER_SLEEP_MS);
+  if (wakeTimer && when >= wakeAt) return;
+  if (wakeTimer) clearTimeout(wakeTimer);
+  wakeAt = when;
+  wakeTimer = setTimeout(onWake, Math.max(0, when - Date.now()));
+  wakeTimer.unref?.();
+}
+
+function wakeSchedulerFor(entries: CaseDeadline[]): void {
+  if (!schedulerStarted) return;
+  for (const entry of entries) {
+    if (entry.checkAt) scheduleWake(Date.parse(entry.checkAt));
+  }
+}
+
+async function armScheduler(): Promise<void> {
+  // Any string sorts after '', so this skips entries whose checkAt is null
+  const [next] = await getDocs<CaseDeadline>(
+    collections.caseDeadlines,
+    [{ field: 'checkAt', op: '>=', value: '' }],
+    { field: 'checkAt' },
+    1,
+  );
+  scheduleWake(next?.checkAt ? Date.parse(next.checkAt) : Infinity);
+}
+
+async function onWake(): Promise<void> {
+  wakeTimer = null;
+  wakeAt = Infinity;
+  try {
+    const result = await processDueDeadlines();
+    if (result.notifications > 0) {
+      console.log(`[awaabs-law] Deadline check: ${result.notifications} notification(s) sent`);
+    }
+  } catch (err: any) {
+    console.error('[awaabs-law] Deadline check failed:', err.message);
+  }
+  try {
+    await armScheduler();
+  } catch (err: any) {
+    console.error('[awaabs-law] Failed to schedule next deadline check:', err.message);
+    scheduleWake(Date.now() + MAX_SCHEDULER_SLEEP_MS);
+  }
+}
+
+export async function startDeadlineScheduler(): Promise<void> {
+  if (schedulerStarted) return;
+  schedulerStarted = true;
+  await armScheduler();
+}
+
+export function stopDeadlineScheduler(): void {
+  schedulerStarted = false;
+  if (wakeTimer) clearTimeout(wakeTimer);
+  wakeTimer = null;
+  wakeAt = Infinity;
+}
+
 // ---- Scan All Cases ----
 
-export async function scanAwaabsLawCases(): Promise<{
+type AwaabsLawCaseSummary = { caseId: string; reference: string; hazardCategory: string; daysRemaining: number; phase: string };
+
+/**
+ * Compliance overview of open Awaab's Law cases, read from the deadline
+ * index: counts come from aggregation queries and the case list is the
+ * `limit` most urgent deadlines.
+ */
+export async function scanAwaabsLawCases(limit = 500): Promise<{
   totalCases: number;
   compliant: number;
   atRisk: number;
   breached: number;
-  cases: { caseId: string; reference: string; hazardCategory: string; daysRemaining: number; phase: string }[];
+  cases: AwaabsLawCaseSummary[];
 }> {
-  const allCases = await getDocs<CaseDoc>(collections.cases, undefined, undefined, 2000);
-  const dampCases = allCases.filter(c =>
-    (c.type === 'damp-mould' || c.isAwaabsLaw) &&
-    !['completed', 'closed', 'cancelled'].includes(c.status),
-  );
-
-  let compliant = 0;
-  let atRisk = 0;
-  let breached = 0;
-  const caseResults: { caseId: string; reference: string; hazardCategory: string; daysRemaining: number; phase: string }[] = [];
-
-  for (const caseDoc of dampCases) {
-    try {
-      const hazardCategory = determineHazardCategory(caseDoc, null);
-      const timeline = calculateTimeline(caseDoc.createdDate, hazardCategory, caseDoc.status);
-
-      caseResults.push({
-        caseId: caseDoc.id,
-        reference: caseDoc.reference,
-        hazardCategory,
-        daysRemaining: timeline.daysRemaining,
-        phase: timeline.currentPhase,
-      });
-
-      if (timeline.daysRemaining <= 0) {
-        breached++;
-      } else if (timeline.daysRemaining <= 5) {
-        atRisk++;
-      } else {
-        compliant++;
-      }
-    } catch {
-      // Skip cases with errors
-    }
-  }
-
-  // Sort by days remaining (most urgent first)
-  caseResults.sort((a, b) => a.daysRemaining - b.daysRemaining);
+  const now = Date.now();
+  const awaabs = collections.caseDeadlines.where('kind', '==', 'awaabs-law');
+  const countUntil = async (ms: number) =>
+    (await awaabs.where('dueAt', '<=', new Date(ms).toISOString()).count().get()).data().count;
+
+  const [totalSnapshot, breached, dueSoon, entries] = await Promise.all([
+    awaabs.count().get(),
+    countUntil(now),
+    countUntil(now + AT_RISK_DAYS * DAY_MS),
+    getDocs<CaseDeadline>(
+      collections.caseDeadlines,
+      [{ field: 'kind', op: '==', value: 'awaabs-law' }],
+      { field: 'dueAt' },
+      limit,
+    ),
+  ]);
+  const totalCases = totalSnapshot.data().count;
+
+  const cases = entries.map(entry => {
+    const daysRemaining = daysUntil(entry.dueAt, now);
+    return {
+      caseId: entry.caseId,
+      reference: entry.reference,
+      hazardCategory: entry.hazardCategory ?? 'category-2',
+      daysRemaining,
+      phase: daysRemaining < 0 ? 'breached' : entry.phase ?? 'reported',
+    };
+  });
 
   return {
-    totalCases: dampCases.length,
-    compliant,
-    atRisk,
+    totalCases,
+    compliant: totalCases - dueSoon,
+    atRisk: dueSoon - breached,
     breached,
-    cases: caseResults,
+    cases,
   };
 }
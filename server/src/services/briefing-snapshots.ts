@@ -0,0 +1,288 @@
+// ============================================================
+// SocialHomes.Ai — Briefing Snapshots
+// Materialised briefing KPIs per persona scope in the
+// briefingSnapshots collection. Case, tenant and property writes
+// stage their delta as increments in the entity write's own
+// transaction (entity-writes.ts); writes that bypass it (imports,
+// seeding) are corrected by the nightly rebuild. The briefing
+// endpoint serves a scope in one document read.
+// ============================================================
+
+import { db, collections, getDoc, getDocs, FieldValue } from './firestore.js';
+import type { CaseDoc, TenantDoc, PropertyDoc } from '../models/firestore-schemas.js';
+
+// ---- Scopes ----
+
+export interface BriefingScope {
+  id: string;
+  showAllData?: boolean;
+  officerName?: string;
+  teamMembers?: string[];
+}
+
+export const BRIEFING_SCOPES: BriefingScope[] = [
+  { id: 'all', showAllData: true },
+  { id: 'team-manager', teamMembers: ['Sarah Mitchell', 'James Okoye', 'Lisa Wong'] },
+  { id: 'officer-sarah-mitchell', officerName: 'Sarah Mitchell' },
+  { id: 'officer-mark-stevens', officerName: 'Mark Stevens' },
+];
+
+const PERSONA_SCOPES: Record<string, string> = {
+  'coo': 'all',
+  'head-of-service': 'all',
+  'manager': 'team-manager',
+  'housing-officer': 'officer-sarah-mitchell',
+  'operative': 'officer-mark-stevens',
+};
+
+export function scopeForPersona(persona: string): BriefingScope {
+  const id = PERSONA_SCOPES[persona] || PERSONA_SCOPES['housing-officer'];
+  return BRIEFING_SCOPES.find(s => s.id === id)!;
+}
+
+function inScope(scope: BriefingScope, person: string | undefined): boolean {
+  if (scope.showAllData) return true;
+  if (!person) return false;
+  if (scope.teamMembers) return scope.teamMembers.includes(person);
+  return person === scope.officerName;
+}
+
+// ---- Snapshot Shape ----
+
+export const KPI_FIELDS = [
+  'totalTenants',
+  'openRepairs',
+  'openComplaints',
+  'openDampCases',
+  'totalArrears',
+  'tenantsInArrears',
+  'highRiskTenants',
+  'dampRiskProperties',
+  'emergencyRepairs',
+  'breachedSla',
+] as const;
+
+export type BriefingKpi = typeof KPI_FIELDS[number];
+
+const TASK_LISTS = ['emergencyTasks', 'complaintTasks'] as const;
+type TaskList = typeof TASK_LISTS[number];
+
+export interface BriefingTask {
+  id: string;
+  description: string;
+  priority: 'high';
+  dueDate: string;
+  type: string;
+}
+
+export interface BriefingSnapshot {
+  scope: string;
+  version: number;
+  kpis: Record<BriefingKpi, number>;
+  /** Keyed by case id so a single case can be added or removed in place */
+  emergencyTasks: Record<string, BriefingTask>;
+  complaintTasks: Record<string, BriefingTask>;
+  builtAt: string;
+  updatedAt: string;
+}
+
+// Bump when the snapshot shape or a KPI definition changes; older
+// documents are then rebuilt on first read.
+const SNAPSHOT_VERSION = 1;
+
+// ---- Contributions ----
+// What one document adds to a scope's snapshot. A write applies
+// contribution(after) - contribution(before) to every scope it touches.
+
+interface Contribution {
+  /** Handler / assigned officer; null applies to every scope */
+  person: string | null | undefined;
+  counters: Partial<Record<BriefingKpi, number>>;
+  tasks: Partial<Record<TaskList, BriefingTask>>;
+}
+
+function caseContribution(c: CaseDoc | null): Contribution | null {
+  if (!c) return null;
+  const counters: Partial<Record<BriefingKpi, number>> = {};
+  const tasks: Partial<Record<TaskList, BriefingTask>> = {};
+
+  const openRepair = c.type === 'repair' && c.status !== 'completed' && c.status !== 'cancelled';
+  const openComplaint = c.type === 'complaint' && c.status !== 'closed';
+  if (openRepair) counters.openRepairs = 1;
+  if (openComplaint) counters.openComplaints = 1;
+  if (c.type === 'damp-mould' && c.status !== 'closed') counters.openDampCases = 1;
+  if (c.slaStatus === 'breached') counters.breachedSla = 1;
+
+  if (openRepair && c.priority === 'emergency') {
+    counters.emergencyRepairs = 1;
+    tasks.emergencyTasks = {
+      id: c.id,
+      description: `Emergency repair: ${c.subject}`,
+      priority: 'high',
+      dueDate: c.targetDate || 'Today',
+      type: 'repair',
+    };
+  }
+  if (openComplaint && (c.slaStatus === 'approaching' || c.slaStatus === 'breached')) {
+    tasks.complaintTasks = {
+      id: c.id,
+      description: `Complaint deadline approaching: ${c.subject}`,
+      priority: 'high',
+      dueDate: c.targetDate || 'This week',
+      type: 'complaint',
+    };
+  }
+  return { person: c.handler, counters, tasks };
+}
+
+function tenantContribution(t: TenantDoc | null): Contribution | null {
+  if (!t) return null;
+  const counters: Partial<Record<BriefingKpi, number>> = { totalTenants: 1 };
+  if (t.rentBalance < 0) {
+    counters.tenantsInArrears = 1;
+    counters.totalArrears = Math.abs(t.rentBalance);
+  }
+  if (t.arrearsRisk > 70) counters.highRiskTenants = 1;
+  return { person: t.assignedOfficer, counters, tasks: {} };
+}
+
+function propertyContribution(p: PropertyDoc | null): Contribution | null {
+  if (!p) return null;
+  // Damp risk is reported estate-wide for every persona
+  return { person: null, counters: p.dampRisk > 50 ? { dampRiskProperties: 1 } : {}, tasks: {} };
+}
+
+function appliesTo(scope: BriefingScope, contribution: Contribution | null): Contribution | null {
+  if (!contribution) return null;
+  if (contribution.person === null || inScope(scope, contribution.person)) return contribution;
+  return null;
+}
+
+// ---- Build ----
+
+function emptySnapshot(scope: BriefingScope, now: string): BriefingSnapshot {
+  const kpis = Object.fromEntries(KPI_FIELDS.map(k => [k, 0])) as Record<BriefingKpi, number>;
+  return { scope: scope.id, version: SNAPSHOT_VERSION, kpis, emergencyTasks: {}, complaintTasks: {}, builtAt: now, updatedAt: now };
+}
+
+function accumulate(snapshot: BriefingSnapshot, contribution: Contribution): void {
+  for (const [key, value] of Object.entries(contribution.counters)) {
+    snapshot.kpis[key as BriefingKpi] += value;
+  }
+  for (const list of TASK_LISTS) {
+    const task = contribution.tasks[list];
+    if (task) snapshot[list][task.id] = task;
+  }
+}
+
+/** Compute every scope's snapshot from a full read of cases, tenants and properties. */
+export function buildBriefingSnapshots(
+  cases: CaseDoc[],
+  tenants: TenantDoc[],
+  properties: PropertyDoc[],
+): Record<string, BriefingSnapshot> {
+  const now = new Date().toISOString();
+  const contributions = [
+    ...cases.map(caseContribution),
+    ...tenants.map(tenantContribution),
+    ...properties.map(propertyContribution),
+  ];
+  const snapshots: Record<string, BriefingSnapshot> = {};
+  for (const scope of BRIEFING_SCOPES) {
+    const snapshot = emptySnapshot(scope, now);
+    for (const contribution of contributions) {
+      const applied = appliesTo(scope, contribution);
+      if (applied) accumulate(snapshot, applied);
+    }
+    snapshots[scope.id] = snapshot;
+  }
+  return snapshots;
+}
+
+let rebuilding: Promise<Record<string, BriefingSnapshot>> | null = null;
+
+/**
+ * Recompute and overwrite every scope's snapshot. Used on first read, after
+ * bulk writes that bypass the hooks below, and nightly to correct drift.
+ * Concurrent callers share one rebuild.
+ */
+export function rebuildBriefingSnapshots(): Promise<Record<string, BriefingSnapshot>> {
+  if (!rebuilding) {
+    rebuilding = (async () => {
+      const [cases, tenants, properties] = await Promise.all([
+        getDocs<CaseDoc>(collections.cases),
+        getDocs<TenantDoc>(collections.tenants),
+        getDocs<PropertyDoc>(collections.properties),
+      ]);
+      const snapshots = buildBriefingSnapshots(cases, tenants, properties);
+      const batch = db.batch();
+      for (const snapshot of Object.values(snapshots)) {
+        batch.set(collections.briefingSnapshots.doc(snapshot.scope), snapshot);
+      }
+      await batch.commit();
+      return snapshots;
+    })().finally(() => { rebuilding = null; });
+  }
+  return rebuilding;
+}
+
+// ---- Read ----
+
+export async function getBriefingSnapshot(scope: BriefingScope): Promise<BriefingSnapshot> {
+  const snapshot = await getDoc<BriefingSnapshot>(collections.briefingSnapshots, scope.id);
+  if (snapshot?.builtAt && snapshot.version === SNAPSHOT_VERSION) return snapshot;
+  const rebuilt = await rebuildBriefingSnapshots();
+  return rebuilt[scope.id];
+}
+
+// ---- Write Hooks ----
+
+/** A write batch or transaction; both stage merged sets the same way */
+interface SnapshotWriter {
+  set(ref: FirebaseFirestore.DocumentReference, data: FirebaseFirestore.DocumentData, options: FirebaseFirestore.SetOptions): unknown;
+}
+
+/** Stage contribution(after) - contribution(before) on every scope. */
+function stageDelta(writer: SnapshotWriter, id: string, before: Contribution | null, after: Contribution | null): void {
+  const now = new Date().toISOString();
+
+  for (const scope of BRIEFING_SCOPES) {
+    const b = appliesTo(scope, before);
+    const a = appliesTo(scope, after);
+    if (!a && !b) continue;
+
+    const update: Record<string, unknown> = {};
+    const kpis: Record<string, unknown> = {};
+    for (const key of KPI_FIELDS) {
+      const delta = (a?.counters[key] ?? 0) - (b?.counters[key] ?? 0);
+      if (delta !== 0) kpis[key] = FieldValue.increment(delta);
+    }
+    if (Object.keys(kpis).length > 0) update.kpis = kpis;
+
+    for (const list of TASK_LISTS) {
+      const next = a?.tasks[list];
+      const prev = b?.tasks[list];
+      if (next && JSON.stringify(next) !== JSON.stringify(prev)) {
+        update[list] = { [id]: next };
+      } else if (!next && prev) {
+        update[list] = { [id]: FieldValue.delete() };
+      }
+    }
+
+    if (Object.keys(update).length === 0) continue;
+    update.updatedAt = now;
+    writer.set(collections.briefingSnapshots.doc(scope.id), update, { merge: true });
+  }
+}
+
+export function stageCaseBriefing(writer: SnapshotWriter, id: string, before: CaseDoc | null, after: CaseDoc | null): void {
+  stageDelta(writer, id, caseContribution(before), caseContribution(after));
+}
+
+export function stageTenantBriefing(writer: SnapshotWriter, id: string, before: TenantDoc | null, after: TenantDoc | null): void {
+  stageDelta(writer, id, tenantContribution(before), tenantContribution(after));
+}
+
+export function stagePropertyBriefing(writer: SnapshotWriter, id: string, before: PropertyDoc | null, after: PropertyDoc | null): void {
+  stageDelta(writer, id, propertyContribution(before), propertyContribution(after));
+}
@@ -6,6 +6,10 @@
 
 import { db, collections, getDocs, FieldValue } from './firestore.js';
 import { dispatchBulkNotification } from './notification-dispatch.js';
+import type { BulkDispatchResult } from './notification-dispatch.js';
+import { withDateKey } from './entity-index.js';
+import { rebuildBriefingSnapshots } from './briefing-snapshots.js';
+import { reindexCaseDeadlines } from './awaabs-law.js';
 import type { CaseDoc, TenantDoc, PropertyDoc } from '../models/firestore-schemas.js';
 
 // ---- Types ----
@@ -22,6 +26,8 @@ export interface BulkOperationResult {
   startedAt: string;
   completedAt?: string;
   duration?: number;
+  /** Notification fan-out summary, for operations that notify */
+  delivery?: Pick<BulkDispatchResult, 'sent' | 'failed' | 'byChannel' | 'durationMs' | 'throughput'>;
 }
 
 // ---- Progress Tracking ----
@@ -44,6 +50,23 @@ function createOperation(type: string, total: number): BulkOperationResult {
   return op;
 }
 
+// Count each tenant as succeeded or failed from a bulk notification result
+function recordDelivery(op: BulkOperationResult, tenantIds: string[], delivery: BulkDispatchResult): void {
+  const failures = new Map(delivery.failures.map(f => [f.userId, f.error]));
+  for (const tenantId of tenantIds) {
+    const error = failures.get(tenantId);
+    if (error) {
+      op.failed++;
+      op.errors.push({ itemId: tenantId, error });
+    } else {
+      op.succeeded++;
+    }
+    op.processed++;
+  }
+  const { sent, failed, byChannel, durationMs, throughput } = delivery;
+  op.delivery = { sent, failed, byChannel, durationMs, throughput };
+}
+
 function completeOperation(op: BulkOperationResult): BulkOperationResult {
   op.completedAt = new Date().toISOString();
   op.duration = new Date(op.completedAt).getTime() - new Date(op.startedAt).getTime();
@@ -80,7 +103,7 @@ export async function bulkUpdateCaseStatus(
 
         // Log activity
         const activityRef = collections.activities.doc();
-        batch.set(activityRef, {
+        batch.set(activityRef, withDateKey({
           caseId,
           tenantId: '',
           type: 'status-change',
@@ -88,7 +111,7 @@ export async function bulkUpdateCaseStatus(
           description: notes || `Bulk operation: status updated to ${newStatus}`,
           date: new Date().toISOString(),
           officer: updatedBy,
-        });
+        }));
 
         op.succeeded++;
       } catch (err: any) {
@@ -109,6 +132,16 @@ export async function bulkUpdateCaseStatus(
     }
   }
 
+  // Batched status changes bypass the per-case briefing and deadline hooks
+  if (op.succeeded > 0) {
+    await rebuildBriefingSnapshots().catch((err: any) => {
+      console.error('[bulk-operations] Briefing snapshot rebuild failed:', err.message);
+    });
+    await reindexCaseDeadlines(caseIds).catch((err: any) => {
+      console.error('[bulk-operations] Deadline re-index failed:', err.message);
+    });
+  }
+
   return completeOperation(op);
 }
 
@@ -124,26 +157,21 @@ export async function bulkSendCommunication(
 ): Promise<BulkOperationResult> {
   const op = createOperation('communication-send', tenantIds.length);
 
-  for (const tenantId of tenantIds) {
-    try {
-      await dispatchBulkNotification([tenantId], {
-        category: 'system',
-        priority: 'medium',
-        title: subject,
-        body,
-        entityType: 'tenant',
-        entityId: tenantId,
-        templateId,
-        channels,
-        metadata: { senderId, bulkOperation: op.operationId },
-      });
-      op.succeeded++;
-    } catch (err: any) {
-      op.failed++;
-      op.errors.push({ itemId: tenantId, error: err.message });
-    }
-    op.processed++;
-  }
+  const delivery = await dispatchBulkNotification(
+    tenantIds,
+    {
+      category: 'system',
+      priority: 'medium',
+      title: subject,
+      body,
+      entityType: 'tenant',
+      templateId,
+      channels,
+      metadata: { senderId, bulkOperation: op.operationId },
+    },
+    tenantId => ({ entityId: tenantId }),
+  );
+  recordDelivery(op, tenantIds, delivery);
 
   return completeOperation(op);
 }
@@ -213,38 +241,51 @@ export async function bulkArrearsAction(
   officer: string,
 ): Promise<BulkOperationResult> {
   const op = createOperation('arrears-action', tenantIds.length);
+  const recorded: string[] = [];
 
-  for (const tenantId of tenantIds) {
-    try {
-      // Create activity record
-      await collections.activities.add({
+  for (let i = 0; i < tenantIds.length; i += 500) {
+    const batch = db.batch();
+    const chunk = tenantIds.slice(i, i + 500);
+
+    // Create activity records
+    for (const tenantId of chunk) {
+      batch.set(collections.activities.doc(), withDateKey({
         tenantId,
         type: `arrears-${actionType}`,
         subject: `Arrears action: ${actionType}`,
         description: JSON.stringify(actionDetails),
         date: new Date().toISOString(),
         officer,
-      });
-
-      // Send notification to tenant (via in-app channel)
-      await dispatchBulkNotification([tenantId], {
-        category: 'arrears-alert',
-        priority: 'medium',
-        title: `Arrears action: ${actionType.replace(/-/g, ' ')}`,
-        body: `An arrears action has been recorded for your account.`,
-        entityType: 'tenant',
-        entityId: tenantId,
-        channels: ['in-app'],
-      });
+      }));
+    }
 
-      op.succeeded++;
+    try {
+      await batch.commit();
+      recorded.push(...chunk);
     } catch (err: any) {
-      op.failed++;
-      op.errors.push({ itemId: tenantId, error: err.message });
+      for (const tenantId of chunk) {
+        op.failed++;
+        op.errors.push({ itemId: tenantId, error: `Batch commit failed: ${err.message}` });
+        op.processed++;
+      }
     }
-    op.processed++;
   }
 
+  // Notify tenants whose action was recorded (via in-app channel)
+  const delivery = await dispatchBulkNotification(
+    recorded,
+    {
+      category: 'arrears-alert',
+      priority: 'medium',
+      title: `Arrears action: ${actionType.replace(/-/g, ' ')}`,
+      body: `An arrears action has been recorded for your account.`,
+      entityType: 'tenant',
+      channels: ['in-app'],
+    },
+    tenantId => ({ entityId: tenantId }),
+  );
+  recordDelivery(op, recorded, delivery);
+
   return completeOperation(op);
 }
 
@@ -0,0 +1,120 @@
+// ============================================================
+// SocialHomes.Ai — Indexed Case Queries
+// List filters pushed down to Firestore, ordered on the
+// write-time normalised createdDateIso key, cursor pagination.
+// ============================================================
+
+import { collections, serializeFirestoreData, DOCUMENT_ID } from './firestore.js';
+import { normaliseDateKey, backfillDateKey } from './entity-index.js';
+import type { CaseDoc } from '../models/firestore-schemas.js';
+
+// ---- Types ----
+
+export const CASE_FILTER_FIELDS = ['type', 'status', 'handler', 'priority', 'propertyId', 'tenantId'] as const;
+
+export type CaseFilterField = typeof CASE_FILTER_FIELDS[number];
+export type CaseFilters = Partial<Record<CaseFilterField, string>>;
+
+/** Position of the last case on a page: [createdDateIso, document id] */
+export type CaseCursor = [string, string];
+
+export interface CaseQueryOptions {
+  limit: number;
+  cursor?: CaseCursor;
+  /** Legacy offset paging — Firestore still reads the skipped documents */
+  offset?: number;
+}
+
+export interface CaseQueryResult {
+  items: CaseDoc[];
+  total: number;
+  nextCursor: string | null;
+}
+
+export const MAX_CASE_PAGE_SIZE = 1000;
+
+// ---- Date Key ----
+
+/**
+ * Stamp the createdDateIso sort key onto case data about to be written.
+ * Data without a createdDate (e.g. a partial PATCH) is returned unchanged.
+ */
+export function withCaseDateKey<T extends object>(data: T): T {
+  const createdDate = (data as { createdDate?: string }).createdDate;
+  if (createdDate === undefined) return data;
+  return { ...data, createdDateIso: normaliseDateKey(createdDate) };
+}
+
+// ---- Cursors ----
+
+export function encodeCaseCursor(caseDoc: { id: string; createdDateIso?: string }): string {
+  return Buffer.from(JSON.stringify([caseDoc.createdDateIso ?? '', caseDoc.id])).toString('base64url');
+}
+
+export function decodeCaseCursor(cursor: string): CaseCursor | null {
+  try {
+    const value = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+    if (Array.isArray(value) && value.length === 2 && typeof value[0] === 'string' && typeof value[1] === 'string') {
+      return [value[0], value[1]];
+    }
+  } catch {
+    // Fall through — malformed cursor
+  }
+  return null;
+}
+
+// ---- Query ----
+
+function filteredCases(filters: CaseFilters): FirebaseFirestore.Query {
+  let query: FirebaseFirestore.Query = collections.cases;
+  for (const field of CASE_FILTER_FIELDS) {
+    const value = filters[field];
+    if (value) query = query.where(field, '==', value);
+  }
+  return query;
+}
+
+/**
+ * One page of cases, newest first. Equality filters run in Firestore
+ * (see the cases indexes in firestore.indexes.json), so the cost of a
+ * page is proportional to its size rather than to the whole collection.
+ */
+export async function queryCases(filters: CaseFilters, options: CaseQueryOptions): Promise<CaseQueryResult> {
+  const limit = Math.max(1, Math.min(options.limit, MAX_CASE_PAGE_SIZE));
+  const query = filteredCases(filters);
+
+  let page = query.orderBy('createdDateIso', 'desc').orderBy(DOCUMENT_ID, 'desc');
+  if (options.cursor) {
+    page = page.startAfter(...options.cursor);
+  } else if (options.offset) {
+    page = page.offset(options.offset);
+  }
+
+  // Fetch one extra document to know whether another page exists
+  const [countSnapshot, snapshot] = await Promise.all([
+    query.count().get(),
+    page.limit(limit + 1).get(),
+  ]);
+
+  const items = snapshot.docs
+    .slice(0, limit)
+    .map(doc => serializeFirestoreData({ id: doc.id, ...doc.data() }) as CaseDoc);
+  const last = items[items.length - 1];
+
+  return {
+    items,
+    total: countSnapshot.data().count,
+    nextCursor: snapshot.docs.length > limit && last ? encodeCaseCursor(last) : null,
+  };
+}
+
+// ---- Backfill ----
+
+/**
+ * Write createdDateIso onto existing cases that are missing it or whose
+ * createdDate has changed format. Firestore omits documents without the
+ * ordered field from queryCases(), so this must run once after deploy.
+ */
+export function backfillCaseDateKeys(): Promise<{ processed: number; updated: number }> {
+  return backfillDateKey(collections.cases, 'createdDate', 'createdDateIso');
+}
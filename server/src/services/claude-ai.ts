@@ -6,6 +6,7 @@
 // ============================================================
 
 import Anthropic from '@anthropic-ai/sdk';
+import { cachedAiResponse } from './ai-response-cache.js';
 
 // ---- Configuration ----
 
@@ -160,20 +161,101 @@ export async function generateChatResponse(query: string, context?: {
     ? `${contextBlock}\n\n---\n\nQuery: ${query}`
     : query;
 
-  try {
-    const response = await client.messages.create({
+  const maxTokens = model === MODEL_COMPLEX ? 2048 : 1024;
+  const anthropic = client;
+
+  const { value } = await cachedAiResponse({
+    namespace: 'chat',
+    model,
+    systemPrompt: HOUSING_SYSTEM_PROMPT,
+    prompt: userMessage,
+    params: { maxTokens },
+    entities: contextEntities(context),
+    ttlMs: CHAT_CACHE_TTL_MS,
+  }, async () => {
+    try {
+      const response = await anthropic.messages.create({
+        model,
+        max_tokens: maxTokens,
+        system: HOUSING_SYSTEM_PROMPT,
+        messages: [{ role: 'user', content: userMessage }],
+      });
+
+      const textBlock = response.content.find(b => b.type === 'text');
+      return textBlock
+        ? { value: textBlock.text, cacheable: true }
+        : { value: 'I was unable to generate a response. Please try again.', cacheable: false };
+    } catch (err: any) {
+      console.error('[claude-ai] Chat error:', err.message);
+      return { value: fallbackChatResponse(query), cacheable: false };
+    }
+  });
+  return value;
+}
+
+// Chat answers quote live figures (balances, case status), so they are
+// reused for an hour; entity edits purge them sooner
+const CHAT_CACHE_TTL_MS = 3600 * 1000;
+
+function contextEntities(context?: { tenantData?: any; propertyData?: any; caseData?: any }): string[] {
+  const entities: string[] = [];
+  if (context?.tenantData?.id) entities.push(`tenants/${context.tenantData.id}`);
+  if (context?.propertyData?.id) entities.push(`properties/${context.propertyData.id}`);
+  if (context?.caseData?.id) entities.push(`cases/${context.caseData.id}`);
+  return entities;
+}
+
+/** One piece of a streamed reply: text as it arrives, usage when known */
+export interface ChatStreamChunk {
+  text?: string;
+  outputTokens?: number;
+}
+
+/**
+ * Stream a chat response from Claude as the model produces it. Returns
+ * null when the API key is missing so the caller can use its own
+ * fallback. Aborting the signal cancels the upstream request.
+ */
+export function streamChatResponse(
+  query: string,
+  context?: {
+    persona?: string;
+    tenantData?: any;
+    propertyData?: any;
+    caseData?: any;
+    /** Context already prepared by the caller (masked, with any summary); replaces the entity data */
+    contextText?: string;
+  },
+  options: { history?: { role: 'user' | 'assistant'; content: string }[]; signal?: AbortSignal } = {},
+): { model: string; chunks: AsyncGenerator<ChatStreamChunk> } | null {
+  if (!client) return null;
+  const anthropic = client;
+
+  const model = selectModel(query);
+  const contextBlock = context?.contextText ?? buildContextBlock(context);
+  const userMessage = contextBlock
+    ? `${contextBlock}\n\n---\n\nQuery: ${query}`
+    : query;
+
+  async function* chunks(): AsyncGenerator<ChatStreamChunk> {
+    const stream = await anthropic.messages.create({
       model,
       max_tokens: model === MODEL_COMPLEX ? 2048 : 1024,
       system: HOUSING_SYSTEM_PROMPT,
-      messages: [{ role: 'user', content: userMessage }],
-    });
-
-    const textBlock = response.content.find(b => b.type === 'text');
-    return textBlock ? textBlock.text : 'I was unable to generate a response. Please try again.';
-  } catch (err: any) {
-    console.error('[claude-ai] Chat error:', err.message);
-    return fallbackChatResponse(query);
+      messages: [...(options.history ?? []), { role: 'user', content: userMessage }],
+      stream: true,
+    }, { signal: options.signal });
+
+    for await (const event of stream) {
+      if (event.type === 'content_block_delta' && event.delta.type === 'text_delta') {
+        yield { text: event.delta.text };
+      } else if (event.type === 'message_delta') {
+        yield { outputTokens: event.usage.output_tokens };
+      }
+    }
   }
+
+  return { model, chunks: chunks() };
 }
 
 /**
@@ -186,6 +268,8 @@ export async function draftCommunication(params: {
   tone: string;
   context: string;
   caseRef?: string;
+  /** Entities the context was built from, as `${collectionId}/${id}` */
+  entities?: string[];
 }): Promise<{ subject: string; body: string }> {
   const fallbackSubject = `Re: ${params.communicationType.replace(/-/g, ' ')}`;
   const fallbackBody = `Dear ${params.tenantName},\n\nThank you for contacting us. We are writing to update you regarding your ${params.communicationType.replace(/-/g, ' ')}.\n\nIf you have any questions, please contact your Housing Officer on 0800 XXX XXXX.\n\nKind regards,\nRiverside Community Housing Association\n${new Date().toLocaleDateString('en-GB')}`;
@@ -219,30 +303,45 @@ Respond in JSON format:
 
 The body should be the complete letter text. Do not include any text outside the JSON.`;
 
-  try {
-    const response = await client.messages.create({
-      model: MODEL_COMPLEX,
-      max_tokens: 2048,
-      system: HOUSING_SYSTEM_PROMPT,
-      messages: [{ role: 'user', content: prompt }],
-    });
-
-    const textBlock = response.content.find(b => b.type === 'text');
-    if (!textBlock) {
-      return { subject: fallbackSubject, body: fallbackBody };
+  const anthropic = client;
+  const fallback = { value: { subject: fallbackSubject, body: fallbackBody }, cacheable: false };
+
+  const { value } = await cachedAiResponse({
+    namespace: 'draft-communication',
+    model: MODEL_COMPLEX,
+    systemPrompt: HOUSING_SYSTEM_PROMPT,
+    prompt,
+    // The letter carries today's date, so a draft is only reused on the day it was written
+    params: { maxTokens: 2048, date: new Date().toISOString().slice(0, 10) },
+    entities: params.entities,
+  }, async () => {
+    try {
+      const response = await anthropic.messages.create({
+        model: MODEL_COMPLEX,
+        max_tokens: 2048,
+        system: HOUSING_SYSTEM_PROMPT,
+        messages: [{ role: 'user', content: prompt }],
+      });
+
+      const textBlock = response.content.find(b => b.type === 'text');
+      if (!textBlock) return fallback;
+
+      // Parse the JSON response — Claude may wrap it in markdown code fences
+      const raw = textBlock.text.replace(/```json\s*/g, '').replace(/```\s*/g, '').trim();
+      const parsed = JSON.parse(raw);
+      return {
+        value: {
+          subject: parsed.subject || fallbackSubject,
+          body: parsed.body || fallbackBody,
+        },
+        cacheable: !!parsed.subject && !!parsed.body,
+      };
+    } catch (err: any) {
+      console.error('[claude-ai] Draft communication error:', err.message);
+      return fallback;
     }
-
-    // Parse the JSON response — Claude may wrap it in markdown code fences
-    const raw = textBlock.text.replace(/```json\s*/g, '').replace(/```\s*/g, '').trim();
-    const parsed = JSON.parse(raw);
-    return {
-      subject: parsed.subject || fallbackSubject,
-      body: parsed.body || fallbackBody,
-    };
-  } catch (err: any) {
-    console.error('[claude-ai] Draft communication error:', err.message);
-    return { subject: fallbackSubject, body: fallbackBody };
-  }
+  });
+  return value;
 }
 
 /**
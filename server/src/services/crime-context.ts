@@ -5,6 +5,7 @@
 // ============================================================
 
 import { collections, getDocs, getDoc } from './firestore.js';
+import { cachedGetDoc } from './entity-cache.js';
 import { fetchWithCache } from './external-api.js';
 import type { EstateDoc, CaseDoc, PropertyDoc } from '../models/firestore-schemas.js';
 
@@ -153,7 +154,7 @@ function generateBriefing(
 
 // ── Main: Estate Crime Context ──
 export async function getEstateCrimeContext(estateId: string, months = 3): Promise<CrimeContext> {
-  const estate = await getDoc<EstateDoc>(collections.estates, estateId);
+  const estate = await cachedGetDoc<EstateDoc>(collections.estates, estateId);
   if (!estate) throw new Error(`Estate ${estateId} not found`);
 
   // Fetch police data and internal ASB cases in parallel
@@ -4,8 +4,10 @@
 // damp/mould risk before it manifests visibly.
 // ============================================================
 
-import { collections, getDocs, getDoc, serializeFirestoreData } from './firestore.js';
+import { collections, getDocs, getDocsIn, getDoc, serializeFirestoreData } from './firestore.js';
+import { cachedGetDoc, cachedGetDocs } from './entity-cache.js';
 import { fetchWithCache } from './external-api.js';
+import { mapWithConcurrency } from './concurrency.js';
 import type { PropertyDoc, CaseDoc, EstateDoc, BlockDoc, TenantDoc } from '../models/firestore-schemas.js';
 
 // ── Weights ──
@@ -47,20 +49,37 @@ export interface DampPrediction {
   predictedAt: string;
 }
 
-// ── Weather Factor ──
-async function calculateWeatherFactor(lat: number, lng: number): Promise<DampFactor> {
-  let humidity = 80;
-  let precipitation = 8;
-  let temperature = 7;
+// ── Weather ──
+export interface WeatherReading {
+  humidity: number;
+  precipitation: number;
+  temperature: number;
+}
+
+const DEFAULT_WEATHER: WeatherReading = { humidity: 80, precipitation: 8, temperature: 7 };
+
+// Open-Meteo's forecast grid is roughly 0.1°, so properties in the same
+// 0.1° cell share one forecast
+const WEATHER_CELLS_PER_DEGREE = 10;
+
+function weatherCell(lat: number, lng: number): { lat: number; lng: number; key: string } {
+  const cellLat = Math.round(lat * WEATHER_CELLS_PER_DEGREE) / WEATHER_CELLS_PER_DEGREE;
+  const cellLng = Math.round(lng * WEATHER_CELLS_PER_DEGREE) / WEATHER_CELLS_PER_DEGREE;
+  return { lat: cellLat, lng: cellLng, key: `${cellLat},${cellLng}` };
+}
+
+async function fetchWeather(lat: number, lng: number): Promise<WeatherReading> {
+  const reading = { ...DEFAULT_WEATHER };
+  const cell = weatherCell(lat, lng);
 
   try {
     const result = await fetchWithCache(
       'open-meteo',
-      `${lat},${lng}`,
+      cell.key,
       3600,
       async () => {
         const resp = await fetch(
-          `https://api.open-meteo.com/v1/forecast?latitude=${lat}&longitude=${lng}` +
+          `https://api.open-meteo.com/v1/forecast?latitude=${cell.lat}&longitude=${cell.lng}` +
           `&daily=temperature_2m_mean,precipitation_sum,relative_humidity_2m_mean` +
           `&timezone=Europe/London&forecast_days=7`,
         );
@@ -75,12 +94,17 @@ async function calculateWeatherFactor(lat: number, lng: number): Promise<DampFac
       const humArr = daily.relative_humidity_2m_mean ?? [];
       const precArr = daily.precipitation_sum ?? [];
       const tempArr = daily.temperature_2m_mean ?? [];
-      humidity = humArr.length > 0 ? humArr.reduce((a: number, b: number) => a + b, 0) / humArr.length : 80;
-      precipitation = precArr.length > 0 ? precArr.reduce((a: number, b: number) => a + b, 0) / precArr.length : 8;
-      temperature = tempArr.length > 0 ? tempArr.reduce((a: number, b: number) => a + b, 0) / tempArr.length : 7;
+      reading.humidity = humArr.length > 0 ? humArr.reduce((a: number, b: number) => a + b, 0) / humArr.length : 80;
+      reading.precipitation = precArr.length > 0 ? precArr.reduce((a: number, b: number) => a + b, 0) / precArr.length : 8;
+      reading.temperature = tempArr.length > 0 ? tempArr.reduce((a: number, b: number) => a + b, 0) / tempArr.length : 7;
     }
   } catch { /* use defaults */ }
 
+  return reading;
+}
+
+// ── Weather Factor ──
+function calculateWeatherFactor({ humidity, precipitation, temperature }: WeatherReading): DampFactor {
   // Score: high humidity + high precipitation + low temp = higher risk
   const humidityScore = Math.min(100, Math.max(0, (humidity - 60) * 2.5)); // 60%=0, 100%=100
   const precipScore = Math.min(100, precipitation * 5); // 20mm/day = 100
@@ -325,29 +349,39 @@ export async function predictDampRisk(propertyId: string): Promise<DampPredictio
 
   // Load related data in parallel
   const [block, propertyCases, tenant] = await Promise.all([
-    property.blockId ? getDoc<BlockDoc>(collections.blocks, property.blockId) : null,
+    property.blockId ? cachedGetDoc<BlockDoc>(collections.blocks, property.blockId) : null,
     getDocs<CaseDoc>(collections.cases, [{ field: 'propertyId', op: '==', value: propertyId }]),
     property.currentTenancyId
       ? getDoc<TenantDoc>(collections.tenants, property.currentTenancyId)
       : null,
   ]);
 
-  // Calculate all factors
-  const [weatherFactor, buildingFactor, historyFactor, sensorFactor, occupancyFactor] = await Promise.all([
-    calculateWeatherFactor(property.lat, property.lng),
-    Promise.resolve(calculateBuildingFactor(property, block)),
-    Promise.resolve(calculateHistoryFactor(propertyCases)),
-    Promise.resolve(calculateSensorFactor(property)),
-    Promise.resolve(calculateOccupancyFactor(property, tenant)),
-  ]);
+  const weather = await fetchWeather(property.lat, property.lng);
+  return buildDampPrediction(property, { block, cases: propertyCases, tenant, weather });
+}
+
+// ── Prediction From Loaded Inputs ──
+export interface DampInputs {
+  block: BlockDoc | null;
+  cases: CaseDoc[];
+  tenant: TenantDoc | null;
+  weather: WeatherReading;
+}
 
-  const factors = [weatherFactor, buildingFactor, historyFactor, sensorFactor, occupancyFactor];
+function buildDampPrediction(property: PropertyDoc, inputs: DampInputs): DampPrediction {
+  const factors = [
+    calculateWeatherFactor(inputs.weather),
+    calculateBuildingFactor(property, inputs.block),
+    calculateHistoryFactor(inputs.cases),
+    calculateSensorFactor(property),
+    calculateOccupancyFactor(property, inputs.tenant),
+  ];
   const overallScore = Math.round(factors.reduce((sum, f) => sum + f.weightedScore, 0));
   const riskLevel = classifyRisk(overallScore);
   const recommendations = generateRecommendations(factors, riskLevel);
 
   // Check Awaab's Law relevance
-  const hasAwaabs = propertyCases.some(c => c.type === 'damp-mould' && c.isAwaabsLaw);
+  const hasAwaabs = inputs.cases.some(c => c.type === 'damp-mould' && c.isAwaabsLaw);
 
   return {
     propertyId: property.id,
@@ -361,34 +395,122 @@ export async function predictDampRisk(propertyId: string): Promise<DampPredictio
   };
 }
 
+// ── Batch Scoring ──
+// Scores many properties from data loaded in a handful of bulk reads.
+// Each factor fills one column of weighted scores, and the columns are
+// summed in a single pass. Every entry comes from the same factor
+// function predictDampRisk uses, so a property scores identically either way.
+
+export interface DampScore {
+  propertyId: string;
+  address: string;
+  score: number;
+  riskLevel: RiskLevel;
+}
+
+export interface DampBatch {
+  blocks: Map<string, BlockDoc>;
+  casesByProperty: Map<string, CaseDoc[]>;
+  tenants: Map<string, TenantDoc>;
+  weatherByCell: Map<string, WeatherReading>;
+}
+
+/** Load everything a set of properties is scored from in one round of bulk reads. */
+export async function loadDampBatch(properties: PropertyDoc[]): Promise<DampBatch> {
+  const propertyIds = properties.map(p => p.id);
+  const blockIds = [...new Set(properties.map(p => p.blockId).filter(Boolean))];
+  const cells = new Map(properties.map(p => {
+    const cell = weatherCell(p.lat, p.lng);
+    return [cell.key, cell];
+  }));
+
+  const [blocks, cases, tenants, readings] = await Promise.all([
+    Promise.all(blockIds.map(id => cachedGetDoc<BlockDoc>(collections.blocks, id))),
+    getDocsIn<CaseDoc>(collections.cases, 'propertyId', propertyIds),
+    getDocsIn<TenantDoc>(collections.tenants, 'propertyId', propertyIds),
+    Promise.all([...cells.values()].map(cell => fetchWeather(cell.lat, cell.lng))),
+  ]);
+
+  const casesByProperty = new Map<string, CaseDoc[]>();
+  for (const c of cases) {
+    const list = casesByProperty.get(c.propertyId);
+    if (list) list.push(c);
+    else casesByProperty.set(c.propertyId, [c]);
+  }
+
+  return {
+    blocks: new Map(blocks.filter((b): b is BlockDoc => !!b).map(b => [b.id, b])),
+    casesByProperty,
+    tenants: new Map(tenants.map(t => [t.id, t])),
+    weatherByCell: new Map([...cells.keys()].map((key, i) => [key, readings[i]])),
+  };
+}
+
+/** One property's scoring inputs, picked out of a loaded batch. */
+export function dampInputsFor(property: PropertyDoc, batch: DampBatch): DampInputs {
+  return {
+    block: batch.blocks.get(property.blockId) ?? null,
+    cases: batch.casesByProperty.get(property.id) ?? [],
+    tenant: property.currentTenancyId ? batch.tenants.get(property.currentTenancyId) ?? null : null,
+    weather: batch.weatherByCell.get(weatherCell(property.lat, property.lng).key) ?? DEFAULT_WEATHER,
+  };
+}
+
+/** Full prediction for one property of a loaded batch. */
+export function predictFromBatch(property: PropertyDoc, batch: DampBatch): DampPrediction {
+  return buildDampPrediction(property, dampInputsFor(property, batch));
+}
+
+function scoreDampBatch(properties: PropertyDoc[], batch: DampBatch): DampScore[] {
+  const n = properties.length;
+  const weather = new Float64Array(n);
+  const building = new Float64Array(n);
+  const history = new Float64Array(n);
+  const sensor = new Float64Array(n);
+  const occupancy = new Float64Array(n);
+
+  for (let i = 0; i < n; i++) {
+    const p = properties[i];
+    const inputs = dampInputsFor(p, batch);
+    weather[i] = calculateWeatherFactor(inputs.weather).weightedScore;
+    building[i] = calculateBuildingFactor(p, inputs.block).weightedScore;
+    history[i] = calculateHistoryFactor(inputs.cases).weightedScore;
+    sensor[i] = calculateSensorFactor(p).weightedScore;
+    occupancy[i] = calculateOccupancyFactor(p, inputs.tenant).weightedScore;
+  }
+
+  return properties.map((p, i) => {
+    // Same summation order as predictDampRisk so rounding agrees
+    const score = Math.round(weather[i] + building[i] + history[i] + sensor[i] + occupancy[i]);
+    return { propertyId: p.id, address: p.address, score, riskLevel: classifyRisk(score) };
+  });
+}
+
+/** Damp scores for a set of properties in one round of bulk reads. */
+export async function scoreDampRiskBatch(properties: PropertyDoc[]): Promise<DampScore[]> {
+  if (properties.length === 0) return [];
+  return scoreDampBatch(properties, await loadDampBatch(properties));
+}
+
 // ── Estate-Level Prediction ──
 export async function predictEstateDampRisk(estateId: string): Promise<{
   estateId: string;
   estateName: string;
   averageScore: number;
   riskLevel: RiskLevel;
-  properties: { propertyId: string; address: string; score: number; riskLevel: RiskLevel }[];
+  properties: DampScore[];
   highRiskCount: number;
   criticalCount: number;
   predictedAt: string;
 }> {
-  const estate = await getDoc<EstateDoc>(collections.estates, estateId);
+  const estate = await cachedGetDoc<EstateDoc>(collections.estates, estateId);
   if (!estate) throw new Error(`Estate ${estateId} not found`);
 
   const estateProperties = await getDocs<PropertyDoc>(collections.properties, [
     { field: 'estateId', op: '==', value: estateId },
   ]);
 
-  const predictions = await Promise.all(
-    estateProperties.map(async (p) => {
-      try {
-        const pred = await predictDampRisk(p.id);
-        return { propertyId: p.id, address: p.address, score: pred.overallScore, riskLevel: pred.riskLevel };
-      } catch {
-        return { propertyId: p.id, address: p.address, score: p.dampRisk ?? 30, riskLevel: classifyRisk(p.dampRisk ?? 30) };
-      }
-    }),
-  );
+  const predictions = await scoreDampRiskBatch(estateProperties);
 
   const avgScore = predictions.length > 0
     ? Math.round(predictions.reduce((s, p) => s + p.score, 0) / predictions.length)
@@ -405,3 +527,46 @@ export async function predictEstateDampRisk(estateId: string): Promise<{
     predictedAt: new Date().toISOString(),
   };
 }
+
+// ── Portfolio-Level Prediction ──
+export interface EstateDampSummary {
+  estateId: string;
+  estateName: string;
+  averageScore: number;
+  riskLevel: RiskLevel;
+  propertyCount: number;
+  highRiskCount: number;
+  criticalCount: number;
+}
+
+const PORTFOLIO_ESTATE_CONCURRENCY = 4;
+
+export async function predictPortfolioDampRisk(): Promise<{
+  estates: EstateDampSummary[];
+  propertyCount: number;
+  highRiskCount: number;
+  criticalCount: number;
+  predictedAt: string;
+}> {
+  const estates = await cachedGetDocs<EstateDoc>(collections.estates);
+  const summaries = await mapWithConcurrency(estates, PORTFOLIO_ESTATE_CONCURRENCY, async (estate): Promise<EstateDampSummary> => {
+    const result = await predictEstateDampRisk(estate.id);
+    return {
+      estateId: result.estateId,
+      estateName: result.estateName,
+      averageScore: result.averageScore,
+      riskLevel: result.riskLevel,
+      propertyCount: result.properties.length,
+      highRiskCount: result.highRiskCount,
+      criticalCount: result.criticalCount,
+    };
+  });
+
+  return {
+    estates: summaries.sort((a, b) => b.averageScore - a.averageScore),
+    propertyCount: summaries.reduce((s, e) => s + e.propertyCount, 0),
+    highRiskCount: summaries.reduce((s, e) => s + e.highRiskCount, 0),
+    criticalCount: summaries.reduce((s, e) => s + e.criticalCount, 0),
+    predictedAt: new Date().toISOString(),
+  };
+}
@@ -0,0 +1,131 @@
+// ============================================================
+// SocialHomes.Ai — Entity Read Cache Tests
+// Read-through hits and misses, per-collection pass-through,
+// listener-gated caching, invalidation, clone isolation and
+// metrics reporting.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+
+// ── Mock the Firestore helpers the cache wraps ──
+const { getDocMock, getDocsMock } = vi.hoisted(() => ({
+  getDocMock: vi.fn(),
+  getDocsMock: vi.fn(),
+}));
+
+vi.mock('./firestore.js', () => ({
+  collections: {},
+  getDoc: getDocMock,
+  getDocs: getDocsMock,
+}));
+
+import {
+  cachedGetDoc,
+  cachedGetDocs,
+  invalidateEntity,
+  clearEntityCache,
+  getEntityCacheStats,
+  setCollectionWatched,
+} from './entity-cache.js';
+import { getMetrics } from './monitoring.js';
+
+function collection(path: string): FirebaseFirestore.CollectionReference {
+  return { id: path.split('/').pop(), path } as unknown as FirebaseFirestore.CollectionReference;
+}
+
+const regions = collection('regions');
+const orgRegions = collection('orgs/rcha/regions');
+const cases = collection('cases');
+
+describe('entity cache', () => {
+  beforeEach(() => {
+    clearEntityCache();
+    setCollectionWatched('regions', true);
+    getDocMock.mockReset();
+    getDocsMock.mockReset();
+    getDocMock.mockImplementation(async (_col: unknown, id: string) => ({ id, name: `Region ${id}` }));
+    getDocsMock.mockImplementation(async () => [{ id: 'london', name: 'London' }]);
+  });
+
+  it('serves a repeated read from memory and records the hit', async () => {
+    const before = getMetrics();
+    await cachedGetDoc(regions, 'london');
+    await cachedGetDoc(regions, 'london');
+
+    expect(getDocMock).toHaveBeenCalledTimes(1);
+    const after = getMetrics();
+    expect(after.cacheMisses - before.cacheMisses).toBe(1);
+    expect(after.cacheHits - before.cacheHits).toBe(1);
+  });
+
+  it('keys queries by filters, order and limit', async () => {
+    await cachedGetDocs(regions, [{ field: 'name', op: '==', value: 'London' }]);
+    await cachedGetDocs(regions, [{ field: 'name', op: '==', value: 'London' }]);
+    await cachedGetDocs(regions, [{ field: 'name', op: '==', value: 'Kent' }]);
+    expect(getDocsMock).toHaveBeenCalledTimes(2);
+  });
+
+  it('passes uncached collections straight through', async () => {
+    await cachedGetDocs(cases);
+    await cachedGetDocs(cases);
+    expect(getDocsMock).toHaveBeenCalledTimes(2);
+    expect(getEntityCacheStats().entries).toBe(0);
+  });
+
+  it('keeps org-scoped collections apart from the flat collection', async () => {
+    setCollectionWatched('orgs/rcha/regions', true);
+    await cachedGetDoc(regions, 'london');
+    await cachedGetDoc(orgRegions, 'london');
+    expect(getDocMock).toHaveBeenCalledTimes(2);
+    setCollectionWatched('orgs/rcha/regions', false);
+  });
+
+  it('passes collections without a live listener straight through', async () => {
+    await cachedGetDoc(orgRegions, 'london');
+    await cachedGetDoc(orgRegions, 'london');
+    expect(getDocMock).toHaveBeenCalledTimes(2);
+
+    await cachedGetDoc(regions, 'london');
+    setCollectionWatched('regions', false);
+    expect(getEntityCacheStats().entries).toBe(0);
+    await cachedGetDoc(regions, 'london');
+    await cachedGetDoc(regions, 'london');
+    expect(getDocMock).toHaveBeenCalledTimes(5);
+  });
+
+  it('shares one read between concurrent misses', async () => {
+    await Promise.all([cachedGetDocs(regions), cachedGetDocs(regions), cachedGetDocs(regions)]);
+    expect(getDocsMock).toHaveBeenCalledTimes(1);
+  });
+
+  it('re-reads a document and its collection queries after invalidation', async () => {
+    await cachedGetDoc(regions, 'london');
+    await cachedGetDocs(regions);
+    invalidateEntity('regions', 'london');
+    await cachedGetDoc(regions, 'london');
+    await cachedGetDocs(regions);
+    expect(getDocMock).toHaveBeenCalledTimes(2);
+    expect(getDocsMock).toHaveBeenCalledTimes(2);
+  });
+
+  it('does not cache a read that was in flight when invalidated', async () => {
+    let release!: () => void;
+    getDocsMock.mockImplementationOnce(() => new Promise(resolve => {
+      release = () => resolve([{ id: 'london', name: 'Stale' }]);
+    }));
+    const pending = cachedGetDocs(regions);
+    invalidateEntity('regions', 'london');
+    release();
+    await pending;
+
+    const fresh = await cachedGetDocs<{ name: string }>(regions);
+    expect(fresh[0].name).toBe('London');
+  });
+
+  it('returns copies so callers cannot mutate the cached value', async () => {
+    const first = await cachedGetDoc<{ name: string }>(regions, 'london');
+    first!.name = 'Mutated';
+    const second = await cachedGetDoc<{ name: string }>(regions, 'london');
+    expect(second!.name).toBe('Region london');
+  });
+});
@@ -0,0 +1,166 @@
+// ============================================================
+// SocialHomes.Ai — Entity Read Cache
+// Read-through cache around getDoc/getDocs for slow-changing
+// collections: per-collection TTLs, an LRU bound on memory, and
+// invalidation from Firestore snapshot listeners. A collection is
+// only cached while its listener is live.
+// ============================================================
+
+import { getDoc, getDocs } from './firestore.js';
+import { recordCacheHit, recordCacheMiss } from './monitoring.js';
+
+// ---- Configuration ----
+
+/** TTL per collection id; collections not listed are never cached */
+export const CACHE_TTLS_MS: Record<string, number> = {
+  regions: 60 * 60 * 1000,
+  localAuthorities: 60 * 60 * 1000,
+  estates: 30 * 60 * 1000,
+  blocks: 30 * 60 * 1000,
+  hactCodes: 24 * 60 * 60 * 1000,
+};
+
+const MAX_CACHE_BYTES = 32 * 1024 * 1024;
+
+type Filter = { field: string; op: FirebaseFirestore.WhereFilterOp; value: any };
+type OrderBy = { field: string; direction?: 'asc' | 'desc' };
+
+interface CacheEntry {
+  /** Collection path, so org-scoped copies of a collection never share entries */
+  collection: string;
+  value: unknown;
+  bytes: number;
+  expiresAt: number;
+}
+
+// ---- LRU Store ----
+// Map iteration order is insertion order, so re-inserting on every hit
+// keeps the least recently used entry first.
+
+const entries = new Map<string, CacheEntry>();
+const inFlight = new Map<string, Promise<unknown>>();
+// Bumped on invalidation so a read that started before a change is not cached after it
+const generations = new Map<string, number>();
+let totalBytes = 0;
+let evictions = 0;
+
+function remove(key: string): void {
+  const entry = entries.get(key);
+  if (!entry) return;
+  entries.delete(key);
+  totalBytes -= entry.bytes;
+}
+
+function store(key: string, collection: string, ttlMs: number, value: unknown): void {
+  remove(key);
+  // Approximate size — the serialised form tracks the heap cost closely enough for a bound
+  const bytes = JSON.stringify(value ?? null).length * 2;
+  if (bytes > MAX_CACHE_BYTES) return;
+  entries.set(key, { collection, value, bytes, expiresAt: Date.now() + ttlMs });
+  totalBytes += bytes;
+  while (totalBytes > MAX_CACHE_BYTES) {
+    const oldest = entries.keys().next().value as string;
+    remove(oldest);
+    evictions++;
+  }
+}
+
+async function readThrough<T>(
+  key: string,
+  collection: FirebaseFirestore.CollectionReference,
+  load: () => Promise<T>,
+): Promise<T> {
+  const entry = entries.get(key);
+  if (entry && entry.expiresAt > Date.now()) {
+    entries.delete(key);
+    entries.set(key, entry);
+    recordCacheHit();
+    return structuredClone(entry.value) as T;
+  }
+  if (entry) remove(key);
+  recordCacheMiss();
+
+  // Concurrent misses for the same key share one Firestore read
+  let pending = inFlight.get(key) as Promise<T> | undefined;
+  if (!pending) {
+    const generation = generations.get(collection.path) ?? 0;
+    pending = load()
+      .then(value => {
+        if ((generations.get(collection.path) ?? 0) === generation) {
+          store(key, collection.path, CACHE_TTLS_MS[collection.id], value);
+        }
+        return value;
+      })
+      .finally(() => inFlight.delete(key));
+    inFlight.set(key, pending);
+  }
+  return structuredClone(await pending);
+}
+
+// ---- Watched Collections ----
+// Entries stay correct only while a snapshot listener invalidates them.
+// Collections without a live listener (listeners disabled, org-scoped
+// copies, a listener waiting to restart) pass straight through.
+
+const watched = new Set<string>();
+
+export function setCollectionWatched(collectionPath: string, live: boolean): void {
+  if (live) {
+    watched.add(collectionPath);
+  } else {
+    watched.delete(collectionPath);
+    invalidateEntity(collectionPath);
+  }
+}
+
+export function isCachedCollection(collection: FirebaseFirestore.CollectionReference): boolean {
+  return collection.id in CACHE_TTLS_MS && watched.has(collection.path);
+}
+
+// ---- Read-Through Helpers ----
+// Same signatures as getDoc/getDocs; uncached collections pass straight through.
+
+export function cachedGetDoc<T>(collection: FirebaseFirestore.CollectionReference, id: string): Promise<T | null> {
+  if (!isCachedCollection(collection)) return getDoc<T>(collection, id);
+  return readThrough(`${collection.path}|doc|${id}`, collection, () => getDoc<T>(collection, id));
+}
+
+export function cachedGetDocs<T>(
+  collection: FirebaseFirestore.CollectionReference,
+  filters?: Filter[],
+  orderBy?: OrderBy,
+  limit?: number,
+): Promise<T[]> {
+  if (!isCachedCollection(collection)) return getDocs<T>(collection, filters, orderBy, limit);
+  const key = `${collection.path}|query|${JSON.stringify([filters ?? [], orderBy ?? null, limit ?? null])}`;
+  return readThrough(key, collection, () => getDocs<T>(collection, filters, orderBy, limit));
+}
+
+// ---- Invalidation ----
+
+/**
+ * Drop a changed document and every cached query on its collection — a
+ * change can move a document in or out of any filtered result.
+ */
+export function invalidateEntity(collectionPath: string, id?: string): void {
+  generations.set(collectionPath, (generations.get(collectionPath) ?? 0) + 1);
+  for (const key of inFlight.keys()) {
+    if (key.startsWith(`${collectionPath}|`)) inFlight.delete(key);
+  }
+  for (const [key, entry] of entries) {
+    if (entry.collection !== collectionPath) continue;
+    if (id === undefined || key.startsWith(`${collectionPath}|query|`) || key === `${collectionPath}|doc|${id}`) {
+      remove(key);
+    }
+  }
+}
+
+export function clearEntityCache(): void {
+  entries.clear();
+  inFlight.clear();
+  totalBytes = 0;
+}
+
+export function getEntityCacheStats(): { entries: number; bytes: number; maxBytes: number; evictions: number } {
+  return { entries: entries.size, bytes: totalBytes, maxBytes: MAX_CACHE_BYTES, evictions };
+}
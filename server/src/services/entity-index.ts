@@ -0,0 +1,119 @@
+// ============================================================
+// SocialHomes.Ai — Per-Entity History Index
+// Tenant and case timelines (activities, rent transactions) read
+// with equality queries on tenantId / caseId, ordered on the
+// write-time normalised dateIso key.
+// ============================================================
+
+import { db, collections, getDocs, DOCUMENT_ID } from './firestore.js';
+import type { ActivityDoc, RentTransactionDoc } from '../models/firestore-schemas.js';
+
+const BACKFILL_PAGE_SIZE = 500;
+
+// ---- Date Key ----
+
+/**
+ * Normalise a date in DD/MM/YYYY, YYYY-MM-DD or full ISO format to
+ * YYYY-MM-DD so it sorts lexicographically. Unparseable dates become ''.
+ */
+export function normaliseDateKey(dateStr: string | undefined): string {
+  if (!dateStr) return '';
+  // DD/MM/YYYY format (UK)
+  const ukMatch = dateStr.match(/^(\d{2})\/(\d{2})\/(\d{4})$/);
+  if (ukMatch) return `${ukMatch[3]}-${ukMatch[2]}-${ukMatch[1]}`;
+  // ISO YYYY-MM-DD or full ISO string
+  if (/^\d{4}-\d{2}-\d{2}/.test(dateStr)) return dateStr.slice(0, 10);
+  const ts = new Date(dateStr).getTime();
+  return isNaN(ts) ? '' : new Date(ts).toISOString().slice(0, 10);
+}
+
+/**
+ * Stamp the dateIso sort key onto an activity or rent transaction about
+ * to be written. Data without a date is returned unchanged.
+ */
+export function withDateKey<T extends object>(data: T): T {
+  const date = (data as { date?: string }).date;
+  if (date === undefined) return data;
+  return { ...data, dateIso: normaliseDateKey(date) };
+}
+
+// ---- Lookups ----
+// Each is backed by an (equality field ASC, dateIso DESC) composite index
+// in firestore.indexes.json, so it reads only the entity's own rows.
+
+export function listTenantActivities(tenantId: string): Promise<ActivityDoc[]> {
+  return getDocs<ActivityDoc>(
+    collections.activities,
+    [{ field: 'tenantId', op: '==', value: tenantId }],
+    { field: 'dateIso', direction: 'desc' },
+  );
+}
+
+export function listCaseActivities(caseId: string): Promise<ActivityDoc[]> {
+  return getDocs<ActivityDoc>(
+    collections.activities,
+    [{ field: 'caseId', op: '==', value: caseId }],
+    { field: 'dateIso', direction: 'desc' },
+  );
+}
+
+export function listTenantTransactions(tenantId: string): Promise<RentTransactionDoc[]> {
+  return getDocs<RentTransactionDoc>(
+    collections.rentTransactions,
+    [{ field: 'tenantId', op: '==', value: tenantId }],
+    { field: 'dateIso', direction: 'desc' },
+  );
+}
+
+// ---- Backfill ----
+
+/**
+ * Write a normalised date key onto every document in a collection that is
+ * missing it or whose source date has changed format. Firestore omits
+ * documents without the ordered field from the lookups above.
+ */
+export async function backfillDateKey(
+  collection: FirebaseFirestore.CollectionReference,
+  sourceField: string,
+  keyField: string,
+): Promise<{ processed: number; updated: number }> {
+  let processed = 0;
+  let updated = 0;
+  let last: FirebaseFirestore.QueryDocumentSnapshot | undefined;
+
+  for (;;) {
+    let page = collection.orderBy(DOCUMENT_ID).limit(BACKFILL_PAGE_SIZE);
+    if (last) page = page.startAfter(last);
+    const snapshot = await page.get();
+    if (snapshot.empty) break;
+
+    const batch = db.batch();
+    let pending = 0;
+    for (const doc of snapshot.docs) {
+      const data = doc.data();
+      const key = normaliseDateKey(data[sourceField]);
+      if (data[keyField] !== key) {
+        batch.update(doc.ref, { [keyField]: key });
+        pending++;
+      }
+    }
+    if (pending > 0) await batch.commit();
+
+    processed += snapshot.size;
+    updated += pending;
+    last = snapshot.docs[snapshot.docs.length - 1];
+    if (snapshot.size < BACKFILL_PAGE_SIZE) break;
+  }
+
+  return { processed, updated };
+}
+
+/** Backfill dateIso on activities and rent transactions. */
+export async function backfillEntityDateKeys(): Promise<{ processed: number; updated: number }> {
+  const activities = await backfillDateKey(collections.activities, 'date', 'dateIso');
+  const rentTransactions = await backfillDateKey(collections.rentTransactions, 'date', 'dateIso');
+  return {
+    processed: activities.processed + rentTransactions.processed,
+    updated: activities.updated + rentTransactions.updated,
+  };
+}
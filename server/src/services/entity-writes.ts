@@ -0,0 +1,74 @@
+// ============================================================
+// SocialHomes.Ai — Entity Writes
+// Case, tenant and property writes that keep the derived
+// aggregates in step: the entity write, its briefing snapshot
+// delta and its report cube delta commit in one transaction,
+// computed from the document as the transaction read it.
+// ============================================================
+
+import { db, collections, serializeFirestoreData } from './firestore.js';
+import { stageCaseBriefing, stageTenantBriefing, stagePropertyBriefing } from './briefing-snapshots.js';
+import { readCubeDelta, stageCubeDelta } from './report-cubes.js';
+import type { CubeSource } from './report-cubes.js';
+import type { CaseDoc, TenantDoc, PropertyDoc } from '../models/firestore-schemas.js';
+
+type StageBriefing<T> = (tx: FirebaseFirestore.Transaction, id: string, before: T | null, after: T | null) => void;
+
+// The document as update(data) leaves it; dotted keys set nested fields
+function applyUpdate<T>(doc: T, data: Record<string, unknown>): T {
+  const out = structuredClone(doc) as Record<string, any>;
+  for (const [path, value] of Object.entries(data)) {
+    const keys = path.split('.');
+    const parent = keys.slice(0, -1).reduce((o, k) => (o[k] ??= {}), out);
+    parent[keys[keys.length - 1]] = value;
+  }
+  return out as T;
+}
+
+/**
+ * Update a document and its aggregates in one transaction, so two
+ * concurrent updates of one entity never both count from the same
+ * `before`. Returns the document as it was before the update.
+ */
+async function updateWithAggregates<T>(
+  source: CubeSource,
+  id: string,
+  data: Record<string, unknown>,
+  stageBriefing: StageBriefing<T>,
+): Promise<T | null> {
+  const ref = collections[source].doc(id);
+  return db.runTransaction(async tx => {
+    const snapshot = await tx.get(ref);
+    const before = snapshot.exists ? serializeFirestoreData({ id: snapshot.id, ...snapshot.data() }) as T : null;
+    const after = before && applyUpdate(before, data);
+    // All reads precede the transaction's writes
+    const cube = await readCubeDelta(tx, source, before, after);
+
+    // Fails on a missing document, as a plain update() does
+    tx.update(ref, data);
+    if (before) stageBriefing(tx, id, before, after);
+    if (cube) stageCubeDelta(tx, cube);
+    return before;
+  });
+}
+
+export function createCase(caseData: CaseDoc): Promise<void> {
+  return db.runTransaction(async tx => {
+    const cube = await readCubeDelta(tx, 'cases', null, caseData);
+    tx.set(collections.cases.doc(caseData.id), caseData);
+    stageCaseBriefing(tx, caseData.id, null, caseData);
+    if (cube) stageCubeDelta(tx, cube);
+  });
+}
+
+export function updateCase(id: string, data: Record<string, unknown>): Promise<CaseDoc | null> {
+  return updateWithAggregates('cases', id, data, stageCaseBriefing);
+}
+
+export function updateTenant(id: string, data: Record<string, unknown>): Promise<TenantDoc | null> {
+  return updateWithAggregates('tenants', id, data, stageTenantBriefing);
+}
+
+export function updateProperty(id: string, data: Record<string, unknown>): Promise<PropertyDoc | null> {
+  return updateWithAggregates('properties', id, data, stagePropertyBriefing);
+}
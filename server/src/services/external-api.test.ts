@@ -76,7 +76,7 @@ vi.mock('@google-cloud/firestore', () => {
 });
 
 // Import AFTER mocks
-import { fetchWithCache, logApiCall } from './external-api.js';
+import { fetchWithCache, logApiCall, clearExternalCacheMemory } from './external-api.js';
 import { Timestamp } from '@google-cloud/firestore';
 
 // ── Helpers ──
@@ -107,6 +107,7 @@ describe('fetchWithCache', () => {
   beforeEach(() => {
     _cacheStore.clear();
     _auditEntries.length = 0;
+    clearExternalCacheMemory();
     vi.clearAllMocks();
   });
 
@@ -228,12 +229,92 @@ describe('fetchWithCache', () => {
     const sanitisedId = 'test-api-sanitise:path_with_special_chars_';
     expect(_cacheStore.has(sanitisedId)).toBe(true);
   });
+
+  it('serves repeat lookups from memory without reading Firestore', async () => {
+    const fetchFn = vi.fn().mockResolvedValue({ data: { lsoa: 'E01003912' }, httpStatus: 200 });
+    await fetchWithCache('imd', 'E01003912', 3600, fetchFn);
+    _cacheStore.clear();
+
+    const result = await fetchWithCache('imd', 'E01003912', 3600, fetchFn);
+
+    expect(fetchFn).toHaveBeenCalledOnce();
+    expect(result).toMatchObject({ source: 'cached', cached: true, data: { lsoa: 'E01003912' } });
+    // Callers get their own copy
+    (result.data as any).lsoa = 'changed';
+    expect((await fetchWithCache('imd', 'E01003912', 3600, fetchFn)).data).toEqual({ lsoa: 'E01003912' });
+  });
+
+  it('coalesces concurrent misses into one upstream call', async () => {
+    const fetchFn = vi.fn().mockImplementation(async () => {
+      await new Promise(resolve => setTimeout(resolve, 10));
+      return { data: { temp: 12 }, httpStatus: 200 };
+    });
+
+    const results = await Promise.all(
+      Array.from({ length: 5 }, () => fetchWithCache('open-meteo', '51.47,-0.07', 3600, fetchFn)),
+    );
+
+    expect(fetchFn).toHaveBeenCalledOnce();
+    expect(results.every(r => (r.data as any).temp === 12)).toBe(true);
+  });
+
+  it('serves a recently expired entry while refreshing it in the background', async () => {
+    setCacheEntry('open-meteo', 'SE15', { temp: 9 }, -10);
+    _cacheStore.get('open-meteo:SE15')!.data.ttlSeconds = 3600;
+    const fetchFn = vi.fn().mockResolvedValue({ data: { temp: 14 }, httpStatus: 200 });
+
+    const result = await fetchWithCache('open-meteo', 'SE15', 3600, fetchFn);
+
+    expect(result).toMatchObject({ source: 'cached', stale: true, data: { temp: 9 } });
+    await vi.waitFor(() => expect(_cacheStore.get('open-meteo:SE15')!.data.data).toEqual({ temp: 14 }));
+    expect(fetchFn).toHaveBeenCalledOnce();
+
+    const refreshed = await fetchWithCache('open-meteo', 'SE15', 3600, fetchFn);
+    expect(refreshed.stale).toBeUndefined();
+    expect(refreshed.data).toEqual({ temp: 14 });
+  });
+
+  it('backs off refreshing a key after a background refresh fails', async () => {
+    vi.spyOn(console, 'warn').mockImplementation(() => {});
+    setCacheEntry('open-meteo', 'E1', { temp: 9 }, -10);
+    _cacheStore.get('open-meteo:E1')!.data.ttlSeconds = 3600;
+    const fetchFn = vi.fn().mockRejectedValue(new Error('503 Service Unavailable'));
+
+    await fetchWithCache('open-meteo', 'E1', 3600, fetchFn);
+    await vi.waitFor(() => expect(console.warn).toHaveBeenCalled());
+    for (let i = 0; i < 5; i++) {
+      expect((await fetchWithCache('open-meteo', 'E1', 3600, fetchFn)).data).toEqual({ temp: 9 });
+    }
+    expect(fetchFn).toHaveBeenCalledOnce();
+  });
+
+  it('keeps coalescing requests started after the memory tier was cleared', async () => {
+    const calls: { resolve: (v: unknown) => void; reject: (e: Error) => void }[] = [];
+    const fetchFn = vi.fn().mockImplementation(() => new Promise((resolve, reject) => calls.push({ resolve, reject })));
+
+    const first = fetchWithCache('imd', 'E01000001', 3600, fetchFn);
+    await vi.waitFor(() => expect(calls).toHaveLength(1));
+    clearExternalCacheMemory();
+    const second = fetchWithCache('imd', 'E01000001', 3600, fetchFn);
+    await vi.waitFor(() => expect(calls).toHaveLength(2));
+
+    // The first request settling must not drop the second from in-flight
+    calls[0].reject(new Error('timeout'));
+    await expect(first).rejects.toThrow('timeout');
+    const third = fetchWithCache('imd', 'E01000001', 3600, fetchFn);
+    calls[1].resolve({ data: { rank: 3120 }, httpStatus: 200 });
+
+    expect((await third).data).toEqual({ rank: 3120 });
+    await second;
+    expect(fetchFn).toHaveBeenCalledTimes(2);
+  });
 });
 
 describe('Rate Limiter', () => {
   beforeEach(() => {
     _cacheStore.clear();
     _auditEntries.length = 0;
+    clearExternalCacheMemory();
     vi.clearAllMocks();
   });
 
@@ -1,7 +1,9 @@
 // ============================================================
 // SocialHomes.Ai — External API Infrastructure
 // Shared caching, rate limiting, and audit logging for all
-// external public-service API integrations.
+// external public-service API integrations. Cached responses sit
+// in memory in front of Firestore; concurrent misses share one
+// upstream call and expired entries are refreshed in the background.
 // ============================================================
 
 import { db, collections, FieldValue, Timestamp } from './firestore.js';
@@ -23,6 +25,8 @@ export interface ExternalApiResult<T = Record<string, unknown>> {
   source: string;      // e.g. "postcodes.io", "cached", "simulated"
   data: T;
   cached: boolean;
+  /** Set when an expired entry was served while a refresh runs */
+  stale?: boolean;
   latencyMs?: number;
 }
 
@@ -96,43 +100,180 @@ export async function logApiCall(
   }
 }
 
+// ── Memory Tier ──
+// Hot keys (weather for one estate, IMD for one LSOA) are served from an
+// in-process LRU in front of the externalDataCache collection. Map
+// iteration order is insertion order, so re-inserting on every hit keeps
+// the least recently used entry first.
+
+const MAX_MEMORY_ENTRIES = 1000;
+// After a failed background refresh, the stale entry is served without
+// retrying for this long, so a failing upstream is not called on every hit
+const REFRESH_BACKOFF_MS = 60_000;
+
+interface MemoryEntry {
+  data: Record<string, unknown>;
+  expiresAt: number;
+  /** Until when an expired entry may still be served while it refreshes */
+  staleUntil: number;
+}
+
+const memory = new Map<string, MemoryEntry>();
+// Concurrent misses for one key share a single cache read and upstream call
+const inFlight = new Map<string, Promise<ExternalApiResult<any>>>();
+const refreshing = new Set<string>();
+const refreshFailedAt = new Map<string, number>();
+
+function remember(cacheDocId: string, entry: MemoryEntry): void {
+  memory.delete(cacheDocId);
+  memory.set(cacheDocId, entry);
+  while (memory.size > MAX_MEMORY_ENTRIES) {
+    memory.delete(memory.keys().next().value as string);
+  }
+}
+
+// An expired entry stays servable for one more TTL while it is refreshed
+function memoryEntry(data: Record<string, unknown>, expiresAt: number, ttlSeconds: number): MemoryEntry {
+  return { data, expiresAt, staleUntil: expiresAt + ttlSeconds * 1000 };
+}
+
+function cachedResult<T>(entry: MemoryEntry, stale: boolean): ExternalApiResult<T> {
+  return {
+    source: 'cached',
+    // Callers own their copy; the memory tier's stays unchanged
+    data: structuredClone(entry.data) as T,
+    cached: true,
+    ...(stale && { stale }),
+  };
+}
+
+/** Empty the memory tier (the Firestore tier is left to its TTLs). */
+export function clearExternalCacheMemory(): void {
+  memory.clear();
+  inFlight.clear();
+  refreshing.clear();
+  refreshFailedAt.clear();
+}
+
 // ── Cache-Through Fetch ──
 
+type FetchFn<T> = () => Promise<{ data: T; httpStatus: number }>;
+
 /**
- * Fetch data with Firestore cache-through.
- * 1. Check cache — if valid, return cached data
- * 2. If expired/missing, call fetchFn
- * 3. Cache result in Firestore
- * 4. On failure, return simulated fallback
+ * Fetch data with a two-tier cache-through.
+ * 1. Check the memory tier, then Firestore — if valid, return cached data
+ * 2. If expired but within one TTL of expiry, return it and refresh in
+ *    the background (stale-while-revalidate)
+ * 3. If missing, call fetchFn once for all concurrent callers
+ * 4. Cache result in memory and Firestore
+ * 5. On failure, return simulated fallback
  */
 export async function fetchWithCache<T extends Record<string, unknown>>(
   source: string,
   lookupKey: string,
   ttlSeconds: number,
-  fetchFn: () => Promise<{ data: T; httpStatus: number }>,
+  fetchFn: FetchFn<T>,
   simulatedData?: T,
   maxPerMinute = 60,
 ): Promise<ExternalApiResult<T>> {
   const cacheDocId = `${source}:${lookupKey}`.replace(/[/\\#\[\]*]/g, '_');
 
-  // 1. Check cache
+  // 1. Memory tier
+  const hit = memory.get(cacheDocId);
+  const now = Date.now();
+  if (hit && hit.expiresAt > now) {
+    remember(cacheDocId, hit);
+    return cachedResult<T>(hit, false);
+  }
+  if (hit && hit.staleUntil > now) {
+    revalidate(source, lookupKey, cacheDocId, ttlSeconds, fetchFn, maxPerMinute);
+    return cachedResult<T>(hit, true);
+  }
+
+  let pending = inFlight.get(cacheDocId) as Promise<ExternalApiResult<T>> | undefined;
+  if (!pending) {
+    const request = readThrough(source, lookupKey, cacheDocId, ttlSeconds, fetchFn, simulatedData, maxPerMinute)
+      .finally(() => {
+        // The map may have been cleared and a newer request started since
+        if (inFlight.get(cacheDocId) === request) inFlight.delete(cacheDocId);
+      });
+    pending = request;
+    inFlight.set(cacheDocId, pending);
+  }
+  const result = await pending;
+  // Coalesced callers each get their own copy of the data
+  return { ...result, data: structuredClone(result.data) };
+}
+
+async function readThrough<T extends Record<string, unknown>>(
+  source: string,
+  lookupKey: string,
+  cacheDocId: string,
+  ttlSeconds: number,
+  fetchFn: FetchFn<T>,
+  simulatedData: T | undefined,
+  maxPerMinute: number,
+): Promise<ExternalApiResult<T>> {
+  // Firestore tier
   try {
     const cacheDoc = await cacheCollection.doc(cacheDocId).get();
     if (cacheDoc.exists) {
       const entry = cacheDoc.data() as CacheEntry;
-      const expiresAt = entry.expiresAt?.toDate?.() ?? new Date(0);
-      if (expiresAt > new Date()) {
-        return {
-          source: 'cached',
-          data: entry.data as T,
-          cached: true,
-        };
+      const expiresAt = entry.expiresAt?.toDate?.().getTime() ?? 0;
+      const stored = memoryEntry(entry.data, expiresAt, entry.ttlSeconds ?? 0);
+      const now = Date.now();
+      if (stored.expiresAt > now) {
+        remember(cacheDocId, stored);
+        return { source: 'cached', data: entry.data as T, cached: true };
+      }
+      if (stored.staleUntil > now) {
+        remember(cacheDocId, stored);
+        revalidate(source, lookupKey, cacheDocId, ttlSeconds, fetchFn, maxPerMinute);
+        return { source: 'cached', data: entry.data as T, cached: true, stale: true };
       }
     }
   } catch {
     // Cache read failed — continue to fetch
   }
 
+  return fetchAndStore(source, lookupKey, cacheDocId, ttlSeconds, fetchFn, simulatedData, maxPerMinute);
+}
+
+/**
+ * Refresh an expired entry in the background, once per key at a time.
+ * The stale entry keeps being served if the refresh is rate limited or
+ * fails, and a failed key is not retried for REFRESH_BACKOFF_MS.
+ */
+function revalidate<T extends Record<string, unknown>>(
+  source: string,
+  lookupKey: string,
+  cacheDocId: string,
+  ttlSeconds: number,
+  fetchFn: FetchFn<T>,
+  maxPerMinute: number,
+): void {
+  if (refreshing.has(cacheDocId)) return;
+  const failedAt = refreshFailedAt.get(cacheDocId);
+  if (failedAt !== undefined && Date.now() - failedAt < REFRESH_BACKOFF_MS) return;
+  refreshing.add(cacheDocId);
+  fetchAndStore(source, lookupKey, cacheDocId, ttlSeconds, fetchFn, undefined, maxPerMinute)
+    .then(() => refreshFailedAt.delete(cacheDocId))
+    .catch((err: Error) => {
+      refreshFailedAt.set(cacheDocId, Date.now());
+      console.warn(`[external-api] Background refresh failed for ${cacheDocId}: ${err.message}`);
+    })
+    .finally(() => refreshing.delete(cacheDocId));
+}
+
+async function fetchAndStore<T extends Record<string, unknown>>(
+  source: string,
+  lookupKey: string,
+  cacheDocId: string,
+  ttlSeconds: number,
+  fetchFn: FetchFn<T>,
+  simulatedData: T | undefined,
+  maxPerMinute: number,
+): Promise<ExternalApiResult<T>> {
   // 2. Rate limit check
   if (!consumeToken(source, maxPerMinute)) {
     console.warn(`[external-api] Rate limit exceeded for ${source}`);
@@ -151,6 +292,7 @@ export async function fetchWithCache<T extends Record<string, unknown>>(
     // Write to cache
     const now = new Date();
     const expiresAt = new Date(now.getTime() + ttlSeconds * 1000);
+    remember(cacheDocId, memoryEntry(result.data, expiresAt.getTime(), ttlSeconds));
     try {
       await cacheCollection.doc(cacheDocId).set({
         source,
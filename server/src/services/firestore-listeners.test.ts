@@ -0,0 +1,110 @@
+// ============================================================
+// SocialHomes.Ai — Firestore Listener Tests
+// Cache listener gating, capped exponential restart backoff and
+// entity caching only while a collection's listener is live.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
+
+// ── Mock collections that record their snapshot handlers ──
+const { handlers, collections } = vi.hoisted(() => {
+  const handlers = new Map<string, { next: (s: any) => void; error: (e: Error) => void }[]>();
+  const collection = (path: string) => ({
+    id: path,
+    path,
+    onSnapshot: (next: (s: any) => void, error: (e: Error) => void) => {
+      handlers.set(path, [...(handlers.get(path) ?? []), { next, error }]);
+      return () => {};
+    },
+  });
+  const collections = Object.fromEntries(
+    ['cases', 'properties', 'regions', 'localAuthorities', 'estates', 'blocks', 'hactCodes'].map(id => [id, collection(id)]),
+  );
+  return { handlers, collections };
+});
+
+vi.mock('./firestore.js', () => ({ db: {}, collections, getDoc: vi.fn(), getDocs: vi.fn() }));
+vi.mock('./websocket.js', () => ({
+  sendToUser: vi.fn(),
+  emitCaseUpdate: vi.fn(),
+  emitSlaBreach: vi.fn(),
+  emitComplianceAlert: vi.fn(),
+}));
+vi.mock('./notification-dispatch.js', () => ({ dispatchNotification: vi.fn(async () => {}) }));
+
+import { startCacheListeners, stopAllListeners } from './firestore-listeners.js';
+import { isCachedCollection } from './entity-cache.js';
+
+const regions = collections.regions as unknown as FirebaseFirestore.CollectionReference;
+const subscriptions = (path: string) => handlers.get(path)?.length ?? 0;
+const latest = (path: string) => handlers.get(path)![subscriptions(path) - 1];
+const emptySnapshot = { docChanges: () => [] };
+
+describe('entity cache listeners', () => {
+  beforeEach(() => {
+    vi.useFakeTimers();
+    handlers.clear();
+    vi.spyOn(console, 'log').mockImplementation(() => {});
+    vi.spyOn(console, 'error').mockImplementation(() => {});
+  });
+
+  afterEach(() => {
+    stopAllListeners();
+    vi.unstubAllEnvs();
+    vi.useRealTimers();
+    vi.restoreAllMocks();
+  });
+
+  it('stays off outside production unless enabled', () => {
+    vi.stubEnv('NODE_ENV', 'development');
+    vi.stubEnv('ENTITY_CACHE_LISTENERS', '');
+    startCacheListeners();
+    expect(handlers.size).toBe(0);
+
+    vi.stubEnv('ENTITY_CACHE_LISTENERS', 'true');
+    startCacheListeners();
+    expect([...handlers.keys()].sort()).toEqual(['blocks', 'estates', 'hactCodes', 'localAuthorities', 'regions']);
+  });
+
+  it('caches a collection only while its listener is live', () => {
+    vi.stubEnv('ENTITY_CACHE_LISTENERS', 'true');
+    startCacheListeners();
+    expect(isCachedCollection(regions)).toBe(false);
+
+    latest('regions').next(emptySnapshot);
+    expect(isCachedCollection(regions)).toBe(true);
+
+    latest('regions').error(new Error('stream closed'));
+    expect(isCachedCollection(regions)).toBe(false);
+  });
+
+  it('backs restarts off exponentially, capped, and resets after a snapshot', () => {
+    vi.stubEnv('ENTITY_CACHE_LISTENERS', 'true');
+    startCacheListeners();
+
+    latest('regions').error(new Error('unavailable'));
+    vi.advanceTimersByTime(10_000);
+    expect(subscriptions('regions')).toBe(2);
+
+    latest('regions').error(new Error('unavailable'));
+    vi.advanceTimersByTime(10_000);
+    expect(subscriptions('regions')).toBe(2);
+    vi.advanceTimersByTime(10_000);
+    expect(subscriptions('regions')).toBe(3);
+
+    // 40s, 80s, ... 640s is capped at 10 minutes
+    for (let attempt = 2; attempt < 7; attempt++) {
+      latest('regions').error(new Error('unavailable'));
+      vi.advanceTimersByTime(10_000 * 2 ** attempt);
+    }
+    expect(subscriptions('regions')).toBe(8);
+    latest('regions').error(new Error('unavailable'));
+    vi.advanceTimersByTime(10 * 60 * 1000);
+    expect(subscriptions('regions')).toBe(9);
+
+    latest('regions').next(emptySnapshot);
+    latest('regions').error(new Error('unavailable'));
+    vi.advanceTimersByTime(10_000);
+    expect(subscriptions('regions')).toBe(10);
+  });
+});
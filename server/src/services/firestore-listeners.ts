@@ -7,12 +7,36 @@
 import { db, collections } from './firestore.js';
 import { sendToUser, emitCaseUpdate, emitSlaBreach, emitComplianceAlert } from './websocket.js';
 import { dispatchNotification } from './notification-dispatch.js';
+import { CACHE_TTLS_MS, invalidateEntity, setCollectionWatched } from './entity-cache.js';
 import type { CaseDoc } from '../models/firestore-schemas.js';
 
 // ---- Active Listeners ----
 
 const activeListeners: Map<string, () => void> = new Map();
 
+// ---- Restart Backoff ----
+// A failed listener restarts after 10s, doubling per consecutive
+// failure up to 10 minutes; a delivered snapshot resets the count.
+
+const RESTART_BASE_MS = 10 * 1000;
+const RESTART_MAX_MS = 10 * 60 * 1000;
+
+const restartAttempts = new Map<string, number>();
+const restartTimers = new Map<string, NodeJS.Timeout>();
+
+function scheduleRestart(name: string, start: () => void): void {
+  const attempts = restartAttempts.get(name) ?? 0;
+  restartAttempts.set(name, attempts + 1);
+  const delay = Math.min(RESTART_BASE_MS * 2 ** attempts, RESTART_MAX_MS);
+  console.log(`[firestore-listeners] Restarting ${name} listener in ${delay / 1000}s`);
+  const timer = setTimeout(() => {
+    restartTimers.delete(name);
+    start();
+  }, delay);
+  timer.unref();
+  restartTimers.set(name, timer);
+}
+
 // ---- Case Locks (Optimistic Locking) ----
 
 interface CaseLock {
@@ -67,6 +91,7 @@ export function startCasesListener(): void {
 
   const unsubscribe = collections.cases.onSnapshot(
     (snapshot) => {
+      restartAttempts.delete('cases');
       for (const change of snapshot.docChanges()) {
         const caseData = { id: change.doc.id, ...change.doc.data() } as CaseDoc;
 
@@ -100,9 +125,8 @@ export function startCasesListener(): void {
     },
     (error) => {
       console.error('[firestore-listeners] Cases listener error:', error.message);
-      // Auto-restart after delay
       activeListeners.delete('cases');
-      setTimeout(() => startCasesListener(), 10000);
+      scheduleRestart('cases', startCasesListener);
     },
   );
 
@@ -151,6 +175,7 @@ export function startComplianceListener(): void {
 
   const unsubscribe = collections.properties.onSnapshot(
     (snapshot) => {
+      restartAttempts.delete('compliance');
       for (const change of snapshot.docChanges()) {
         if (change.type !== 'modified') continue;
 
@@ -168,31 +193,94 @@ export function startComplianceListener(): void {
     (error) => {
       console.error('[firestore-listeners] Compliance listener error:', error.message);
       activeListeners.delete('compliance');
-      setTimeout(() => startComplianceListener(), 10000);
+      scheduleRestart('compliance', startComplianceListener);
     },
   );
 
   activeListeners.set('compliance', unsubscribe);
 }
 
+// ---- Listener: Entity Cache Invalidation ----
+
+export function startCacheInvalidationListener(collection: FirebaseFirestore.CollectionReference): void {
+  const name = `cache:${collection.id}`;
+  if (activeListeners.has(name)) return;
+
+  let initial = true;
+  const unsubscribe = collection.onSnapshot(
+    (snapshot) => {
+      restartAttempts.delete(name);
+      // The first snapshot is the current state, not a change; from here
+      // on every change is seen, so the cache may serve the collection
+      if (initial) {
+        initial = false;
+        setCollectionWatched(collection.path, true);
+        return;
+      }
+      for (const change of snapshot.docChanges()) {
+        invalidateEntity(collection.path, change.doc.id);
+      }
+    },
+    (error) => {
+      console.error(`[firestore-listeners] ${name} listener error:`, error.message);
+      // Changes are missed until the restart — stop caching the collection
+      setCollectionWatched(collection.path, false);
+      activeListeners.delete(name);
+      scheduleRestart(name, () => startCacheInvalidationListener(collection));
+    },
+  );
+
+  activeListeners.set(name, unsubscribe);
+}
+
+/**
+ * ENTITY_CACHE_LISTENERS=true|false; on by default in production only.
+ * With the listeners off the entity cache passes every read through.
+ */
+export function cacheListenersEnabled(): boolean {
+  const flag = process.env.ENTITY_CACHE_LISTENERS;
+  if (flag === 'true' || flag === 'false') return flag === 'true';
+  return process.env.NODE_ENV === 'production';
+}
+
+// Only the flat collections are listened to; org-scoped copies are never
+// watched, so the entity cache does not serve them
+export function startCacheListeners(): void {
+  if (!cacheListenersEnabled()) {
+    console.log('[firestore-listeners] Entity cache invalidation listeners disabled');
+    return;
+  }
+  for (const id of Object.keys(CACHE_TTLS_MS)) {
+    startCacheInvalidationListener(collections[id as keyof typeof collections]);
+  }
+  console.log('[firestore-listeners] Entity cache invalidation listeners started');
+}
+
 // ---- Lifecycle ----
 
 export function startAllListeners(): void {
   startCasesListener();
   startComplianceListener();
+  startCacheListeners();
   console.log('[firestore-listeners] All listeners started');
 }
 
 export function stopAllListeners(): void {
+  for (const timer of restartTimers.values()) clearTimeout(timer);
+  restartTimers.clear();
+  restartAttempts.clear();
   for (const [name, unsubscribe] of activeListeners) {
     unsubscribe();
     console.log(`[firestore-listeners] Stopped ${name} listener`);
   }
   activeListeners.clear();
+  for (const id of Object.keys(CACHE_TTLS_MS)) {
+    setCollectionWatched(collections[id as keyof typeof collections].path, false);
+  }
 }
 
 export function getListenerStatus(): { name: string; active: boolean }[] {
-  const expected = ['cases', 'compliance'];
+  const expected = ['cases', 'compliance', ...Object.keys(CACHE_TTLS_MS).map(id => `cache:${id}`)];
   return expected.map(name => ({
     name,
     active: activeListeners.has(name),
@@ -0,0 +1,96 @@
+// ============================================================
+// SocialHomes.Ai — Firestore Tracing Tests
+// Per-request attribution of reads, writes and time, single
+// counting of nested SDK calls, and slow-operation logging.
+// ============================================================
+
+import { describe, it, expect, vi, beforeAll } from 'vitest';
+import { installFirestoreTracing, withFirestoreTrace, currentFirestoreTrace, serverTimingEntry } from './firestore-tracing.js';
+
+// ── A minimal stand-in for the SDK's class layout ──
+const doc = (id: string) => ({ id, exists: true, data: () => ({ id, name: 'x'.repeat(100) }) });
+
+class FakeQuery {
+  constructor(public path: string, public size = 3) {}
+  async get() {
+    return { size: this.size, docs: Array.from({ length: this.size }, (_, i) => doc(`${this.path}-${i}`)) };
+  }
+  count() { return new FakeAggregateQuery(this); }
+  doc(id: string) { return new FakeDocumentReference(`${this.path}/${id}`); }
+}
+class FakeAggregateQuery {
+  constructor(public _query: FakeQuery) {}
+  async get() { return { data: () => ({ count: 2500 }) }; }
+}
+class FakeDocumentReference {
+  constructor(public path: string) {}
+  // Like the SDK, a single document read goes through getAll
+  async get() { return (await db.getAll(this))[0]; }
+}
+class FakeWriteBatch {
+  private writes = 0;
+  set() { this.writes++; return this; }
+  async commit() { return Array.from({ length: this.writes }, () => ({})); }
+}
+class FakeFirestore {
+  collection(path: string) { return new FakeQuery(path); }
+  batch() { return new FakeWriteBatch(); }
+  async getAll(...refs: FakeDocumentReference[]) { return refs.map(r => doc(r.path)); }
+}
+
+const db = new FakeFirestore();
+
+describe('firestore tracing', () => {
+  beforeAll(() => {
+    installFirestoreTracing(db as unknown as FirebaseFirestore.Firestore);
+  });
+
+  it('attributes reads and writes to the request that made them', async () => {
+    const trace = await withFirestoreTrace('GET /api/v1/briefing', async () => {
+      await db.collection('cases').get();
+      await db.collection('cases').count().get();
+      await db.batch().set().set().commit();
+      return currentFirestoreTrace()!;
+    });
+
+    expect(trace).toMatchObject({ ops: 3, reads: 3 + 3, writes: 2 });
+    expect(trace.bytes).toBeGreaterThan(300);
+    expect(serverTimingEntry(trace)).toMatch(/^firestore;dur=[\d.]+;desc="3 ops, 6 reads, 2 writes, ~\d+ KB"$/);
+  });
+
+  it('counts a document read once although it goes through getAll', async () => {
+    const trace = await withFirestoreTrace('GET /api/v1/tenants/:id', async () => {
+      await db.collection('tenants').doc('ten-001').get();
+      return currentFirestoreTrace()!;
+    });
+    expect(trace).toMatchObject({ ops: 1, reads: 1 });
+    expect(trace.slowest!.label).toBe('get tenants/ten-001');
+  });
+
+  it('keeps concurrent requests apart', async () => {
+    const [a, b] = await Promise.all([
+      withFirestoreTrace('a', async () => {
+        await db.collection('properties').get();
+        return currentFirestoreTrace()!;
+      }),
+      withFirestoreTrace('b', async () => {
+        await Promise.all([db.collection('cases').get(), db.collection('tenants').get()]);
+        return currentFirestoreTrace()!;
+      }),
+    ]);
+    expect(a.ops).toBe(1);
+    expect(b.ops).toBe(2);
+  });
+
+  it('logs slow and large operations with the request that made them', async () => {
+    const warn = vi.spyOn(console, 'warn').mockImplementation(() => {});
+    const big = new FakeQuery('activities', 1500);
+    await withFirestoreTrace('GET /api/v1/reports', () => big.get());
+    expect(warn).toHaveBeenCalledWith(expect.stringContaining('query activities'));
+    expect(warn.mock.calls[0][0]).toContain('1500 docs read (GET /api/v1/reports)');
+
+    // Outside a request nothing is attributed, but the log still names it
+    await big.get();
+    expect(warn.mock.calls[1][0]).toContain('(background)');
+  });
+});
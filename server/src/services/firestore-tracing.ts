@@ -0,0 +1,183 @@
+// ============================================================
+// SocialHomes.Ai — Firestore Operation Tracing
+// Attributes every Firestore read and write to the request that
+// made it, through AsyncLocalStorage: documents read and written,
+// approximate bytes read and time spent waiting on the database.
+// The SDK's own query, document, getAll and batch methods are
+// wrapped, so raw collection access is counted the same as the
+// getDoc/getDocs/batchWrite helpers that call it.
+//
+// Not counted: reads and writes inside db.runTransaction (the
+// SDK runs them through internal methods), BulkWriter writes
+// (the import pipeline) and onSnapshot listener reads, which are
+// long-lived and belong to no request.
+// ============================================================
+
+import { AsyncLocalStorage } from 'async_hooks';
+import { performance } from 'perf_hooks';
+
+// ---- Configuration ----
+
+// A single operation slower than this, or reading more documents, is logged
+const SLOW_OP_MS = parseInt(process.env.FIRESTORE_SLOW_OP_MS || '500', 10);
+const LARGE_READ_DOCS = 1000;
+// Bytes are estimated from a sample of each result rather than every document
+const BYTE_SAMPLE_SIZE = 10;
+
+export interface FirestoreOp {
+  label: string;
+  ms: number;
+  reads: number;
+  writes: number;
+}
+
+export interface FirestoreTrace {
+  /** Request the trace belongs to, for log lines */
+  name: string;
+  ops: number;
+  reads: number;
+  writes: number;
+  bytes: number;
+  ms: number;
+  slowest: FirestoreOp | null;
+}
+
+const traces = new AsyncLocalStorage<FirestoreTrace>();
+// Set while a traced operation runs, so SDK methods that call other
+// traced methods internally (doc.get → getAll, doc.set → batch.commit)
+// are counted once
+const inOperation = new AsyncLocalStorage<true>();
+
+// ---- Request Context ----
+
+export function newFirestoreTrace(name: string): FirestoreTrace {
+  return { name, ops: 0, reads: 0, writes: 0, bytes: 0, ms: 0, slowest: null };
+}
+
+/** Run `fn` with Firestore operations attributed to `trace`. */
+export function runInFirestoreTrace<T>(trace: FirestoreTrace, fn: () => T): T {
+  return traces.run(trace, fn);
+}
+
+/** Run `fn` with Firestore operations attributed to a new trace. */
+export function withFirestoreTrace<T>(name: string, fn: () => T): T {
+  return runInFirestoreTrace(newFirestoreTrace(name), fn);
+}
+
+export function currentFirestoreTrace(): FirestoreTrace | undefined {
+  return traces.getStore();
+}
+
+/** A Server-Timing entry, e.g. `firestore;dur=41.2;desc="3 ops, 120 reads, 1 writes, ~48 KB"` */
+export function serverTimingEntry(trace: FirestoreTrace): string {
+  const kb = Math.round(trace.bytes / 1024);
+  return `firestore;dur=${trace.ms.toFixed(1)};desc="${trace.ops} ops, ${trace.reads} reads, ${trace.writes} writes, ~${kb} KB"`;
+}
+
+// ---- Accounting ----
+
+function estimateBytes(docs: { data(): unknown }[]): number {
+  if (docs.length === 0) return 0;
+  const step = Math.max(1, Math.floor(docs.length / BYTE_SAMPLE_SIZE));
+  let sampled = 0;
+  let bytes = 0;
+  for (let i = 0; i < docs.length && sampled < BYTE_SAMPLE_SIZE; i += step, sampled++) {
+    const data = docs[i].data();
+    if (data) bytes += Buffer.byteLength(JSON.stringify(data));
+  }
+  return Math.round((bytes / sampled) * docs.length);
+}
+
+function record(label: string, ms: number, reads: number, writes: number, bytes: number): void {
+  const trace = traces.getStore();
+  const op: FirestoreOp = { label, ms, reads, writes };
+  if (trace) {
+    trace.ops += 1;
+    trace.reads += reads;
+    trace.writes += writes;
+    trace.bytes += bytes;
+    trace.ms += ms;
+    if (!trace.slowest || ms > trace.slowest.ms) trace.slowest = op;
+  }
+  if (ms >= SLOW_OP_MS || reads >= LARGE_READ_DOCS) {
+    console.warn(`[firestore] Slow operation ${label}: ${ms.toFixed(0)}ms, ${reads} docs read (${trace?.name ?? 'background'})`);
+  }
+}
+
+type Counts = { reads: number; writes: number; bytes: number };
+
+/**
+ * Replace a method on the prototype that defines it with one that times
+ * the call and records what `count` derives from its result.
+ */
+function wrap(
+  instance: object,
+  method: string,
+  label: (self: any, args: unknown[]) => string,
+  count: (result: any, args: unknown[]) => Counts,
+): void {
+  let owner = instance;
+  while (owner && !Object.prototype.hasOwnProperty.call(owner, method)) owner = Object.getPrototypeOf(owner);
+  const original = owner && (owner as Record<string, unknown>)[method];
+  if (typeof original !== 'function' || (original as { traced?: boolean }).traced) return;
+
+  const traced = function (this: unknown, ...args: unknown[]) {
+    if (inOperation.getStore()) return original.apply(this, args);
+    const start = performance.now();
+    return inOperation.run(true, () => original.apply(this, args)).then((result: unknown) => {
+      const { reads, writes, bytes } = count(result, args);
+      record(label(this, args), performance.now() - start, reads, writes, bytes);
+      return result;
+    });
+  };
+  traced.traced = true;
+  (owner as Record<string, unknown>)[method] = traced;
+}
+
+// ---- Installation ----
+
+// Query exposes no public path, so logs name the collection it reads
+function collectionOf(query: any): string {
+  return query.path ?? query._queryOptions?.collectionId ?? '(unknown)';
+}
+
+/**
+ * Wrap the SDK methods plain reads and batched writes go through (see the
+ * header for what is not counted). Called once at startup; tests that
+ * import routes directly run untraced.
+ */
+export function installFirestoreTracing(db: FirebaseFirestore.Firestore): void {
+  const collection = db.collection('_tracing');
+
+  wrap(collection, 'get', query => `query ${collectionOf(query)}`, (snapshot: FirebaseFirestore.QuerySnapshot) => ({
+    reads: Math.max(1, snapshot.size),  // an empty result is still billed one read
+    writes: 0,
+    bytes: estimateBytes(snapshot.docs),
+  }));
+
+  wrap(collection.count(), 'get', aggregate => `count ${collectionOf(aggregate._query ?? aggregate)}`,
+    (snapshot: FirebaseFirestore.AggregateQuerySnapshot<{ count: FirebaseFirestore.AggregateField<number> }>) => ({
+      // Billed one read per 1,000 index entries counted
+      reads: Math.max(1, Math.ceil(snapshot.data().count / 1000)),
+      writes: 0,
+      bytes: 0,
+    }));
+
+  wrap(collection.doc('_'), 'get', ref => `get ${ref.path}`, (snapshot: FirebaseFirestore.DocumentSnapshot) => ({
+    reads: 1,
+    writes: 0,
+    bytes: estimateBytes(snapshot.exists ? [snapshot] : []),
+  }));
+
+  wrap(db, 'getAll', (_db, refs) => `getAll ${refs.length} docs`, (snapshots: FirebaseFirestore.DocumentSnapshot[]) => ({
+    reads: snapshots.length,
+    writes: 0,
+    bytes: estimateBytes(snapshots.filter(s => s.exists)),
+  }));
+
+  wrap(db.batch(), 'commit', () => 'batch commit', (results: FirebaseFirestore.WriteResult[]) => ({
+    reads: 0,
+    writes: results.length,
+    bytes: 0,
+  }));
+}
@@ -83,6 +83,16 @@ export function getCollections(orgId: string = 'rcha') {
     externalDataCache: db.collection(`${prefix}/externalDataCache`),
     viewings: db.collection(`${prefix}/viewings`),
     applications: db.collection(`${prefix}/applications`),
+    briefingSnapshots: db.collection(`${prefix}/briefingSnapshots`),
+    reportCubes: db.collection(`${prefix}/reportCubes`),
+    importJobs: db.collection(`${prefix}/importJobs`),
+    vulnerabilityScans: db.collection(`${prefix}/vulnerabilityScans`),
+    caseDeadlines: db.collection(`${prefix}/caseDeadlines`),
+    operatives: db.collection(`${prefix}/operatives`),
+    appointments: db.collection(`${prefix}/appointments`),
+    diaryBlocks: db.collection(`${prefix}/diaryBlocks`),
+    operativeOccupancy: db.collection(`${prefix}/operativeOccupancy`),
+    aiResponseCache: db.collection(`${prefix}/aiResponseCache`),
     // Global collections (NOT org-scoped)
     users: db.collection('users'),
     organisations: db.collection('organisations'),
@@ -112,6 +122,16 @@ export const collections = {
   externalDataCache: db.collection('externalDataCache'),
   viewings: db.collection('viewings'),
   applications: db.collection('applications'),
+  briefingSnapshots: db.collection('briefingSnapshots'),
+  reportCubes: db.collection('reportCubes'),
+  importJobs: db.collection('importJobs'),
+  vulnerabilityScans: db.collection('vulnerabilityScans'),
+  caseDeadlines: db.collection('caseDeadlines'),
+  operatives: db.collection('operatives'),
+  appointments: db.collection('appointments'),
+  diaryBlocks: db.collection('diaryBlocks'),
+  operativeOccupancy: db.collection('operativeOccupancy'),
+  aiResponseCache: db.collection('aiResponseCache'),
   users: db.collection('users'),
   organisations: db.collection('organisations'),
   auditLog: db.collection('auditLog'),
@@ -148,6 +168,27 @@ export async function getDocs<T>(
   return snapshot.docs.map(doc => serializeFirestoreData({ id: doc.id, ...doc.data() }) as T);
 }
 
+// Firestore's reserved field path for the document ID (FieldPath.documentId())
+export const DOCUMENT_ID = '__name__';
+
+// Firestore caps the values in an 'in' filter at 30
+const IN_QUERY_LIMIT = 30;
+
+/**
+ * Documents whose field matches any of the values, in parallel 'in'
+ * queries of up to 30 values. Use DOCUMENT_ID to match document IDs.
+ */
+export async function getDocsIn<T>(
+  collection: FirebaseFirestore.CollectionReference,
+  field: string,
+  values: string[],
+): Promise<T[]> {
+  const chunks: string[][] = [];
+  for (let i = 0; i < values.length; i += IN_QUERY_LIMIT) chunks.push(values.slice(i, i + IN_QUERY_LIMIT));
+  const pages = await Promise.all(chunks.map(chunk => getDocs<T>(collection, [{ field, op: 'in', value: chunk }])));
+  return pages.flat();
+}
+
 export async function setDoc(
   collection: FirebaseFirestore.CollectionReference,
   id: string,
@@ -6,6 +6,7 @@
 
 import { db, collections, getDocs, FieldValue } from './firestore.js';
 import { exportAuditLogCsv } from './audit-log.js';
+import { updateTenant } from './entity-writes.js';
 import type { TenantDoc, CaseDoc, ActivityDoc, PropertyDoc } from '../models/firestore-schemas.js';
 
 // ---- Types ----
@@ -212,7 +213,8 @@ export async function processErasureRequest(tenantId: string, requestedBy: strin
 
   // 1. Anonymise tenant personal data (retain structure for regulatory reporting)
   try {
-    await collections.tenants.doc(tenantId).update({
+    // Through the entity hook, so the aggregates stay in step with the tenant
+    await updateTenant(tenantId, {
       firstName: '[REDACTED]',
       lastName: '[REDACTED]',
       email: '[REDACTED]',
@@ -0,0 +1,167 @@
+// ============================================================
+// SocialHomes.Ai — Streaming Import Pipeline Tests
+// Incremental CSV / JSON parsing across chunk boundaries, row
+// validation, and job progress and resume through BulkWriter.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+
+// ── Mock the Firestore layer with an in-memory BulkWriter ──
+const { written, jobs, failIds } = vi.hoisted(() => ({
+  written: new Map<string, any>(),
+  jobs: new Map<string, any>(),
+  failIds: new Set<string>(),
+}));
+
+vi.mock('./firestore.js', () => {
+  const collection = (name: string) => ({
+    doc: (id: string) => ({
+      id,
+      path: `${name}/${id}`,
+      set: async (data: any) => { jobs.set(id, structuredClone(data)); },
+    }),
+  });
+  return {
+    db: {
+      bulkWriter: () => ({
+        onWriteError: () => {},
+        set: async (ref: any, data: any) => {
+          if (failIds.has(ref.id)) throw new Error('PERMISSION_DENIED');
+          written.set(ref.path, data);
+        },
+        close: async () => {},
+      }),
+    },
+    collections: {
+      properties: collection('properties'),
+      tenants: collection('tenants'),
+      cases: collection('cases'),
+      rentTransactions: collection('rentTransactions'),
+      importJobs: collection('importJobs'),
+    },
+    getDoc: async (_col: unknown, id: string) => jobs.get(id) ?? null,
+  };
+});
+
+vi.mock('./briefing-snapshots.js', () => ({
+  rebuildBriefingSnapshots: vi.fn(async () => ({})),
+}));
+
+vi.mock('./awaabs-law.js', () => ({
+  rebuildDeadlineIndex: vi.fn(async () => ({ processed: 0, indexed: 0 })),
+}));
+
+import { parseCsvRows, parseJsonRows, transformRecord, createImportJob, runImportJob } from './import-pipeline.js';
+
+async function* chunks(...parts: string[]): AsyncGenerator<string> {
+  for (const part of parts) yield part;
+}
+
+async function collect<T>(rows: AsyncIterable<T>): Promise<T[]> {
+  const out: T[] = [];
+  for await (const row of rows) out.push(row);
+  return out;
+}
+
+const transaction = (id: string, amount = '100') => ({
+  id, tenantId: 'ten-001', propertyId: 'prop-001', date: '01/02/2026', amount, type: 'credit',
+});
+
+describe('parseCsvRows', () => {
+  it('handles quoted commas, newlines and escaped quotes split across chunks', async () => {
+    const rows = await collect(parseCsvRows(chunks(
+      'id,description\r\n1,"Leak, kit',
+      'chen ""urgent""',
+      '"\r\n2,"two\nlines"\r\n\r\n3,plain',
+    )));
+    expect(rows).toEqual([
+      { id: '1', description: 'Leak, kitchen "urgent"' },
+      { id: '2', description: 'two\nlines' },
+      { id: '3', description: 'plain' },
+    ]);
+  });
+
+  it('decodes multi-byte characters split across byte chunks', async () => {
+    const bytes = new TextEncoder().encode('id,name\n1,Zoë\n');
+    async function* byteChunks() {
+      // 'ë' is two bytes; split between them
+      yield bytes.slice(0, 13);
+      yield bytes.slice(13);
+    }
+    const rows = await collect(parseCsvRows(byteChunks()));
+    expect(rows).toEqual([{ id: '1', name: 'Zoë' }]);
+  });
+
+  it('rejects an unterminated quoted field', async () => {
+    await expect(collect(parseCsvRows(chunks('id\n"open')))).rejects.toThrow('Unterminated');
+  });
+});
+
+describe('parseJsonRows', () => {
+  it('yields objects from an array split mid-string and mid-object', async () => {
+    const rows = await collect(parseJsonRows(chunks('[{"id":"a","note":"brace } and \\"', 'quote"},', '{"id":"b","tags":["x"]}]')));
+    expect(rows).toEqual([{ id: 'a', note: 'brace } and "quote' }, { id: 'b', tags: ['x'] }]);
+  });
+
+  it('accepts newline-delimited JSON', async () => {
+    const rows = await collect(parseJsonRows(chunks('{"id":"a"}\n{"id":"b"}\n')));
+    expect(rows.map(r => r.id)).toEqual(['a', 'b']);
+  });
+});
+
+describe('transformRecord', () => {
+  it('coerces template types and stamps the date key', () => {
+    const result = transformRecord('rentTransactions', transaction('tx-1'));
+    expect(result).toMatchObject({ ok: true, id: 'tx-1', data: { amount: 100, date: '2026-02-01', dateIso: '2026-02-01' } });
+  });
+
+  it('reports every missing required field', () => {
+    const result = transformRecord('rentTransactions', { id: 'tx-1' });
+    expect(result.ok).toBe(false);
+    if (!result.ok) expect(result.messages).toContain('Missing required field: Amount');
+  });
+});
+
+describe('runImportJob', () => {
+  beforeEach(() => {
+    written.clear();
+    jobs.clear();
+    failIds.clear();
+  });
+
+  it('writes valid rows, records invalid ones and completes the job', async () => {
+    const job = createImportJob('rentTransactions', 'test@rcha.org.uk');
+    const result = await runImportJob(job, [transaction('tx-1'), { id: 'tx-2' }, transaction('tx-3')]);
+
+    expect(result.status).toBe('completed');
+    expect(result.imported).toBe(2);
+    expect(result.skipped).toBe(1);
+    expect(result.committedRows).toBe(3);
+    expect(result.errors.every(e => e.row === 2)).toBe(true);
+    expect(written.get('rentTransactions/tx-1')).toMatchObject({ importedBy: 'test@rcha.org.uk' });
+    expect(jobs.get(job.id).status).toBe('completed');
+  });
+
+  it('records a failed write against its row without aborting the job', async () => {
+    failIds.add('tx-2');
+    const result = await runImportJob(createImportJob('rentTransactions', 'system'), [transaction('tx-1'), transaction('tx-2')]);
+    expect(result.status).toBe('completed');
+    expect(result.imported).toBe(1);
+    expect(result.errors).toEqual([{ row: 2, message: 'Write failed: PERMISSION_DENIED' }]);
+  });
+
+  it('fails on unparseable input and resumes after the last committed row', async () => {
+    const job = createImportJob('rentTransactions', 'system');
+    const first = await runImportJob(job, parseJsonRows(chunks(
+      JSON.stringify(transaction('tx-1')), JSON.stringify(transaction('tx-2')), 'oops',
+    )));
+    expect(first.status).toBe('failed');
+    expect(first.committedRows).toBe(2);
+
+    written.clear();
+    const resumed = await runImportJob(first, [transaction('tx-1'), transaction('tx-2'), transaction('tx-3')]);
+    expect(resumed.status).toBe('completed');
+    expect([...written.keys()]).toEqual(['rentTransactions/tx-3']);
+    expect(resumed.imported).toBe(3);
+  });
+});
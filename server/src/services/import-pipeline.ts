@@ -0,0 +1,540 @@
+// ============================================================
+// SocialHomes.Ai — Streaming Import Pipeline
+// Parses CSV or JSON rows incrementally, validates each row
+// against its HACT entity template as it arrives, and commits
+// through a throttled BulkWriter with retry and backpressure.
+// Progress is kept on a resumable importJobs document.
+// ============================================================
+
+import crypto from 'crypto';
+import { db, collections, getDoc } from './firestore.js';
+import { withCaseDateKey } from './case-query.js';
+import { withDateKey } from './entity-index.js';
+import { rebuildBriefingSnapshots } from './briefing-snapshots.js';
+import { rebuildDeadlineIndex } from './awaabs-law.js';
+
+// ---- HACT v3.5 Entity Templates — required & optional fields ----
+
+export interface FieldDef {
+  field: string;
+  label: string;
+  required: boolean;
+  type: 'string' | 'number' | 'date' | 'boolean' | 'email' | 'postcode';
+}
+
+export const ENTITY_TEMPLATES: Record<string, FieldDef[]> = {
+  properties: [
+    { field: 'id', label: 'Property ID', required: true, type: 'string' },
+    { field: 'address', label: 'Address', required: true, type: 'string' },
+    { field: 'postcode', label: 'Postcode', required: true, type: 'postcode' },
+    { field: 'uprn', label: 'UPRN', required: false, type: 'string' },
+    { field: 'type', label: 'Property Type', required: true, type: 'string' },
+    { field: 'bedrooms', label: 'Bedrooms', required: true, type: 'number' },
+    { field: 'floorArea', label: 'Floor Area (sqm)', required: false, type: 'number' },
+    { field: 'heatingType', label: 'Heating Type', required: false, type: 'string' },
+    { field: 'tenureType', label: 'Tenure Type', required: false, type: 'string' },
+    { field: 'isVoid', label: 'Is Void', required: false, type: 'boolean' },
+    { field: 'voidSince', label: 'Void Since', required: false, type: 'date' },
+    { field: 'constructionYear', label: 'Construction Year', required: false, type: 'number' },
+    { field: 'epcRating', label: 'EPC Rating', required: false, type: 'string' },
+    { field: 'weeklyRent', label: 'Weekly Rent', required: false, type: 'number' },
+    { field: 'serviceCharge', label: 'Service Charge', required: false, type: 'number' },
+    { field: 'dampRisk', label: 'Damp Risk Score', required: false, type: 'number' },
+    { field: 'blockId', label: 'Block ID', required: false, type: 'string' },
+    { field: 'estateId', label: 'Estate ID', required: false, type: 'string' },
+    { field: 'localAuthorityId', label: 'Local Authority ID', required: false, type: 'string' },
+    { field: 'regionId', label: 'Region ID', required: false, type: 'string' },
+    { field: 'lat', label: 'Latitude', required: false, type: 'number' },
+    { field: 'lng', label: 'Longitude', required: false, type: 'number' },
+  ],
+  tenants: [
+    { field: 'id', label: 'Tenant ID', required: true, type: 'string' },
+    { field: 'firstName', label: 'First Name', required: true, type: 'string' },
+    { field: 'lastName', label: 'Last Name', required: true, type: 'string' },
+    { field: 'title', label: 'Title', required: false, type: 'string' },
+    { field: 'email', label: 'Email', required: true, type: 'email' },
+    { field: 'phone', label: 'Phone', required: true, type: 'string' },
+    { field: 'mobile', label: 'Mobile', required: false, type: 'string' },
+    { field: 'dob', label: 'Date of Birth', required: false, type: 'date' },
+    { field: 'propertyId', label: 'Property ID', required: true, type: 'string' },
+    { field: 'tenancyId', label: 'Tenancy ID', required: false, type: 'string' },
+    { field: 'tenancyStartDate', label: 'Tenancy Start Date', required: true, type: 'date' },
+    { field: 'tenancyType', label: 'Tenancy Type', required: false, type: 'string' },
+    { field: 'tenancyStatus', label: 'Tenancy Status', required: false, type: 'string' },
+    { field: 'weeklyCharge', label: 'Weekly Charge', required: false, type: 'number' },
+    { field: 'rentBalance', label: 'Rent Balance', required: false, type: 'number' },
+    { field: 'ucStatus', label: 'UC Status', required: false, type: 'string' },
+    { field: 'paymentMethod', label: 'Payment Method', required: false, type: 'string' },
+    { field: 'communicationPreference', label: 'Communication Preference', required: false, type: 'string' },
+    { field: 'assignedOfficer', label: 'Assigned Officer', required: false, type: 'string' },
+  ],
+  cases: [
+    { field: 'id', label: 'Case ID', required: true, type: 'string' },
+    { field: 'reference', label: 'Reference', required: true, type: 'string' },
+    { field: 'type', label: 'Type (repair/complaint/asb)', required: true, type: 'string' },
+    { field: 'tenantId', label: 'Tenant ID', required: true, type: 'string' },
+    { field: 'propertyId', label: 'Property ID', required: true, type: 'string' },
+    { field: 'subject', label: 'Subject', required: true, type: 'string' },
+    { field: 'description', label: 'Description', required: true, type: 'string' },
+    { field: 'status', label: 'Status', required: true, type: 'string' },
+    { field: 'priority', label: 'Priority', required: true, type: 'string' },
+    { field: 'handler', label: 'Handler', required: false, type: 'string' },
+    { field: 'createdDate', label: 'Created Date', required: true, type: 'date' },
+    { field: 'targetDate', label: 'Target Date', required: false, type: 'date' },
+    { field: 'closedDate', label: 'Closed Date', required: false, type: 'date' },
+    { field: 'sorCode', label: 'SOR Code', required: false, type: 'string' },
+    { field: 'trade', label: 'Trade', required: false, type: 'string' },
+    { field: 'cost', label: 'Cost', required: false, type: 'number' },
+    { field: 'category', label: 'Category', required: false, type: 'string' },
+  ],
+  rentTransactions: [
+    { field: 'id', label: 'Transaction ID', required: true, type: 'string' },
+    { field: 'tenantId', label: 'Tenant ID', required: true, type: 'string' },
+    { field: 'propertyId', label: 'Property ID', required: true, type: 'string' },
+    { field: 'date', label: 'Date', required: true, type: 'date' },
+    { field: 'amount', label: 'Amount', required: true, type: 'number' },
+    { field: 'type', label: 'Type (debit/credit)', required: true, type: 'string' },
+    { field: 'description', label: 'Description', required: false, type: 'string' },
+    { field: 'reference', label: 'Reference', required: false, type: 'string' },
+    { field: 'paymentMethod', label: 'Payment Method', required: false, type: 'string' },
+    { field: 'balance', label: 'Running Balance', required: false, type: 'number' },
+  ],
+};
+
+// ---- Validation ----
+
+const UK_POSTCODE_REGEX = /^[A-Z]{1,2}\d[A-Z\d]?\s*\d[A-Z]{2}$/i;
+const EMAIL_REGEX = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+const DATE_REGEX = /^\d{4}-\d{2}-\d{2}$/;
+// Also accept DD/MM/YYYY and DD-MM-YYYY
+const DATE_UK_REGEX = /^\d{2}[\/\-]\d{2}[\/\-]\d{4}$/;
+
+function normaliseDate(value: string): string | null {
+  if (DATE_REGEX.test(value)) return value;
+  if (DATE_UK_REGEX.test(value)) {
+    const parts = value.split(/[\/\-]/);
+    return `${parts[2]}-${parts[1]}-${parts[0]}`;
+  }
+  // Try parsing as a date
+  const d = new Date(value);
+  if (!isNaN(d.getTime())) return d.toISOString().split('T')[0];
+  return null;
+}
+
+export function validateField(
+  value: any,
+  fieldDef: FieldDef,
+): string | null {
+  const strVal = String(value ?? '').trim();
+
+  if (fieldDef.required && (!strVal || strVal === 'undefined' || strVal === 'null')) {
+    return `${fieldDef.label} is required`;
+  }
+
+  if (!strVal || strVal === 'undefined' || strVal === 'null') return null;
+
+  switch (fieldDef.type) {
+    case 'number': {
+      const num = Number(strVal);
+      if (isNaN(num)) return `${fieldDef.label} must be a number`;
+      break;
+    }
+    case 'date': {
+      const normalised = normaliseDate(strVal);
+      if (!normalised) return `${fieldDef.label} must be a valid date (YYYY-MM-DD or DD/MM/YYYY)`;
+      break;
+    }
+    case 'boolean': {
+      const lower = strVal.toLowerCase();
+      if (!['true', 'false', 'yes', 'no', '1', '0', 'y', 'n'].includes(lower)) {
+        return `${fieldDef.label} must be true/false, yes/no, or 1/0`;
+      }
+      break;
+    }
+    case 'email': {
+      if (!EMAIL_REGEX.test(strVal)) return `${fieldDef.label} must be a valid email address`;
+      break;
+    }
+    case 'postcode': {
+      if (!UK_POSTCODE_REGEX.test(strVal)) return `${fieldDef.label} must be a valid UK postcode`;
+      break;
+    }
+  }
+
+  return null;
+}
+
+function normaliseBool(value: string): boolean {
+  const lower = String(value).toLowerCase().trim();
+  return ['true', 'yes', '1', 'y'].includes(lower);
+}
+
+export function coerceValue(value: any, type: FieldDef['type']): any {
+  const strVal = String(value ?? '').trim();
+  if (!strVal || strVal === 'undefined' || strVal === 'null') return undefined;
+
+  switch (type) {
+    case 'number': return Number(strVal);
+    case 'boolean': return normaliseBool(strVal);
+    case 'date': return normaliseDate(strVal) || strVal;
+    default: return strVal;
+  }
+}
+
+
+// ---- Row Transform ----
+
+export type ImportEntityType = 'properties' | 'tenants' | 'cases' | 'rentTransactions';
+
+export function isImportEntityType(value: unknown): value is ImportEntityType {
+  return typeof value === 'string' && value in ENTITY_TEMPLATES;
+}
+
+function importCollection(entityType: ImportEntityType): FirebaseFirestore.CollectionReference {
+  const collectionMap: Record<ImportEntityType, FirebaseFirestore.CollectionReference> = {
+    properties: collections.properties,
+    tenants: collections.tenants,
+    cases: collections.cases,
+    rentTransactions: collections.rentTransactions,
+  };
+  return collectionMap[entityType];
+}
+
+export type TransformResult =
+  | { ok: true; id: string; data: Record<string, any> }
+  | { ok: false; messages: string[] };
+
+/**
+ * Map, coerce and validate one source record. Mapping is sourceField ->
+ * targetField; without one, source fields are assumed to match the template.
+ */
+export function transformRecord(
+  entityType: ImportEntityType,
+  record: Record<string, any>,
+  mapping?: Record<string, string>,
+): TransformResult {
+  const fields = ENTITY_TEMPLATES[entityType];
+  const fieldMap = new Map(fields.map(f => [f.field, f]));
+  const transformed: Record<string, any> = {};
+
+  if (mapping && Object.keys(mapping).length > 0) {
+    for (const [sourceField, targetField] of Object.entries(mapping)) {
+      const fieldDef = fieldMap.get(targetField);
+      if (fieldDef && record[sourceField] !== undefined) {
+        transformed[targetField] = coerceValue(record[sourceField], fieldDef.type);
+      }
+    }
+  } else {
+    for (const fieldDef of fields) {
+      if (record[fieldDef.field] !== undefined) {
+        transformed[fieldDef.field] = coerceValue(record[fieldDef.field], fieldDef.type);
+      }
+    }
+  }
+
+  // Require an ID for each record
+  const id = transformed.id || record.id;
+  if (!id) return { ok: false, messages: ['Missing ID field'] };
+
+  const messages: string[] = [];
+  for (const reqField of fields.filter(f => f.required)) {
+    const val = transformed[reqField.field];
+    if (val === undefined || val === null || val === '') {
+      messages.push(`Missing required field: ${reqField.label}`);
+    }
+  }
+  if (messages.length > 0) return { ok: false, messages };
+
+  // Stamp the normalised sort keys used by the indexed list queries
+  const data = entityType === 'cases' ? withCaseDateKey(transformed)
+    : entityType === 'rentTransactions' ? withDateKey(transformed)
+    : transformed;
+  return { ok: true, id: String(id), data };
+}
+
+// ---- Incremental Parsers ----
+// Both read the source chunk by chunk and yield each row as soon as it is
+// complete, so memory is bounded by the longest row rather than the upload.
+
+type ImportSource = AsyncIterable<string | Uint8Array>;
+
+async function* textChunks(source: ImportSource): AsyncGenerator<string> {
+  const decoder = new TextDecoder();
+  for await (const chunk of source) {
+    // stream: true holds back a multi-byte character split across chunks
+    yield typeof chunk === 'string' ? chunk : decoder.decode(chunk, { stream: true });
+  }
+  const tail = decoder.decode();
+  if (tail) yield tail;
+}
+
+/**
+ * RFC 4180 CSV: the first row is the header, quoted fields may contain
+ * commas, newlines and doubled quotes. Blank lines are ignored.
+ */
+export async function* parseCsvRows(source: ImportSource): AsyncGenerator<Record<string, string>> {
+  let headers: string[] | null = null;
+  let row: string[] = [];
+  let field = '';
+  let inQuotes = false;
+  // A quote inside a quoted field is either an escape ("") or the closing
+  // quote — which one depends on the next character, possibly in the next chunk
+  let quotePending = false;
+
+  const endRow = (): Record<string, string> | null => {
+    row.push(field);
+    const cells = row;
+    row = [];
+    field = '';
+    if (cells.length === 1 && cells[0].trim() === '') return null;
+    if (!headers) {
+      headers = cells.map((h, i) => (i === 0 ? h.replace(/^\uFEFF/, '') : h).trim());
+      return null;
+    }
+    const record: Record<string, string> = {};
+    headers.forEach((header, i) => { record[header] = cells[i] ?? ''; });
+    return record;
+  };
+
+  for await (const text of textChunks(source)) {
+    for (let i = 0; i < text.length; i++) {
+      const ch = text[i];
+      if (inQuotes) {
+        if (!quotePending) {
+          if (ch === '"') quotePending = true;
+          else field += ch;
+          continue;
+        }
+        quotePending = false;
+        if (ch === '"') {
+          field += '"';
+          continue;
+        }
+        inQuotes = false;
+      }
+      if (ch === '"' && field === '') {
+        inQuotes = true;
+      } else if (ch === ',') {
+        row.push(field);
+        field = '';
+      } else if (ch === '\n') {
+        const record = endRow();
+        if (record) yield record;
+      } else if (ch !== '\r') {
+        field += ch;
+      }
+    }
+  }
+
+  if (inQuotes && !quotePending) throw new Error('Unterminated quoted field at end of CSV');
+  if (field !== '' || row.length > 0) {
+    const record = endRow();
+    if (record) yield record;
+  }
+}
+
+/**
+ * A JSON array of objects or newline-delimited JSON objects. Each
+ * top-level object is parsed as soon as its closing brace arrives.
+ */
+export async function* parseJsonRows(source: ImportSource): AsyncGenerator<Record<string, any>> {
+  let buffer = '';
+  let depth = 0;
+  let inString = false;
+  let escaped = false;
+
+  for await (const text of textChunks(source)) {
+    let start = depth > 0 ? 0 : -1;
+    for (let i = 0; i < text.length; i++) {
+      const ch = text[i];
+      if (depth === 0) {
+        if (ch === '{') {
+          depth = 1;
+          start = i;
+        } else if (!/[\s,[\]]/.test(ch)) {
+          throw new Error(`Expected a JSON object, found '${ch}'`);
+        }
+        continue;
+      }
+      if (inString) {
+        if (escaped) escaped = false;
+        else if (ch === '\\') escaped = true;
+        else if (ch === '"') inString = false;
+      } else if (ch === '"') {
+        inString = true;
+      } else if (ch === '{' || ch === '[') {
+        depth++;
+      } else if (ch === '}' || ch === ']') {
+        depth--;
+        if (depth === 0) {
+          const json = buffer + text.slice(start, i + 1);
+          buffer = '';
+          start = -1;
+          yield JSON.parse(json);
+        }
+      }
+    }
+    if (depth > 0) buffer += text.slice(start);
+  }
+
+  if (depth > 0) throw new Error('Unexpected end of JSON input');
+}
+
+// ---- Import Jobs ----
+
+export interface ImportJob {
+  id: string;
+  entityType: ImportEntityType;
+  status: 'running' | 'completed' | 'failed';
+  rowsRead: number;
+  imported: number;
+  skipped: number;
+  /** Every row up to and including this one is written or skipped; a resumed run starts after it */
+  committedRows: number;
+  errors: { row: number; message: string }[];
+  message?: string;
+  createdBy: string;
+  createdAt: string;
+  updatedAt: string;
+  finishedAt?: string;
+}
+
+const MAX_JOB_ERRORS = 100;
+const PROGRESS_EVERY_ROWS = 1000;
+
+export function getImportJob(id: string): Promise<ImportJob | null> {
+  return getDoc<ImportJob>(collections.importJobs, id);
+}
+
+export function createImportJob(entityType: ImportEntityType, createdBy: string): ImportJob {
+  const now = new Date().toISOString();
+  return {
+    id: crypto.randomUUID(),
+    entityType,
+    status: 'running',
+    rowsRead: 0,
+    imported: 0,
+    skipped: 0,
+    committedRows: 0,
+    errors: [],
+    createdBy,
+    createdAt: now,
+    updatedAt: now,
+  };
+}
+
+async function saveJob(job: ImportJob): Promise<void> {
+  job.updatedAt = new Date().toISOString();
+  await collections.importJobs.doc(job.id).set(job);
+}
+
+// ---- Bulk Writer ----
+
+// BulkWriter ramps from the initial rate by 50% every 5 minutes up to the cap
+const INITIAL_OPS_PER_SECOND = 500;
+const MAX_OPS_PER_SECOND = 5000;
+// Backpressure: stop reading once this many writes are queued, resume at half
+const MAX_QUEUED_WRITES = 2000;
+const RESUME_QUEUED_WRITES = MAX_QUEUED_WRITES / 2;
+const MAX_WRITE_ATTEMPTS = 5;
+// gRPC codes worth retrying: DEADLINE_EXCEEDED, RESOURCE_EXHAUSTED, ABORTED, INTERNAL, UNAVAILABLE
+const RETRYABLE_CODES = new Set([4, 8, 10, 13, 14]);
+
+/**
+ * Write a job's rows. Rows up to job.committedRows are skipped, so a failed
+ * or interrupted job resumes by re-sending the same source; writes are
+ * idempotent sets keyed by record ID. Row failures are recorded on the job
+ * rather than aborting it; a source that cannot be parsed fails the job.
+ */
+export async function runImportJob(
+  job: ImportJob,
+  rows: AsyncIterable<Record<string, any>> | Iterable<Record<string, any>>,
+  mapping?: Record<string, string>,
+): Promise<ImportJob> {
+  const collection = importCollection(job.entityType);
+  const resumeAfter = job.committedRows;
+  const importedAt = new Date().toISOString();
+  let importedThisRun = 0;
+
+  job.status = 'running';
+  delete job.message;
+  delete job.finishedAt;
+  await saveJob(job);
+
+  const writer = db.bulkWriter({
+    throttling: { initialOpsPerSecond: INITIAL_OPS_PER_SECOND, maxOpsPerSecond: MAX_OPS_PER_SECOND },
+  });
+  writer.onWriteError(err => RETRYABLE_CODES.has(err.code) && err.failedAttempts < MAX_WRITE_ATTEMPTS);
+
+  const recordError = (row: number, message: string) => {
+    if (job.errors.length < MAX_JOB_ERRORS) job.errors.push({ row, message });
+  };
+
+  // Rows settle out of order; committedRows only advances over a contiguous run
+  const settled = new Map<number, boolean>();
+  const settle = (row: number) => {
+    settled.set(row, true);
+    for (const [r, done] of settled) {
+      if (!done) break;
+      settled.delete(r);
+      job.committedRows = r;
+    }
+  };
+
+  let queued = 0;
+  let drained: { below: number; resolve: () => void } | null = null;
+  const waitForQueue = (below: number) => queued <= below
+    ? Promise.resolve()
+    : new Promise<void>(resolve => { drained = { below, resolve }; });
+
+  let row = 0;
+  try {
+    for await (const record of rows) {
+      row++;
+      if (row <= resumeAfter) continue;
+      job.rowsRead = row;
+
+      const result = transformRecord(job.entityType, record, mapping);
+      if (!result.ok) {
+        job.skipped++;
+        for (const message of result.messages) recordError(row, message);
+        settle(row);
+      } else {
+        const rowNumber = row;
+        settled.set(rowNumber, false);
+        queued++;
+        writer.set(collection.doc(result.id), { ...result.data, importedAt, importedBy: job.createdBy })
+          .then(
+            () => { job.imported++; importedThisRun++; },
+            (err: Error) => { job.skipped++; recordError(rowNumber, `Write failed: ${err.message}`); },
+          )
+          .then(() => {
+            queued--;
+            settle(rowNumber);
+            if (drained && queued <= drained.below) {
+              drained.resolve();
+              drained = null;
+            }
+          });
+        if (queued >= MAX_QUEUED_WRITES) await waitForQueue(RESUME_QUEUED_WRITES);
+      }
+
+      if (row % PROGRESS_EVERY_ROWS === 0) await saveJob(job);
+    }
+    job.status = 'completed';
+  } catch (err: any) {
+    job.status = 'failed';
+    job.message = `Row ${row}: ${err.message}`;
+  }
+
+  // Writes already queued still complete, so committedRows is accurate for a resume
+  await writer.close();
+  await waitForQueue(0);
+  job.finishedAt = new Date().toISOString();
+  await saveJob(job);
+
+  // Bulk writes bypass the per-document briefing and deadline hooks
+  if (importedThisRun > 0 && job.entityType !== 'rentTransactions') await rebuildBriefingSnapshots();
+  if (importedThisRun > 0 && job.entityType === 'cases') await rebuildDeadlineIndex();
+  return job;
+}
@@ -0,0 +1,67 @@
+// ============================================================
+// SocialHomes.Ai — Multi-Keyword Matcher
+// Aho-Corasick automaton over many keyword lists, built once.
+// A scan reports every keyword that occurs anywhere in the text
+// (same semantics as text.includes(keyword)) in one pass, so the
+// cost depends on the text length, not the number of keywords.
+// ============================================================
+
+export interface KeywordMatcher<T> {
+  /** Values of every keyword found in the text, each value at most once */
+  match(text: string): Set<T>;
+}
+
+/**
+ * Compile keyword → value pairs into a matcher. A keyword may map to
+ * several values, and keywords may overlap or contain each other.
+ */
+export function buildKeywordMatcher<T>(keywords: Iterable<readonly [string, T]>): KeywordMatcher<T> {
+  const transitions: Map<string, number>[] = [new Map()];
+  const outputs: T[][] = [[]];
+
+  // Trie of keywords
+  for (const [keyword, value] of keywords) {
+    if (!keyword) continue;
+    let state = 0;
+    for (const ch of keyword) {
+      let next = transitions[state].get(ch);
+      if (next === undefined) {
+        next = transitions.length;
+        transitions.push(new Map());
+        outputs.push([]);
+        transitions[state].set(ch, next);
+      }
+      state = next;
+    }
+    outputs[state].push(value);
+  }
+
+  // Failure links, breadth first; each state also inherits the outputs
+  // of its failure state so a match reports every keyword ending there
+  const fail = new Array<number>(transitions.length).fill(0);
+  const queue: number[] = [...transitions[0].values()];
+  for (let head = 0; head < queue.length; head++) {
+    const state = queue[head];
+    for (const [ch, next] of transitions[state]) {
+      let f = fail[state];
+      while (f !== 0 && !transitions[f].has(ch)) f = fail[f];
+      const target = transitions[f].get(ch);
+      fail[next] = target !== undefined && target !== next ? target : 0;
+      if (outputs[fail[next]].length > 0) outputs[next] = outputs[next].concat(outputs[fail[next]]);
+      queue.push(next);
+    }
+  }
+
+  return {
+    match(text: string): Set<T> {
+      const found = new Set<T>();
+      let state = 0;
+      for (const ch of text) {
+        while (state !== 0 && !transitions[state].has(ch)) state = fail[state];
+        state = transitions[state].get(ch) ?? 0;
+        for (const value of outputs[state]) found.add(value);
+      }
+      return found;
+    },
+  };
+}
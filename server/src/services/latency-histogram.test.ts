@@ -0,0 +1,81 @@
+// ============================================================
+// SocialHomes.Ai — Latency Histogram Tests
+// Bucket precision, percentiles, rolling windows and the
+// per-route figures and Prometheus export in monitoring.
+// ============================================================
+
+import { describe, it, expect, vi } from 'vitest';
+
+vi.mock('./firestore.js', () => ({ collections: {} }));
+
+import { LatencyHistogram, RollingHistograms, bucketIndex, bucketUpperBound } from './latency-histogram.js';
+import { recordRequest, getLatencyStats, getPrometheusMetrics } from './monitoring.js';
+
+describe('LatencyHistogram', () => {
+  it('keeps every bucket within 1/16 of its values', () => {
+    for (const ms of [0.3, 1, 7.5, 42, 250, 1234, 60_000]) {
+      const upper = bucketUpperBound(bucketIndex(ms));
+      expect(upper).toBeGreaterThanOrEqual(ms);
+      expect((upper - ms) / upper).toBeLessThanOrEqual(1 / 16);
+    }
+  });
+
+  it('reports percentiles of a skewed distribution', () => {
+    const histogram = new LatencyHistogram();
+    for (let i = 1; i <= 1000; i++) histogram.record(i <= 990 ? 20 : 2000 + i);
+
+    const summary = histogram.summary();
+    expect(summary.count).toBe(1000);
+    expect(summary.p50).toBeCloseTo(20, -1);
+    expect(summary.p90).toBeLessThan(25);
+    expect(summary.p99).toBeLessThan(25);
+    expect(histogram.percentile(99.5)).toBeGreaterThan(2000);
+    expect(summary.max).toBe(3000);
+  });
+
+  it('merges histograms', () => {
+    const a = new LatencyHistogram();
+    const b = new LatencyHistogram();
+    a.record(10);
+    b.record(1000);
+    expect(a.merge(b).summary()).toMatchObject({ count: 2, max: 1000 });
+  });
+});
+
+describe('RollingHistograms', () => {
+  it('drops samples once their slot leaves the window', () => {
+    const window = new RollingHistograms(10_000, 6);
+    window.record('GET /a', 5, 0);
+    window.record('GET /a', 500, 30_000);
+
+    expect(window.snapshot(55_000).get('GET /a')!.count).toBe(2);
+    expect(window.snapshot(65_000).get('GET /a')!.count).toBe(1);
+    expect(window.snapshot(95_000).size).toBe(0);
+  });
+});
+
+describe('monitoring latency', () => {
+  it('groups percentiles by route template and status class', () => {
+    for (let i = 0; i < 99; i++) recordRequest('GET /api/v1/tenants/:id', 200, 12);
+    recordRequest('GET /api/v1/tenants/:id', 200, 900);
+    recordRequest('GET /api/v1/tenants/:id', 404, 3);
+
+    const stats = getLatencyStats('1m');
+    const ok = stats.routes.find(r => r.route === 'GET /api/v1/tenants/:id' && r.statusClass === '2xx')!;
+    expect(ok).toMatchObject({ count: 100, max: 900 });
+    expect(ok.p50).toBeLessThan(13);
+    expect(stats.routes.find(r => r.statusClass === '4xx')!.count).toBe(1);
+    expect(stats.overall.count).toBe(101);
+  });
+
+  it('exports a cumulative Prometheus histogram', () => {
+    recordRequest('GET /api/v1/cases', 500, 30);
+    const text = getPrometheusMetrics();
+
+    expect(text).toContain('# TYPE socialhomes_http_request_duration_seconds histogram');
+    expect(text).toContain('socialhomes_http_request_duration_seconds_bucket{route="GET /api/v1/cases",status_class="5xx",le="0.025"} 0');
+    expect(text).toContain('socialhomes_http_request_duration_seconds_bucket{route="GET /api/v1/cases",status_class="5xx",le="0.05"} 1');
+    expect(text).toContain('socialhomes_http_request_duration_seconds_count{route="GET /api/v1/cases",status_class="5xx"} 1');
+    expect(text.endsWith('\n')).toBe(true);
+  });
+});
@@ -0,0 +1,136 @@
+// ============================================================
+// SocialHomes.Ai — Latency Histograms
+// Log-linear histograms for request latencies: each power of two
+// is split into 16 linear buckets, so any percentile is within
+// ~6% of the true value at a fixed, small cost per sample.
+// Rolling windows keep a ring of per-slot histograms and merge
+// the slots still inside the window on read.
+// ============================================================
+
+// ---- Buckets ----
+
+const SUB_BUCKETS = 16;
+// 2^20 ms is ~17 minutes; anything slower shares the last octave
+const MAX_EXPONENT = 20;
+
+/** Bucket for a latency in ms. Sub-millisecond values get their own linear octave. */
+export function bucketIndex(ms: number): number {
+  if (ms < 1) return Math.max(0, Math.floor(ms * SUB_BUCKETS));
+  const exponent = Math.min(Math.floor(Math.log2(ms)), MAX_EXPONENT);
+  const sub = Math.min(SUB_BUCKETS - 1, Math.floor((ms / 2 ** exponent - 1) * SUB_BUCKETS));
+  return SUB_BUCKETS * (exponent + 1) + sub;
+}
+
+/** Highest latency (ms) that falls in a bucket. */
+export function bucketUpperBound(index: number): number {
+  if (index < SUB_BUCKETS) return (index + 1) / SUB_BUCKETS;
+  const exponent = Math.floor(index / SUB_BUCKETS) - 1;
+  return 2 ** exponent * (1 + ((index % SUB_BUCKETS) + 1) / SUB_BUCKETS);
+}
+
+// ---- Histogram ----
+
+export interface LatencySummary {
+  count: number;
+  p50: number;
+  p90: number;
+  p99: number;
+  max: number;
+}
+
+/** Sparse: only buckets that have seen a sample hold a counter. */
+export class LatencyHistogram {
+  private counts = new Map<number, number>();
+  count = 0;
+  sum = 0;
+  max = 0;
+
+  record(ms: number): void {
+    const index = bucketIndex(ms);
+    this.counts.set(index, (this.counts.get(index) ?? 0) + 1);
+    this.count++;
+    this.sum += ms;
+    if (ms > this.max) this.max = ms;
+  }
+
+  merge(other: LatencyHistogram): this {
+    for (const [index, n] of other.counts) this.counts.set(index, (this.counts.get(index) ?? 0) + n);
+    this.count += other.count;
+    this.sum += other.sum;
+    if (other.max > this.max) this.max = other.max;
+    return this;
+  }
+
+  /** Latency (ms) at or below which `p` percent of samples fall. */
+  percentile(p: number): number {
+    if (this.count === 0) return 0;
+    const rank = Math.max(1, Math.ceil((p / 100) * this.count));
+    let seen = 0;
+    for (const index of [...this.counts.keys()].sort((a, b) => a - b)) {
+      seen += this.counts.get(index)!;
+      if (seen >= rank) return Math.min(bucketUpperBound(index), this.max);
+    }
+    return this.max;
+  }
+
+  summary(): LatencySummary {
+    const round = (ms: number) => Math.round(ms * 10) / 10;
+    return {
+      count: this.count,
+      p50: round(this.percentile(50)),
+      p90: round(this.percentile(90)),
+      p99: round(this.percentile(99)),
+      max: round(this.max),
+    };
+  }
+}
+
+// ---- Rolling Window ----
+
+interface Slot {
+  start: number;
+  series: Map<string, LatencyHistogram>;
+}
+
+/**
+ * Histograms per series key over the last `slots * slotMs`. A sample
+ * goes into the slot for its time; slots are reused once they fall out
+ * of the window, so memory is bounded by the series active per slot.
+ */
+export class RollingHistograms {
+  private ring: Slot[];
+
+  constructor(private slotMs: number, slots: number) {
+    this.ring = Array.from({ length: slots }, () => ({ start: -Infinity, series: new Map() }));
+  }
+
+  record(key: string, ms: number, now = Date.now()): void {
+    const start = now - (now % this.slotMs);
+    const slot = this.ring[Math.floor(now / this.slotMs) % this.ring.length];
+    if (slot.start !== start) {
+      slot.start = start;
+      slot.series = new Map();
+    }
+    let histogram = slot.series.get(key);
+    if (!histogram) {
+      histogram = new LatencyHistogram();
+      slot.series.set(key, histogram);
+    }
+    histogram.record(ms);
+  }
+
+  /** Each series merged across the slots still inside the window. */
+  snapshot(now = Date.now()): Map<string, LatencyHistogram> {
+    const oldest = now - now % this.slotMs - (this.ring.length - 1) * this.slotMs;
+    const merged = new Map<string, LatencyHistogram>();
+    for (const slot of this.ring) {
+      if (slot.start < oldest) continue;
+      for (const [key, histogram] of slot.series) {
+        const target = merged.get(key);
+        if (target) target.merge(histogram);
+        else merged.set(key, new LatencyHistogram().merge(histogram));
+      }
+    }
+    return merged;
+  }
+}
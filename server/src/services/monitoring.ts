@@ -4,6 +4,9 @@
 // ============================================================
 
 import { collections } from './firestore.js';
+import type { AiCacheTier } from './ai-response-cache.js';
+import { LatencyHistogram, RollingHistograms, type LatencySummary } from './latency-histogram.js';
+import type { FirestoreTrace } from './firestore-tracing.js';
 
 interface Metrics {
   requestCount: number;
@@ -15,6 +18,8 @@ interface Metrics {
   startedAt: string;
   cacheHits: number;
   cacheMisses: number;
+  aiCacheHits: Record<AiCacheTier, number>;
+  aiCacheMisses: number;
 }
 
 const metrics: Metrics = {
@@ -27,21 +32,147 @@ const metrics: Metrics = {
   startedAt: new Date().toISOString(),
   cacheHits: 0,
   cacheMisses: 0,
+  aiCacheHits: { memory: 0, firestore: 0 },
+  aiCacheMisses: 0,
 };
 
+// ---- Latency ----
+// Per route template and status class. Rolling windows back the JSON
+// percentiles; the cumulative buckets back the Prometheus histogram.
+
+const latencyWindows = {
+  '1m': new RollingHistograms(10_000, 6),
+  '1h': new RollingHistograms(60_000, 60),
+};
+
+type LatencyWindow = keyof typeof latencyWindows;
+
+// Prometheus histogram bucket bounds (ms), exported in seconds
+const PROMETHEUS_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+
+interface PrometheusSeries {
+  route: string;
+  statusClass: string;
+  buckets: number[];   // per bound, not cumulative; last is +Inf
+  sum: number;
+  count: number;
+}
+
+const prometheusSeries = new Map<string, PrometheusSeries>();
+
+function statusClassOf(statusCode: number): string {
+  return `${Math.floor(statusCode / 100)}xx`;
+}
+
+// Status classes never contain '|', so the first one splits the key
+function seriesKey(route: string, statusClass: string): string {
+  return `${statusClass}|${route}`;
+}
+
+function recordLatency(route: string, statusCode: number, ms: number): void {
+  const statusClass = statusClassOf(statusCode);
+  const key = seriesKey(route, statusClass);
+  const now = Date.now();
+  for (const window of Object.values(latencyWindows)) window.record(key, ms, now);
+
+  let series = prometheusSeries.get(key);
+  if (!series) {
+    series = { route, statusClass, buckets: new Array(PROMETHEUS_BUCKETS_MS.length + 1).fill(0), sum: 0, count: 0 };
+    prometheusSeries.set(key, series);
+  }
+  const bound = PROMETHEUS_BUCKETS_MS.findIndex(b => ms <= b);
+  series.buckets[bound === -1 ? PROMETHEUS_BUCKETS_MS.length : bound] += 1;
+  series.sum += ms;
+  series.count += 1;
+}
+
+export interface RouteLatency extends LatencySummary {
+  route: string;
+  statusClass: string;
+}
+
+/** p50/p90/p99/max over the window, overall and per route and status class (slowest p99 first). */
+export function getLatencyStats(window: LatencyWindow): { overall: LatencySummary; routes: RouteLatency[] } {
+  const overall = new LatencyHistogram();
+  const routes: RouteLatency[] = [];
+  for (const [key, histogram] of latencyWindows[window].snapshot()) {
+    const split = key.indexOf('|');
+    routes.push({ route: key.slice(split + 1), statusClass: key.slice(0, split), ...histogram.summary() });
+    overall.merge(histogram);
+  }
+  routes.sort((a, b) => b.p99 - a.p99);
+  return { overall: overall.summary(), routes };
+}
+
+// ---- Firestore Usage ----
+// Totals per route template from the request traces, so the cost of an
+// endpoint can be followed over time
+
+interface FirestoreUsage {
+  requests: number;
+  reads: number;
+  writes: number;
+  bytes: number;
+  ms: number;
+}
+
+const firestoreUsage = new Map<string, FirestoreUsage>();
+
+export function recordFirestoreUsage(route: string, trace: FirestoreTrace): void {
+  let usage = firestoreUsage.get(route);
+  if (!usage) {
+    usage = { requests: 0, reads: 0, writes: 0, bytes: 0, ms: 0 };
+    firestoreUsage.set(route, usage);
+  }
+  usage.requests += 1;
+  usage.reads += trace.reads;
+  usage.writes += trace.writes;
+  usage.bytes += trace.bytes;
+  usage.ms += trace.ms;
+}
+
+export interface RouteFirestoreUsage {
+  route: string;
+  requests: number;
+  avgReads: number;
+  avgWrites: number;
+  avgKb: number;
+  avgMs: number;
+}
+
+/** Average Firestore cost per request for each route, most reads first. */
+export function getFirestoreUsage(): RouteFirestoreUsage[] {
+  return [...firestoreUsage]
+    .map(([route, u]) => ({
+      route,
+      requests: u.requests,
+      avgReads: Math.round(u.reads / u.requests),
+      avgWrites: Math.round(u.writes / u.requests),
+      avgKb: Math.round(u.bytes / u.requests / 1024),
+      avgMs: Math.round(u.ms / u.requests),
+    }))
+    .sort((a, b) => b.avgReads - a.avgReads);
+}
+
 // ---- Public API ----
 
-export function recordRequest(path: string, statusCode: number, responseTimeMs: number): void {
+/**
+ * Record a finished request. `route` should be a template such as
+ * "GET /api/v1/tenants/:id" so percentiles group by endpoint, not by ID.
+ */
+export function recordRequest(route: string, statusCode: number, responseTimeMs: number): void {
   metrics.requestCount += 1;
   metrics.responseTimeSum += responseTimeMs;
   metrics.responseTimeCount += 1;
 
   metrics.statusCodes[statusCode] = (metrics.statusCodes[statusCode] || 0) + 1;
-  metrics.endpointHits[path] = (metrics.endpointHits[path] || 0) + 1;
+  metrics.endpointHits[route] = (metrics.endpointHits[route] || 0) + 1;
 
   if (statusCode >= 400) {
     metrics.errorCount += 1;
   }
+
+  recordLatency(route, statusCode, responseTimeMs);
 }
 
 export function recordCacheHit(): void {
@@ -52,6 +183,26 @@ export function recordCacheMiss(): void {
   metrics.cacheMisses += 1;
 }
 
+export function recordAiCacheHit(tier: AiCacheTier): void {
+  metrics.aiCacheHits[tier] += 1;
+}
+
+export function recordAiCacheMiss(): void {
+  metrics.aiCacheMisses += 1;
+}
+
+function aiCacheStats(): { hits: number; misses: number; hitRate: number; memoryHits: number; firestoreHits: number } {
+  const hits = metrics.aiCacheHits.memory + metrics.aiCacheHits.firestore;
+  const total = hits + metrics.aiCacheMisses;
+  return {
+    hits,
+    misses: metrics.aiCacheMisses,
+    hitRate: total > 0 ? Math.round((hits / total) * 100) : 0,
+    memoryHits: metrics.aiCacheHits.memory,
+    firestoreHits: metrics.aiCacheHits.firestore,
+  };
+}
+
 export function getMetrics(): {
   requestCount: number;
   errorCount: number;
@@ -63,6 +214,9 @@ export function getMetrics(): {
   cacheHits: number;
   cacheMisses: number;
   cacheHitRate: number;
+  aiResponseCache: ReturnType<typeof aiCacheStats>;
+  latency: Record<LatencyWindow, ReturnType<typeof getLatencyStats>>;
+  firestoreUsage: RouteFirestoreUsage[];
 } {
   const avgResponseTimeMs =
     metrics.responseTimeCount > 0
@@ -83,9 +237,79 @@ export function getMetrics(): {
     cacheHits: metrics.cacheHits,
     cacheMisses: metrics.cacheMisses,
     cacheHitRate,
+    aiResponseCache: aiCacheStats(),
+    latency: {
+      '1m': getLatencyStats('1m'),
+      '1h': getLatencyStats('1h'),
+    },
+    firestoreUsage: getFirestoreUsage(),
   };
 }
 
+// ---- Prometheus Export ----
+
+function escapeLabel(value: string): string {
+  return value.replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+}
+
+function labels(values: Record<string, string>): string {
+  return `{${Object.entries(values).map(([k, v]) => `${k}="${escapeLabel(v)}"`).join(',')}}`;
+}
+
+/** The same counters in Prometheus text exposition format (version 0.0.4). */
+export function getPrometheusMetrics(): string {
+  const lines: string[] = [];
+  const metric = (name: string, type: string, help: string) => {
+    lines.push(`# HELP ${name} ${help}`, `# TYPE ${name} ${type}`);
+  };
+
+  metric('socialhomes_http_requests_total', 'counter', 'HTTP requests by status code.');
+  for (const [code, n] of Object.entries(metrics.statusCodes)) {
+    lines.push(`socialhomes_http_requests_total${labels({ code })} ${n}`);
+  }
+
+  metric('socialhomes_http_request_duration_seconds', 'histogram', 'HTTP request latency by route template and status class.');
+  for (const series of prometheusSeries.values()) {
+    const base = { route: series.route, status_class: series.statusClass };
+    let cumulative = 0;
+    PROMETHEUS_BUCKETS_MS.forEach((bound, i) => {
+      cumulative += series.buckets[i];
+      lines.push(`socialhomes_http_request_duration_seconds_bucket${labels({ ...base, le: String(bound / 1000) })} ${cumulative}`);
+    });
+    lines.push(`socialhomes_http_request_duration_seconds_bucket${labels({ ...base, le: '+Inf' })} ${series.count}`);
+    lines.push(`socialhomes_http_request_duration_seconds_sum${labels(base)} ${series.sum / 1000}`);
+    lines.push(`socialhomes_http_request_duration_seconds_count${labels(base)} ${series.count}`);
+  }
+
+  metric('socialhomes_firestore_documents_read_total', 'counter', 'Firestore documents read by route template.');
+  for (const [route, u] of firestoreUsage) {
+    lines.push(`socialhomes_firestore_documents_read_total${labels({ route })} ${u.reads}`);
+  }
+  metric('socialhomes_firestore_documents_written_total', 'counter', 'Firestore documents written by route template.');
+  for (const [route, u] of firestoreUsage) {
+    lines.push(`socialhomes_firestore_documents_written_total${labels({ route })} ${u.writes}`);
+  }
+  metric('socialhomes_firestore_seconds_total', 'counter', 'Time spent in Firestore operations by route template.');
+  for (const [route, u] of firestoreUsage) {
+    lines.push(`socialhomes_firestore_seconds_total${labels({ route })} ${u.ms / 1000}`);
+  }
+
+  metric('socialhomes_entity_cache_requests_total', 'counter', 'Entity cache lookups by result.');
+  lines.push(`socialhomes_entity_cache_requests_total${labels({ result: 'hit' })} ${metrics.cacheHits}`);
+  lines.push(`socialhomes_entity_cache_requests_total${labels({ result: 'miss' })} ${metrics.cacheMisses}`);
+
+  metric('socialhomes_ai_response_cache_requests_total', 'counter', 'AI response cache lookups by result.');
+  for (const [tier, n] of Object.entries(metrics.aiCacheHits)) {
+    lines.push(`socialhomes_ai_response_cache_requests_total${labels({ result: `hit-${tier}` })} ${n}`);
+  }
+  lines.push(`socialhomes_ai_response_cache_requests_total${labels({ result: 'miss' })} ${metrics.aiCacheMisses}`);
+
+  metric('socialhomes_process_uptime_seconds', 'gauge', 'Seconds since the instance started.');
+  lines.push(`socialhomes_process_uptime_seconds ${Math.round(process.uptime())}`);
+
+  return `${lines.join('\n')}\n`;
+}
+
 export async function getHealthStatus(): Promise<{
   status: 'healthy' | 'degraded' | 'unhealthy';
   service: string;
@@ -106,6 +330,7 @@ export async function getHealthStatus(): Promise<{
     misses: number;
     hitRate: number;
   };
+  aiResponseCache: ReturnType<typeof aiCacheStats>;
 }> {
   const memUsage = process.memoryUsage();
   const totalCacheOps = metrics.cacheHits + metrics.cacheMisses;
@@ -153,5 +378,6 @@ export async function getHealthStatus(): Promise<{
       misses: metrics.cacheMisses,
       hitRate: cacheHitRate,
     },
+    aiResponseCache: aiCacheStats(),
   };
 }
@@ -5,6 +5,7 @@
 // ============================================================
 
 import { collections, getDocs, getDoc } from './firestore.js';
+import { cachedGetDoc, cachedGetDocs } from './entity-cache.js';
 import { fetchWithCache } from './external-api.js';
 import type { EstateDoc, PropertyDoc, TenantDoc, CaseDoc, BlockDoc } from '../models/firestore-schemas.js';
 
@@ -156,7 +157,7 @@ async function getCrimeSummary(lat: number, lng: number) {
 
 // ── Main: Generate Briefing ──
 export async function generateNeighbourhoodBriefing(estateId: string): Promise<NeighbourhoodBriefing> {
-  const estate = await getDoc<EstateDoc>(collections.estates, estateId);
+  const estate = await cachedGetDoc<EstateDoc>(collections.estates, estateId);
   if (!estate) throw new Error(`Estate ${estateId} not found`);
 
   // Load all data in parallel
@@ -173,7 +174,7 @@ export async function generateNeighbourhoodBriefing(estateId: string): Promise<N
     getDocs<CaseDoc>(collections.cases),
     getWeatherSummary(estate.lat, estate.lng),
     getCrimeSummary(estate.lat, estate.lng),
-    getDocs<BlockDoc>(collections.blocks, [{ field: 'estateId', op: '==', value: estateId }]),
+    cachedGetDocs<BlockDoc>(collections.blocks, [{ field: 'estateId', op: '==', value: estateId }]),
   ]);
 
   const propertyIds = new Set(estateProperties.map(p => p.id));
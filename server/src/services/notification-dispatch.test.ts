@@ -0,0 +1,124 @@
+// ============================================================
+// SocialHomes.Ai — Bulk Notification Dispatch Tests
+// Batched preference reads and queue writes, per-channel
+// delivery tallies, failure reporting and throughput.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+
+// ── Mock the Firestore layer with batch and getAll counters ──
+const { prefs, queue, portal, calls, sendToUser } = vi.hoisted(() => ({
+  prefs: new Map<string, any>(),
+  queue: new Map<string, any>(),
+  portal: [] as any[],
+  calls: { getAll: 0, commits: 0 },
+  sendToUser: vi.fn(),
+}));
+
+vi.mock('./firestore.js', () => {
+  let autoId = 0;
+  const collection = (name: string) => ({
+    doc: (id = `auto-${++autoId}`) => ({ id, name }),
+  });
+  return {
+    db: {
+      collection,
+      getAll: async (...refs: any[]) => {
+        calls.getAll++;
+        return refs.map(ref => ({ id: ref.id, exists: prefs.has(ref.id), data: () => prefs.get(ref.id) }));
+      },
+      batch: () => {
+        const ops: (() => void)[] = [];
+        return {
+          set: (ref: any, data: any) => {
+            ops.push(() => (ref.name === 'portalNotifications' ? portal.push(data) : queue.set(ref.id, data)));
+          },
+          update: (ref: any, data: any) => { ops.push(() => queue.set(ref.id, { ...queue.get(ref.id), ...data })); },
+          commit: async () => {
+            calls.commits++;
+            for (const op of ops) op();
+          },
+        };
+      },
+    },
+    collections: {},
+    FieldValue: { serverTimestamp: () => 'SERVER_TIMESTAMP' },
+  };
+});
+
+vi.mock('./websocket.js', () => ({
+  sendToUser,
+  sendToRole: vi.fn(),
+  sendToEstate: vi.fn(),
+  broadcast: vi.fn(),
+}));
+
+import { dispatchBulkNotification } from './notification-dispatch.js';
+
+const payload = {
+  category: 'arrears-alert' as const,
+  priority: 'medium' as const,
+  title: 'Arrears action',
+  body: 'An arrears action has been recorded for your account.',
+};
+
+const tenantIds = (n: number) => Array.from({ length: n }, (_, i) => `ten-${i}`);
+
+describe('dispatchBulkNotification', () => {
+  beforeEach(() => {
+    prefs.clear();
+    queue.clear();
+    portal.length = 0;
+    calls.getAll = 0;
+    calls.commits = 0;
+    sendToUser.mockReset();
+    vi.spyOn(console, 'log').mockImplementation(() => {});
+  });
+
+  it('reads preferences and writes the queue once per batch of 500', async () => {
+    const result = await dispatchBulkNotification(tenantIds(1200), payload);
+
+    expect(calls.getAll).toBe(3);
+    // Enqueue and outcome writes for each batch
+    expect(calls.commits).toBe(6);
+    expect(result.recipients).toBe(1200);
+    expect(result.sent).toBe(1200);
+    expect(result.queueIds).toHaveLength(1200);
+    expect([...queue.values()].every(q => q.status === 'sent')).toBe(true);
+    expect(result.throughput).toBeGreaterThan(0);
+  });
+
+  it('delivers on each recipient\'s preferred channels and tallies them', async () => {
+    prefs.set('ten-0', { channels: { 'in-app': true, email: true, sms: false, portal: true } });
+    const result = await dispatchBulkNotification(tenantIds(3), payload);
+
+    expect(result.byChannel).toEqual({
+      'in-app': { sent: 3, failed: 0 },
+      email: { sent: 1, failed: 0 },
+      portal: { sent: 1, failed: 0 },
+    });
+    expect(portal).toEqual([expect.objectContaining({ tenantId: 'ten-0' })]);
+  });
+
+  it('skips the preference lookup when channels are explicit', async () => {
+    await dispatchBulkNotification(tenantIds(10), { ...payload, channels: ['in-app'] });
+    expect(calls.getAll).toBe(0);
+  });
+
+  it('personalises each recipient and reports the ones no channel reached', async () => {
+    sendToUser.mockImplementation((userId: string) => {
+      if (userId === 'ten-1') throw new Error('socket closed');
+    });
+    const result = await dispatchBulkNotification(
+      ['ten-0', 'ten-1', 'ten-0'],
+      { ...payload, channels: ['in-app'] },
+      userId => ({ entityId: userId }),
+    );
+
+    expect(result.recipients).toBe(2);
+    expect(result.failures).toEqual([{ userId: 'ten-1', error: 'socket closed' }]);
+    expect(sendToUser).toHaveBeenCalledWith('ten-0', expect.objectContaining({ entityId: 'ten-0' }));
+    const failed = [...queue.values()].find(q => q.payload.recipientUserId === 'ten-1');
+    expect(failed.status).toBe('failed');
+  });
+});
@@ -1,10 +1,12 @@
 // ============================================================
 // SocialHomes.Ai — Notification Dispatch Service
 // Task 5.2.4: Orchestrate GOV.UK Notify email/SMS, in-app
-// WebSocket push, notification queue, delivery tracking, retry
+// WebSocket push, notification queue, delivery tracking, retry.
+// Bulk campaigns fan out in batches through per-channel worker pools.
 // ============================================================
 
 import { db, collections, FieldValue } from './firestore.js';
+import { mapWithConcurrency } from './concurrency.js';
 import { sendToUser, sendToRole, sendToEstate, broadcast } from './websocket.js';
 import { renderTemplate, getTemplateById } from './govuk-notify.js';
 import type { WebSocketMessage, NotificationCategory, NotificationPriority, NotificationChannel, NotificationPreference } from '../types/websocket.js';
@@ -66,18 +68,46 @@ export async function dispatchNotification(payload: NotificationPayload): Promis
 }
 
 /**
- * Send a bulk notification to multiple users.
+ * Send a bulk notification to multiple users and wait for delivery.
+ * `personalise` supplies per-recipient fields (e.g. entityId) on top of
+ * the shared payload. See Bulk Dispatch below.
  */
 export async function dispatchBulkNotification(
   userIds: string[],
   payload: Omit<NotificationPayload, 'recipientUserId'>,
-): Promise<string[]> {
-  const queueIds: string[] = [];
-  for (const userId of userIds) {
-    const id = await dispatchNotification({ ...payload, recipientUserId: userId });
-    queueIds.push(id);
+  personalise?: (userId: string) => Partial<NotificationPayload>,
+): Promise<BulkDispatchResult> {
+  const start = Date.now();
+  const recipients = [...new Set(userIds)];
+  const result: BulkDispatchResult = {
+    queueIds: [],
+    recipients: recipients.length,
+    sent: 0,
+    failed: 0,
+    byChannel: {},
+    failures: [],
+    durationMs: 0,
+    throughput: 0,
+  };
+
+  for (let i = 0; i < recipients.length; i += BULK_BATCH_SIZE) {
+    const chunk = recipients.slice(i, i + BULK_BATCH_SIZE);
+    try {
+      await dispatchBatch(chunk, payload, personalise, result);
+    } catch (err: any) {
+      // The batch could not be queued — nothing in it was delivered
+      result.failed += chunk.length;
+      for (const userId of chunk) result.failures.push({ userId, error: err.message });
+    }
   }
-  return queueIds;
+
+  result.durationMs = Date.now() - start;
+  result.throughput = Math.round(recipients.length / Math.max(result.durationMs / 1000, 0.001));
+  console.log(
+    `[notification-dispatch] Bulk ${payload.category}: ${result.sent}/${recipients.length} delivered ` +
+    `in ${result.durationMs}ms (${result.throughput}/s)`,
+  );
+  return result;
 }
 
 /**
@@ -102,8 +132,8 @@ export async function dispatchEstateNotification(
 
 // ---- Queue Management ----
 
-async function queueNotification(payload: NotificationPayload): Promise<string> {
-  const ref = await notificationQueueCollection.add({
+function queueEntry(payload: NotificationPayload): Omit<QueuedNotification, 'id'> {
+  return {
     payload,
     status: 'queued',
     channels: payload.channels || ['in-app'],
@@ -111,7 +141,11 @@ async function queueNotification(payload: NotificationPayload): Promise<string>
     retryCount: 0,
     maxRetries: 3,
     createdAt: new Date().toISOString(),
-  });
+  };
+}
+
+async function queueNotification(payload: NotificationPayload): Promise<string> {
+  const ref = await notificationQueueCollection.add(queueEntry(payload));
   return ref.id;
 }
 
@@ -177,6 +211,147 @@ async function processNotification(queueId: string, payload: NotificationPayload
   }
 }
 
+// ---- Bulk Dispatch ----
+// A campaign is sent in batches of BULK_BATCH_SIZE recipients: one getAll
+// for preferences, one batched write to queue, delivery through a worker
+// pool per channel, and one batched write of the outcomes. The pools run
+// side by side, so GOV.UK Notify email/SMS limits never hold up in-app.
+
+const BULK_BATCH_SIZE = 500;
+
+const CHANNEL_CONCURRENCY: Record<NotificationChannel, number> = {
+  'in-app': 100,
+  email: 20,
+  sms: 10,
+  portal: 1, // Written as one batch per bulk batch
+};
+
+type DeliveryResult = { sent: boolean; sentAt?: string; error?: string };
+
+export interface BulkDispatchResult {
+  queueIds: string[];
+  recipients: number;
+  /** Recipients reached on at least one channel */
+  sent: number;
+  failed: number;
+  byChannel: Partial<Record<NotificationChannel, { sent: number; failed: number }>>;
+  failures: { userId: string; error: string }[];
+  durationMs: number;
+  /** Recipients per second */
+  throughput: number;
+}
+
+interface BulkItem {
+  userId: string;
+  payload: NotificationPayload;
+  channels: NotificationChannel[];
+  ref: FirebaseFirestore.DocumentReference;
+  deliveryResults: Record<string, DeliveryResult>;
+}
+
+async function getUserPreferencesBulk(userIds: string[]): Promise<Map<string, NotificationPreference>> {
+  const prefs = new Map<string, NotificationPreference>();
+  if (userIds.length === 0) return prefs;
+  try {
+    const snapshots = await db.getAll(...userIds.map(id => notificationPrefsCollection.doc(id)));
+    for (const snapshot of snapshots) {
+      if (snapshot.exists) prefs.set(snapshot.id, snapshot.data() as NotificationPreference);
+    }
+  } catch {
+    // Fall back to default channels, as getUserPreferences does
+  }
+  return prefs;
+}
+
+async function deliverBatch(channel: NotificationChannel, payloads: NotificationPayload[]): Promise<DeliveryResult[]> {
+  if (channel === 'portal') {
+    const batch = db.batch();
+    for (const payload of payloads) {
+      if (payload.recipientUserId) batch.set(db.collection('portalNotifications').doc(), portalNotification(payload));
+    }
+    try {
+      await batch.commit();
+      const sentAt = new Date().toISOString();
+      return payloads.map(() => ({ sent: true, sentAt }));
+    } catch (err: any) {
+      return payloads.map(() => ({ sent: false, error: err.message }));
+    }
+  }
+
+  return mapWithConcurrency(payloads, CHANNEL_CONCURRENCY[channel], async (payload): Promise<DeliveryResult> => {
+    try {
+      await deliverToChannel(channel, payload);
+      return { sent: true, sentAt: new Date().toISOString() };
+    } catch (err: any) {
+      return { sent: false, error: err.message };
+    }
+  });
+}
+
+async function dispatchBatch(
+  userIds: string[],
+  payload: Omit<NotificationPayload, 'recipientUserId'>,
+  personalise: ((userId: string) => Partial<NotificationPayload>) | undefined,
+  result: BulkDispatchResult,
+): Promise<void> {
+  // Explicit channels override preferences, so skip the lookup
+  const prefs = payload.channels?.length ? new Map<string, NotificationPreference>() : await getUserPreferencesBulk(userIds);
+
+  const items: BulkItem[] = userIds.map(userId => {
+    const recipientPayload = { ...payload, ...personalise?.(userId), recipientUserId: userId };
+    return {
+      userId,
+      payload: recipientPayload,
+      channels: resolveChannels(recipientPayload, prefs.get(userId) ?? null),
+      ref: notificationQueueCollection.doc(),
+      deliveryResults: {},
+    };
+  });
+
+  const processedAt = new Date().toISOString();
+  const enqueue = db.batch();
+  for (const item of items) {
+    enqueue.set(item.ref, { ...queueEntry(item.payload), status: 'processing', channels: item.channels, processedAt });
+  }
+  await enqueue.commit();
+
+  const recipientsByChannel = new Map<NotificationChannel, BulkItem[]>();
+  for (const item of items) {
+    for (const channel of item.channels) {
+      const list = recipientsByChannel.get(channel);
+      if (list) list.push(item);
+      else recipientsByChannel.set(channel, [item]);
+    }
+  }
+  await Promise.all([...recipientsByChannel].map(async ([channel, recipients]) => {
+    const outcomes = await deliverBatch(channel, recipients.map(r => r.payload));
+    const tally = result.byChannel[channel] ??= { sent: 0, failed: 0 };
+    outcomes.forEach((outcome, i) => {
+      recipients[i].deliveryResults[channel] = outcome;
+      if (outcome.sent) tally.sent++;
+      else tally.failed++;
+    });
+  }));
+
+  const record = db.batch();
+  for (const item of items) {
+    const outcomes = Object.values(item.deliveryResults);
+    const anySent = outcomes.some(o => o.sent);
+    record.update(item.ref, { status: anySent ? 'sent' : 'failed', deliveryResults: item.deliveryResults });
+    result.queueIds.push(item.ref.id);
+    if (anySent) {
+      result.sent++;
+    } else {
+      result.failed++;
+      result.failures.push({ userId: item.userId, error: outcomes.find(o => o.error)?.error ?? 'No channel delivered' });
+    }
+  }
+  // Delivery has already happened; a failed status write must not report it as failed
+  await record.commit().catch((err: any) => {
+    console.error('[notification-dispatch] Failed to record bulk delivery results:', err.message);
+  });
+}
+
 // ---- Channel Delivery ----
 
 function resolveChannels(payload: NotificationPayload, prefs: NotificationPreference | null): NotificationChannel[] {
@@ -283,17 +458,21 @@ async function deliverSms(payload: NotificationPayload): Promise<void> {
   console.log(`[notification-dispatch] SMS: To=${payload.recipientPhone || payload.recipientUserId}, Body=${payload.body.substring(0, 160)}`);
 }
 
+function portalNotification(payload: NotificationPayload): Record<string, unknown> {
+  return {
+    tenantId: payload.recipientUserId,
+    title: payload.title,
+    body: payload.body,
+    category: payload.category,
+    read: false,
+    createdAt: FieldValue.serverTimestamp(),
+  };
+}
+
 async function deliverPortal(payload: NotificationPayload): Promise<void> {
   // Tenant portal notification — stored in Firestore for tenant to view
   if (payload.recipientUserId) {
-    await db.collection('portalNotifications').add({
-      tenantId: payload.recipientUserId,
-      title: payload.title,
-      body: payload.body,
-      category: payload.category,
-      read: false,
-      createdAt: FieldValue.serverTimestamp(),
-    });
+    await db.collection('portalNotifications').add(portalNotification(payload));
   }
 }
 
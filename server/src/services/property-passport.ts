@@ -5,6 +5,7 @@
 // ============================================================
 
 import { collections, getDoc, getDocs, serializeFirestoreData } from './firestore.js';
+import { cachedGetDoc } from './entity-cache.js';
 import { fetchWithCache } from './external-api.js';
 import { predictDampRisk, type DampPrediction } from './damp-prediction.js';
 import type { PropertyDoc, TenantDoc, CaseDoc, BlockDoc, EstateDoc } from '../models/firestore-schemas.js';
@@ -103,8 +104,8 @@ export async function generatePropertyPassport(propertyId: string): Promise<Prop
 
   // Load all related data in parallel
   const [block, estate, tenant, propertyCases, dampPrediction] = await Promise.all([
-    property.blockId ? getDoc<BlockDoc>(collections.blocks, property.blockId) : null,
-    property.estateId ? getDoc<EstateDoc>(collections.estates, property.estateId) : null,
+    property.blockId ? cachedGetDoc<BlockDoc>(collections.blocks, property.blockId) : null,
+    property.estateId ? cachedGetDoc<EstateDoc>(collections.estates, property.estateId) : null,
     property.currentTenancyId
       ? getDoc<TenantDoc>(collections.tenants, property.currentTenancyId)
       : null,
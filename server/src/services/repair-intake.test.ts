@@ -0,0 +1,77 @@
+// ============================================================
+// SocialHomes.Ai — Repair Intake Classification Tests
+// Compiled keyword matcher (overlapping and nested keywords)
+// and single-pass SOR / flag classification of descriptions.
+// ============================================================
+
+import { describe, it, expect, vi } from 'vitest';
+
+vi.mock('./firestore.js', () => ({
+  collections: {},
+  getDocs: vi.fn(async () => []),
+}));
+
+import { buildKeywordMatcher } from './keyword-matcher.js';
+import { analyseRepairDescription, analyseRepairDescriptions } from './repair-intake.js';
+
+describe('buildKeywordMatcher', () => {
+  const matcher = buildKeywordMatcher([
+    ['burst', 'burst'],
+    ['burst pipe', 'burst pipe'],
+    ['pipe burst', 'pipe burst'],
+    ['pipe', 'pipe'],
+    ['tap', 'tap'],
+    ['leak', 'plumbing'],
+    ['leak', 'roofing'],
+  ] as const);
+
+  it('reports overlapping and nested keywords in one pass', () => {
+    expect(matcher.match('pipe burst pipe')).toEqual(new Set(['pipe', 'pipe burst', 'burst', 'burst pipe']));
+  });
+
+  it('matches inside words, like String.includes', () => {
+    expect(matcher.match('tapping noise')).toEqual(new Set(['tap']));
+  });
+
+  it('returns every value mapped to a keyword once', () => {
+    expect([...matcher.match('leak, leak, leak')]).toEqual(['plumbing', 'roofing']);
+  });
+
+  it('finds nothing in unrelated text', () => {
+    expect(matcher.match('the door handle is loose').size).toBe(0);
+  });
+});
+
+describe('analyseRepairDescription', () => {
+  it('prefers the entry with the most multi-word keyword hits', () => {
+    const result = analyseRepairDescription('Burst pipe under the sink, water flooding the kitchen');
+    expect(result.suggestedSorCode).toBe('PL001');
+    expect(result.suggestedPriority).toBe('emergency');
+    expect(result.confidence).toBe(0.95);
+  });
+
+  it('flags damp as Awaab\'s Law and raises severity for a child in the home', () => {
+    const result = analyseRepairDescription('Black mould on bedroom wall, my child has asthma');
+    expect(result.isAwaabsLaw).toBe(true);
+    expect(result.awaabsLawCategory).toBe('category-1');
+    expect(result.additionalFlags).toContain('Vulnerable occupant mentioned');
+  });
+
+  it('breaks score ties by catalogue order', () => {
+    // 'door' (CA001) and 'window' (CA002) score the same
+    expect(analyseRepairDescription('door and window sticking').suggestedSorCode).toBe('CA001');
+  });
+
+  it('falls back to the general code when nothing matches', () => {
+    const result = analyseRepairDescription('Something is wrong');
+    expect(result.suggestedSorCode).toBe('GN999');
+    expect(result.confidence).toBe(0.3);
+  });
+
+  it('classifies a batch in input order', () => {
+    const results = analyseRepairDescriptions(['gas smell in hallway', 'dripping tap', 'mice again']);
+    expect(results.map(r => r.suggestedSorCode)).toEqual(['HT004', 'PL003', 'GN001']);
+    expect(results[0].additionalFlags).toContain('Communal area — may affect multiple households');
+    expect(results[2].recurringPattern).toBe(true);
+  });
+});
@@ -5,6 +5,7 @@
 // ============================================================
 
 import { collections, getDocs } from './firestore.js';
+import { buildKeywordMatcher } from './keyword-matcher.js';
 import type { CaseDoc, PropertyDoc } from '../models/firestore-schemas.js';
 
 // ---- Types ----
@@ -79,54 +80,80 @@ const SOR_DATABASE: SorEntry[] = [
   { code: 'GN002', description: 'Communal area repair', trade: 'General', keywords: ['communal', 'hallway', 'stairwell', 'common area', 'entrance'], avgCostMin: 50, avgCostMax: 300, defaultPriority: 'routine' },
 ];
 
+// ---- Keyword Lists ----
+
+type IntakeFlag = 'damp' | 'severity' | 'asbestos' | 'emergency' | 'vulnerable' | 'reported-recurring' | 'recurring' | 'communal';
+
+const FLAG_KEYWORDS: Record<IntakeFlag, string[]> = {
+  // Awaab's Law trigger (damp/mould keywords)
+  damp: ['damp', 'mould', 'mold', 'condensation', 'mushroom', 'black spots', 'fungus', 'wet wall'],
+  // Raises an Awaab's Law case to category 1
+  severity: ['emergency', 'severe', 'child'],
+  // Asbestos risk (properties built before 2000)
+  asbestos: ['asbestos', 'artex', 'textured ceiling', 'insulation board', 'pipe lagging'],
+  // Priority override
+  emergency: ['flood', 'gas leak', 'no heating winter', 'no hot water', 'dangerous', 'unsafe', 'fire', 'electrocution', 'exposed wires'],
+  vulnerable: ['elderly', 'disabled', 'child', 'baby', 'pregnant', 'wheelchair'],
+  'reported-recurring': ['recurring', 'again', 'third time', 'keeps happening'],
+  recurring: ['recurring', 'again', 'keeps'],
+  communal: ['communal', 'shared', 'hallway'],
+};
+
+// ---- Compiled Matcher ----
+// Every SOR keyword and flag keyword in one automaton, built at module
+// load, so a description is scanned once whatever the catalogue size.
+
+type IntakeHit =
+  | { sor: SorEntry; rank: number; weight: number }
+  | { flag: IntakeFlag };
+
+const INTAKE_MATCHER = buildKeywordMatcher<IntakeHit>([
+  ...SOR_DATABASE.flatMap((sor, rank) => sor.keywords.map(keyword =>
+    // Multi-word matches score higher
+    [keyword, { sor, rank, weight: keyword.split(' ').length * 10 }] as const)),
+  ...(Object.entries(FLAG_KEYWORDS) as [IntakeFlag, string[]][]).flatMap(([flag, keywords]) =>
+    keywords.map(keyword => [keyword, { flag }] as const)),
+]);
+
 // ---- Analysis Engine ----
 
 export function analyseRepairDescription(description: string, propertyId?: string): RepairIntakeResult {
-  const desc = description.toLowerCase();
-  const words = desc.split(/\s+/);
-
-  // Score each SOR code against the description
-  const scores: { entry: SorEntry; score: number }[] = [];
-
-  for (const entry of SOR_DATABASE) {
-    let score = 0;
-    for (const keyword of entry.keywords) {
-      if (desc.includes(keyword)) {
-        score += keyword.split(' ').length * 10; // Multi-word matches score higher
-      }
-    }
-    if (score > 0) {
-      scores.push({ entry, score });
+  const hits = INTAKE_MATCHER.match(description.toLowerCase());
+
+  // Score each matched SOR code and collect flags
+  const scores = new Map<SorEntry, { rank: number; score: number }>();
+  const flags = new Set<IntakeFlag>();
+  for (const hit of hits) {
+    if ('flag' in hit) {
+      flags.add(hit.flag);
+      continue;
     }
+    const entry = scores.get(hit.sor);
+    if (entry) entry.score += hit.weight;
+    else scores.set(hit.sor, { rank: hit.rank, score: hit.weight });
   }
 
-  // Sort by score (best match first)
-  scores.sort((a, b) => b.score - a.score);
+  // Best match first; ties go to the earlier catalogue entry
+  const ranked = [...scores].sort(([, a], [, b]) => b.score - a.score || a.rank - b.rank);
 
-  const bestMatch = scores[0]?.entry;
-  const confidence = scores.length > 0 ? Math.min(0.95, scores[0].score / 30) : 0.3;
+  const bestMatch = ranked[0]?.[0];
+  const confidence = ranked.length > 0 ? Math.min(0.95, ranked[0][1].score / 30) : 0.3;
 
-  // Check for Awaab's Law trigger (damp/mould keywords)
-  const dampKeywords = ['damp', 'mould', 'mold', 'condensation', 'mushroom', 'black spots', 'fungus', 'wet wall'];
-  const isAwaabsLaw = dampKeywords.some(kw => desc.includes(kw));
+  const isAwaabsLaw = flags.has('damp');
   const awaabsLawCategory = isAwaabsLaw
-    ? (desc.includes('emergency') || desc.includes('severe') || desc.includes('child') ? 'category-1' : 'category-2')
+    ? (flags.has('severity') ? 'category-1' : 'category-2')
     : undefined;
 
-  // Check for asbestos risk (properties built before 2000)
-  const asbestosKeywords = ['asbestos', 'artex', 'textured ceiling', 'insulation board', 'pipe lagging'];
-  const asbestosRisk = asbestosKeywords.some(kw => desc.includes(kw));
+  const asbestosRisk = flags.has('asbestos');
 
   // Check priority override
   let priority = bestMatch?.defaultPriority || 'routine';
-  const emergencyKeywords = ['flood', 'gas leak', 'no heating winter', 'no hot water', 'dangerous', 'unsafe', 'fire', 'electrocution', 'exposed wires'];
-  if (emergencyKeywords.some(kw => desc.includes(kw))) {
+  if (flags.has('emergency')) {
     priority = 'emergency';
   }
 
   // Check for vulnerable tenant keywords
-  const vulnerableKeywords = ['elderly', 'disabled', 'child', 'baby', 'pregnant', 'wheelchair'];
-  const hasVulnerableOccupant = vulnerableKeywords.some(kw => desc.includes(kw));
+  const hasVulnerableOccupant = flags.has('vulnerable');
   if (hasVulnerableOccupant && priority === 'routine') {
     priority = 'urgent';
   }
@@ -136,10 +163,10 @@ export function analyseRepairDescription(description: string, propertyId?: strin
   if (hasVulnerableOccupant) additionalFlags.push('Vulnerable occupant mentioned');
   if (asbestosRisk) additionalFlags.push('Potential asbestos risk — do not disturb materials');
   if (isAwaabsLaw) additionalFlags.push('Awaab\'s Law applies — strict timelines');
-  if (desc.includes('recurring') || desc.includes('again') || desc.includes('third time') || desc.includes('keeps happening')) {
+  if (flags.has('reported-recurring')) {
     additionalFlags.push('Tenant reports recurring issue');
   }
-  if (desc.includes('communal') || desc.includes('shared') || desc.includes('hallway')) {
+  if (flags.has('communal')) {
     additionalFlags.push('Communal area — may affect multiple households');
   }
 
@@ -156,7 +183,7 @@ export function analyseRepairDescription(description: string, propertyId?: strin
     isAwaabsLaw,
     awaabsLawCategory,
     asbestosRisk,
-    recurringPattern: desc.includes('recurring') || desc.includes('again') || desc.includes('keeps'),
+    recurringPattern: flags.has('recurring'),
     recurringDetails: undefined,
     estimatedCost: {
       min: bestMatch?.avgCostMin || 50,
@@ -168,6 +195,14 @@ export function analyseRepairDescription(description: string, propertyId?: strin
   };
 }
 
+/**
+ * Classify many descriptions, e.g. for bulk re-classification of
+ * historical repairs. Results are in input order.
+ */
+export function analyseRepairDescriptions(descriptions: string[]): RepairIntakeResult[] {
+  return descriptions.map(description => analyseRepairDescription(description));
+}
+
 /**
  * Check if a property has recurring repair patterns.
  */
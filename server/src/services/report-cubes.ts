@@ -0,0 +1,367 @@
+// ============================================================
+// SocialHomes.Ai — Report Cubes
+// Pre-aggregated TSM and regulatory measures in the reportCubes
+// collection, one cell per (period, estate). Cells hold additive
+// facts so estates roll up to an organisation-wide 'all' cell,
+// plus the measure values derived from them by code.
+//
+// The current period is kept live: case, tenant and property
+// writes stage their fact deltas in the entity write's own
+// transaction (entity-writes.ts). The daily refresh finalises the
+// previous period once at month rollover and re-aggregates the
+// current one to correct drift from writes that bypassed the
+// hooks, or a property moving estate with its tenants and cases.
+// ============================================================
+
+import { db, collections, getDoc, getDocs, FieldValue } from './firestore.js';
+import type { CaseDoc, TenantDoc, PropertyDoc } from '../models/firestore-schemas.js';
+
+// ---- Types ----
+
+export const FACT_FIELDS = [
+  'units',
+  'voids',
+  'gasCompliant',        // compliance.gas valid or n/a
+  'fireCompliant',       // compliance.fire valid
+  'gasSafetyValid',      // compliance.gasSafety valid
+  'fireRiskValid',       // compliance.fireRisk valid
+  'tenants',
+  'tenantsInArrears',
+  'arrearsTotal',
+  'repairs',
+  'openRepairs',
+  'completedRepairs',
+  'completedRepairsInTarget',
+  'satisfiedRepairs',
+  'complaints',
+  'openComplaints',
+  'stage1Complaints',
+  'stage1Responded',
+  'asbCases',
+] as const;
+
+export type CubeFact = typeof FACT_FIELDS[number];
+export type CubeFacts = Record<CubeFact, number>;
+
+export interface ReportCubeCell {
+  period: string;   // YYYY-MM
+  estateId: string; // estate id, 'unassigned', or 'all' for the rollup
+  facts: CubeFacts;
+  /** Derived measure values keyed by measure code (null when the denominator is empty) */
+  measures: Record<string, number | null>;
+  refreshedAt: string;
+  /** Set once the month has rolled over; the cell is never written again */
+  finalisedAt?: string;
+}
+
+export interface ReportCubeRefresh {
+  period: string;
+  processed: number;
+  updated: number;
+  /** Cells of the previous period stamped as finalised by this refresh */
+  finalised: number;
+  cells: Map<string, ReportCubeCell>;
+}
+
+/** Fact changes for the current period's cells, staged with an entity write */
+export interface CubeDelta {
+  period: string;
+  cells: Map<string, CubeFacts>;
+}
+
+export type CubeSource = 'cases' | 'tenants' | 'properties';
+
+export const ALL_ESTATES = 'all';
+const UNASSIGNED_ESTATE = 'unassigned';
+
+// ---- Keys ----
+
+export function currentPeriod(date: Date = new Date()): string {
+  return date.toISOString().slice(0, 7);
+}
+
+export function previousPeriod(period: string): string {
+  const [year, month] = period.split('-').map(Number);
+  return currentPeriod(new Date(Date.UTC(year, month - 2, 1)));
+}
+
+export function cubeCellId(period: string, estateId: string): string {
+  return `${period}__${estateId}`;
+}
+
+// ---- Aggregation ----
+
+function emptyFacts(): CubeFacts {
+  return Object.fromEntries(FACT_FIELDS.map(f => [f, 0])) as CubeFacts;
+}
+
+function percentage(numerator: number, denominator: number, decimals = 1): number | null {
+  if (denominator === 0) return null;
+  const scale = 10 ** decimals;
+  return Math.round(numerator / denominator * 100 * scale) / scale;
+}
+
+/** Measure values derived from a cell's facts, keyed by TSM / regulatory code. */
+export function deriveMeasures(f: CubeFacts): Record<string, number | null> {
+  return {
+    BS01: percentage(f.gasCompliant, f.units),
+    BS02: percentage(f.fireCompliant, f.units),
+    RP01: percentage(f.completedRepairsInTarget, f.completedRepairs, 0),
+    CH01: f.complaints > 0 ? percentage(f.stage1Responded, Math.max(1, f.stage1Complaints), 0) : null,
+    TP02: percentage(f.satisfiedRepairs, f.completedRepairs),
+    NM01: percentage(f.tenantsInArrears, f.tenants),
+    OCC: percentage(f.units - f.voids, f.units),
+    VOID: percentage(f.voids, f.units),
+  };
+}
+
+function propertyFacts(p: PropertyDoc): CubeFacts {
+  const f = emptyFacts();
+  f.units++;
+  if (p.isVoid) f.voids++;
+  if (p.compliance?.gas === 'valid' || p.compliance?.gas === 'na') f.gasCompliant++;
+  if (p.compliance?.fire === 'valid') f.fireCompliant++;
+  if (p.compliance?.gasSafety === 'valid') f.gasSafetyValid++;
+  if (p.compliance?.fireRisk === 'valid') f.fireRiskValid++;
+  return f;
+}
+
+function tenantFacts(t: TenantDoc): CubeFacts {
+  const f = emptyFacts();
+  f.tenants++;
+  if (t.rentBalance < 0) {
+    f.tenantsInArrears++;
+    f.arrearsTotal += Math.abs(t.rentBalance);
+  }
+  return f;
+}
+
+function caseFacts(c: CaseDoc): CubeFacts {
+  const f = emptyFacts();
+  if (c.type === 'repair') {
+    f.repairs++;
+    if (c.status !== 'completed' && c.status !== 'cancelled') f.openRepairs++;
+    if (c.status === 'completed') {
+      f.completedRepairs++;
+      if (c.slaStatus === 'within') f.completedRepairsInTarget++;
+      if ((c.satisfaction || 0) >= 4) f.satisfiedRepairs++;
+    }
+  } else if (c.type === 'complaint') {
+    f.complaints++;
+    if (c.status !== 'closed') f.openComplaints++;
+    if (c.stage === 1) {
+      f.stage1Complaints++;
+      if (c.respondedDate) f.stage1Responded++;
+    }
+  } else if (c.type === 'asb') {
+    f.asbCases++;
+  }
+  return f;
+}
+
+function addFacts(target: CubeFacts, facts: CubeFacts, sign = 1): void {
+  for (const key of FACT_FIELDS) target[key] += sign * facts[key];
+}
+
+/**
+ * Aggregate cases, tenants and properties into one cell per estate plus
+ * the 'all' rollup. Cases and tenants are placed by their property's estate.
+ */
+export function aggregateCubeFacts(
+  cases: CaseDoc[],
+  tenants: TenantDoc[],
+  properties: PropertyDoc[],
+): Map<string, CubeFacts> {
+  const cells = new Map<string, CubeFacts>();
+  const cell = (estateId: string | undefined) => {
+    const key = estateId || UNASSIGNED_ESTATE;
+    let facts = cells.get(key);
+    if (!facts) {
+      facts = emptyFacts();
+      cells.set(key, facts);
+    }
+    return facts;
+  };
+
+  const estateOf = new Map<string, string>();
+  for (const p of properties) {
+    estateOf.set(p.id, p.estateId);
+    addFacts(cell(p.estateId), propertyFacts(p));
+  }
+  for (const t of tenants) addFacts(cell(estateOf.get(t.propertyId)), tenantFacts(t));
+  for (const c of cases) addFacts(cell(estateOf.get(c.propertyId)), caseFacts(c));
+
+  const rollup = emptyFacts();
+  for (const facts of cells.values()) addFacts(rollup, facts);
+  cells.set(ALL_ESTATES, rollup);
+  return cells;
+}
+
+// ---- Refresh ----
+
+function sameFacts(a: CubeFacts | undefined, b: CubeFacts): boolean {
+  return !!a && FACT_FIELDS.every(key => a[key] === b[key]);
+}
+
+let refreshing: Promise<ReportCubeRefresh> | null = null;
+
+/** Stamp the previous period's cells as finalised; a no-op once they are. */
+async function finalisePeriod(period: string, now: string): Promise<number> {
+  const cells = await getDocs<ReportCubeCell>(collections.reportCubes, [{ field: 'period', op: '==', value: period }]);
+  const open = cells.filter(c => !c.finalisedAt);
+  if (open.length === 0) return 0;
+  const batch = db.batch();
+  for (const cell of open) {
+    batch.update(collections.reportCubes.doc(cubeCellId(period, cell.estateId)), { finalisedAt: now });
+  }
+  await batch.commit();
+  return open.length;
+}
+
+/**
+ * Finalise the previous period and rebuild the current period's cells
+ * from one pass over the source collections. The previous period keeps
+ * the facts its write hooks left at rollover; cells whose facts are
+ * unchanged since the last refresh are skipped. Concurrent callers
+ * share one refresh.
+ */
+export function refreshReportCubes(): Promise<ReportCubeRefresh> {
+  if (!refreshing) {
+    refreshing = (async () => {
+      const period = currentPeriod();
+      const now = new Date().toISOString();
+      const finalised = await finalisePeriod(previousPeriod(period), now);
+
+      const [cases, tenants, properties, existing] = await Promise.all([
+        getDocs<CaseDoc>(collections.cases),
+        getDocs<TenantDoc>(collections.tenants),
+        getDocs<PropertyDoc>(collections.properties),
+        getDocs<ReportCubeCell>(collections.reportCubes, [{ field: 'period', op: '==', value: period }]),
+      ]);
+      const previous = new Map(existing.map(c => [c.estateId, c]));
+
+      const cells = new Map<string, ReportCubeCell>();
+      const batch = db.batch();
+      let updated = 0;
+      for (const [estateId, facts] of aggregateCubeFacts(cases, tenants, properties)) {
+        const prior = previous.get(estateId);
+        if (prior && sameFacts(prior.facts, facts)) {
+          cells.set(estateId, prior);
+          continue;
+        }
+        const cell: ReportCubeCell = { period, estateId, facts, measures: deriveMeasures(facts), refreshedAt: now };
+        batch.set(collections.reportCubes.doc(cubeCellId(period, estateId)), cell);
+        cells.set(estateId, cell);
+        updated++;
+      }
+      // Estates that no longer have any stock drop out of the period
+      for (const estateId of previous.keys()) {
+        if (!cells.has(estateId)) {
+          batch.delete(collections.reportCubes.doc(cubeCellId(period, estateId)));
+          updated++;
+        }
+      }
+      if (updated > 0) await batch.commit();
+
+      return { period, processed: cases.length + tenants.length + properties.length, updated, finalised, cells };
+    })().finally(() => { refreshing = null; });
+  }
+  return refreshing;
+}
+
+/** Whether a refresh is running, e.g. building a period a read found missing. */
+export function isRefreshingReportCubes(): boolean {
+  return refreshing !== null;
+}
+
+// ---- Write Hooks ----
+
+async function estateOfProperty(
+  tx: FirebaseFirestore.Transaction,
+  propertyId: string | undefined,
+): Promise<string | undefined> {
+  if (!propertyId) return undefined;
+  const snapshot = await tx.get(collections.properties.doc(propertyId));
+  return snapshot.data()?.estateId;
+}
+
+/**
+ * Read what an entity write changes in the current period's cells.
+ * Returns null when the period has not been built yet — the build that
+ * creates it counts the write — or when no fact changes. Reads only, so
+ * it runs before the transaction's writes.
+ */
+export async function readCubeDelta(
+  tx: FirebaseFirestore.Transaction,
+  source: CubeSource,
+  before: Record<string, any> | null,
+  after: Record<string, any> | null,
+): Promise<CubeDelta | null> {
+  const period = currentPeriod();
+  const built = await tx.get(collections.reportCubes.doc(cubeCellId(period, ALL_ESTATES)));
+  if (!built.exists) return null;
+
+  const cells = new Map<string, CubeFacts>();
+  const rollup = emptyFacts();
+  for (const [doc, sign] of [[before, -1], [after, 1]] as const) {
+    if (!doc) continue;
+    const facts = source === 'properties' ? propertyFacts(doc as PropertyDoc)
+      : source === 'tenants' ? tenantFacts(doc as TenantDoc)
+      : caseFacts(doc as CaseDoc);
+    const estateId = (source === 'properties' ? doc.estateId : await estateOfProperty(tx, doc.propertyId)) || UNASSIGNED_ESTATE;
+    if (!cells.has(estateId)) cells.set(estateId, emptyFacts());
+    addFacts(cells.get(estateId)!, facts, sign);
+    addFacts(rollup, facts, sign);
+  }
+  cells.set(ALL_ESTATES, rollup);
+
+  for (const [estateId, facts] of cells) {
+    if (FACT_FIELDS.every(key => facts[key] === 0)) cells.delete(estateId);
+  }
+  return cells.size > 0 ? { period, cells } : null;
+}
+
+/** Stage a delta as increments; measures are derived from the facts on read. */
+export function stageCubeDelta(tx: FirebaseFirestore.Transaction, delta: CubeDelta): void {
+  const now = new Date().toISOString();
+  for (const [estateId, changes] of delta.cells) {
+    const facts: Record<string, unknown> = {};
+    for (const key of FACT_FIELDS) {
+      if (changes[key] !== 0) facts[key] = FieldValue.increment(changes[key]);
+    }
+    tx.set(
+      collections.reportCubes.doc(cubeCellId(delta.period, estateId)),
+      { period: delta.period, estateId, facts, refreshedAt: now },
+      { merge: true },
+    );
+  }
+}
+
+// ---- Read ----
+
+// Cells kept by increments can lag their stored measures, or lack
+// facts an estate has never had; derive from the facts every time
+function withMeasures(cell: ReportCubeCell): ReportCubeCell {
+  const facts = { ...emptyFacts(), ...cell.facts };
+  return { ...cell, facts, measures: deriveMeasures(facts) };
+}
+
+/**
+ * One cube cell. Without a period, the current period is used. A
+ * current period that has not been built yet is built in the background
+ * while the previous period's cell is served; null when neither exists.
+ */
+export async function getReportCube(estateId: string = ALL_ESTATES, period?: string): Promise<ReportCubeCell | null> {
+  const cellPeriod = period || currentPeriod();
+  const cell = await getDoc<ReportCubeCell>(collections.reportCubes, cubeCellId(cellPeriod, estateId));
+  if (cell) return withMeasures(cell);
+  if (period) return null;
+  // The rollup exists whenever the period has been built — an unknown estate is just absent
+  if (estateId !== ALL_ESTATES && await getDoc(collections.reportCubes, cubeCellId(cellPeriod, ALL_ESTATES))) return null;
+
+  refreshReportCubes().catch(err => {
+    console.error('[report-cubes] Background build failed:', err.message);
+  });
+  const previous = await getDoc<ReportCubeCell>(collections.reportCubes, cubeCellId(previousPeriod(cellPeriod), estateId));
+  return previous ? withMeasures(previous) : null;
+}
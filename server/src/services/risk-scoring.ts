@@ -0,0 +1,245 @@
+// ============================================================
+// SocialHomes.Ai — Risk Scoring Pipeline
+// Scores every property (damp risk) and tenant (vulnerability,
+// activity) in chunks and stores each score with its factor
+// breakdown on the entity under riskScores. Detail pages serve the
+// stored score and worklists order by it. Entities whose inputs are
+// unchanged since the last run are skipped.
+// ============================================================
+
+import crypto from 'crypto';
+import { db, collections, getDoc, getDocsIn, serializeFirestoreData, DOCUMENT_ID } from './firestore.js';
+import { loadDampBatch, dampInputsFor, predictFromBatch } from './damp-prediction.js';
+import { buildAssessment, lookupDeprivation, DEFAULT_POSTCODE, type DeprivationLookup } from './vulnerability-detection.js';
+import { buildTenantActivityScore } from './tenant-activity-scoring.js';
+import type { PropertyDoc, TenantDoc, CaseDoc, ActivityDoc, StoredRiskScore } from '../models/firestore-schemas.js';
+
+// ---- Configuration ----
+
+export type RiskScoreKey = 'dampRisk' | 'vulnerabilityScore' | 'activityScore';
+
+const SCORE_CHUNK_SIZE = 200;
+// Scores also depend on elapsed time (age, days since last contact, 30-day
+// windows), so a score with unchanged inputs is still refreshed at this age
+const MAX_SCORE_AGE_MS = 7 * 24 * 3600 * 1000;
+// Detail pages serve a stored score checked up to this long ago — a missed
+// nightly run falls back to computing on demand
+const STORED_SCORE_MAX_AGE_MS = 36 * 3600 * 1000;
+
+// ---- Input Fingerprint ----
+
+// Key-order independent JSON; riskScores is the pipeline's own output, not an input
+function stableStringify(value: unknown): string {
+  if (value === null || typeof value !== 'object') return JSON.stringify(value) ?? 'null';
+  if (Array.isArray(value)) return `[${value.map(stableStringify).join(',')}]`;
+  const entries = Object.entries(value as Record<string, unknown>)
+    .filter(([key, v]) => key !== 'riskScores' && v !== undefined)
+    .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+  return `{${entries.map(([key, v]) => `${JSON.stringify(key)}:${stableStringify(v)}`).join(',')}}`;
+}
+
+export function inputHash(inputs: unknown): string {
+  return crypto.createHash('sha1').update(stableStringify(inputs)).digest('hex');
+}
+
+function isCurrent(stored: StoredRiskScore | undefined, hash: string, now: number): boolean {
+  return !!stored && stored.inputHash === hash && now - Date.parse(stored.scoredAt) < MAX_SCORE_AGE_MS;
+}
+
+function storedScore<T>(score: number, level: string, result: T, hash: string, scoredAt: string): StoredRiskScore<T> {
+  return { score, level, result, inputHash: hash, scoredAt, checkedAt: scoredAt };
+}
+
+// ---- Chunked Read ----
+
+async function* readInChunks<T>(collection: FirebaseFirestore.CollectionReference): AsyncGenerator<T[]> {
+  let last: FirebaseFirestore.QueryDocumentSnapshot | undefined;
+  for (;;) {
+    let page = collection.orderBy(DOCUMENT_ID).limit(SCORE_CHUNK_SIZE);
+    if (last) page = page.startAfter(last);
+    const snapshot = await page.get();
+    if (snapshot.empty) return;
+    yield snapshot.docs.map(doc => serializeFirestoreData({ id: doc.id, ...doc.data() }) as T);
+    last = snapshot.docs[snapshot.docs.length - 1];
+    if (snapshot.size < SCORE_CHUNK_SIZE) return;
+  }
+}
+
+// ---- Properties ----
+
+async function scorePropertyChunk(properties: PropertyDoc[], now: number): Promise<number> {
+  const batch = await loadDampBatch(properties);
+  const scoredAt = new Date(now).toISOString();
+  const writes = db.batch();
+  let rescored = 0;
+
+  for (const property of properties) {
+    const hash = inputHash({ property, ...dampInputsFor(property, batch) });
+    if (isCurrent(property.riskScores?.dampRisk, hash, now)) {
+      // Unchanged inputs: only mark the stored score as still current
+      writes.update(collections.properties.doc(property.id), { 'riskScores.dampRisk.checkedAt': scoredAt });
+      continue;
+    }
+    const prediction = predictFromBatch(property, batch);
+    writes.update(collections.properties.doc(property.id), {
+      'riskScores.dampRisk': storedScore(prediction.overallScore, prediction.riskLevel, prediction, hash, scoredAt),
+    });
+    rescored++;
+  }
+
+  if (properties.length > 0) await writes.commit();
+  return rescored;
+}
+
+// ---- Tenants ----
+
+function groupBy<T>(items: T[], key: (item: T) => string | undefined): Map<string, T[]> {
+  const groups = new Map<string, T[]>();
+  for (const item of items) {
+    const k = key(item);
+    if (!k) continue;
+    const list = groups.get(k);
+    if (list) list.push(item);
+    else groups.set(k, [item]);
+  }
+  return groups;
+}
+
+async function scoreTenantChunk(
+  tenants: TenantDoc[],
+  imdFor: (postcode: string) => Promise<DeprivationLookup>,
+  now: number,
+): Promise<number> {
+  const tenantIds = tenants.map(t => t.id);
+  const propertyIds = [...new Set(tenants.map(t => t.propertyId).filter(Boolean))];
+  const [properties, cases, activities] = await Promise.all([
+    getDocsIn<PropertyDoc>(collections.properties, DOCUMENT_ID, propertyIds),
+    getDocsIn<CaseDoc>(collections.cases, 'tenantId', tenantIds),
+    getDocsIn<ActivityDoc>(collections.activities, 'tenantId', tenantIds),
+  ]);
+  const propertyById = new Map(properties.map(p => [p.id, p]));
+  const casesByTenant = groupBy(cases, c => c.tenantId);
+  const activitiesByTenant = groupBy(activities, a => a.tenantId);
+
+  const scoredAt = new Date(now).toISOString();
+  const writes = db.batch();
+  let rescored = 0;
+
+  for (const tenant of tenants) {
+    const property = propertyById.get(tenant.propertyId) ?? null;
+    const tenantCases = casesByTenant.get(tenant.id) ?? [];
+    const tenantActivities = activitiesByTenant.get(tenant.id) ?? [];
+    const update: Record<string, StoredRiskScore<unknown> | string> = {};
+
+    const imd = await imdFor(property?.postcode || DEFAULT_POSTCODE);
+    const vulnerabilityHash = inputHash({
+      tenant,
+      property: property && { postcode: property.postcode, address: property.address },
+      cases: tenantCases,
+      imd,
+    });
+    if (!isCurrent(tenant.riskScores?.vulnerabilityScore, vulnerabilityHash, now)) {
+      const assessment = buildAssessment(tenant, property, tenantCases, imd);
+      update['riskScores.vulnerabilityScore'] = storedScore(
+        assessment.overallScore, assessment.level, assessment, vulnerabilityHash, scoredAt);
+    } else {
+      update['riskScores.vulnerabilityScore.checkedAt'] = scoredAt;
+    }
+
+    const activityHash = inputHash({ tenant, cases: tenantCases, activities: tenantActivities });
+    if (!isCurrent(tenant.riskScores?.activityScore, activityHash, now)) {
+      const activity = buildTenantActivityScore(tenant, tenantCases, tenantActivities);
+      update['riskScores.activityScore'] = storedScore(
+        activity.engagementScore, activity.riskLevel, activity, activityHash, scoredAt);
+    } else {
+      update['riskScores.activityScore.checkedAt'] = scoredAt;
+    }
+
+    writes.update(collections.tenants.doc(tenant.id), update);
+    if (Object.values(update).some(value => typeof value !== 'string')) rescored++;
+  }
+
+  if (tenants.length > 0) await writes.commit();
+  return rescored;
+}
+
+// ---- Pipeline ----
+
+export interface RiskScoringRun {
+  processed: number;
+  rescored: number;
+  skipped: number;
+  metrics: Record<string, number>;
+}
+
+let running: Promise<RiskScoringRun> | null = null;
+
+/**
+ * Score every property and tenant, one chunk of SCORE_CHUNK_SIZE at a
+ * time, recomputing only scores whose inputs changed or that have aged
+ * out. Unchanged scores get a new checkedAt, which is what detail pages
+ * measure freshness by. Concurrent callers share one run.
+ */
+export function runRiskScoring(): Promise<RiskScoringRun> {
+  if (!running) {
+    running = (async () => {
+      const now = Date.now();
+      let properties = 0;
+      let tenants = 0;
+      let propertiesRescored = 0;
+      let tenantsRescored = 0;
+
+      for await (const chunk of readInChunks<PropertyDoc>(collections.properties)) {
+        properties += chunk.length;
+        propertiesRescored += await scorePropertyChunk(chunk, now);
+      }
+
+      // IMD is looked up once per postcode for the whole run
+      const imdByPostcode = new Map<string, Promise<DeprivationLookup>>();
+      const imdFor = (postcode: string) => {
+        let lookup = imdByPostcode.get(postcode);
+        if (!lookup) {
+          lookup = lookupDeprivation(postcode);
+          imdByPostcode.set(postcode, lookup);
+        }
+        return lookup;
+      };
+      for await (const chunk of readInChunks<TenantDoc>(collections.tenants)) {
+        tenants += chunk.length;
+        tenantsRescored += await scoreTenantChunk(chunk, imdFor, now);
+      }
+
+      const processed = properties + tenants;
+      const rescored = propertiesRescored + tenantsRescored;
+      return {
+        processed,
+        rescored,
+        skipped: processed - rescored,
+        metrics: { properties, tenants, propertiesRescored, tenantsRescored },
+      };
+    })().finally(() => { running = null; });
+  }
+  return running;
+}
+
+// ---- Read ----
+
+/**
+ * The stored result for one entity's score, or null when it has not been
+ * scored or no pipeline run has confirmed it recently enough to serve.
+ */
+export async function getStoredScore<T>(
+  collection: FirebaseFirestore.CollectionReference,
+  id: string,
+  key: RiskScoreKey,
+): Promise<T | null> {
+  const doc = await getDoc<{ riskScores?: Partial<Record<RiskScoreKey, StoredRiskScore<T>>> }>(collection, id);
+  const stored = doc?.riskScores?.[key];
+  if (!stored || Date.now() - Date.parse(stored.checkedAt ?? stored.scoredAt) > STORED_SCORE_MAX_AGE_MS) return null;
+  return stored.result;
+}
+
+/** Firestore field path for ordering a worklist by a stored score. */
+export function scoreOrderField(key: RiskScoreKey): string {
+  return `riskScores.${key}.score`;
+}
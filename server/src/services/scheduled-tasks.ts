@@ -4,10 +4,17 @@
 // weekly TSM refresh, monthly regulatory reports, arrears triggers
 // ============================================================
 
-import { db, collections, getDocs, FieldValue } from './firestore.js';
+import { collections, getDocs } from './firestore.js';
 import { dispatchNotification, dispatchBulkNotification } from './notification-dispatch.js';
 import { runCacheWarming } from './cache-warming.js';
-import type { PropertyDoc, TenantDoc, CaseDoc } from '../models/firestore-schemas.js';
+import { backfillCaseDateKeys } from './case-query.js';
+import { backfillEntityDateKeys } from './entity-index.js';
+import { rebuildBriefingSnapshots } from './briefing-snapshots.js';
+import { refreshReportCubes, getReportCube } from './report-cubes.js';
+import { runRiskScoring } from './risk-scoring.js';
+import { processDueDeadlines, rebuildDeadlineIndex } from './awaabs-law.js';
+import { rebuildOccupancy } from './scheduling-availability.js';
+import type { PropertyDoc, TenantDoc } from '../models/firestore-schemas.js';
 
 // ---- Types ----
 
@@ -50,8 +57,8 @@ const taskRegistry: ScheduledTask[] = [
   {
     id: 'sla-breach-check',
     name: 'SLA Breach Detection',
-    description: 'Check cases approaching or breaching SLA targets',
-    schedule: 'Every 4 hours',
+    description: 'Notify SLA and Awaab\'s Law deadlines that are approaching or breached, from the deadline index',
+    schedule: 'When the next deadline is due',
     status: 'idle',
     enabled: true,
   },
@@ -71,6 +78,14 @@ const taskRegistry: ScheduledTask[] = [
     status: 'idle',
     enabled: true,
   },
+  {
+    id: 'report-cube-refresh',
+    name: 'Report Cube Refresh',
+    description: 'Finalise the previous period at month rollover and re-aggregate the current period of the report cubes, correcting drift from writes that bypassed the entity hooks',
+    schedule: 'Daily at 04:00 UTC',
+    status: 'idle',
+    enabled: true,
+  },
   {
     id: 'monthly-regulatory',
     name: 'Monthly Regulatory Report',
@@ -87,6 +102,54 @@ const taskRegistry: ScheduledTask[] = [
     status: 'idle',
     enabled: true,
   },
+  {
+    id: 'briefing-snapshot-rebuild',
+    name: 'Briefing Snapshot Rebuild',
+    description: 'Recompute materialised briefing KPIs for every persona scope, correcting any drift from incremental updates',
+    schedule: 'Daily at 05:00 UTC',
+    status: 'idle',
+    enabled: true,
+  },
+  {
+    id: 'case-index-backfill',
+    name: 'Case Date Key Backfill',
+    description: 'Normalise createdDateIso on existing cases for indexed case list queries',
+    schedule: 'On demand (after deploy or bulk data fixes)',
+    status: 'idle',
+    enabled: true,
+  },
+  {
+    id: 'entity-index-backfill',
+    name: 'Activity & Rent Date Key Backfill',
+    description: 'Normalise dateIso on existing activities and rent transactions for per-tenant and per-case lookups',
+    schedule: 'On demand (after deploy or bulk data fixes)',
+    status: 'idle',
+    enabled: true,
+  },
+  {
+    id: 'risk-scoring',
+    name: 'Portfolio Risk Scoring',
+    description: 'Re-score damp risk, vulnerability and activity where inputs changed, storing scores for worklists',
+    schedule: 'Daily at 02:00 UTC',
+    status: 'idle',
+    enabled: true,
+  },
+  {
+    id: 'deadline-index-rebuild',
+    name: 'Case Deadline Index Rebuild',
+    description: 'Rebuild SLA and Awaab\'s Law deadlines for every case, correcting drift from writes that bypassed the case hooks',
+    schedule: 'Daily at 03:00 UTC',
+    status: 'idle',
+    enabled: true,
+  },
+  {
+    id: 'occupancy-rebuild',
+    name: 'Operative Occupancy Rebuild',
+    description: 'Recount per-operative, per-day appointment counters used by slot searches, correcting drift from writes that bypassed the booking routes',
+    schedule: 'Daily at 03:30 UTC',
+    status: 'idle',
+    enabled: true,
+  },
 ];
 
 // ---- Task Implementations ----
@@ -199,100 +262,44 @@ export async function runArrearsEscalation(): Promise<{ processed: number; notif
 }
 
 /**
- * Check all open cases for SLA breaches or approaching breaches.
+ * Notify SLA and Awaab's Law deadlines that are approaching or breached.
+ * Reads only the due entries of the deadline index, not every open case;
+ * the deadline scheduler also runs this whenever the next deadline falls due.
  */
-export async function runSlaBreachCheck(): Promise<{ processed: number; notifications: number; errors: string[] }> {
-  const cases = await getDocs<CaseDoc>(collections.cases, undefined, undefined, 1000);
-  const openCases = cases.filter(c => !['completed', 'closed', 'cancelled'].includes(c.status));
-  let notifications = 0;
-  const errors: string[] = [];
-  const now = new Date();
-
-  for (const caseDoc of openCases) {
-    try {
-      if (!caseDoc.targetDate) continue;
-
-      const target = new Date(caseDoc.targetDate);
-      const daysRemaining = Math.ceil((target.getTime() - now.getTime()) / (1000 * 60 * 60 * 24));
-
-      if (daysRemaining <= 0) {
-        // SLA breached
-        await dispatchNotification({
-          category: 'sla-breach',
-          priority: caseDoc.isAwaabsLaw ? 'critical' : 'high',
-          title: `SLA BREACHED — ${caseDoc.reference}`,
-          body: `${caseDoc.type} case ${caseDoc.reference} has breached SLA by ${Math.abs(daysRemaining)} day(s). ${caseDoc.isAwaabsLaw ? 'AWAAB\'S LAW CASE — immediate escalation required.' : 'Escalation review needed.'}`,
-          entityType: 'case',
-          entityId: caseDoc.id,
-          actionUrl: `/cases/${caseDoc.id}`,
-          recipientRole: 'manager',
-        });
-        notifications++;
-      } else if (daysRemaining <= 2) {
-        // Approaching breach
-        await dispatchNotification({
-          category: 'sla-breach',
-          priority: 'high',
-          title: `SLA approaching — ${caseDoc.reference}`,
-          body: `${caseDoc.type} case ${caseDoc.reference} will breach SLA in ${daysRemaining} day(s). Handler: ${caseDoc.handler}.`,
-          entityType: 'case',
-          entityId: caseDoc.id,
-          actionUrl: `/cases/${caseDoc.id}`,
-          recipientRole: 'housing-officer',
-        });
-        notifications++;
-      }
-    } catch (err: any) {
-      errors.push(`${caseDoc.reference}: ${err.message}`);
-    }
-  }
-
-  return { processed: openCases.length, notifications, errors };
+export function runSlaBreachCheck(): Promise<{ processed: number; notifications: number; errors: string[] }> {
+  return processDueDeadlines();
 }
 
 /**
  * Refresh Tenant Satisfaction Measures (TSM) for regulatory reporting.
+ * The aggregation lives in the report cubes, kept current by the entity
+ * write hooks; this reports the organisation-wide metrics from the 'all' cell.
  */
 export async function runTsmRefresh(): Promise<{ processed: number; metrics: Record<string, number> }> {
-  const [cases, tenants, properties] = await Promise.all([
-    getDocs<CaseDoc>(collections.cases, undefined, undefined, 2000),
-    getDocs<TenantDoc>(collections.tenants, undefined, undefined, 1000),
-    getDocs<PropertyDoc>(collections.properties, undefined, undefined, 1000),
-  ]);
-
-  const repairs = cases.filter(c => c.type === 'repair');
-  const completedRepairs = repairs.filter(c => c.status === 'completed');
-  const complaints = cases.filter(c => c.type === 'complaint');
-  const asbCases = cases.filter(c => c.type === 'asb');
+  const cube = await getReportCube();
+  if (!cube) throw new Error('Report cube for the current period is not built yet');
+  const f = cube.facts;
+  const processed = f.units + f.tenants + f.repairs + f.complaints + f.asbCases;
 
   // Calculate TSM metrics
   const metrics: Record<string, number> = {
     'TP01-overall-satisfaction': 0, // Placeholder — requires survey data
-    'TP02-repairs-satisfaction': completedRepairs.length > 0
-      ? completedRepairs.filter(r => (r.satisfaction || 0) >= 4).length / completedRepairs.length * 100
-      : 0,
-    'TP06-complaints-relative': complaints.length / (tenants.length || 1) * 100,
+    'TP02-repairs-satisfaction': f.completedRepairs > 0 ? f.satisfiedRepairs / f.completedRepairs * 100 : 0,
+    'TP06-complaints-relative': f.complaints / (f.tenants || 1) * 100,
     'TP07-complaints-handling-satisfaction': 0, // Requires survey
     'TP10-asb-handling-satisfaction': 0, // Requires survey
-    'RP01-gas-safety-compliance': properties.filter(p => p.compliance?.gasSafety === 'valid').length / (properties.length || 1) * 100,
-    'RP02-fire-safety-compliance': properties.filter(p => p.compliance?.fireRisk === 'valid').length / (properties.length || 1) * 100,
-    'CH01-repairs-completed-target': completedRepairs.filter(r => r.slaStatus === 'within').length / (completedRepairs.length || 1) * 100,
-    'NM01-arrears-percentage': tenants.filter(t => t.rentBalance < 0).length / (tenants.length || 1) * 100,
-    'total-properties': properties.length,
-    'total-tenants': tenants.length,
-    'total-open-repairs': repairs.filter(r => r.status !== 'completed' && r.status !== 'cancelled').length,
-    'total-open-complaints': complaints.filter(c => c.status !== 'closed').length,
-    'void-rate': properties.filter(p => p.isVoid).length / (properties.length || 1) * 100,
+    'RP01-gas-safety-compliance': f.gasSafetyValid / (f.units || 1) * 100,
+    'RP02-fire-safety-compliance': f.fireRiskValid / (f.units || 1) * 100,
+    'CH01-repairs-completed-target': f.completedRepairsInTarget / (f.completedRepairs || 1) * 100,
+    'NM01-arrears-percentage': f.tenantsInArrears / (f.tenants || 1) * 100,
+    'total-properties': f.units,
+    'total-tenants': f.tenants,
+    'total-open-repairs': f.openRepairs,
+    'total-open-complaints': f.openComplaints,
+    'void-rate': f.voids / (f.units || 1) * 100,
   };
 
-  // Persist to Firestore
-  await db.collection('tsmMeasures').doc(`tsm-${new Date().toISOString().slice(0, 10)}`).set({
-    ...metrics,
-    calculatedAt: FieldValue.serverTimestamp(),
-    period: new Date().toISOString().slice(0, 7), // YYYY-MM
-  });
-
-  return { processed: tenants.length + properties.length + cases.length, metrics };
+  return { processed, metrics };
 }
 
 // ---- Run All Scheduled Tasks ----
@@ -328,9 +335,40 @@ export async function runScheduledTask(taskId: string): Promise<ScheduledTask> {
       case 'daily-briefing':
         result = await runCacheWarming('all');
         break;
+      case 'report-cube-refresh': {
+        const { processed, updated, finalised } = await refreshReportCubes();
+        result = { processed, metrics: { cellsUpdated: updated, cellsFinalised: finalised } };
+        break;
+      }
       case 'monthly-regulatory':
         result = await runTsmRefresh();
         break;
+      case 'briefing-snapshot-rebuild': {
+        const snapshots = await rebuildBriefingSnapshots();
+        result = { processed: Object.keys(snapshots).length };
+        break;
+      }
+      case 'case-index-backfill':
+        result = await backfillCaseDateKeys();
+        break;
+      case 'entity-index-backfill':
+        result = await backfillEntityDateKeys();
+        break;
+      case 'deadline-index-rebuild': {
+        const { processed, indexed } = await rebuildDeadlineIndex();
+        result = { processed, metrics: { deadlinesIndexed: indexed } };
+        break;
+      }
+      case 'occupancy-rebuild': {
+        const { processed, indexed } = await rebuildOccupancy();
+        result = { processed, metrics: { operativeDaysIndexed: indexed } };
+        break;
+      }
+      case 'risk-scoring': {
+        const { processed, rescored, skipped, metrics } = await runRiskScoring();
+        result = { processed, metrics: { rescored, skipped, ...metrics } };
+        break;
+      }
       default:
         throw new Error(`No implementation for task: ${taskId}`);
     }
@@ -0,0 +1,337 @@
+// ============================================================
+// SocialHomes.Ai — Operative Availability Engine
+// Per-operative, per-day occupancy counters kept in step with
+// appointment writes, plus an interval index over diary blocks.
+// A slot search over any date range and set of trades reads the
+// counters and blocks for that range once, instead of scanning
+// every appointment per day and per operative.
+// ============================================================
+
+import { db, collections, FieldValue, serializeFirestoreData, DOCUMENT_ID } from './firestore.js';
+
+// ---- Types ----
+
+export type TimeSlot = 'morning' | 'afternoon';
+
+export const TIME_SLOTS: TimeSlot[] = ['morning', 'afternoon'];
+
+export interface Operative {
+  id: string;
+  name: string;
+  trade: string;
+  email: string;
+  phone: string;
+  maxJobsPerDay: number;
+  available: boolean;
+  region: string;
+  qualifications: string[];
+}
+
+export interface Appointment {
+  id: string;
+  caseId: string;
+  operativeId: string;
+  operativeName: string;
+  date: string;        // YYYY-MM-DD
+  timeSlot: TimeSlot;
+  propertyId: string;
+  tenantId: string;
+  status: 'booked' | 'completed' | 'cancelled' | 'no-access';
+  notes?: string;
+  createdAt: string;
+  updatedAt: string;
+}
+
+export interface DiaryBlock {
+  id: string;
+  operativeId: string;
+  startDate: string;   // YYYY-MM-DD
+  endDate: string;     // YYYY-MM-DD
+  reason: 'holiday' | 'training' | 'sick' | 'other';
+  notes?: string;
+  createdAt: string;
+}
+
+export interface Slot {
+  date: string;
+  timeSlot: TimeSlot;
+  operativeId: string;
+  operativeName: string;
+  available: boolean;
+}
+
+/** Appointments held by one operative on one day (operativeOccupancy) */
+export interface OperativeDayOccupancy {
+  id: string;          // `${operativeId}__${date}`
+  operativeId: string;
+  date: string;        // YYYY-MM-DD
+  morning: number;
+  afternoon: number;
+  total: number;
+  updatedAt: string;
+}
+
+// ---- Configuration ----
+
+// Planners search a fortnight at a time; a month is the most one call will scan
+export const MAX_SEARCH_DAYS = 31;
+const REBUILD_PAGE_SIZE = 500;
+// Written by a completed rebuild; has no date, so day queries never see it
+const BACKFILL_MARKER_ID = '_backfill';
+const DAY_MS = 24 * 3600 * 1000;
+
+// ---- Dates ----
+
+const DATE_PATTERN = /^\d{4}-\d{2}-\d{2}$/;
+
+export function isDateKey(value: unknown): value is string {
+  return typeof value === 'string' && DATE_PATTERN.test(value) && !isNaN(Date.parse(`${value}T00:00:00Z`));
+}
+
+/** Every YYYY-MM-DD from `from` to `to` inclusive. */
+export function daysBetween(from: string, to: string): string[] {
+  const days: string[] = [];
+  for (let t = Date.parse(`${from}T00:00:00Z`); t <= Date.parse(`${to}T00:00:00Z`); t += DAY_MS) {
+    days.push(new Date(t).toISOString().slice(0, 10));
+  }
+  return days;
+}
+
+// ---- Occupancy Counters ----
+
+export function occupancyId(operativeId: string, date: string): string {
+  return `${operativeId}__${date}`;
+}
+
+// A cancelled appointment frees its slot; every other status holds it
+function occupies(appointment: Appointment | null): appointment is Appointment {
+  return !!appointment && appointment.status !== 'cancelled';
+}
+
+/** A write batch or transaction; both stage merged sets the same way */
+interface OccupancyWriter {
+  set(ref: FirebaseFirestore.DocumentReference, data: FirebaseFirestore.DocumentData, options: FirebaseFirestore.SetOptions): unknown;
+}
+
+/**
+ * Add the counter changes for an appointment going from `before` to
+ * `after` (null for a new or removed appointment) to a write batch or
+ * transaction, so the counters commit atomically with the appointment
+ * itself. Changes to an existing appointment must read `before` in the
+ * same transaction, or two concurrent updates both undo its old slot.
+ */
+export function applyOccupancyChange(
+  writer: OccupancyWriter,
+  before: Appointment | null,
+  after: Appointment | null,
+): void {
+  const deltas = new Map<string, { operativeId: string; date: string; morning: number; afternoon: number }>();
+  const add = (appointment: Appointment, n: number) => {
+    const key = occupancyId(appointment.operativeId, appointment.date);
+    const delta = deltas.get(key) ?? { operativeId: appointment.operativeId, date: appointment.date, morning: 0, afternoon: 0 };
+    delta[appointment.timeSlot] += n;
+    deltas.set(key, delta);
+  };
+  if (occupies(before)) add(before, -1);
+  if (occupies(after)) add(after, 1);
+
+  const updatedAt = new Date().toISOString();
+  for (const [key, delta] of deltas) {
+    if (delta.morning === 0 && delta.afternoon === 0) continue;
+    writer.set(collections.operativeOccupancy.doc(key), {
+      operativeId: delta.operativeId,
+      date: delta.date,
+      morning: FieldValue.increment(delta.morning),
+      afternoon: FieldValue.increment(delta.afternoon),
+      total: FieldValue.increment(delta.morning + delta.afternoon),
+      updatedAt,
+    }, { merge: true });
+  }
+}
+
+async function loadOccupancy(from: string, to: string): Promise<Map<string, OperativeDayOccupancy>> {
+  const snapshot = await collections.operativeOccupancy
+    .where('date', '>=', from)
+    .where('date', '<=', to)
+    .get();
+  return new Map(snapshot.docs.map(doc => [doc.id, doc.data() as OperativeDayOccupancy]));
+}
+
+/**
+ * Recount every operative's occupancy from the appointments collection,
+ * correcting drift from writes that bypassed the booking routes, and
+ * remove counters for days that no longer hold an appointment.
+ */
+export async function rebuildOccupancy(): Promise<{ processed: number; indexed: number }> {
+  const counts = new Map<string, OperativeDayOccupancy>();
+  const updatedAt = new Date().toISOString();
+  let processed = 0;
+  let last: FirebaseFirestore.QueryDocumentSnapshot | undefined;
+
+  for (;;) {
+    let page = collections.appointments.orderBy(DOCUMENT_ID).limit(REBUILD_PAGE_SIZE);
+    if (last) page = page.startAfter(last);
+    const snapshot = await page.get();
+    if (snapshot.empty) break;
+
+    for (const doc of snapshot.docs) {
+      const appointment = serializeFirestoreData({ id: doc.id, ...doc.data() }) as Appointment;
+      if (!occupies(appointment) || !appointment.operativeId || !appointment.date) continue;
+      const id = occupancyId(appointment.operativeId, appointment.date);
+      const entry = counts.get(id)
+        ?? { id, operativeId: appointment.operativeId, date: appointment.date, morning: 0, afternoon: 0, total: 0, updatedAt };
+      if (appointment.timeSlot === 'morning' || appointment.timeSlot === 'afternoon') entry[appointment.timeSlot]++;
+      entry.total++;
+      counts.set(id, entry);
+    }
+    processed += snapshot.size;
+
+    last = snapshot.docs[snapshot.docs.length - 1];
+    if (snapshot.size < REBUILD_PAGE_SIZE) break;
+  }
+
+  const entries = [...counts.values()];
+  for (let i = 0; i < entries.length; i += 500) {
+    const batch = db.batch();
+    for (const entry of entries.slice(i, i + 500)) batch.set(collections.operativeOccupancy.doc(entry.id), entry);
+    await batch.commit();
+  }
+
+  const orphans = (await collections.operativeOccupancy.select().get()).docs
+    .filter(doc => doc.id !== BACKFILL_MARKER_ID && !counts.has(doc.id));
+  for (let i = 0; i < orphans.length; i += 500) {
+    const batch = db.batch();
+    for (const doc of orphans.slice(i, i + 500)) batch.delete(doc.ref);
+    await batch.commit();
+  }
+
+  await collections.operativeOccupancy.doc(BACKFILL_MARKER_ID).set({ rebuiltAt: updatedAt, processed });
+  return { processed, indexed: counts.size };
+}
+
+// Appointments booked before the counters existed are counted by one full
+// rebuild, the first time availability is asked for. The rebuild leaves a
+// marker, so counters created by bookings made before that first search
+// do not hide the appointments they were never counted against.
+let occupancyReady: Promise<void> | null = null;
+function ensureOccupancyIndexed(): Promise<void> {
+  if (!occupancyReady) {
+    occupancyReady = (async () => {
+      const marker = await collections.operativeOccupancy.doc(BACKFILL_MARKER_ID).get();
+      if (!marker.exists) await rebuildOccupancy();
+    })().catch(err => {
+      occupancyReady = null;
+      throw err;
+    });
+  }
+  return occupancyReady;
+}
+
+// ---- Diary Block Interval Index ----
+
+export interface DiaryBlockIndex {
+  /** Whether any block covers the operative on the date */
+  isBlocked(operativeId: string, date: string): boolean;
+  /** The operative's blocks overlapping from..to, by start date */
+  overlapping(operativeId: string, from: string, to: string): DiaryBlock[];
+}
+
+/**
+ * Index diary blocks per operative. Overlapping blocks are merged into
+ * disjoint, sorted intervals so a day lookup is a binary search.
+ */
+export function buildDiaryBlockIndex(blocks: DiaryBlock[]): DiaryBlockIndex {
+  const byOperative = new Map<string, DiaryBlock[]>();
+  for (const block of blocks) {
+    const list = byOperative.get(block.operativeId);
+    if (list) list.push(block);
+    else byOperative.set(block.operativeId, [block]);
+  }
+
+  const intervals = new Map<string, [string, string][]>();
+  for (const [operativeId, list] of byOperative) {
+    list.sort((a, b) => a.startDate.localeCompare(b.startDate));
+    const merged: [string, string][] = [];
+    for (const block of list) {
+      const tail = merged[merged.length - 1];
+      if (tail && block.startDate <= tail[1]) {
+        if (block.endDate > tail[1]) tail[1] = block.endDate;
+      } else {
+        merged.push([block.startDate, block.endDate]);
+      }
+    }
+    intervals.set(operativeId, merged);
+  }
+
+  return {
+    isBlocked(operativeId, date) {
+      const list = intervals.get(operativeId);
+      if (!list) return false;
+      // Last interval starting on or before the date
+      let lo = 0;
+      let hi = list.length - 1;
+      let found = -1;
+      while (lo <= hi) {
+        const mid = (lo + hi) >> 1;
+        if (list[mid][0] <= date) {
+          found = mid;
+          lo = mid + 1;
+        } else {
+          hi = mid - 1;
+        }
+      }
+      return found >= 0 && date <= list[found][1];
+    },
+    overlapping(operativeId, from, to) {
+      return (byOperative.get(operativeId) ?? []).filter(b => b.startDate <= to && b.endDate >= from);
+    },
+  };
+}
+
+/**
+ * Index the diary blocks overlapping from..to, read with one query bounded
+ * on both ends (the endDate + startDate composite index) so blocks booked
+ * further ahead are not read.
+ */
+export async function loadDiaryBlockIndex(from: string, to: string): Promise<DiaryBlockIndex> {
+  const snapshot = await collections.diaryBlocks
+    .where('endDate', '>=', from)
+    .where('startDate', '<=', to)
+    .get();
+  const blocks = snapshot.docs.map(doc => serializeFirestoreData({ id: doc.id, ...doc.data() }) as DiaryBlock);
+  return buildDiaryBlockIndex(blocks);
+}
+
+// ---- Slot Search ----
+
+/**
+ * Morning and afternoon slots for each operative on each day from..to.
+ * Each half-day holds at most half of maxJobsPerDay (rounded up), within
+ * the operative's daily maximum; a diary block closes the whole day.
+ */
+export async function searchSlots(operatives: Operative[], from: string, to: string): Promise<Slot[]> {
+  if (operatives.length === 0) return [];
+  await ensureOccupancyIndexed();
+  const [occupancy, blocks] = await Promise.all([loadOccupancy(from, to), loadDiaryBlockIndex(from, to)]);
+
+  const slots: Slot[] = [];
+  for (const date of daysBetween(from, to)) {
+    for (const op of operatives) {
+      const blocked = blocks.isBlocked(op.id, date);
+      const day = occupancy.get(occupancyId(op.id, date));
+      const total = day?.total ?? 0;
+      const maxPerSlot = Math.ceil(op.maxJobsPerDay / 2);
+
+      for (const timeSlot of TIME_SLOTS) {
+        slots.push({
+          date,
+          timeSlot,
+          operativeId: op.id,
+          operativeName: op.name,
+          available: !blocked && (day?.[timeSlot] ?? 0) < maxPerSlot && total < op.maxJobsPerDay,
+        });
+      }
+    }
+  }
+  return slots;
+}
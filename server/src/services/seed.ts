@@ -9,6 +9,10 @@
 
 import { db, collections, batchWrite } from './firestore.js';
 import { appToHact, getAllCodeListNames, getCodeList } from '../models/hact-codes.js';
+import { withCaseDateKey } from './case-query.js';
+import { withDateKey } from './entity-index.js';
+import { rebuildBriefingSnapshots } from './briefing-snapshots.js';
+import { rebuildDeadlineIndex } from './awaabs-law.js';
 
 interface SeedData {
   organisation: any;
@@ -96,12 +100,12 @@ export async function seedFirestore(data: SeedData) {
 
   // 8. Cases (all types merged)
   console.log(`  → Seeding ${data.cases.length} cases...`);
-  await batchWrite(data.cases.map(c => ({ collection: collections.cases, id: c.id, data: c })));
+  await batchWrite(data.cases.map(c => ({ collection: collections.cases, id: c.id, data: withCaseDateKey(c) })));
 
   // 9. Activities
   if (data.activities.length > 0) {
     console.log(`  → Seeding ${data.activities.length} activities...`);
-    await batchWrite(data.activities.map(a => ({ collection: collections.activities, id: a.id, data: a })));
+    await batchWrite(data.activities.map(a => ({ collection: collections.activities, id: a.id, data: withDateKey(a) })));
   }
 
   // 10. Communications
@@ -137,7 +141,7 @@ export async function seedFirestore(data: SeedData) {
   // 15. Rent Transactions
   if (data.rentTransactions.length > 0) {
     console.log(`  → Seeding ${data.rentTransactions.length} rent transactions...`);
-    await batchWrite(data.rentTransactions.map(r => ({ collection: collections.rentTransactions, id: r.id, data: r })));
+    await batchWrite(data.rentTransactions.map(r => ({ collection: collections.rentTransactions, id: r.id, data: withDateKey(r) })));
   }
 
   // 16. Viewings
@@ -161,6 +165,14 @@ export async function seedFirestore(data: SeedData) {
     data: { name, codes: getCodeList(name) },
   })));
 
+  // 19. Briefing snapshots (materialised from the data above)
+  console.log('  → Building briefing snapshots...');
+  await rebuildBriefingSnapshots();
+
+  // 20. Deadline index, so seeded cases are notified before the nightly rebuild
+  console.log('  → Indexing case deadlines...');
+  await rebuildDeadlineIndex();
+
   const elapsed = ((Date.now() - startTime) / 1000).toFixed(1);
   console.log(`✅ Firestore seed complete in ${elapsed}s`);
 }
@@ -178,6 +178,13 @@ export async function calculateTenantActivityScore(tenantId: string): Promise<Te
     getDocs<ActivityDoc>(collections.activities, [{ field: 'tenantId', op: '==', value: tenantId }]),
   ]);
 
+  return buildTenantActivityScore(tenant, cases, activities);
+}
+
+/**
+ * Score one tenant from already-loaded cases and activities.
+ */
+export function buildTenantActivityScore(tenant: TenantDoc, cases: CaseDoc[], activities: ActivityDoc[]): TenantActivityScore {
   // Calculate component scores
   const contactFreq = scoreContactFrequency(tenant, activities);
   const caseHist = scoreCaseHistory(cases);
@@ -224,7 +231,7 @@ export async function calculateTenantActivityScore(tenantId: string): Promise<Te
   if (tenant.ucStatus === 'transitioning') proactiveActions.push('Monitor UC transition — offer benefits advice');
 
   return {
-    tenantId,
+    tenantId: tenant.id,
     tenantName: `${tenant.title} ${tenant.firstName} ${tenant.lastName}`,
     engagementScore,
     components: {
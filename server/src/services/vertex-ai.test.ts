@@ -0,0 +1,209 @@
+// ============================================================
+// SocialHomes.Ai — Chat Streaming Tests
+// Incremental token delivery, fallback before the first token,
+// cancellation and the timing figures in the done event; the
+// bounded prompt window, running summary and context cache.
+// ============================================================
+
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+
+const { conversations, streamChatResponse } = vi.hoisted(() => ({
+  conversations: new Map<string, any>(),
+  streamChatResponse: vi.fn(),
+}));
+
+vi.mock('./firestore.js', () => ({
+  db: {
+    collection: () => ({
+      add: async (data: any) => {
+        const id = `conv-${conversations.size + 1}`;
+        conversations.set(id, { ...data, messages: [] });
+        return { id };
+      },
+      doc: (id: string) => ({
+        get: async () => ({ exists: conversations.has(id), id, data: () => conversations.get(id) }),
+        // arrayUnion is mocked to return its messages; increments replace
+        update: async ({ messages, ...rest }: any) => {
+          const conv = conversations.get(id);
+          Object.assign(conv, rest);
+          conv.messages.push(...messages);
+        },
+      }),
+    }),
+  },
+  collections: {},
+  FieldValue: { arrayUnion: (...m: any[]) => m, increment: (n: number) => n },
+}));
+
+vi.mock('./claude-ai.js', () => ({ streamChatResponse }));
+
+import { streamAiResponse, generateAiResponse, selectPromptWindow, foldIntoSummary } from './vertex-ai.js';
+
+const context = { entityType: 'general' as const, persona: 'housing-officer' };
+
+function deferred() {
+  let release!: () => void;
+  const promise = new Promise<void>(resolve => { release = resolve; });
+  return { promise, release };
+}
+
+describe('streamAiResponse', () => {
+  beforeEach(() => {
+    conversations.clear();
+    streamChatResponse.mockReset();
+    vi.spyOn(console, 'error').mockImplementation(() => {});
+  });
+
+  it('forwards each token before the model has finished', async () => {
+    const rest = deferred();
+    streamChatResponse.mockReturnValue({
+      model: 'claude-haiku',
+      chunks: (async function* () {
+        yield { text: 'Damp ' };
+        await rest.promise;
+        yield { text: 'and mould.' };
+        yield { outputTokens: 4 };
+      })(),
+    });
+
+    const stream = streamAiResponse('What about damp?', context);
+    expect(JSON.parse((await stream.next()).value!.data)).toMatchObject({ conversationId: 'conv-1', model: 'claude-haiku' });
+    expect((await stream.next()).value).toEqual({ type: 'token', data: 'Damp ' });
+
+    rest.release();
+    const events = [];
+    for await (const event of stream) events.push(event);
+    expect(events[0]).toEqual({ type: 'token', data: 'and mould.' });
+
+    const done = JSON.parse(events[events.length - 1].data);
+    expect(done.tokenUsage.outputTokens).toBe(4);
+    expect(done.timeToFirstTokenMs).toBeGreaterThanOrEqual(0);
+    expect(done.interrupted).toBe(false);
+    expect(conversations.get('conv-1').messages.map((m: any) => m.content)).toEqual(['What about damp?', 'Damp and mould.']);
+  });
+
+  it('streams the rule-based answer when the model fails before its first token', async () => {
+    streamChatResponse.mockReturnValue({
+      model: 'claude-haiku',
+      chunks: (async function* () { throw new Error('overloaded'); })(),
+    });
+
+    const events = [];
+    for await (const event of streamAiResponse('Any complaints due?', context)) events.push(event);
+
+    const text = events.filter(e => e.type === 'token').map(e => e.data).join('');
+    expect(text).toContain('Complaint Handling');
+    expect(JSON.parse(events[events.length - 1].data).model).toBe('rule-based');
+  });
+
+  it('stops the upstream stream and keeps the partial answer when the client leaves', async () => {
+    const abort = new AbortController();
+    let upstreamClosed = false;
+    streamChatResponse.mockImplementation((_q: string, _c: unknown, options: { signal: AbortSignal }) => ({
+      model: 'claude-haiku',
+      chunks: (async function* () {
+        try {
+          yield { text: 'Stage 1 ' };
+          await new Promise(resolve => options.signal.addEventListener('abort', resolve));
+          yield { text: 'never sent' };
+        } finally {
+          upstreamClosed = true;
+        }
+      })(),
+    }));
+
+    const stream = streamAiResponse('Complaint stages?', context, undefined, { signal: abort.signal });
+    await stream.next();
+    await stream.next();
+    abort.abort();
+    await stream.return(undefined);
+
+    expect(upstreamClosed).toBe(true);
+    expect(conversations.get('conv-1').messages.map((m: any) => m.content)).toEqual(['Complaint stages?', 'Stage 1 ']);
+  });
+
+  it('falls back to the rule-based engine when no model is configured', async () => {
+    streamChatResponse.mockReturnValue(null);
+    const events = [];
+    for await (const event of streamAiResponse('Hello', context)) events.push(event);
+    expect(events.filter(e => e.type === 'token').length).toBeGreaterThan(1);
+  });
+});
+
+describe('prompt window', () => {
+  const turns = (n: number, text = 'How do I handle a Stage 1 complaint about a repair? More detail follows here.') =>
+    Array.from({ length: n }, (_, i) => ({
+      role: (i % 2 === 0 ? 'user' : 'assistant') as 'user' | 'assistant',
+      content: `${text} (${i})`,
+      timestamp: '2026-03-01T10:00:00.000Z',
+      tokens: 100,
+    }));
+
+  beforeEach(() => {
+    conversations.clear();
+  });
+
+  it('keeps the newest messages within budget and summarises the rest', () => {
+    const window = selectPromptWindow(turns(30), undefined, 1000);
+    expect(window.history).toHaveLength(10);
+    expect(window.historyTokens).toBe(1000);
+    expect(window.history[0].role).toBe('user');
+    expect(window.summary).toMatchObject({ coveredMessages: 20 });
+    expect(window.summary!.lines[0]).toBe('- Officer asked: How do I handle a Stage 1 complaint about a repair?');
+    expect(window.summaryChanged).toBe(true);
+  });
+
+  it('only folds messages the summary does not already cover', () => {
+    const summary = foldIntoSummary(undefined, turns(20), 20);
+    const window = selectPromptWindow(turns(30), summary, 1000);
+    expect(window.summaryChanged).toBe(false);
+    expect(window.summary).toBe(summary);
+  });
+
+  it('caps the summary by dropping its oldest lines', () => {
+    const summary = foldIntoSummary(undefined, turns(400, 'Boiler pressure keeps dropping'), 400);
+    expect(summary.tokens).toBeLessThanOrEqual(800);
+    expect(summary.lines.length).toBeLessThan(400);
+    expect(summary.lines[summary.lines.length - 1]).toContain('(399)');
+  });
+
+  it('bounds the prompt of a long session and reuses the masked context', async () => {
+    const context = { entityType: 'tenant' as const, persona: 'housing-officer', entityData: { email: 'tenant@example.com' } };
+    conversations.set('conv-long', {
+      messages: turns(200, 'Arrears update for the tenant, please advise on next steps. Extra text.'),
+      tokenCount: 20000,
+    });
+
+    const first = await generateAiResponse('What next on arrears?', context, 'conv-long');
+    const stored = conversations.get('conv-long');
+    expect(stored.summary.coveredMessages).toBeGreaterThan(100);
+    expect(stored.contextCache.text).toContain('[EMAIL REDACTED]');
+    expect(first.tokenUsage.inputTokens).toBeLessThan(8000);
+
+    const cached = stored.contextCache;
+    const second = await generateAiResponse('And after that?', context, 'conv-long');
+    expect(conversations.get('conv-long').contextCache).toBe(cached);
+    expect(second.tokenUsage.inputTokens).toBeLessThan(8000);
+  });
+
+  it('streams from Claude with the masked context, summary and trimmed history', async () => {
+    const context = { entityType: 'tenant' as const, persona: 'housing-officer', entityData: { email: 'tenant@example.com' } };
+    conversations.set('conv-claude', {
+      messages: turns(200, 'Arrears update for the tenant, please advise on next steps. Extra text.'),
+      tokenCount: 20000,
+    });
+    streamChatResponse.mockReturnValue({
+      model: 'claude-test',
+      chunks: (async function* () { yield { text: 'Noted.' }; })(),
+    });
+
+    for await (const _event of streamAiResponse('What next on arrears?', context, 'conv-claude'));
+
+    const [, sent, options] = streamChatResponse.mock.lastCall!;
+    expect(sent.contextText).toContain('[EMAIL REDACTED]');
+    expect(sent.contextText).toContain('Earlier in this conversation:');
+    expect(JSON.stringify(sent)).not.toContain('tenant@example.com');
+    expect(options.history.length).toBeGreaterThan(0);
+    expect(options.history.length).toBeLessThan(200);
+  });
+});
@@ -4,7 +4,9 @@
 // conversation history with Firestore persistence, token counting
 // ============================================================
 
+import crypto from 'crypto';
 import { db, collections, FieldValue } from './firestore.js';
+import { streamChatResponse, type ChatStreamChunk } from './claude-ai.js';
 import type {
   GeminiModel,
   ModelConfig,
@@ -13,12 +15,14 @@ import type {
   ConversationContext,
   ChatMessage,
   ConversationDoc,
+  ConversationSummary,
+  ConversationContextCache,
   AiChatResponse,
   TokenBudget,
-  TOKEN_BUDGETS,
   PiiMaskingConfig,
   DEFAULT_PII_MASKING,
 } from '../types/vertex-ai.js';
+import { TOKEN_BUDGETS } from '../types/vertex-ai.js';
 
 // ---- Configuration ----
 
@@ -133,9 +137,9 @@ export async function addMessage(
   conversationId: string,
   message: ChatMessage,
 ): Promise<void> {
-  const tokens = estimateTokens(message.content);
+  const tokens = message.tokens ?? estimateTokens(message.content);
   await conversationsCollection.doc(conversationId).update({
-    messages: FieldValue.arrayUnion(message),
+    messages: FieldValue.arrayUnion({ ...message, tokens }),
     updatedAt: new Date().toISOString(),
     tokenCount: FieldValue.increment(tokens),
   });
@@ -151,6 +155,167 @@ export async function getConversationHistory(
   return conv.messages.slice(-maxMessages);
 }
 
+// ---- Context Window ----
+// Each turn sends the newest messages verbatim within a token budget.
+// Older turns are folded once into a running summary stored on the
+// conversation, and the masked entity context is cached there too, so
+// prompt size and per-turn work stay flat however long a session runs.
+
+const HISTORY_TOKEN_BUDGET = 6000;
+const MAX_WINDOW_MESSAGES = 20;
+const SUMMARY_TOKEN_BUDGET = 800;
+const SUMMARY_LINE_CHARS = 160;
+
+function messageTokens(message: ChatMessage): number {
+  return message.tokens ?? estimateTokens(message.content);
+}
+
+// One line per evicted message: its first sentence, without Markdown
+function summaryLine(message: ChatMessage): string {
+  const text = message.content.replace(/[*_`#>]/g, '').replace(/\s+/g, ' ').trim();
+  const sentence = text.match(/^.*?[.!?](?=\s|$)/)?.[0] ?? text;
+  const clipped = sentence.length > SUMMARY_LINE_CHARS ? `${sentence.slice(0, SUMMARY_LINE_CHARS - 1)}…` : sentence;
+  return `- ${message.role === 'user' ? 'Officer asked' : 'Assistant answered'}: ${clipped}`;
+}
+
+/**
+ * Add evicted messages to the running summary, dropping its oldest lines
+ * once it exceeds SUMMARY_TOKEN_BUDGET.
+ */
+export function foldIntoSummary(
+  summary: ConversationSummary | undefined,
+  evicted: ChatMessage[],
+  coveredMessages: number,
+): ConversationSummary {
+  const lines = [...(summary?.lines ?? []), ...evicted.map(summaryLine)];
+  let tokens = 0;
+  let keepFrom = lines.length;
+  while (keepFrom > 0) {
+    const lineTokens = estimateTokens(lines[keepFrom - 1]);
+    if (tokens + lineTokens > SUMMARY_TOKEN_BUDGET) break;
+    tokens += lineTokens;
+    keepFrom--;
+  }
+  return { lines: lines.slice(keepFrom), tokens, coveredMessages, updatedAt: new Date().toISOString() };
+}
+
+export interface PromptWindow {
+  history: ChatMessage[];
+  historyTokens: number;
+  summary?: ConversationSummary;
+  summaryChanged: boolean;
+}
+
+/**
+ * The newest messages that fit the token budget (at most
+ * MAX_WINDOW_MESSAGES), plus the summary of everything before them.
+ */
+export function selectPromptWindow(messages: ChatMessage[], summary: ConversationSummary | undefined, budgetTokens: number): PromptWindow {
+  const covered = Math.min(summary?.coveredMessages ?? 0, messages.length);
+  let start = messages.length;
+  let historyTokens = 0;
+  while (start > covered && messages.length - start < MAX_WINDOW_MESSAGES) {
+    const tokens = messageTokens(messages[start - 1]);
+    if (historyTokens + tokens > budgetTokens) break;
+    historyTokens += tokens;
+    start--;
+  }
+  // Never open the window on an answer whose question was evicted
+  if (start < messages.length && messages[start].role === 'assistant') {
+    historyTokens -= messageTokens(messages[start]);
+    start++;
+  }
+
+  if (start <= covered) return { history: messages.slice(start), historyTokens, summary, summaryChanged: false };
+  return {
+    history: messages.slice(start),
+    historyTokens,
+    summary: foldIntoSummary(summary, messages.slice(covered, start), start),
+    summaryChanged: true,
+  };
+}
+
+function contextKey(context: ConversationContext): string {
+  return crypto.createHash('sha1').update(JSON.stringify(context)).digest('hex');
+}
+
+/** The masked context string, reused from the conversation while the context is unchanged. */
+function contextFor(
+  conversation: ConversationDoc | null,
+  context: ConversationContext,
+): { cache: ConversationContextCache; changed: boolean } {
+  const key = contextKey(context);
+  if (conversation?.contextCache?.key === key) return { cache: conversation.contextCache, changed: false };
+  const text = maskPii(buildContextString(context));
+  return { cache: { key, text, tokens: estimateTokens(text) }, changed: true };
+}
+
+interface PreparedTurn {
+  conversationId: string;
+  history: ChatMessage[];
+  /** Masked entity context followed by the summary of earlier turns */
+  promptContext: string;
+  inputTokens: number;
+  /** Window state to store with the turn */
+  updates: { summary?: ConversationSummary; contextCache?: ConversationContextCache };
+}
+
+async function prepareTurn(
+  query: string,
+  context: ConversationContext,
+  conversationId: string | undefined,
+  preset: string,
+): Promise<PreparedTurn> {
+  // Get or create conversation
+  const conversation = conversationId ? await getConversation(conversationId) : null;
+  const convId = conversationId || await createConversation(
+    context.persona,
+    context.persona,
+    context.entityType,
+    context.entityId,
+  );
+
+  const budget = TOKEN_BUDGETS[preset] ?? TOKEN_BUDGETS.chat;
+  const { cache, changed } = contextFor(conversation, context);
+  const queryTokens = estimateTokens(query);
+  const historyBudget = Math.max(0, Math.min(
+    HISTORY_TOKEN_BUDGET,
+    budget.maxInputTokens - cache.tokens - queryTokens - SUMMARY_TOKEN_BUDGET,
+  ));
+  const window = selectPromptWindow(conversation?.messages ?? [], conversation?.summary, historyBudget);
+
+  const summaryText = window.summary?.lines.length
+    ? `\n\nEarlier in this conversation:\n${window.summary.lines.join('\n')}`
+    : '';
+
+  return {
+    conversationId: convId,
+    history: window.history,
+    promptContext: cache.text + summaryText,
+    inputTokens: queryTokens + cache.tokens + (window.summary?.tokens ?? 0) + window.historyTokens,
+    updates: {
+      summary: window.summaryChanged ? window.summary : undefined,
+      contextCache: changed ? cache : undefined,
+    },
+  };
+}
+
+/** Store a question and answer, with any window changes, in one write. */
+async function recordTurn(turn: PreparedTurn, query: string, responseText: string): Promise<void> {
+  const timestamp = new Date().toISOString();
+  const messages: ChatMessage[] = [
+    { role: 'user', content: query, timestamp, tokens: estimateTokens(query) },
+    { role: 'assistant', content: responseText, timestamp, tokens: estimateTokens(responseText) },
+  ];
+  await conversationsCollection.doc(turn.conversationId).update({
+    messages: FieldValue.arrayUnion(...messages),
+    updatedAt: timestamp,
+    tokenCount: FieldValue.increment(messages.reduce((sum, m) => sum + (m.tokens ?? 0), 0)),
+    ...(turn.updates.summary && { summary: turn.updates.summary }),
+    ...(turn.updates.contextCache && { contextCache: turn.updates.contextCache }),
+  });
+}
+
 // ---- AI Response Generation ----
 
 /**
@@ -165,34 +330,18 @@ export async function generateAiResponse(
   preset: string = 'chat',
 ): Promise<AiChatResponse> {
   const start = Date.now();
-
-  // Get or create conversation
-  let convId = conversationId;
-  if (!convId) {
-    convId = await createConversation(
-      context.persona,
-      context.persona,
-      context.entityType,
-      context.entityId,
-    );
-  }
-
-  // Build context for the model
-  const contextString = buildContextString(context);
-  const history = await getConversationHistory(convId);
-
-  // Estimate tokens
-  const inputTokens = estimateTokens(query) + estimateTokens(contextString) +
-    history.reduce((sum, m) => sum + estimateTokens(m.content), 0);
+  const turn = await prepareTurn(query, context, conversationId, preset);
+  const { conversationId: convId, inputTokens } = turn;
 
   let responseText: string;
   let outputTokens: number;
   let model: GeminiModel = 'gemini-2.0-flash';
+  let fallback = false;
 
   if (AI_ENABLED) {
     // Production: Call Vertex AI Gemini via REST API
     try {
-      const result = await callVertexAi(query, contextString, history, preset);
+      const result = await callVertexAi(query, turn.promptContext, turn.history, preset);
       responseText = result.text;
       outputTokens = result.outputTokens;
       model = result.model;
@@ -200,27 +349,17 @@ export async function generateAiResponse(
       console.error('[vertex-ai] Gemini API error, falling back to rule-based:', err.message);
       responseText = generateFallbackResponse(query, context);
       outputTokens = estimateTokens(responseText);
+      fallback = true;
     }
   } else {
     // Development: Rule-based fallback
     responseText = generateFallbackResponse(query, context);
     outputTokens = estimateTokens(responseText);
+    fallback = true;
   }
 
   // Save messages to conversation
-  const userMessage: ChatMessage = {
-    role: 'user',
-    content: query,
-    timestamp: new Date().toISOString(),
-  };
-  const assistantMessage: ChatMessage = {
-    role: 'assistant',
-    content: responseText,
-    timestamp: new Date().toISOString(),
-  };
-
-  await addMessage(convId, userMessage);
-  await addMessage(convId, assistantMessage);
+  await recordTurn(turn, query, responseText);
 
   const latencyMs = Date.now() - start;
 
@@ -239,20 +378,32 @@ export async function generateAiResponse(
       persona: context.persona,
       entityType: context.entityType,
       entityId: context.entityId,
+      ...(fallback && { fallback }),
     },
   };
 }
 
 // ---- Vertex AI REST Call ----
 
-async function callVertexAi(
+function modelEndpoint(model: GeminiModel, method: string): string {
+  return `https://${VERTEX_LOCATION}-aiplatform.googleapis.com/v1/projects/${VERTEX_PROJECT}/locations/${VERTEX_LOCATION}/publishers/google/models/${model}:${method}`;
+}
+
+/** The model and system prompt a preset sends, for callers that cache its output. */
+export function presetIdentity(preset: string): { model: GeminiModel; systemPrompt: string } {
+  return {
+    model: preset === 'drafting' ? 'gemini-1.5-pro' : 'gemini-2.0-flash',
+    systemPrompt: getSystemPrompt(preset),
+  };
+}
+
+function buildChatRequest(
   query: string,
   context: string,
   history: ChatMessage[],
   preset: string,
-): Promise<{ text: string; outputTokens: number; model: GeminiModel }> {
-  const model: GeminiModel = preset === 'drafting' ? 'gemini-1.5-pro' : 'gemini-2.0-flash';
-  const endpoint = `https://${VERTEX_LOCATION}-aiplatform.googleapis.com/v1/projects/${VERTEX_PROJECT}/locations/${VERTEX_LOCATION}/publishers/google/models/${model}:generateContent`;
+): { model: GeminiModel; body: Record<string, unknown> } {
+  const { model, systemPrompt } = presetIdentity(preset);
 
   // Build messages array
   const contents = [];
@@ -274,7 +425,7 @@ async function callVertexAi(
   const body = {
     contents,
     systemInstruction: {
-      parts: [{ text: getSystemPrompt(preset) }],
+      parts: [{ text: systemPrompt }],
     },
     generationConfig: {
       temperature: preset === 'drafting' ? 0.4 : 0.7,
@@ -290,9 +441,13 @@ async function callVertexAi(
     ],
   };
 
+  return { model, body };
+}
+
+async function vertexHeaders(): Promise<Record<string, string>> {
   // Use Google Cloud default credentials (automatic on Cloud Run)
   const { GoogleAuth } = await import('google-auth-library' as string).catch(() => ({ GoogleAuth: null }));
-  let headers: Record<string, string> = { 'Content-Type': 'application/json' };
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' };
 
   if (GoogleAuth) {
     try {
@@ -306,10 +461,20 @@ async function callVertexAi(
       // Fallback — on Cloud Run, metadata server provides tokens
     }
   }
+  return headers;
+}
+
+async function callVertexAi(
+  query: string,
+  context: string,
+  history: ChatMessage[],
+  preset: string,
+): Promise<{ text: string; outputTokens: number; model: GeminiModel }> {
+  const { model, body } = buildChatRequest(query, context, history, preset);
 
-  const response = await fetch(endpoint, {
+  const response = await fetch(modelEndpoint(model, 'generateContent'), {
     method: 'POST',
-    headers,
+    headers: await vertexHeaders(),
     body: JSON.stringify(body),
   });
 
@@ -524,40 +689,188 @@ Damp/mould issues should always be at least "urgent" due to Awaab's Law requirem
 
 // ---- Streaming (SSE) ----
 
+interface ModelStream {
+  model: string;
+  chunks: AsyncGenerator<ChatStreamChunk>;
+}
+
+/** The payload of each `data:` line in a server-sent event stream. */
+async function* readSseData(body: ReadableStream<Uint8Array>): AsyncGenerator<string> {
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for await (const bytes of body as unknown as AsyncIterable<Uint8Array>) {
+    buffer += decoder.decode(bytes, { stream: true });
+    let newline: number;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newline).replace(/\r$/, '');
+      buffer = buffer.slice(newline + 1);
+      if (line.startsWith('data:')) yield line.slice(5).trim();
+    }
+  }
+  if (buffer.startsWith('data:')) yield buffer.slice(5).trim();
+}
+
+function streamVertexAi(
+  query: string,
+  context: string,
+  history: ChatMessage[],
+  preset: string,
+  signal?: AbortSignal,
+): ModelStream {
+  const { model, body } = buildChatRequest(query, context, history, preset);
+
+  async function* chunks(): AsyncGenerator<ChatStreamChunk> {
+    const response = await fetch(modelEndpoint(model, 'streamGenerateContent?alt=sse'), {
+      method: 'POST',
+      headers: await vertexHeaders(),
+      body: JSON.stringify(body),
+      signal,
+    });
+
+    if (!response.ok || !response.body) {
+      const errorText = await response.text();
+      throw new Error(`Vertex AI API error ${response.status}: ${errorText}`);
+    }
+
+    for await (const data of readSseData(response.body)) {
+      const event = JSON.parse(data);
+      const parts: { text?: string }[] = event.candidates?.[0]?.content?.parts ?? [];
+      // Usage metadata is cumulative; the last event carries the total
+      yield {
+        text: parts.map(p => p.text ?? '').join(''),
+        outputTokens: event.usageMetadata?.candidatesTokenCount,
+      };
+    }
+  }
+
+  return { model, chunks: chunks() };
+}
+
+// The rule-based engine has nothing to stream, so its answer is sent in
+// word-aligned pieces of about 20 characters
+async function* fallbackChunks(text: string): AsyncGenerator<ChatStreamChunk> {
+  const words = text.split(' ');
+  let chunk = '';
+  for (let i = 0; i < words.length; i++) {
+    chunk += (i > 0 ? ' ' : '') + words[i];
+    if (chunk.length >= 20 || i === words.length - 1) {
+      yield { text: chunk };
+      chunk = '';
+    }
+  }
+}
+
+/**
+ * Pick the model to stream from: Vertex AI when enabled, then Claude when
+ * an API key is configured, then the rule-based engine.
+ */
+function openModelStream(
+  query: string,
+  context: ConversationContext,
+  contextString: string,
+  history: ChatMessage[],
+  preset: string,
+  signal?: AbortSignal,
+): ModelStream {
+  if (AI_ENABLED) return streamVertexAi(query, contextString, history, preset, signal);
+
+  // The same masked context, summary and trimmed history Vertex AI gets
+  const claude = streamChatResponse(query, { contextText: contextString }, {
+    history: history.flatMap(m => (m.role === 'system' ? [] : [{ role: m.role, content: m.content }])),
+    signal,
+  });
+  if (claude) return claude;
+
+  return { model: 'rule-based', chunks: fallbackChunks(generateFallbackResponse(query, context)) };
+}
+
+export interface StreamOptions {
+  /** Aborted when the client disconnects; cancels the upstream model call */
+  signal?: AbortSignal;
+  preset?: string;
+}
+
+/**
+ * Stream a chat response token by token as the model produces it.
+ * Emits `metadata` (conversation and model), then `token` events, then
+ * `done` with token usage, time to first token and output rate. If the
+ * model fails before its first token the rule-based answer is streamed
+ * instead; a failure part-way through ends the stream with `error`.
+ */
 export async function* streamAiResponse(
   query: string,
   context: ConversationContext,
   conversationId?: string,
+  options: StreamOptions = {},
 ): AsyncGenerator<{ type: string; data: string }> {
-  // For non-AI mode, simulate streaming by yielding chunks
-  const fullResponse = await generateAiResponse(query, context, conversationId);
+  const start = Date.now();
+  const { signal, preset = 'chat' } = options;
+  const turn = await prepareTurn(query, context, conversationId, preset);
+  const { conversationId: convId, inputTokens } = turn;
+
+  let source = openModelStream(query, context, turn.promptContext, turn.history, preset, signal);
 
   // Yield metadata first
   yield {
     type: 'metadata',
-    data: JSON.stringify({
-      conversationId: fullResponse.conversationId,
-      model: fullResponse.metadata.model,
-    }),
+    data: JSON.stringify({ conversationId: convId, model: source.model }),
   };
 
-  // Simulate streaming by chunking the response
-  const words = fullResponse.response.split(' ');
-  let chunk = '';
-  for (let i = 0; i < words.length; i++) {
-    chunk += (i > 0 ? ' ' : '') + words[i];
-    if (chunk.length >= 20 || i === words.length - 1) {
-      yield { type: 'token', data: chunk };
-      chunk = '';
+  let responseText = '';
+  let reportedTokens: number | undefined;
+  let firstTokenAt: number | undefined;
+  let interrupted = false;
+
+  try {
+    for (;;) {
+      try {
+        for await (const chunk of source.chunks) {
+          if (chunk.outputTokens !== undefined) reportedTokens = chunk.outputTokens;
+          if (!chunk.text) continue;
+          firstTokenAt ??= Date.now();
+          responseText += chunk.text;
+          yield { type: 'token', data: chunk.text };
+        }
+        break;
+      } catch (err: any) {
+        if (signal?.aborted) throw err;
+        console.error(`[vertex-ai] ${source.model} stream error:`, err.message);
+        if (responseText) {
+          interrupted = true;
+          yield { type: 'error', data: JSON.stringify({ error: 'The response was interrupted. Please try again.' }) };
+          break;
+        }
+        reportedTokens = undefined;
+        source = { model: 'rule-based', chunks: fallbackChunks(generateFallbackResponse(query, context)) };
+      }
+    }
+  } finally {
+    // Keep whatever the user was shown, even if they disconnected mid-answer
+    if (responseText) {
+      await recordTurn(turn, query, responseText)
+        .catch(err => console.error('[vertex-ai] Failed to save streamed exchange:', err.message));
     }
   }
 
+  const end = Date.now();
+  const outputTokens = reportedTokens ?? estimateTokens(responseText);
+  const generationMs = firstTokenAt !== undefined ? end - firstTokenAt : 0;
+
   // Yield completion event
   yield {
     type: 'done',
     data: JSON.stringify({
-      tokenUsage: fullResponse.tokenUsage,
-      latencyMs: fullResponse.metadata.latencyMs,
+      model: source.model,
+      interrupted,
+      tokenUsage: {
+        inputTokens,
+        outputTokens,
+        totalTokens: inputTokens + outputTokens,
+        remainingBudget: 50000 - (inputTokens + outputTokens),
+      },
+      latencyMs: end - start,
+      timeToFirstTokenMs: firstTokenAt !== undefined ? firstTokenAt - start : null,
+      tokensPerSecond: generationMs > 0 ? Math.round((outputTokens / generationMs) * 10000) / 10 : null,
     }),
   };
 }
@@ -4,8 +4,10 @@
 // vulnerable tenants who may need proactive support.
 // ============================================================
 
-import { collections, getDocs, getDoc } from './firestore.js';
+import crypto from 'crypto';
+import { db, collections, getDocs, getDoc, deleteDoc } from './firestore.js';
 import { fetchWithCache } from './external-api.js';
+import { mapWithConcurrency } from './concurrency.js';
 import type { TenantDoc, PropertyDoc, CaseDoc } from '../models/firestore-schemas.js';
 
 // ── Weights ──
@@ -44,7 +46,10 @@ export interface VulnerabilityAssessment {
 }
 
 export interface VulnerabilityScan {
+  scanId: string;
   scannedAt: string;
+  /** True when the scan continued from an interrupted run's checkpoint */
+  resumed: boolean;
   totalTenants: number;
   results: {
     tenantId: string;
@@ -69,8 +74,13 @@ function classifyVulnerability(score: number): VulnerabilityLevel {
   return 'critical';
 }
 
-// ── Factor 1: Deprivation (IMD) ──
-async function calculateDeprivationFactor(postcode: string): Promise<VulnerabilityFactor> {
+// ── IMD Lookup ──
+export interface DeprivationLookup {
+  imdDecile: number;
+  imdScore: number;
+}
+
+export async function lookupDeprivation(postcode: string): Promise<DeprivationLookup> {
   let imdDecile = 5;
   let imdScore = 20;
 
@@ -108,6 +118,11 @@ async function calculateDeprivationFactor(postcode: string): Promise<Vulnerabili
     }
   } catch { /* use defaults */ }
 
+  return { imdDecile, imdScore };
+}
+
+// ── Factor 1: Deprivation (IMD) ──
+function calculateDeprivationFactor(postcode: string, { imdDecile, imdScore }: DeprivationLookup): VulnerabilityFactor {
   // IMD decile 1 = most deprived, 10 = least. Invert for scoring.
   const rawScore = Math.round(Math.max(0, Math.min(100, (11 - imdDecile) * 10)));
 
@@ -356,18 +371,17 @@ function generateActions(level: VulnerabilityLevel, factors: VulnerabilityFactor
   return actions;
 }
 
-// ── Main: Single Tenant Assessment ──
-export async function assessVulnerability(tenantId: string): Promise<VulnerabilityAssessment> {
-  const tenant = await getDoc<TenantDoc>(collections.tenants, tenantId);
-  if (!tenant) throw new Error(`Tenant ${tenantId} not found`);
-
-  const property = await getDoc<PropertyDoc>(collections.properties, tenant.propertyId);
-  const tenantCases = await getDocs<CaseDoc>(collections.cases, [
-    { field: 'tenantId', op: '==', value: tenantId },
-  ]);
-
-  // Calculate all factors
-  const deprivationFactor = await calculateDeprivationFactor(property?.postcode || 'SE15 4QN');
+// ── Assessment ──
+export const DEFAULT_POSTCODE = 'SE15 4QN';
+
+/** Score one tenant from already-loaded records. */
+export function buildAssessment(
+  tenant: TenantDoc,
+  property: PropertyDoc | null,
+  tenantCases: CaseDoc[],
+  imd: DeprivationLookup,
+): VulnerabilityAssessment {
+  const deprivationFactor = calculateDeprivationFactor(property?.postcode || DEFAULT_POSTCODE, imd);
   const arrearsFactor = calculateArrearsFactor(tenant);
   const healthFactor = calculateHealthFactor(tenant, tenantCases);
   const isolationFactor = calculateIsolationFactor(tenant);
@@ -397,14 +411,130 @@ export async function assessVulnerability(tenantId: string): Promise<Vulnerabili
   };
 }
 
+// ── Main: Single Tenant Assessment ──
+export async function assessVulnerability(tenantId: string): Promise<VulnerabilityAssessment> {
+  const tenant = await getDoc<TenantDoc>(collections.tenants, tenantId);
+  if (!tenant) throw new Error(`Tenant ${tenantId} not found`);
+
+  const property = await getDoc<PropertyDoc>(collections.properties, tenant.propertyId);
+  const tenantCases = await getDocs<CaseDoc>(collections.cases, [
+    { field: 'tenantId', op: '==', value: tenantId },
+  ]);
+  const imd = await lookupDeprivation(property?.postcode || DEFAULT_POSTCODE);
+
+  return buildAssessment(tenant, property, tenantCases, imd);
+}
+
 // ── Batch Scan ──
-export async function scanAllTenants(): Promise<VulnerabilityScan> {
-  const tenants = await getDocs<TenantDoc>(collections.tenants);
+// Tenants, properties and cases are read once; IMD is looked up once per
+// distinct postcode with at most `concurrency` lookups in flight. Tenants
+// are scored in ID order and each chunk is checkpointed to the
+// vulnerabilityScans collection, so an interrupted scan resumes after the
+// last checkpoint instead of starting over.
+
+export interface ScanOptions {
+  /** Maximum IMD lookups in flight at once */
+  concurrency?: number;
+  /** Discard an unfinished scan and start again */
+  restart?: boolean;
+}
+
+type ScanResult = VulnerabilityScan['results'][number];
+
+interface ScanCheckpoint {
+  scanId: string;
+  status: 'running' | 'completed';
+  startedAt: string;
+  updatedAt: string;
+  totalTenants: number;
+  processedTenants: number;
+  /** Highest tenant ID scored so far */
+  lastTenantId: string;
+  /** Number of result chunk documents written */
+  chunks: number;
+}
+
+export const DEFAULT_SCAN_CONCURRENCY = 8;
+const CHECKPOINT_EVERY_TENANTS = 250;
+// An unfinished scan older than this is restarted rather than mixing old and new scores
+const RESUME_WINDOW_MS = 24 * 3600 * 1000;
+const CHECKPOINT_ID = 'latest';
+
+function chunkId(scanId: string, index: number): string {
+  return `${scanId}__${String(index).padStart(5, '0')}`;
+}
+
+async function discardScan(checkpoint: ScanCheckpoint): Promise<void> {
+  await Promise.all(Array.from({ length: checkpoint.chunks }, (_, i) =>
+    deleteDoc(collections.vulnerabilityScans, chunkId(checkpoint.scanId, i))));
+}
+
+async function runScan({ concurrency = DEFAULT_SCAN_CONCURRENCY, restart = false }: ScanOptions): Promise<VulnerabilityScan> {
+  const [tenants, properties, cases, previous] = await Promise.all([
+    getDocs<TenantDoc>(collections.tenants),
+    getDocs<PropertyDoc>(collections.properties),
+    getDocs<CaseDoc>(collections.cases),
+    getDoc<ScanCheckpoint>(collections.vulnerabilityScans, CHECKPOINT_ID),
+  ]);
 
-  const results = await Promise.all(
-    tenants.map(async (t) => {
+  const propertyById = new Map(properties.map(p => [p.id, p]));
+  const casesByTenant = new Map<string, CaseDoc[]>();
+  for (const c of cases) {
+    if (!c.tenantId) continue;
+    const list = casesByTenant.get(c.tenantId);
+    if (list) list.push(c);
+    else casesByTenant.set(c.tenantId, [c]);
+  }
+
+  const now = new Date().toISOString();
+  const resumed = !restart && previous?.status === 'running'
+    && Date.now() - new Date(previous.startedAt).getTime() < RESUME_WINDOW_MS;
+  const results: ScanResult[] = [];
+  let checkpoint: ScanCheckpoint;
+
+  if (resumed && previous) {
+    checkpoint = previous;
+    for (let i = 0; i < previous.chunks; i++) {
+      const chunk = await getDoc<{ results: ScanResult[] }>(collections.vulnerabilityScans, chunkId(previous.scanId, i));
+      results.push(...(chunk?.results ?? []));
+    }
+  } else {
+    if (previous) await discardScan(previous);
+    checkpoint = {
+      scanId: crypto.randomUUID(),
+      status: 'running',
+      startedAt: now,
+      updatedAt: now,
+      totalTenants: tenants.length,
+      processedTenants: 0,
+      lastTenantId: '',
+      chunks: 0,
+    };
+  }
+
+  const remaining = tenants
+    .filter(t => t.id > checkpoint.lastTenantId)
+    .sort((a, b) => (a.id < b.id ? -1 : a.id > b.id ? 1 : 0));
+  checkpoint.totalTenants = checkpoint.processedTenants + remaining.length;
+
+  // Tenants sharing a postcode share one lookup, including one still in flight
+  const imdByPostcode = new Map<string, Promise<DeprivationLookup>>();
+  const imdFor = (postcode: string) => {
+    let lookup = imdByPostcode.get(postcode);
+    if (!lookup) {
+      lookup = lookupDeprivation(postcode);
+      imdByPostcode.set(postcode, lookup);
+    }
+    return lookup;
+  };
+
+  for (let start = 0; start < remaining.length; start += CHECKPOINT_EVERY_TENANTS) {
+    const chunk = remaining.slice(start, start + CHECKPOINT_EVERY_TENANTS);
+    const chunkResults = await mapWithConcurrency(chunk, concurrency, async (t): Promise<ScanResult> => {
       try {
-        const assessment = await assessVulnerability(t.id);
+        const property = propertyById.get(t.propertyId) ?? null;
+        const imd = await imdFor(property?.postcode || DEFAULT_POSTCODE);
+        const assessment = buildAssessment(t, property, casesByTenant.get(t.id) ?? [], imd);
         return {
           tenantId: t.id,
           tenantName: assessment.tenantName,
@@ -421,14 +551,33 @@ export async function scanAllTenants(): Promise<VulnerabilityScan> {
           newFlags: [],
         };
       }
-    }),
-  );
+    });
+    results.push(...chunkResults);
+
+    checkpoint.processedTenants += chunk.length;
+    checkpoint.lastTenantId = chunk[chunk.length - 1].id;
+    checkpoint.updatedAt = new Date().toISOString();
+    const batch = db.batch();
+    batch.set(collections.vulnerabilityScans.doc(chunkId(checkpoint.scanId, checkpoint.chunks)), {
+      scanId: checkpoint.scanId,
+      results: chunkResults,
+    });
+    checkpoint.chunks++;
+    batch.set(collections.vulnerabilityScans.doc(CHECKPOINT_ID), checkpoint);
+    await batch.commit();
+  }
+
+  checkpoint.status = 'completed';
+  checkpoint.updatedAt = new Date().toISOString();
+  await collections.vulnerabilityScans.doc(CHECKPOINT_ID).set(checkpoint);
 
   // Sort by score descending
   results.sort((a, b) => b.score - a.score);
 
   return {
-    scannedAt: new Date().toISOString(),
+    scanId: checkpoint.scanId,
+    scannedAt: checkpoint.updatedAt,
+    resumed: !!resumed,
     totalTenants: results.length,
     results,
     summary: {
@@ -440,3 +589,11 @@ export async function scanAllTenants(): Promise<VulnerabilityScan> {
     },
   };
 }
+
+let scanning: Promise<VulnerabilityScan> | null = null;
+
+/** Scan every tenant. Concurrent callers share one scan. */
+export function scanAllTenants(options: ScanOptions = {}): Promise<VulnerabilityScan> {
+  if (!scanning) scanning = runScan(options).finally(() => { scanning = null; });
+  return scanning;
+}
@@ -75,6 +75,22 @@ export interface ChatMessage {
   role: 'user' | 'assistant' | 'system';
   content: string;
   timestamp: string;
+  tokens?: number;     // estimated once when the message is stored
+}
+
+/** Running summary of the turns that have left the prompt window */
+export interface ConversationSummary {
+  lines: string[];
+  tokens: number;
+  coveredMessages: number;   // messages[0..coveredMessages) are summarised
+  updatedAt: string;
+}
+
+/** Masked entity context, reused while the context inputs are unchanged */
+export interface ConversationContextCache {
+  key: string;
+  text: string;
+  tokens: number;
 }
 
 export interface ConversationDoc {
@@ -88,6 +104,8 @@ export interface ConversationDoc {
   updatedAt: string;
   tokenCount: number;
   maxTokens: number;
+  summary?: ConversationSummary;
+  contextCache?: ConversationContextCache;
 }
 
 // ---- Streaming ----
@@ -146,6 +164,8 @@ export interface AiChatResponse {
     entityType: EntityType;
     entityId?: string;
     groundedSources?: string[];
+    /** Set when the rule-based engine answered instead of the model */
+    fallback?: boolean;
   };
 }
 
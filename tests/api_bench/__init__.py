@@ -0,0 +1,8 @@
+"""
+SocialHomes.Ai — /api/v1 load-generation and latency benchmark
+Drives the scan-heavy API routes at a fixed concurrency and reports
+p50/p95/p99 latency, throughput and error rates as JSON and HTML.
+
+Usage (from tests/):
+    python -m api_bench --base http://localhost:8080 --concurrency 16 --requests 200
+"""
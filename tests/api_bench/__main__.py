@@ -0,0 +1,67 @@
+"""
+SocialHomes.Ai — api_bench command line
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+from .report import write_reports
+from .runner import ENDPOINTS, run_benchmark
+
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench_results")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="api_bench", description="SocialHomes.Ai /api/v1 latency benchmark")
+    parser.add_argument("--base", default=os.environ.get("SH_BENCH_BASE", "http://localhost:8080"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--duration", type=float, help="Seconds per endpoint (overrides --requests)")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per endpoint")
+    parser.add_argument("--token", default=os.environ.get("SH_BENCH_TOKEN"),
+                        help="Firebase ID token; without one the dev-mode X-Persona header is used")
+    parser.add_argument("--persona", default="housing-officer")
+    parser.add_argument("--tenant-id", help="Tenant for /tenants/:id/activities (default: first tenant)")
+    parser.add_argument("--endpoint", action="append", choices=[name for name, _ in ENDPOINTS],
+                        help="Only benchmark this endpoint (repeatable)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--max-error-rate", type=float,
+                        help="Exit non-zero if any endpoint's error rate exceeds this fraction")
+    args = parser.parse_args(argv)
+
+    started = datetime.now(timezone.utc)
+    print(f"SocialHomes.Ai API benchmark -> {args.base} (concurrency {args.concurrency})")
+    endpoints = asyncio.run(run_benchmark(
+        args.base, concurrency=args.concurrency, requests=args.requests, duration=args.duration,
+        warmup=args.warmup, token=args.token, persona=args.persona, tenant_id=args.tenant_id,
+        only=set(args.endpoint) if args.endpoint else None, timeout=args.timeout,
+    ))
+    report = {
+        "ts": started.isoformat(),
+        "config": {
+            "base": args.base,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "auth": "bearer" if args.token else f"x-persona:{args.persona}",
+        },
+        "endpoints": endpoints,
+    }
+    json_path, html_path = write_reports(report, args.out)
+    print(f"Results saved to: {json_path}\nHTML report: {html_path}")
+
+    if args.max_error_rate is not None:
+        worst = max((r["error_rate"] for r in endpoints.values()), default=0.0)
+        if worst > args.max_error_rate:
+            print(f"Error rate {worst:.1%} exceeds --max-error-rate {args.max_error_rate:.1%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
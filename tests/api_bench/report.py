@@ -0,0 +1,68 @@
+"""
+SocialHomes.Ai — JSON and HTML reports for api_bench
+"""
+
+import html
+import json
+import os
+
+
+def write_json(report, path):
+    with open(path, "w") as fp:
+        json.dump(report, fp, indent=2)
+    return path
+
+
+def write_html(report, path):
+    rows = []
+    for name, r in report["endpoints"].items():
+        lat = r["latency_ms"]
+        err_class = " class=\"bad\"" if r["error_rate"] else ""
+        rows.append(
+            "<tr>"
+            f"<td>{html.escape(name)}</td><td><code>{html.escape(r['path'])}</code></td>"
+            f"<td>{r['requests']}</td><td>{lat['p50']:.1f}</td><td>{lat['p95']:.1f}</td>"
+            f"<td>{lat['p99']:.1f}</td><td>{lat['max']:.1f}</td><td>{r['throughput_rps']:.1f}</td>"
+            f"<td{err_class}>{r['error_rate']:.1%}</td>"
+            f"<td>{html.escape(', '.join(f'{k}: {v}' for k, v in sorted(r['statuses'].items())))}</td>"
+            "</tr>"
+        )
+    cfg = report["config"]
+    doc = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>SocialHomes.Ai API benchmark — {html.escape(report['ts'])}</title>
+<style>
+  body {{ font-family: system-ui, sans-serif; margin: 2rem; color: #1f2937; }}
+  table {{ border-collapse: collapse; width: 100%; }}
+  th, td {{ border: 1px solid #d1d5db; padding: 6px 10px; text-align: right; }}
+  th:nth-child(-n+2), td:nth-child(-n+2), td:last-child {{ text-align: left; }}
+  th {{ background: #f3f4f6; }}
+  .bad {{ color: #b91c1c; font-weight: 600; }}
+</style>
+</head>
+<body>
+<h1>SocialHomes.Ai API benchmark</h1>
+<p>{html.escape(cfg['base'])} &middot; concurrency {cfg['concurrency']} &middot;
+{html.escape(str(cfg['requests']) + ' requests' if not cfg['duration'] else str(cfg['duration']) + 's')} per endpoint &middot;
+{html.escape(report['ts'])}</p>
+<table>
+<thead><tr><th>Endpoint</th><th>Path</th><th>Requests</th><th>p50 ms</th><th>p95 ms</th>
+<th>p99 ms</th><th>max ms</th><th>req/s</th><th>Errors</th><th>Statuses</th></tr></thead>
+<tbody>
+{chr(10).join(rows)}
+</tbody>
+</table>
+</body>
+</html>
+"""
+    with open(path, "w") as fp:
+        fp.write(doc)
+    return path
+
+
+def write_reports(report, out_dir, stem="api_bench"):
+    os.makedirs(out_dir, exist_ok=True)
+    return (write_json(report, os.path.join(out_dir, f"{stem}.json")),
+            write_html(report, os.path.join(out_dir, f"{stem}.html")))
@@ -0,0 +1,106 @@
+"""
+SocialHomes.Ai — Async load generator for api_bench
+Closed-loop workers: each of ``concurrency`` coroutines issues its next
+request as soon as the previous one returns.
+"""
+
+import asyncio
+import time
+
+import aiohttp
+
+from .stats import summarise
+
+ENDPOINTS = [
+    ("cases", "/api/v1/cases"),
+    ("tenant-activities", "/api/v1/tenants/{tenant_id}/activities"),
+    ("briefing", "/api/v1/briefing"),
+    ("reports-tsm", "/api/v1/reports/tsm"),
+    ("rent-dashboard", "/api/v1/rent/dashboard"),
+    ("explore-hierarchy", "/api/v1/explore/hierarchy"),
+]
+
+
+def build_headers(token=None, persona=None):
+    """Bearer token when given; otherwise the dev-mode X-Persona fallback."""
+    headers = {"Accept": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    elif persona:
+        headers["X-Persona"] = persona
+    return headers
+
+
+async def resolve_tenant_id(session, base):
+    """First tenant id from /api/v1/tenants, for the per-tenant activities route."""
+    async with session.get(f"{base}/api/v1/tenants", params={"limit": "1"}) as resp:
+        resp.raise_for_status()
+        body = await resp.json()
+    items = body.get("items", []) if isinstance(body, dict) else body
+    if not items:
+        raise RuntimeError("No tenants returned by /api/v1/tenants; pass --tenant-id")
+    return items[0]["id"]
+
+
+async def _request(session, url):
+    start = time.perf_counter()
+    try:
+        async with session.get(url) as resp:
+            body = await resp.read()
+            return {"ms": (time.perf_counter() - start) * 1000, "status": resp.status, "bytes": len(body)}
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return {"ms": (time.perf_counter() - start) * 1000, "status": 0, "bytes": 0,
+                "error": f"{type(e).__name__}: {e}"[:200]}
+
+
+async def bench_endpoint(session, url, concurrency, requests=None, duration=None, warmup=0):
+    """Load one URL and return (samples, wall-clock seconds)."""
+    for _ in range(warmup):
+        await _request(session, url)
+
+    samples = []
+    issued = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal issued
+        while True:
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return
+            elif issued >= requests:
+                return
+            issued += 1
+            samples.append(await _request(session, url))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+async def run_benchmark(base, concurrency=8, requests=100, duration=None, warmup=2,
+                        token=None, persona="housing-officer", tenant_id=None,
+                        only=None, timeout=60):
+    """Benchmark every endpoint in ENDPOINTS (or those named in ``only``) in turn."""
+    base = base.rstrip("/")
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    results = {}
+    async with aiohttp.ClientSession(headers=build_headers(token, persona), connector=connector,
+                                     timeout=client_timeout) as session:
+        for name, template in ENDPOINTS:
+            if only and name not in only:
+                continue
+            if "{tenant_id}" in template and tenant_id is None:
+                tenant_id = await resolve_tenant_id(session, base)
+            path = template.format(tenant_id=tenant_id)
+            print(f"  {name:20s} {path} ...", flush=True)
+            samples, wall = await bench_endpoint(session, base + path, concurrency,
+                                                 requests=requests, duration=duration, warmup=warmup)
+            summary = summarise(samples, wall)
+            summary["path"] = path
+            results[name] = summary
+            lat = summary["latency_ms"]
+            print(f"  {name:20s} p50 {lat['p50']:.0f}ms  p95 {lat['p95']:.0f}ms  p99 {lat['p99']:.0f}ms  "
+                  f"{summary['throughput_rps']:.1f} req/s  errors {summary['error_rate']:.1%}")
+    return results
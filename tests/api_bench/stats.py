@@ -0,0 +1,46 @@
+"""
+SocialHomes.Ai — Latency statistics for api_bench
+"""
+
+import math
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarise(samples, wall_seconds):
+    """Reduce raw samples to the reported metrics for one endpoint.
+
+    Each sample is a dict with ``ms`` (latency), ``status`` (HTTP status or
+    0 for transport errors), ``bytes`` and optional ``error``.
+    """
+    latencies = sorted(s["ms"] for s in samples)
+    ok = [s for s in samples if 200 <= s["status"] < 400]
+    statuses = {}
+    for s in samples:
+        key = str(s["status"]) if s["status"] else "transport"
+        statuses[key] = statuses.get(key, 0) + 1
+    errors = len(samples) - len(ok)
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else 0.0,
+        "latency_ms": {
+            "min": round(latencies[0], 2) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "avg_bytes": round(sum(s["bytes"] for s in ok) / len(ok)) if ok else 0,
+        "sample_errors": sorted({s["error"] for s in samples if s.get("error")})[:5],
+    }
@@ -0,0 +1,243 @@
+"""
+SocialHomes.Ai — Adaptive page readiness for the Selenium suites
+Replaces fixed post-navigation sleeps with waits on real signals:
+  - network idle, from the Chrome DevTools performance log
+  - React commit quiescence, via the DevTools global hook (MutationObserver fallback)
+  - SkeletonLoader placeholders gone and finite CSS animations finished
+Every wait is recorded so the suites can report page-ready latency.
+"""
+
+import json
+import math
+import time
+
+READY_TIMEOUT = 15       # seconds before a wait gives up and is recorded as timed out
+QUIET_WINDOW = 0.5       # seconds with no network/React activity that counts as settled
+POLL_INTERVAL = 0.1
+STALE_REQUEST = 10       # in-flight requests older than this are treated as background (polling, SSE)
+
+# SkeletonLoader and the panel loading states pulse a block of surface-coloured bars.
+# Bare .animate-pulse is also used by live status dots, which never go away.
+SKELETON_SELECTOR = ".animate-pulse:has(.bg-surface-hover, .bg-surface-elevated)"
+
+IGNORED_RESOURCE_TYPES = {"EventSource", "WebSocket", "Ping"}
+
+PAGE_READY = []
+
+# Runs before any page script so React registers with it instead of the real extension hook.
+REACT_HOOK_JS = """
+(function () {
+  var s = window.__shReady = { commit: 0, mutation: 0 };
+  var mark = function () { s.commit = performance.now(); };
+  var hook = window.__REACT_DEVTOOLS_GLOBAL_HOOK__;
+  if (hook && typeof hook.onCommitFiberRoot === 'function') {
+    var orig = hook.onCommitFiberRoot;
+    hook.onCommitFiberRoot = function () { mark(); return orig.apply(hook, arguments); };
+    return;
+  }
+  var nextId = 0;
+  window.__REACT_DEVTOOLS_GLOBAL_HOOK__ = {
+    renderers: new Map(),
+    supportsFiber: true,
+    inject: function (renderer) { nextId += 1; this.renderers.set(nextId, renderer); return nextId; },
+    onScheduleFiberRoot: function () {},
+    onCommitFiberRoot: mark,
+    onCommitFiberUnmount: function () {},
+    onPostCommitFiberRoot: function () {},
+    checkDCE: function () {}
+  };
+})();
+"""
+
+PROBE_JS = """
+var s = window.__shReady || (window.__shReady = { commit: 0, mutation: 0 });
+if (!s.observer && document.body) {
+  s.observer = new MutationObserver(function () { s.mutation = performance.now(); });
+  s.observer.observe(document.body, { childList: true, subtree: true, characterData: true });
+  s.mutation = performance.now();
+}
+var animations = 0;
+if (document.getAnimations) {
+  document.getAnimations().forEach(function (a) {
+    var timing = a.effect && a.effect.getComputedTiming ? a.effect.getComputedTiming() : {};
+    if (a.playState === 'running' && timing.iterations !== Infinity) animations += 1;
+  });
+}
+return {
+  readyState: document.readyState,
+  quietMs: performance.now() - Math.max(s.commit, s.mutation),
+  skeletons: document.querySelectorAll(arguments[0]).length,
+  animations: animations
+};
+"""
+
+_network = {}
+
+
+def enable(options):
+    """Turn on the DevTools performance log for a ChromeOptions instance."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def install(driver):
+    """Register the React commit hook on every new document loaded by this driver."""
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": REACT_HOOK_JS})
+    except Exception:
+        pass  # Probe falls back to the MutationObserver
+    return driver
+
+
+class _NetworkTracker:
+    """In-flight request bookkeeping fed from the performance log."""
+
+    def __init__(self):
+        self.inflight = {}
+        self.last_activity = time.monotonic()
+        self.available = True
+
+    def reset(self):
+        self.inflight.clear()
+        self.last_activity = time.monotonic()
+
+    def drain(self, driver):
+        if not self.available:
+            return
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            self.available = False
+            return
+        now = time.monotonic()
+        for entry in entries:
+            try:
+                msg = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = msg.get("method", "")
+            params = msg.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                url = params.get("request", {}).get("url", "")
+                if url.startswith("data:") or params.get("type") in IGNORED_RESOURCE_TYPES:
+                    continue
+                self.inflight[request_id] = now
+                self.last_activity = now
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                if self.inflight.pop(request_id, None) is not None:
+                    self.last_activity = now
+
+    def idle(self, quiet):
+        if not self.available:
+            return True
+        now = time.monotonic()
+        active = [t for t in self.inflight.values() if now - t < STALE_REQUEST]
+        return not active and now - self.last_activity >= quiet
+
+
+def _tracker(driver):
+    key = getattr(driver, "session_id", id(driver))
+    if key not in _network:
+        _network[key] = _NetworkTracker()
+    return _network[key]
+
+
+def begin(driver):
+    """Discard network activity from before a navigation or click."""
+    tracker = _tracker(driver)
+    tracker.drain(driver)
+    tracker.reset()
+
+
+def wait_until_ready(driver, label=None, timeout=READY_TIMEOUT, quiet=QUIET_WINDOW, fallback=None):
+    """Block until the page has settled and record how long that took.
+
+    ``fallback`` is the old fixed sleep, used only when the page cannot be
+    probed at all (e.g. a raw JSON response with scripts disabled).
+    Returns the observed wait in seconds.
+    """
+    tracker = _tracker(driver)
+    start = time.monotonic()
+    pending = []
+    probed = False
+    while True:
+        tracker.drain(driver)
+        try:
+            state = driver.execute_script(PROBE_JS, SKELETON_SELECTOR) or {}
+            probed = True
+        except Exception:
+            probed = False
+            break
+        pending = []
+        if state.get("readyState") != "complete":
+            pending.append("document")
+        if state.get("quietMs", 0) < quiet * 1000:
+            pending.append("react")
+        if state.get("skeletons", 0):
+            pending.append("skeleton")
+        if state.get("animations", 0):
+            pending.append("animation")
+        if not tracker.idle(quiet):
+            pending.append("network")
+        if not pending:
+            break
+        if time.monotonic() - start >= timeout:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    if not probed and fallback:
+        time.sleep(fallback)
+    elapsed = time.monotonic() - start
+    if label is None:
+        try:
+            label = driver.current_url
+        except Exception:
+            label = "unknown"
+    PAGE_READY.append({
+        "page": label,
+        "seconds": round(elapsed, 3),
+        "timed_out": bool(pending) or not probed,
+        "pending": pending,
+    })
+    return elapsed
+
+
+def navigate(driver, url, label=None, timeout=READY_TIMEOUT, fallback=None):
+    """driver.get() followed by an adaptive readiness wait."""
+    begin(driver)
+    driver.get(url)
+    return wait_until_ready(driver, label or url, timeout=timeout, fallback=fallback)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summary(records=None):
+    """Page-ready latency per page: samples, mean, p50, p95, max and timeouts."""
+    records = PAGE_READY if records is None else records
+    by_page = {}
+    for r in records:
+        by_page.setdefault(r["page"], []).append(r)
+    pages = {}
+    for page, rows in sorted(by_page.items()):
+        values = sorted(r["seconds"] for r in rows)
+        pages[page] = {
+            "samples": len(values),
+            "mean": round(sum(values) / len(values), 3),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "max": values[-1],
+            "timeouts": sum(1 for r in rows if r["timed_out"]),
+        }
+    all_values = sorted(r["seconds"] for r in records)
+    return {
+        "total_wait_seconds": round(sum(all_values), 3),
+        "p50": _percentile(all_values, 50),
+        "p95": _percentile(all_values, 95),
+        "pages": pages,
+    }
@@ -0,0 +1,244 @@
+"""
+SocialHomes.Ai — Login session cache for the Selenium suites
+Signs in through FirebaseUI once, captures the Firebase auth state
+(IndexedDB firebaseLocalStorageDb + localStorage) and injects it into
+fresh drivers. The captured state is shared on disk between parallel
+workers and re-captured only when the ID token is close to expiry.
+Also owns the per-process Chrome driver the unittest suites share,
+which is reset to clean cookies and storage for every test class.
+"""
+
+import atexit
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import readiness
+
+SESSION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".session_cache.json")
+REFRESH_MARGIN = 300     # re-login when the ID token has less than this many seconds left
+BOOTSTRAP_PATH = "/health"  # lightweight same-origin page to write storage from
+SCRIPT_TIMEOUT = 15
+
+LOGIN_TIMEOUT = 30
+
+# Test credentials
+EMAIL = "sarah.mitchell@rcha.org.uk"
+PASSWORD = "SocialHomes2026!"
+
+FIREBASE_DB = "firebaseLocalStorageDb"
+FIREBASE_STORE = "firebaseLocalStorage"
+
+CAPTURE_JS = """
+var done = arguments[arguments.length - 1];
+var local = {};
+for (var i = 0; i < localStorage.length; i++) {
+  var k = localStorage.key(i);
+  local[k] = localStorage.getItem(k);
+}
+var finish = function (rows) { done({ indexedDb: rows, localStorage: local }); };
+var req = indexedDB.open('%(db)s');
+req.onerror = function () { finish([]); };
+req.onsuccess = function () {
+  var db = req.result;
+  if (!db.objectStoreNames.contains('%(store)s')) { db.close(); finish([]); return; }
+  var all = db.transaction('%(store)s', 'readonly').objectStore('%(store)s').getAll();
+  all.onsuccess = function () { db.close(); finish(all.result); };
+  all.onerror = function () { db.close(); finish([]); };
+};
+""" % {"db": FIREBASE_DB, "store": FIREBASE_STORE}
+
+INJECT_JS = """
+var rows = arguments[0], local = arguments[1], done = arguments[arguments.length - 1];
+Object.keys(local).forEach(function (k) { localStorage.setItem(k, local[k]); });
+var req = indexedDB.open('%(db)s', 1);
+req.onupgradeneeded = function () { req.result.createObjectStore('%(store)s', { keyPath: 'fbase_key' }); };
+req.onerror = function () { done(false); };
+req.onsuccess = function () {
+  var db = req.result;
+  try {
+    var tx = db.transaction('%(store)s', 'readwrite');
+    var store = tx.objectStore('%(store)s');
+    rows.forEach(function (row) { store.put(row); });
+    tx.oncomplete = function () { db.close(); done(true); };
+    tx.onerror = function () { db.close(); done(false); };
+  } catch (e) {
+    db.close();
+    done(false);
+  }
+};
+""" % {"db": FIREBASE_DB, "store": FIREBASE_STORE}
+
+CLEAR_JS = """
+var done = arguments[arguments.length - 1];
+localStorage.clear();
+sessionStorage.clear();
+var req = indexedDB.deleteDatabase('%(db)s');
+req.onsuccess = req.onerror = req.onblocked = function () { done(true); };
+""" % {"db": FIREBASE_DB}
+
+_shared = {}
+
+
+def _token_expiry(state):
+    """Earliest stsTokenManager.expirationTime (epoch seconds) in the captured state."""
+    users = [row.get("value") for row in state.get("indexedDb", [])
+             if str(row.get("fbase_key", "")).startswith("firebase:authUser:")]
+    for key, raw in state.get("localStorage", {}).items():
+        if key.startswith("firebase:authUser:"):
+            try:
+                users.append(json.loads(raw))
+            except ValueError:
+                pass
+    expiries = [u["stsTokenManager"]["expirationTime"] / 1000 for u in users
+                if isinstance(u, dict) and u.get("stsTokenManager", {}).get("expirationTime")]
+    return min(expiries) if expiries else 0
+
+
+def is_fresh(state, margin=REFRESH_MARGIN):
+    return bool(state) and state.get("expires_at", 0) - time.time() > margin
+
+
+def capture(driver):
+    """Read the signed-in Firebase auth state out of the current page."""
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+    state = driver.execute_async_script(CAPTURE_JS) or {}
+    state["expires_at"] = _token_expiry(state)
+    state["captured_at"] = time.time()
+    return state
+
+
+def inject(driver, base, state):
+    """Write captured auth state into a fresh driver's storage for ``base``."""
+    readiness.navigate(driver, base + BOOTSTRAP_PATH, label=BOOTSTRAP_PATH, fallback=1)
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+    return bool(driver.execute_async_script(
+        INJECT_JS, state.get("indexedDb", []), state.get("localStorage", {})))
+
+
+@contextmanager
+def _locked():
+    """Serialise login/capture across parallel worker processes."""
+    with open(SESSION_FILE + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _load_all():
+    try:
+        with open(SESSION_FILE) as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return {}
+
+
+def load(base, email):
+    return _load_all().get(f"{base}|{email}")
+
+
+def save(base, email, state):
+    sessions = _load_all()
+    sessions[f"{base}|{email}"] = state
+    tmp = SESSION_FILE + ".tmp"
+    with open(tmp, "w") as fp:
+        json.dump(sessions, fp)
+    os.chmod(tmp, 0o600)
+    os.replace(tmp, SESSION_FILE)
+
+
+def ensure_session(driver, base, email, login, check_path="/dashboard"):
+    """Sign ``driver`` in, reusing the cached session when its token is still fresh.
+
+    ``login(driver)`` is the full FirebaseUI flow; it only runs when there is
+    no fresh cached state or the injected state is rejected.
+    Returns True when the cached session was reused.
+    """
+    with _locked():
+        state = load(base, email)
+        if is_fresh(state) and inject(driver, base, state):
+            readiness.navigate(driver, base + check_path, label=check_path, fallback=3)
+            if "/login" not in driver.current_url:
+                return True
+        login(driver)
+        save(base, email, capture(driver))
+        return False
+
+
+def reset(driver, base):
+    """Drop the cookies, storage and Firebase auth state a previous test class left on ``base``."""
+    readiness.navigate(driver, base + BOOTSTRAP_PATH, label=BOOTSTRAP_PATH, fallback=1)
+    driver.delete_all_cookies()
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+    driver.execute_async_script(CLEAR_JS)
+
+
+def firebaseui_login(driver, base, email=EMAIL, password=PASSWORD):
+    """The full FirebaseUI email/password sign-in on ``base``."""
+    readiness.navigate(driver, base + "/login", label="/login", fallback=8)  # Firebase init + FirebaseUI render
+    w = WebDriverWait(driver, LOGIN_TIMEOUT)
+    w.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".firebaseui-idp-password"))).click()
+    w.until(EC.presence_of_element_located((
+        By.CSS_SELECTOR, "input[name='email'], input[type='email'], .firebaseui-id-email"
+    ))).send_keys(email)
+    w.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".firebaseui-id-submit, button[type='submit']"))).click()
+    w.until(EC.presence_of_element_located((
+        By.CSS_SELECTOR, "input[name='password'], input[type='password'], .firebaseui-id-password"
+    ))).send_keys(password)
+    w.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".firebaseui-id-submit, button[type='submit']"))).click()
+    w.until(lambda d: "/login" not in d.current_url)
+
+
+def create_driver():
+    """Headless Chrome from webdriver-manager with the readiness hooks installed."""
+    from webdriver_manager.chrome import ChromeDriverManager  # only the unittest suites use it
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    readiness.enable(options)
+    service = Service(ChromeDriverManager().install())
+    return readiness.install(webdriver.Chrome(service=service, options=options))
+
+
+def _quit_shared():
+    driver = _shared.pop("driver", None)
+    if driver is not None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def shared_driver(factory):
+    """One driver per process, reused by every test class instead of one per setUpClass."""
+    if "driver" not in _shared:
+        _shared["driver"] = factory()
+        atexit.register(_quit_shared)
+    return _shared["driver"]
+
+
+def signed_in_driver(base, email=EMAIL, password=PASSWORD):
+    """The shared driver, reset and signed in to ``base`` for a new test class.
+
+    The cached session is injected again after the reset, so FirebaseUI
+    runs at most once per token lifetime across classes and workers.
+    """
+    driver = shared_driver(create_driver)
+    reset(driver, base)
+    ensure_session(driver, base, email, lambda d: firebaseui_login(d, base, email, password))
+    return driver
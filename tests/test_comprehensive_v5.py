@@ -4,7 +4,8 @@ SocialHomes.Ai — COMPREHENSIVE TEST SUITE V5
 Tests EVERY page, EVERY field, EVERY button, EVERY link in context.
 Date: 2026-02-13
 """
-import time, json, os, sys, re, traceback
+import time, json, os, sys, re, traceback, argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 
 from selenium import webdriver
@@ -20,6 +21,9 @@ from selenium.common.exceptions import (
     StaleElementReferenceException, WebDriverException
 )
 
+import readiness
+import session_cache
+
 BASE = "https://socialhomes-587984201316.europe-west2.run.app"
 SS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "screenshots_v5")
 os.makedirs(SS_DIR, exist_ok=True)
@@ -28,8 +32,8 @@ CHROME_BIN = "/tmp/chrome-install/chrome/linux-145.0.7632.76/chrome-linux64/chro
 CHROMEDRIVER = "/tmp/chrome-install/chromedriver/linux-145.0.7632.76/chromedriver-linux64/chromedriver"
 
 # Test credentials
-EMAIL = "sarah.mitchell@rcha.org.uk"
-PASSWORD = "SocialHomes2026!"
+EMAIL = session_cache.EMAIL
+PASSWORD = session_cache.PASSWORD
 
 findings = []
 section_counts = {}
@@ -61,9 +65,12 @@ def ss(driver, name):
     return path
 
 def nav(driver, path, wait=4):
-    """Navigate to a path."""
-    driver.get(BASE + path)
-    time.sleep(wait)
+    """Navigate to a path and wait until it is ready (``wait`` is the no-probe fallback)."""
+    readiness.navigate(driver, BASE + path, label=path, fallback=wait)
+
+def settle(driver, wait=2):
+    """Wait for the page to settle after an in-page action such as a click."""
+    readiness.wait_until_ready(driver, driver.current_url.replace(BASE, "") or "/", fallback=wait)
 
 def safe_click(driver, element):
     """Click element safely using JS."""
@@ -122,26 +129,26 @@ def create_driver():
     opts.add_argument("--disable-gpu")
     opts.add_argument("--window-size=1920,1200")
     opts.add_argument("--disable-extensions")
+    readiness.enable(opts)
     svc = Service(CHROMEDRIVER)
-    return webdriver.Chrome(service=svc, options=opts)
+    return readiness.install(webdriver.Chrome(service=svc, options=opts))
 
 def do_login(driver):
-    driver.get(BASE + "/login")
-    time.sleep(8)  # Wait for Firebase init + FirebaseUI render
+    readiness.navigate(driver, BASE + "/login", label="/login", fallback=8)  # Firebase init + FirebaseUI render
     w = WebDriverWait(driver, 30)
 
     # Click "Sign in with email" via FirebaseUI button
     try:
         btn = w.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".firebaseui-idp-password")))
         btn.click()
-        time.sleep(2)
+        settle(driver)
     except:
         # Fallback: look for any button with "email" text
         for b in driver.find_elements(By.CSS_SELECTOR, "button, li"):
             try:
                 if "email" in (b.text or "").lower():
                     b.click()
-                    time.sleep(2)
+                    settle(driver)
                     break
             except:
                 continue
@@ -155,7 +162,7 @@ def do_login(driver):
 
     # Click Next
     w.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".firebaseui-id-submit, button[type='submit']"))).click()
-    time.sleep(3)
+    settle(driver, 3)
 
     # Fill password
     pwd_input = w.until(EC.presence_of_element_located((
@@ -166,7 +173,6 @@ def do_login(driver):
 
     # Click Sign In
     w.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".firebaseui-id-submit, button[type='submit']"))).click()
-    time.sleep(5)
 
     # Wait for redirect away from /login
     try:
@@ -174,7 +180,7 @@ def do_login(driver):
     except TimeoutException:
         print(f"  WARNING: Still on login page after submit. URL: {driver.current_url}")
         ss(driver, "login_stuck")
-    time.sleep(3)
+    settle(driver, 3)
     print(f"  Logged in as Sarah Mitchell -> {driver.current_url}")
 
 # =============================================================================
@@ -187,8 +193,7 @@ def test_health_and_api(d):
     print("0. HEALTH & API ENDPOINTS")
     print("=" * 70)
 
-    d.get(BASE + "/health")
-    time.sleep(2)
+    nav(d, "/health", 2)
     body = get_text(d)
     is_healthy = "healthy" in body
     log("API", "API-01", "Health endpoint", "pass" if is_healthy else "fail", f"Response: {body[:200]}")
@@ -204,8 +209,7 @@ def test_health_and_api(d):
         ("/api/v1/reports", "Reports API"),
     ]
     for path, name in api_paths:
-        d.get(BASE + path)
-        time.sleep(2)
+        nav(d, path, 2)
         body = get_text(d)
         has_data = len(body) > 10 and ("error" not in body.lower() or "unauthorized" in body.lower())
         log("API", f"API-{name[:3]}", name, "pass" if has_data else "warn", f"Response length: {len(body)}")
@@ -217,8 +221,7 @@ def test_login(d):
     print("1. LOGIN & AUTHENTICATION")
     print("=" * 70)
 
-    d.get(BASE + "/login")
-    time.sleep(4)
+    nav(d, "/login", 4)
     s = ss(d, "01_login_page")
     text = get_text(d)
 
@@ -279,7 +282,7 @@ def test_sidebar_navigation(d):
             links = d.find_elements(By.CSS_SELECTOR, f"a[href='{path}']")
             if links:
                 safe_click(d, links[0])
-                time.sleep(3)
+                settle(d, 3)
                 dest = d.current_url.replace(BASE, "")
                 ok = path in dest or dest != "/dashboard"
                 log("Sidebar", f"SB-CK-{name[:5]}", f"Click nav: {name}", "pass" if ok else "fail",
@@ -374,7 +377,7 @@ def test_dashboard(d):
                 continue
             before = d.current_url
             safe_click(d, card)
-            time.sleep(2)
+            settle(d, 2)
             after = d.current_url.replace(BASE, "")
             if after != "/dashboard":
                 log("Dashboard", f"DASH-CLK-{i}", f"Card clickable: '{card_text[:25]}'", "pass", f"→ {after}")
@@ -432,7 +435,7 @@ def test_briefing(d):
         try:
             btn_text = btn.text.strip()[:30]
             safe_click(d, btn)
-            time.sleep(3)
+            settle(d, 3)
             after = d.current_url.replace(BASE, "")
             log("Briefing", f"BR-ACT-{btn_text[:8]}", f"Action '{btn_text}' navigates",
                 "pass" if after != "/briefing" else "warn", f"→ {after}")
@@ -446,7 +449,7 @@ def test_briefing(d):
     skip = find_buttons(d, ["skip", "dismiss", "go to dashboard", "continue"])
     if skip:
         safe_click(d, skip[0])
-        time.sleep(2)
+        settle(d, 2)
         dest = d.current_url.replace(BASE, "")
         log("Briefing", "BR-SKIP", "Skip button", "pass", f"Skip → {dest}")
 
@@ -490,7 +493,7 @@ def test_explore(d):
     if markers:
         try:
             safe_click(d, markers[0])
-            time.sleep(2)
+            settle(d, 2)
             popup = d.find_elements(By.CSS_SELECTOR, ".leaflet-popup, .leaflet-popup-content")
             log("Explore", "EX-05", "Marker popup", "pass" if popup else "warn",
                 f"Popup appeared: {bool(popup)}")
@@ -545,7 +548,7 @@ def test_tenancies(d):
         try:
             page_search[0].clear()
             page_search[0].send_keys("Hassan")
-            time.sleep(2)
+            settle(d, 2)
             filtered_rows = d.find_elements(By.CSS_SELECTOR, "table tbody tr")
             log("Tenancies", "TN-06", "Search filters rows", "pass" if len(filtered_rows) < len(rows) else "warn",
                 f"Before: {len(rows)}, After: {len(filtered_rows)}")
@@ -562,7 +565,7 @@ def test_tenancies(d):
     if rows:
         row_text = rows[0].text.strip()[:50]
         safe_click(d, rows[0])
-        time.sleep(4)
+        settle(d, 4)
         dest = d.current_url.replace(BASE, "")
         crashed = is_crashed(d)
         s = ss(d, "07_tenant_detail")
@@ -594,7 +597,7 @@ def test_tenancies(d):
                 for t in tabs:
                     if t.text.strip().lower() == tn:
                         safe_click(d, t)
-                        time.sleep(2)
+                        settle(d, 2)
                         ss(d, f"07_tenant_tab_{tn}")
                         tab_text = get_text(d)
                         tab_crashed = is_crashed(d)
@@ -648,7 +651,7 @@ def test_properties(d):
     # Click property row → detail
     if rows:
         safe_click(d, rows[0])
-        time.sleep(4)
+        settle(d, 4)
         dest = d.current_url.replace(BASE, "")
         crashed = is_crashed(d)
         s = ss(d, "08_property_detail")
@@ -683,7 +686,7 @@ def test_properties(d):
                 for t in tabs:
                     if tn in t.text.strip().lower():
                         safe_click(d, t)
-                        time.sleep(3)
+                        settle(d, 3)
                         ss(d, f"08_prop_tab_{tn.replace(' ', '_')}")
                         tab_text = get_text(d)
                         tab_crashed = is_crashed(d)
@@ -744,7 +747,7 @@ def test_repairs(d):
     if rows:
         row_text = rows[0].text.strip()[:60]
         safe_click(d, rows[0])
-        time.sleep(3)
+        settle(d, 3)
         dest = d.current_url.replace(BASE, "")
         crashed = is_crashed(d)
         s = ss(d, "09_repair_detail")
@@ -784,7 +787,7 @@ def test_repairs(d):
     if filters:
         try:
             safe_click(d, filters[0])
-            time.sleep(1)
+            settle(d, 1)
             options = d.find_elements(By.CSS_SELECTOR, "option, [role='option'], li")
             log("Repairs", "RP-20", "Filter options", "pass" if options else "warn",
                 f"{len(options)} filter options")
@@ -839,7 +842,7 @@ def test_rent(d):
     if wl_links:
         try:
             safe_click(d, wl_links[0])
-            time.sleep(3)
+            settle(d, 3)
             dest = d.current_url.replace(BASE, "")
             crashed = is_crashed(d)
             log("Rent", "RT-08", "Worklist link click", "pass" if not crashed and dest != "/rent" else "fail",
@@ -952,7 +955,7 @@ def test_complaints(d):
     if rows:
         row_text = rows[0].text.strip()[:60]
         safe_click(d, rows[0])
-        time.sleep(3)
+        settle(d, 3)
         dest = d.current_url.replace(BASE, "")
         crashed = is_crashed(d)
         ss(d, "12_complaint_detail")
@@ -1051,7 +1054,7 @@ def test_asb(d):
     # Click a case → detail
     if rows:
         safe_click(d, rows[0])
-        time.sleep(3)
+        settle(d, 3)
         dest = d.current_url.replace(BASE, "")
         crashed = is_crashed(d)
         ss(d, "14_asb_detail")
@@ -1097,7 +1100,7 @@ def test_communications(d):
     for i, row in enumerate(rows[:3]):
         try:
             safe_click(d, row)
-            time.sleep(2)
+            settle(d, 2)
             ss(d, f"15_comm_detail_{i}")
             detail = get_text(d)
 
@@ -1314,7 +1317,7 @@ def test_yantra_assist(d):
     if chat_triggers:
         try:
             safe_click(d, chat_triggers[0])
-            time.sleep(2)
+            settle(d, 2)
             ss(d, "20_yantra_assist_open")
             chat_text = get_text(d)
             has_input = count_elements(d, "input[placeholder*='ask' i], input[placeholder*='message' i], textarea") > 0
@@ -1396,51 +1399,115 @@ def test_global_checks(d):
 # MAIN
 # =============================================================================
 
+TEST_SECTIONS = [
+    ("API Health", test_health_and_api),
+    ("Login", test_login),
+    ("Sidebar Navigation", test_sidebar_navigation),
+    ("Header", test_header),
+    ("Dashboard", test_dashboard),
+    ("Briefing", test_briefing),
+    ("Explore", test_explore),
+    ("Tenancies", test_tenancies),
+    ("Properties", test_properties),
+    ("Repairs", test_repairs),
+    ("Rent", test_rent),
+    ("Compliance", test_compliance),
+    ("Complaints", test_complaints),
+    ("Allocations", test_allocations),
+    ("ASB", test_asb),
+    ("Communications", test_communications),
+    ("Reports", test_reports),
+    ("AI Centre", test_ai_centre),
+    ("Admin", test_admin),
+    ("Tenant Portal", test_tenant_portal),
+    ("Yantra Assist", test_yantra_assist),
+    ("Global Checks", test_global_checks),
+]
+
+# Sections that run before sign-in (Login performs its own do_login)
+PRE_AUTH_SECTIONS = {"API Health", "Login"}
+
+
+def run_shard(indexes):
+    """Run a shard of TEST_SECTIONS on its own driver, signed in from the session cache.
+
+    Returns a list of (section index, findings, page-ready waits) so the
+    parent process can merge results back into TEST_SECTIONS order.
+    """
+    d = create_driver()
+    authed = False
+    results = []
+    try:
+        for idx in indexes:
+            name, func = TEST_SECTIONS[idx]
+            first = len(findings)
+            first_ready = len(readiness.PAGE_READY)
+            try:
+                if name not in PRE_AUTH_SECTIONS and not authed:
+                    session_cache.ensure_session(d, BASE, EMAIL, do_login)
+                    authed = True
+                func(d)
+                if name == "Login":
+                    authed = True
+            except Exception as e:
+                print(f"\n!!! ERROR in {name}: {e}")
+                traceback.print_exc()
+                ss(d, f"ERROR_{name.replace(' ', '_')}")
+                log(name, f"FATAL-{name[:6]}", f"{name} section fatal error", "fail", str(e)[:500])
+            results.append((idx, findings[first:], readiness.PAGE_READY[first_ready:]))
+    finally:
+        d.quit()
+    return results
+
+
+def shard_sections(workers):
+    """Deal section indexes round-robin so each shard keeps TEST_SECTIONS order.
+
+    Login (index 1) is therefore always the first section of its shard, which
+    it needs because it starts from a signed-out driver.
+    """
+    shards = [[] for _ in range(workers)]
+    for idx in range(len(TEST_SECTIONS)):
+        shards[idx % workers].append(idx)
+    return [s for s in shards if s]
+
+
+def merge_results(shard_results):
+    """Merge per-shard results into findings, section_counts and readiness.PAGE_READY."""
+    findings.clear()
+    section_counts.clear()
+    readiness.PAGE_READY.clear()
+    for _, chunk, ready in sorted((r for shard in shard_results for r in shard), key=lambda r: r[0]):
+        readiness.PAGE_READY.extend(ready)
+        for f in chunk:
+            findings.append(f)
+            counts = section_counts.setdefault(f["section"], {"pass": 0, "fail": 0, "warn": 0})
+            counts[f["status"]] = counts.get(f["status"], 0) + 1
+
+
 def main():
+    parser = argparse.ArgumentParser(description="SocialHomes.Ai comprehensive test suite V5")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("V5_WORKERS", "1")),
+                        help="Parallel Chrome workers, each with its own login session (0 = CPU count)")
+    args = parser.parse_args()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    workers = min(workers, len(TEST_SECTIONS))
+
     start_time = datetime.now(timezone.utc)
     print("=" * 70)
     print(f"SOCIALHOMES.AI — COMPREHENSIVE TEST SUITE V5")
     print(f"Started: {start_time.isoformat()}")
     print(f"Target: {BASE}")
+    print(f"Workers: {workers}")
     print("=" * 70)
 
-    d = create_driver()
-
-    test_functions = [
-        ("API Health", test_health_and_api),
-        ("Login", test_login),
-        ("Sidebar Navigation", test_sidebar_navigation),
-        ("Header", test_header),
-        ("Dashboard", test_dashboard),
-        ("Briefing", test_briefing),
-        ("Explore", test_explore),
-        ("Tenancies", test_tenancies),
-        ("Properties", test_properties),
-        ("Repairs", test_repairs),
-        ("Rent", test_rent),
-        ("Compliance", test_compliance),
-        ("Complaints", test_complaints),
-        ("Allocations", test_allocations),
-        ("ASB", test_asb),
-        ("Communications", test_communications),
-        ("Reports", test_reports),
-        ("AI Centre", test_ai_centre),
-        ("Admin", test_admin),
-        ("Tenant Portal", test_tenant_portal),
-        ("Yantra Assist", test_yantra_assist),
-        ("Global Checks", test_global_checks),
-    ]
-
-    for name, func in test_functions:
-        try:
-            func(d)
-        except Exception as e:
-            print(f"\n!!! ERROR in {name}: {e}")
-            traceback.print_exc()
-            ss(d, f"ERROR_{name.replace(' ', '_')}")
-            log(name, f"FATAL-{name[:6]}", f"{name} section fatal error", "fail", str(e)[:500])
-
-    d.quit()
+    shards = shard_sections(workers)
+    if workers == 1:
+        shard_results = [run_shard(shards[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shard_results = list(pool.map(run_shard, shards))
+    merge_results(shard_results)
 
     # Compile results
     end_time = datetime.now(timezone.utc)
@@ -1460,6 +1527,9 @@ def main():
     print(f"  WARNED: {warned}")
     print(f"Pass rate: {passed/total*100:.1f}%" if total else "No tests")
     print(f"Duration: {duration:.0f}s")
+    ready = readiness.summary()
+    print(f"Page ready: p50 {ready['p50']:.2f}s, p95 {ready['p95']:.2f}s, "
+          f"{ready['total_wait_seconds']:.0f}s waiting in total")
 
     print("\nBy Section:")
     for section, counts in sorted(section_counts.items()):
@@ -1479,12 +1549,14 @@ def main():
     results = {
         "ts": end_time.isoformat(),
         "duration_seconds": duration,
+        "workers": workers,
         "total": total,
         "passed": passed,
         "failed": failed,
         "warned": warned,
         "rate": f"{passed/total*100:.0f}%" if total else "0%",
         "sections": section_counts,
+        "page_ready": readiness.summary(),
         "findings": findings
     }
 
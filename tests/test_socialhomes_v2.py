@@ -12,9 +12,6 @@ import json
 import os
 import re
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
@@ -22,7 +19,9 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException, NoSuchElementException, ElementClickInterceptedException
 )
-from webdriver_manager.chrome import ChromeDriverManager
+
+import readiness
+import session_cache
 
 BASE_URL = "http://localhost:5173"
 WAIT_TIMEOUT = 10
@@ -43,29 +42,17 @@ class SocialHomesTestBase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         os.makedirs(SCREENSHOT_DIR, exist_ok=True)
-        options = Options()
-        options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-gpu")
-        service = Service(ChromeDriverManager().install())
-        cls.driver = webdriver.Chrome(service=service, options=options)
+        cls.driver = session_cache.signed_in_driver(BASE_URL)
         cls.driver.implicitly_wait(3)
         cls.wait = WebDriverWait(cls.driver, WAIT_TIMEOUT)
 
-    @classmethod
-    def tearDownClass(cls):
-        cls.driver.quit()
-
     def screenshot(self, name):
         path = os.path.join(SCREENSHOT_DIR, f"{name}.png")
         self.driver.save_screenshot(path)
         return path
 
     def navigate(self, path):
-        self.driver.get(f"{BASE_URL}{path}")
-        time.sleep(2)
+        readiness.navigate(self.driver, f"{BASE_URL}{path}", label=path, fallback=2)
 
     def find_all(self, by, value):
         return self.driver.find_elements(by, value)
@@ -88,14 +75,12 @@ class SocialHomesTestBase(unittest.TestCase):
 
     def navigate_and_wait(self, path, wait_for_text=None, timeout=5):
         """Navigate and optionally wait for specific text to appear."""
-        self.driver.get(f"{BASE_URL}{path}")
+        readiness.navigate(self.driver, f"{BASE_URL}{path}", label=path, fallback=2)
         if wait_for_text:
             for _ in range(timeout * 2):
                 if wait_for_text in self.driver.page_source:
                     break
                 time.sleep(0.5)
-        else:
-            time.sleep(2)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1152,7 +1137,7 @@ def generate_report():
 
     json_path = os.path.join(os.path.dirname(__file__), "test_results_v2.json")
     with open(json_path, "w") as f:
-        json.dump(RESULTS, f, indent=2)
+        json.dump({"results": RESULTS, "page_ready": readiness.summary()}, f, indent=2)
 
     print(f"\n{'='*60}")
     print(f"RE-TEST REPORT v2")
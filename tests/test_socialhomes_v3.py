@@ -11,9 +11,6 @@ import json
 import os
 import re
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
@@ -22,7 +19,9 @@ from selenium.common.exceptions import (
     TimeoutException, NoSuchElementException, ElementClickInterceptedException,
     StaleElementReferenceException
 )
-from webdriver_manager.chrome import ChromeDriverManager
+
+import readiness
+import session_cache
 
 BASE_URL = "http://localhost:5173"
 WAIT_TIMEOUT = 10
@@ -43,21 +42,10 @@ class SocialHomesTestBase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         os.makedirs(SCREENSHOT_DIR, exist_ok=True)
-        options = Options()
-        options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-gpu")
-        service = Service(ChromeDriverManager().install())
-        cls.driver = webdriver.Chrome(service=service, options=options)
+        cls.driver = session_cache.signed_in_driver(BASE_URL)
         cls.driver.implicitly_wait(3)
         cls.wait = WebDriverWait(cls.driver, WAIT_TIMEOUT)
 
-    @classmethod
-    def tearDownClass(cls):
-        cls.driver.quit()
-
     def screenshot(self, name):
         path = os.path.join(SCREENSHOT_DIR, f"{name}.png")
         self.driver.save_screenshot(path)
@@ -65,8 +53,7 @@ class SocialHomesTestBase(unittest.TestCase):
 
     def navigate(self, path):
         """Full page load navigation."""
-        self.driver.get(f"{BASE_URL}{path}")
-        time.sleep(2.5)
+        readiness.navigate(self.driver, f"{BASE_URL}{path}", label=path, fallback=2.5)
 
     def spa_navigate(self, link_text=None, href=None):
         """Navigate via sidebar links to preserve React state."""
@@ -75,14 +62,14 @@ class SocialHomesTestBase(unittest.TestCase):
             for link in links:
                 if link.is_displayed():
                     self.click_safe(link)
-                    time.sleep(2)
+                    readiness.wait_until_ready(self.driver, fallback=2)
                     return True
         if link_text:
             links = self.find_all(By.XPATH, f"//a[contains(.,'{link_text}')]")
             for link in links:
                 if link.is_displayed():
                     self.click_safe(link)
-                    time.sleep(2)
+                    readiness.wait_until_ready(self.driver, fallback=2)
                     return True
         return False
 
@@ -110,8 +97,8 @@ class SocialHomesTestBase(unittest.TestCase):
                 return False
 
     def wait_for_animation(self, seconds=3):
-        """Wait for CSS animations to complete."""
-        time.sleep(seconds)
+        """Wait for CSS animations and pending renders to complete (``seconds`` is the no-probe fallback)."""
+        readiness.wait_until_ready(self.driver, fallback=seconds)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1217,7 +1204,7 @@ def generate_report():
 
     json_path = os.path.join(os.path.dirname(__file__), "test_results_v3.json")
     with open(json_path, "w") as f:
-        json.dump(RESULTS, f, indent=2)
+        json.dump({"results": RESULTS, "page_ready": readiness.summary()}, f, indent=2)
 
     print(f"\n{'='*60}")
     print(f"FINAL RE-TEST REPORT")